@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""Measure resident memory per recipient row for each representation.
+
+Generates a CSV, then loads it in a fresh interpreter per representation
+and reports how much the process RSS grew:
+
+- ``dicts``: one 4-key dict per row (the previous read_recipients output)
+- ``records``: read_recipients, a list of slotted Recipient records
+- ``table``: read_recipient_table, the array-backed column store
+- ``dict-results`` / ``results``: one result per row, as a plain dataclass
+  holding a dict versus the slotted EmailResult holding a Recipient
+
+Usage:
+    python benchmarks/memory.py [--rows 500000]
+"""
+
+import argparse
+import csv
+import gc
+import os
+import subprocess
+import sys
+import tempfile
+from dataclasses import dataclass
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+KINDS = ("dicts", "records", "table", "dict-results", "results")
+
+
+def rss_bytes() -> int:
+    """Current resident set size of this process."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        import resource
+
+        # Peak rather than current RSS, but still grows with what we load
+        scale = 1 if sys.platform == "darwin" else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+@dataclass
+class DictResult:
+    """EmailResult as it was before: a regular dataclass holding a dict."""
+
+    recipient: dict
+    coupon_code: str
+    status: object
+    success: bool
+    error_message: str = ""
+    processing_time_ms: float = 0.0
+
+
+def read_dicts(csv_path: str) -> list:
+    """Parse rows into dicts the way read_recipients used to."""
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        return [
+            {
+                "roll_no": row["roll_no"].strip(),
+                "email": row["email"].strip(),
+                "name": row["name"].strip(),
+                "is_paid": row["is_paid"].strip().lower() in ("true", "1"),
+            }
+            for row in csv.DictReader(f)
+        ]
+
+
+def load(kind: str, csv_path: str):
+    """Build and return the structure being measured."""
+    from mail_coupons.csv_reader import read_recipient_table, read_recipients
+    from mail_coupons.email_sender import EmailResult, EmailStatus
+
+    if kind == "dicts":
+        return read_dicts(csv_path)
+    if kind == "records":
+        return read_recipients(csv_path)
+    if kind == "table":
+        return read_recipient_table(csv_path)
+    if kind == "dict-results":
+        return [
+            DictResult(r, f"MLNC{i:06d}", EmailStatus.SENT, True, "", 12.5)
+            for i, r in enumerate(read_dicts(csv_path))
+        ]
+    return [
+        EmailResult(r, f"MLNC{i:06d}", EmailStatus.SENT, True, "", 12.5)
+        for i, r in enumerate(read_recipients(csv_path))
+    ]
+
+
+def child(kind: str, csv_path: str, rows: int):
+    """Measure one representation and print bytes per row."""
+    import mail_coupons.csv_reader  # noqa: F401  (exclude import cost)
+    import mail_coupons.email_sender  # noqa: F401
+
+    gc.collect()
+    before = rss_bytes()
+    data = load(kind, csv_path)
+    gc.collect()
+    grown = rss_bytes() - before
+    assert len(data) == rows
+    print(grown / rows)
+
+
+def write_csv(path: str, rows: int):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("roll_no,email,name,is_paid\n")
+        for i in range(rows):
+            f.write(f"ROLL{i:07d},student{i}@college.edu,Student Number {i},{i % 2}\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=500_000, help="CSV rows")
+    parser.add_argument("--child", choices=KINDS, help=argparse.SUPPRESS)
+    parser.add_argument("--csv", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        return child(args.child, args.csv, args.rows)
+
+    env = dict(os.environ, PYTHONPATH=os.path.join(ROOT, "src"))
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "recipients.csv")
+        write_csv(csv_path, args.rows)
+        print(f"{args.rows} rows, RSS growth per row:")
+        for kind in KINDS:
+            out = subprocess.run(
+                [
+                    sys.executable,
+                    os.path.abspath(__file__),
+                    f"--child={kind}",
+                    f"--csv={csv_path}",
+                    f"--rows={args.rows}",
+                ],
+                env=env,
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout
+            print(f"  {kind:<13} {float(out):7.1f} bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""Measure CLI startup: module import time and time-to-first-email.
+
+Runs everything locally: a small HTTP server stands in for the login and
+coupon APIs (with an optional artificial latency) and an SMTP sink records
+when the first message arrives, so no credentials or network are needed.
+
+Usage:
+    python benchmarks/startup.py [--runs 5] [--rows 10] [--api-latency 0.2]
+"""
+
+import argparse
+import json
+import os
+import socketserver
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    """Login and coupon endpoints that answer after a fixed delay."""
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        time.sleep(self.server.latency)
+        body = {"accessToken": "bench-token"} if self.path == "/login" else {}
+        data = json.dumps(body).encode()
+        self.send_response(200 if self.path == "/login" else 201)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class SmtpSink(socketserver.ThreadingTCPServer):
+    """SMTP server that records the arrival time of every message."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), SmtpHandler)
+        self.arrivals = []
+        self.lock = threading.Lock()
+
+
+class SmtpHandler(socketserver.StreamRequestHandler):
+    """Speak just enough SMTP for smtplib."""
+
+    def reply(self, line: str):
+        self.wfile.write(line.encode() + b"\r\n")
+
+    def handle(self):
+        self.reply("220 bench ready")
+        for raw in self.rfile:
+            command = raw.decode().strip().upper()
+            if command.startswith("EHLO"):
+                self.reply("250-bench")
+                self.reply("250 AUTH PLAIN LOGIN")
+            elif command.startswith("AUTH"):
+                self.reply("235 authenticated")
+            elif command == "DATA":
+                self.reply("354 go ahead")
+                for line in self.rfile:
+                    if line == b".\r\n":
+                        break
+                with self.server.lock:
+                    self.server.arrivals.append(time.perf_counter())
+                self.reply("250 queued")
+            elif command == "QUIT":
+                self.reply("221 bye")
+                return
+            else:
+                self.reply("250 ok")
+
+
+def serve(server) -> int:
+    """Start a server on a daemon thread and return its port."""
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server.server_address[1]
+
+
+def env() -> dict:
+    return dict(os.environ, PYTHONPATH=os.path.join(ROOT, "src"))
+
+
+def import_time_ms() -> float:
+    """Return the cumulative import time of main.py in milliseconds."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=ROOT,
+        env=env(),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    for line in reversed(proc.stderr.splitlines()):
+        if line.rstrip().endswith("| main"):
+            return int(line.split("|")[1]) / 1000
+    raise RuntimeError("main not found in -X importtime output")
+
+
+def first_email(rows: int, api_port: int, sink: SmtpSink) -> tuple:
+    """Run ``main.py send`` once and time it.
+
+    Returns:
+        Tuple of (seconds to first email, seconds for the whole run)
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "recipients.csv")
+        with open(csv_path, "w", encoding="utf-8") as f:
+            f.write("roll_no,email,name,is_paid\n")
+            for i in range(rows):
+                f.write(f"R{i:03d},student{i}@example.com,Student {i},{i % 2}\n")
+
+        api = f"http://127.0.0.1:{api_port}"
+        with sink.lock:
+            sink.arrivals.clear()
+        start = time.perf_counter()
+        subprocess.run(
+            [
+                sys.executable,
+                os.path.join(ROOT, "main.py"),
+                "send",
+                csv_path,
+                "--username=bench",
+                "--password=bench",
+                "--smtp-username=bench",
+                "--smtp-password=bench",
+                f"--db-path={os.path.join(tmp, 'bench.db')}",
+                f"--retry-csv={os.path.join(tmp, 'failed.csv')}",
+                f"--login-url={api}/login",
+                f"--api-endpoint={api}/coupons",
+                f"--relay=smtp://127.0.0.1:{sink.server_address[1]}?starttls=0",
+                f"--rate-limit={max(rows, 1)}",
+                "--max-outage=5",
+                "--no-progress",
+                "--quiet",
+            ],
+            cwd=tmp,
+            env=env(),
+            stdout=subprocess.DEVNULL,
+            check=True,
+        )
+        total = time.perf_counter() - start
+        with sink.lock:
+            if len(sink.arrivals) != rows:
+                raise RuntimeError(f"expected {rows} emails, got {len(sink.arrivals)}")
+            return min(sink.arrivals) - start, total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="Repetitions per metric")
+    parser.add_argument("--rows", type=int, default=10, help="Recipients per run")
+    parser.add_argument(
+        "--api-latency",
+        type=float,
+        default=0.2,
+        help="Seconds the stand-in login/coupon API takes to answer",
+    )
+    args = parser.parse_args()
+
+    api = ThreadingHTTPServer(("127.0.0.1", 0), ApiHandler)
+    api.latency = args.api_latency
+    api_port = serve(api)
+    sink = SmtpSink()
+    serve(sink)
+
+    imports = [import_time_ms() for _ in range(args.runs)]
+    runs = [first_email(args.rows, api_port, sink) for _ in range(args.runs)]
+
+    print(f"import main:        {statistics.median(imports):7.1f} ms (median)")
+    print(
+        f"time to 1st email:  {statistics.median(r[0] for r in runs) * 1000:7.1f} ms "
+        f"(median, {args.rows} rows, {args.api_latency * 1000:.0f} ms API latency)"
+    )
+    print(f"whole run:          {statistics.median(r[1] for r in runs) * 1000:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
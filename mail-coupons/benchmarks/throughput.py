@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""Measure the pipeline's CPU-only throughput ceiling.
+
+Runs process_recipients_batch over generated recipients with the coupon
+API call stubbed out and a dry-run transport, so every message is built
+and handed to the transport but nothing leaves the machine:
+
+- ``null``: messages are counted and dropped
+- ``mbox`` / ``maildir``: messages are written to a temporary directory
+
+Usage:
+    python benchmarks/throughput.py [--rows 5000] [--rate 5000]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+from mail_coupons.email_sender import EmailSender  # noqa: E402
+from mail_coupons.records import Recipient  # noqa: E402
+from mail_coupons.transports import create_transport  # noqa: E402
+
+KINDS = ("null", "mbox", "maildir")
+
+
+def run(kind: str, rows: int, rate: int, tmp: str) -> float:
+    """Send ``rows`` recipients through one transport; return messages/second."""
+    target = {"null": "", "mbox": f":{tmp}/out.mbox", "maildir": f":{tmp}/maildir"}
+    transport = create_transport(kind + target[kind])
+    sender = EmailSender(
+        api_endpoint="",
+        bearer_token="",
+        smtp_host="",
+        smtp_port=0,
+        smtp_username="",
+        smtp_password="",
+        from_email="noreply@example.com",
+        rate_limit=rate,
+        logger=logging.getLogger("throughput"),
+        transport=transport,
+    )
+    sender.create_coupon = lambda coupon_code: (True, "")
+    recipients = (
+        Recipient(f"R{i:07d}", f"student{i}@example.com", f"student number {i}", True)
+        for i in range(rows)
+    )
+
+    start = time.perf_counter()
+    stats = asyncio.run(sender.process_recipients_batch(recipients, total=rows))
+    elapsed = time.perf_counter() - start
+    sender.close()
+    assert stats.success_count == rows, stats
+    return rows / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=5000, help="Recipients per run")
+    parser.add_argument(
+        "--rate", type=int, default=5000, help="--rate-limit (also the worker count)"
+    )
+    parser.add_argument("--transport", choices=KINDS, action="append")
+    args = parser.parse_args()
+
+    logging.getLogger("throughput").setLevel(logging.WARNING)
+    print(f"{args.rows} recipients, rate limit {args.rate}/s:")
+    for kind in args.transport or KINDS:
+        with tempfile.TemporaryDirectory() as tmp:
+            print(f"  {kind:<8} {run(kind, args.rows, args.rate, tmp):8.0f} msgs/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,21 +3,53 @@
 
 import sys
 import os
+import time
 
 # Add src directory to path when running directly
 if __name__ == "__main__":
     sys.path.insert(0, os.path.join(os.path.dirname(__file__), "src"))
 
 import click
-import logging
-import asyncio
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Optional
-
-from mail_coupons.csv_reader import read_recipients
-from mail_coupons.database import Database
-from mail_coupons.login import authenticate_user
+from typing import TYPE_CHECKING, Optional, Tuple
+
+from mail_coupons.csv_reader import (
+    csv_fingerprint,
+    read_header,
+    read_recipient_table,
+    read_recipients,
+    read_recipients_tail,
+)
+from mail_coupons.concurrency import ConcurrencyController
+from mail_coupons.control import RuntimeControl
+from mail_coupons.coupons import CouponCodes, KeyedCouponCodes, RandomCouponCodes
+from mail_coupons.database import DEFAULT_CAMPAIGN, Database
+from mail_coupons.domains import parse_domain_limit
+from mail_coupons.login import authenticate_user, TokenProvider
+from mail_coupons.minify import BODY_ENCODINGS
 from mail_coupons.email_sender import EmailSender, EmailResult
+from mail_coupons.profiling import Profiler
+from mail_coupons.quota import WINDOW, DailyQuota
+from mail_coupons.progress import ProgressTracker, ProgressRenderer
+from mail_coupons.log import setup_logging, flush_logging
+from mail_coupons.results import RunStats, build_sink
+from mail_coupons.spool import Spool
+from mail_coupons.relays import RelayPool, parse_relay
+from mail_coupons.scheduling import PriorityScheduler, parse_priority
+from mail_coupons.suppression import SuppressionList, parse_notification_file
+from mail_coupons.templates import TemplateRegistry
+from mail_coupons.transports import (
+    NullTransport,
+    Transport,
+    create_transport,
+    parse_transport,
+)
+
+if TYPE_CHECKING:
+    from mail_coupons.service import SubmissionServer
+    from mail_coupons.watch import FileWatcher
 
 # Configuration constants
 API_ENDPOINT = "https://app.melinia.in/api/v1/coupons"
@@ -28,230 +60,527 @@ REGISTER_URL = "https://melinia.in/register"
 LOGIN_URL = "https://app.melinia.in/api/v1/auth/login"
 
 
-class ColoredFormatter(logging.Formatter):
-    """Custom formatter with colors for console output."""
-
-    # ANSI color codes
-    RESET = "\033[0m"
-    BOLD = "\033[1m"
-    DIM = "\033[2m"
-
-    # Colors
-    RED = "\033[91m"
-    GREEN = "\033[92m"
-    YELLOW = "\033[93m"
-    BLUE = "\033[94m"
-    MAGENTA = "\033[95m"
-    CYAN = "\033[96m"
-    WHITE = "\033[97m"
-    GRAY = "\033[90m"
-
-    # Level colors
-    LEVEL_COLORS = {
-        "DEBUG": GRAY,
-        "INFO": GREEN,
-        "WARNING": YELLOW,
-        "ERROR": RED,
-        "CRITICAL": RED + BOLD,
-    }
-
-    def format(self, record: logging.LogRecord) -> str:
-        # Get color for level
-        level_color = self.LEVEL_COLORS.get(record.levelname, self.WHITE)
-
-        # Format timestamp
-        timestamp = datetime.fromtimestamp(record.created).strftime("%H:%M:%S.%f")[:-3]
-
-        # Build the formatted message
-        level_str = f"{level_color}{record.levelname:8}{self.RESET}"
+def print_banner():
+    """Print application banner."""
+    banner = f"""
+{click.style("╔══════════════════════════════════════════════════════════════╗", fg="cyan", bold=True)}
+{click.style("║", fg="cyan", bold=True)}  {click.style("🎫  Melinia'26 Coupon Email Sender", fg="white", bold=True)}{" " * 31}{click.style("║", fg="cyan", bold=True)}
+{click.style("║", fg="cyan", bold=True)}  {click.style("Parallel email delivery with rate limiting", fg="bright_black")}{" " * 21}{click.style("║", fg="cyan", bold=True)}
+{click.style("╚══════════════════════════════════════════════════════════════╝", fg="cyan", bold=True)}
+"""
+    click.echo(banner)
 
-        # Add emoji indicators for certain log levels
-        emoji = ""
-        if record.levelname == "INFO":
-            emoji = "ℹ️  "
-        elif record.levelname == "WARNING":
-            emoji = "⚠️  "
-        elif record.levelname == "ERROR":
-            emoji = "❌ "
-        elif record.levelname == "DEBUG":
-            emoji = "🔍 "
 
-        # Format the message
-        msg = f"{self.GRAY}[{timestamp}]{self.RESET} {level_str} {emoji}{record.getMessage()}"
+def format_failure(result: EmailResult) -> str:
+    """Format failure details for display above the progress bar.
 
-        # Add exception info if present
-        if record.exc_info:
-            exc_text = self.formatException(record.exc_info)
-            msg += f"\n{self.RED}{exc_text}{self.RESET}"
+    Args:
+        result: Failed EmailResult
 
-        return msg
+    Returns:
+        Multi-line failure description
+    """
+    return "\n".join(
+        [
+            f"  {click.style('✗ Failed:', fg='red', bold=True)} {result.recipient['name']} ({result.recipient['roll_no']})",
+            f"     {click.style('Coupon:', fg='yellow')} {result.coupon_code}",
+            f"     {click.style('Error:', fg='red')} {result.error_message}",
+            f"     {click.style('Time:', fg='blue')} {result.processing_time_ms:.0f}ms",
+        ]
+    )
 
 
-def setup_logging(verbose: bool = False, quiet: bool = False) -> logging.Logger:
-    """Setup logging with custom formatting.
+def print_summary(
+    stats: RunStats,
+    duration: float,
+    retry_csv: Optional[str] = None,
+    done_message: str = "All emails sent successfully!",
+    concurrency: Optional[ConcurrencyController] = None,
+):
+    """Print the processing summary.
 
     Args:
-        verbose: Enable debug logging
-        quiet: Only show errors
-
-    Returns:
-        Configured logger instance
+        stats: Statistics for the run
+        duration: Wall-clock duration in seconds
+        retry_csv: Path failed recipients were written to, if any
+        done_message: Message shown when nothing failed
+        concurrency: The sender's concurrency controller, to report its window
     """
-    logger = logging.getLogger("mail_coupons")
-    logger.setLevel(
-        logging.DEBUG if verbose else (logging.ERROR if quiet else logging.INFO)
+    click.echo()
+    click.echo(click.style("═" * 60, fg="cyan", bold=True))
+    click.echo(click.style("📊  PROCESSING SUMMARY", fg="white", bold=True))
+    click.echo(click.style("═" * 60, fg="cyan", bold=True))
+
+    click.echo(f"  {click.style('Total Recipients:', fg='white')}: {stats.total}")
+    click.echo(f"  {click.style('Successful:', fg='green')}: {stats.success_count} ✓")
+    click.echo(f"  {click.style('Failed:', fg='red')}: {stats.fail_count} ✗")
+    click.echo(
+        f"  {click.style('Success Rate:', fg='cyan')}: {stats.success_rate:.1f}%"
+    )
+    click.echo()
+    click.echo(f"  {click.style('Duration:', fg='white')}: {duration:.1f} seconds")
+    click.echo(
+        f"  {click.style('Average Time:', fg='white')}: {stats.average_time_ms:.0f}ms per email"
+    )
+    rate = stats.total / duration if duration > 0 else 0.0
+    click.echo(
+        f"  {click.style('Effective Rate:', fg='white')}: {rate:.1f} emails/second"
     )
+    if concurrency is not None:
+        click.echo(
+            f"  {click.style('Concurrency:', fg='white')}: peak {concurrency.peak_window} "
+            f"in flight (cap {concurrency.max_window}), "
+            f"{concurrency.latency * 1000:.0f}ms average latency"
+        )
+    click.echo(click.style("═" * 60, fg="cyan", bold=True))
 
-    # Remove existing handlers
-    logger.handlers = []
+    if stats.fail_count > 0:
+        click.echo()
+        click.echo(click.style("⚠️  Failed Recipients:", fg="red", bold=True))
+        for result in stats.failures:
+            click.echo(
+                f"   • {result.recipient['name']} ({result.recipient['roll_no']}) - {result.coupon_code}"
+            )
+        if stats.failures_truncated:
+            click.echo(f"   … and {stats.fail_count - len(stats.failures)} more")
+        if retry_csv:
+            click.echo(
+                f"   Retry list written to {click.style(retry_csv, fg='yellow')}"
+            )
+        click.echo()
+    else:
+        click.echo()
+        click.echo(click.style(f"✨ {done_message} ✨", fg="green", bold=True))
+        click.echo()
 
-    # Console handler with colors
-    console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setLevel(
-        logging.DEBUG if verbose else (logging.ERROR if quiet else logging.INFO)
-    )
-    console_handler.setFormatter(ColoredFormatter())
-    logger.addHandler(console_handler)
 
-    return logger
+class DefaultCommandGroup(click.Group):
+    """Command group that runs ``send`` when no subcommand is named.
 
+    Keeps ``main.py CSV_FILE [OPTIONS]`` working alongside the other modes.
+    """
 
-def print_banner():
-    """Print application banner."""
-    banner = f"""
-{click.style("╔══════════════════════════════════════════════════════════════╗", fg="cyan", bold=True)}
-{click.style("║", fg="cyan", bold=True)}  {click.style("🎫  Melinia'26 Coupon Email Sender", fg="white", bold=True)}{" " * 31}{click.style("║", fg="cyan", bold=True)}
-{click.style("║", fg="cyan", bold=True)}  {click.style("Parallel email delivery with rate limiting", fg="bright_black")}{" " * 21}{click.style("║", fg="cyan", bold=True)}
-{click.style("╚══════════════════════════════════════════════════════════════╝", fg="cyan", bold=True)}
-"""
-    click.echo(banner)
+    default_command = "send"
 
+    def parse_args(self, ctx, args):
+        if args and args[0] not in self.commands and args[0] not in ("--help", "-h"):
+            args.insert(0, self.default_command)
+        return super().parse_args(ctx, args)
 
-def print_progress_bar(
-    current: int, total: int, success_count: int, fail_count: int, width: int = 50
-):
-    """Print a progress bar with statistics.
 
-    Args:
-        current: Current progress
-        total: Total items
-        success_count: Number of successful sends
-        fail_count: Number of failed sends
-        width: Width of the progress bar
-    """
-    percentage = (current / total) * 100
-    filled = int(width * current / total)
-    bar = click.style("█" * filled, fg="green") + click.style(
-        "░" * (width - filled), fg="bright_black"
+def parse_relay_options(ctx, param, value):
+    """Click callback turning --relay URLs into SmtpRelay objects."""
+    try:
+        return [parse_relay(spec) for spec in value]
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+
+
+def relay_options(f):
+    """Add the multi-relay options to an SMTP-sending command."""
+    f = click.option(
+        "--relay-strategy",
+        type=click.Choice(RelayPool.STRATEGIES),
+        default="least-outstanding",
+        help="How to pick a relay for each message",
+    )(f)
+    return click.option(
+        "--relay",
+        "relays",
+        multiple=True,
+        callback=parse_relay_options,
+        help=(
+            "SMTP relay as smtp://[user:pass@]host[:port][?weight=N&rate=N&starttls=0]; "
+            "repeat to balance and fail over across relays (replaces --smtp-host/--smtp-port)"
+        ),
+    )(f)
+
+
+def parse_transport_option(ctx, param, value):
+    """Click callback validating --transport; returns None for SMTP."""
+    try:
+        if parse_transport(value) is None:
+            return None
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+    return value
+
+
+def transport_option(help: str):
+    """Add --transport to a sending command."""
+    return click.option(
+        "--transport",
+        default="smtp",
+        callback=parse_transport_option,
+        help=help,
     )
 
-    # Calculate rate
-    elapsed = (datetime.now() - start_time).total_seconds()
-    rate = current / elapsed if elapsed > 0 else 0
 
-    status_line = f"\r{bar} {percentage:5.1f}% | {click.style(str(current), fg='cyan')}/{click.style(str(total), fg='white')} | "
-    status_line += f"✓{click.style(str(success_count), fg='green')} ✗{click.style(str(fail_count), fg='red')} | "
-    status_line += f"{rate:.1f} emails/s"
+def create_transport_or_exit(logger, spec: Optional[str]) -> Optional[Transport]:
+    """Create the transport for a --transport spec, exiting on bad config.
 
-    click.echo(status_line, nl=False)
+    Returns:
+        The transport, or None for SMTP
+    """
+    if spec is None:
+        return None
+    try:
+        transport = create_transport(spec, logger=logger)
+    except ValueError as e:
+        logger.error(str(e))
+        sys.exit(1)
+    if transport.templated:
+        logger.info(
+            "Sending through %s (up to %d recipients per call)",
+            transport.name,
+            transport.batch_size,
+        )
+    else:
+        logger.info("Sending through %s", transport.name)
+    if not transport.delivers:
+        logger.warning("Dry run: messages are not delivered and not recorded as sent")
+    return transport
+
+
+def concurrency_option(f):
+    """Add --max-concurrency and --control-file to a batch command."""
+    f = click.option(
+        "--control-file",
+        default=None,
+        type=click.Path(dir_okay=False),
+        help=(
+            "File to watch for live changes (rate = N, max_concurrency = N, "
+            "pause/resume); SIGUSR1/SIGUSR2 also raise/lower the rate"
+        ),
+    )(f)
+    return click.option(
+        "--max-concurrency",
+        default=256,
+        type=click.IntRange(min=1),
+        help=(
+            "Upper bound on recipients in flight; below it the window is sized "
+            "from observed latency to sustain --rate-limit"
+        ),
+    )(f)
+
+
+def profile_option(f):
+    """Add --profile to a batch command."""
+    return click.option(
+        "--profile",
+        is_flag=True,
+        help=(
+            "Profile the batch: CPU/wall time and allocations by stage, plus "
+            "pstats and flame graph stacks, written next to the database"
+        ),
+    )(f)
+
+
+def campaign_option(f):
+    """Add --campaign to a command that tracks sends in the database."""
+    return click.option(
+        "--campaign",
+        default=DEFAULT_CAMPAIGN,
+        show_default=True,
+        help=(
+            "Campaign to track sends under; each campaign skips only its own "
+            "earlier recipients"
+        ),
+    )(f)
+
+
+def coupon_option(f):
+    """Add --coupon-key to a command that creates coupons."""
+    return click.option(
+        "--coupon-key",
+        default=None,
+        envvar="MAIL_COUPONS_COUPON_KEY",
+        help=(
+            "Secret for deterministic coupon codes derived from --campaign and "
+            "the roll number, so reruns reuse the same code (default: random codes)"
+        ),
+    )(f)
+
+
+def message_options(f):
+    """Add --no-minify and --body-encoding to a command that builds messages."""
+    f = click.option(
+        "--body-encoding",
+        type=click.Choice(BODY_ENCODINGS),
+        default="auto",
+        show_default=True,
+        help=(
+            "Transfer encoding for parts with non-ASCII text (ASCII parts are "
+            "always 7bit); auto picks the smaller of quoted-printable and "
+            "base64, 8bit needs a relay with 8BITMIME"
+        ),
+    )(f)
+    return click.option(
+        "--no-minify", is_flag=True, help="Send the HTML template as written"
+    )(f)
+
+
+def template_options(f):
+    """Add the named template options to a command that builds messages."""
+    f = click.option(
+        "--template-column",
+        default=None,
+        help=(
+            "CSV column naming each row's template in --templates-dir; rows "
+            "that leave it empty get --template"
+        ),
+    )(f)
+    f = click.option(
+        "--template",
+        default=None,
+        help="Template in --templates-dir to send (default: the built-in coupon email)",
+    )(f)
+    return click.option(
+        "--templates-dir",
+        default=None,
+        type=click.Path(exists=True, file_okay=False),
+        help="Directory of NAME.html (and optional NAME.txt) email templates",
+    )(f)
+
+
+def create_templates(
+    logger,
+    templates_dir: Optional[str],
+    template: Optional[str],
+    template_column: Optional[str],
+    minify: bool,
+    transport: Optional[Transport] = None,
+) -> Optional[TemplateRegistry]:
+    """Create the template registry for --templates-dir, if given."""
+    if templates_dir is None:
+        if template or template_column:
+            raise click.UsageError(
+                "--template and --template-column need --templates-dir"
+            )
+        return None
+    if transport is not None and transport.templated:
+        raise click.UsageError(
+            f"--templates-dir can't be used with {transport.name}, which sends "
+            "a single stored template"
+        )
+    registry = TemplateRegistry(templates_dir, minify=minify, logger=logger)
+    logger.debug("Templates available: %s", ", ".join(registry.names()) or "none")
+    return registry
 
 
-def on_progress_update(
-    current: int, total: int, result: EmailResult, success_count: list, fail_count: list
+def load_templates(
+    logger,
+    registry: Optional[TemplateRegistry],
+    recipients,
+    template: Optional[str],
+    template_column: Optional[str],
 ):
-    """Callback for progress updates.
+    """Compile every template the recipients use, exiting if one is unusable.
 
-    Args:
-        current: Current count
-        total: Total count
-        result: EmailResult from processing
-        success_count: List with single int for mutable reference
-        fail_count: List with single int for mutable reference
+    Catches a missing or broken template before any coupon is spent on it.
     """
-    if result.success:
-        success_count[0] += 1
-    else:
-        fail_count[0] += 1
-        # Print error details on new line
-        click.echo(
-            f"\n  {click.style('✗ Failed:', fg='red', bold=True)} {result.recipient['name']} ({result.recipient['roll_no']})"
+    if registry is None:
+        return
+    if template_column is None:
+        usage = Counter({template: len(recipients)})
+    elif hasattr(recipients, "column"):
+        usage = Counter(
+            value or template for value in recipients.column(template_column)
         )
-        click.echo(f"     {click.style('Coupon:', fg='yellow')} {result.coupon_code}")
-        click.echo(f"     {click.style('Error:', fg='red')} {result.error_message}")
-        click.echo(
-            f"     {click.style('Time:', fg='blue')} {result.processing_time_ms:.0f}ms"
+    else:
+        usage = Counter(r.get(template_column) or template for r in recipients)
+    for name in sorted(filter(None, usage)):
+        try:
+            registry.get(name)
+        except ValueError as e:
+            logger.error(f"Template error: {e}")
+            sys.exit(1)
+    if recipients:
+        logger.info(
+            "Templates: %s",
+            ", ".join(f"{name or 'built-in'} ({n})" for name, n in usage.items()),
         )
 
-    print_progress_bar(current, total, success_count[0], fail_count[0])
 
+def recipient_columns(
+    priority,
+    csv_file: str,
+    templates: Optional[TemplateRegistry],
+    template_column: Optional[str],
+) -> list:
+    """Extra CSV columns to read for scheduling and templates.
 
-# Global start time for rate calculation
-start_time: datetime = datetime.now()
+    Named templates can fill in any column, so they get all of them.
+    """
+    columns = [k.column for k in priority]
+    if templates is not None:
+        columns += read_header(csv_file)
+    if template_column:
+        columns.append(template_column)
+    return list(dict.fromkeys(columns))
 
 
-@click.command()
-@click.argument("csv_file", type=click.Path(exists=True))
-@click.option("--username", required=True, help="Username for login authentication")
-@click.option("--password", required=True, help="Password for login authentication")
-@click.option("--smtp-username", required=True, help="SMTP username for email sending")
-@click.option("--smtp-password", required=True, help="SMTP password for email sending")
-@click.option(
-    "--db-path",
-    default="mail_coupons.db",
-    help="Path to SQLite database for tracking sent emails",
-)
-@click.option(
-    "--api-endpoint", default=API_ENDPOINT, help="API endpoint for creating coupons"
-)
-@click.option("--login-url", default=LOGIN_URL, help="Login API endpoint URL")
-@click.option("--from-email", default=FROM_EMAIL, help="From email address")
-@click.option("--smtp-host", default=SES_SMTP_HOST, help="SMTP server hostname")
-@click.option("--smtp-port", default=SES_SMTP_PORT, help="SMTP server port")
-@click.option("--register-url", default=REGISTER_URL, help="Registration URL")
-@click.option("--rate-limit", default=12, help="Emails per second rate limit", type=int)
-@click.option("-v", "--verbose", is_flag=True, help="Enable verbose debug logging")
-@click.option("-q", "--quiet", is_flag=True, help="Only show errors")
-@click.option("--no-progress", is_flag=True, help="Disable progress bar")
-def main(
-    csv_file,
-    username,
-    password,
-    smtp_username,
-    smtp_password,
-    db_path,
-    api_endpoint,
-    login_url,
-    from_email,
-    smtp_host,
-    smtp_port,
-    register_url,
-    rate_limit,
-    verbose,
-    quiet,
-    no_progress,
-):
-    """Send registration coupons to recipients from CSV file.
+def parse_domain_limit_options(ctx, param, value):
+    """Click callback turning --domain-limit values into a dict of limits."""
+    try:
+        return dict(parse_domain_limit(spec) for spec in value)
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+
+
+def domain_limit_option(f):
+    """Add --domain-limit to a command that sends email."""
+    return click.option(
+        "--domain-limit",
+        "domain_limits",
+        multiple=True,
+        callback=parse_domain_limit_options,
+        help=(
+            "Per-recipient-domain limit DOMAIN=RATE[/MAX_IN_FLIGHT], e.g. "
+            "gmail.com=5/20; '*' sets it for every other domain (repeatable)"
+        ),
+    )(f)
+
+
+def quota_option(f):
+    """Add --daily-quota to a command that sends email."""
+    return click.option(
+        "--daily-quota",
+        type=click.IntRange(min=1),
+        default=None,
+        envvar="MAIL_COUPONS_DAILY_QUOTA",
+        help=(
+            "Maximum emails in any rolling 24 hours (e.g. SES Max24HourSend), "
+            "counted across runs in the database; the run pauses when it's "
+            "reached and resumes as the window frees up"
+        ),
+    )(f)
+
+
+def create_quota(
+    logger, db: Database, daily_quota: Optional[int], total: int, rate: float
+) -> Optional[DailyQuota]:
+    """Create the daily quota for a batch and log its projected completion."""
+    if daily_quota is None:
+        return None
+    quota = DailyQuota(db, daily_quota, logger=logger)
+    quota.plan(total, rate)
+    return quota
+
+
+def create_coupon_codes(logger, db: Database, coupon_key: Optional[str]) -> CouponCodes:
+    """Create the coupon code generator, seeded with the codes in the DB."""
+    created = db.coupon_codes()
+    if coupon_key:
+        codes = KeyedCouponCodes(
+            coupon_key.encode("utf-8"),
+            db.campaign,
+            created=created,
+            on_created=db.record_coupon_code,
+        )
+        logger.info("Deriving coupon codes for campaign %s", db.campaign)
+    else:
+        codes = RandomCouponCodes(created=created, on_created=db.record_coupon_code)
+    if created:
+        logger.debug("Avoiding %d coupon codes already created", len(created))
+    return codes
 
-    CSV Format: roll_no,email,name,is_paid
 
-    Features:
-    - Parallel processing with configurable rate limiting
-    - Verbose logging with formatted output
-    - Progress tracking with detailed error reporting
-    - SQLite database for tracking sent emails
+def profile_prefix(db_path: str) -> str:
+    """Path prefix for this run's profile reports, next to the database."""
+    stem = os.path.splitext(db_path)[0]
+    return f"{stem}.profile-{datetime.now():%Y%m%d-%H%M%S}"
+
+
+def parse_priority_option(ctx, param, value):
+    """Click callback turning --priority into PriorityKey objects."""
+    try:
+        return parse_priority(value)
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+
+
+def priority_options(f):
+    """Add the recipient scheduling options to a command reading a CSV."""
+    f = click.option(
+        "--priority-aging",
+        default=60.0,
+        type=float,
+        help="Seconds of extra waiting that promote a lower priority class by one rank (0: off)",
+    )(f)
+    return click.option(
+        "--priority",
+        default="is_paid",
+        callback=parse_priority_option,
+        help=(
+            "Processing order as comma-separated CSV columns, true/larger first "
+            "unless suffixed ':asc' (e.g. 'is_paid,year:asc'); 'none' keeps CSV order"
+        ),
+    )(f)
+
+
+def schedule_recipients(logger, recipients, priority, aging: float):
+    """Order recipients by priority.
+
+    The scheduler holds row indices rather than rows, so a RecipientTable
+    is only materialized one recipient at a time.
+
+    Args:
+        recipients: List of recipients or a RecipientTable
+
+    Returns:
+        Lazy iterator over the recipients in scheduling order
     """
-    global start_time
+    if not priority:
+        return iter(recipients)
+    logger.info(
+        "Scheduling by priority: %s",
+        ", ".join(f"{k.column} {'desc' if k.descending else 'asc'}" for k in priority),
+    )
+    scheduler = PriorityScheduler(
+        priority, aging_seconds=aging, record=recipients.__getitem__
+    )
+    scheduler.extend(range(len(recipients)))
+    return (recipients[index] for index in scheduler.drain())
+
+
+def create_token_provider(
+    username: str, password: str, login_url: str, token_cache: Optional[str] = None
+) -> TokenProvider:
+    """Create a TokenProvider for the login API (does not log in yet)."""
+    return TokenProvider(
+        username,
+        password,
+        login_url,
+        cache_path=token_cache,
+        authenticate=authenticate_user,
+    )
 
-    # Setup logging
-    logger = setup_logging(verbose=verbose, quiet=quiet)
 
-    # Print banner
-    print_banner()
+def authenticate_or_exit(
+    logger,
+    username: str,
+    password: str,
+    login_url: str,
+    token_cache: Optional[str] = None,
+) -> TokenProvider:
+    """Authenticate against the login API, exiting with help on failure.
+
+    A still-valid token in ``token_cache`` is reused without logging in.
+
+    Returns:
+        TokenProvider holding a valid token
+    """
+    token_provider = create_token_provider(username, password, login_url, token_cache)
+    login_or_exit(logger, token_provider, login_url)
+    return token_provider
+
 
-    # Authenticate user
+def login_or_exit(logger, token_provider: TokenProvider, login_url: str):
+    """Make sure a TokenProvider holds a valid token, exiting with help on failure."""
     logger.info(f"Authenticating at {login_url}...")
     try:
-        bearer_token = authenticate_user(username, password, login_url)
+        token_provider.get_token()
         logger.info("Authentication successful ✓")
     except Exception as e:
         logger.error(f"Authentication failed: {e}")
@@ -266,94 +595,210 @@ def main(
         )
         sys.exit(1)
 
-    # Initialize database
-    logger.info(f"Initializing database: {db_path}")
-    db = Database(db_path)
-    logger.info("Database initialized ✓")
 
-    # Read recipients from CSV
+def load_unsent_recipients(
+    logger,
+    db: Database,
+    csv_file: str,
+    extra_columns: Optional[list] = None,
+    columnar: bool = False,
+):
+    """Read the CSV and drop recipients that were already sent or suppressed.
+
+    Exits the process when the CSV can't be read.
+
+    Args:
+        extra_columns: Additional CSV columns to keep on each recipient
+        columnar: Load into a RecipientTable instead of a list
+
+    Returns:
+        List (or RecipientTable) of recipients still to process
+    """
     logger.info(f"Reading recipients from: {csv_file}")
     try:
-        all_recipients = read_recipients(csv_file)
+        if columnar:
+            all_recipients = read_recipient_table(csv_file, extra_columns)
+        else:
+            all_recipients = read_recipients(csv_file, extra_columns)
         logger.info(f"Found {len(all_recipients)} recipients in CSV ✓")
     except Exception as e:
         logger.error(f"Error reading CSV: {e}")
         sys.exit(1)
 
-    # Filter out already sent emails
-    unsent_recipients = db.get_unsent_recipients(all_recipients)
-    already_sent = len(all_recipients) - len(unsent_recipients)
+    # Filter out already sent emails and suppressed addresses
+    suppressed = SuppressionList(db)
+    if columnar:
+        unsent_recipients = all_recipients.exclude("roll_no", db.sent_roll_nos())
+        if len(suppressed):
+            unsent_recipients = unsent_recipients.exclude("email", suppressed)
+    else:
+        unsent_recipients = db.get_unsent_recipients(all_recipients, suppressed)
+    log_skipped(logger, len(all_recipients) - len(unsent_recipients), suppressed)
+
+    return unsent_recipients
+
 
+def log_skipped(logger, skipped: int, suppressed: SuppressionList):
+    """Log how many recipients were skipped as already sent or suppressed."""
+    already_sent = skipped - suppressed.hits
     if already_sent > 0:
         logger.info(f"Skipping {already_sent} recipients (already sent)")
+    if suppressed.hits > 0:
+        logger.info(
+            f"Skipping {suppressed.hits} recipients (suppressed after a hard "
+            "bounce or complaint)"
+        )
 
-    if len(unsent_recipients) == 0:
-        logger.info("No new recipients to process. All emails already sent!")
-        sys.exit(0)
 
-    logger.info(
-        f"Processing {len(unsent_recipients)} new recipients at {rate_limit} emails/second..."
-    )
+def load_new_recipients(
+    logger, db: Database, csv_file: str, extra_columns: Optional[list] = None
+) -> Tuple[list, dict]:
+    """Read only the CSV rows appended since the last complete run.
 
-    # Initialize email sender
-    email_sender = EmailSender(
-        api_endpoint=api_endpoint,
-        bearer_token=bearer_token,
-        smtp_host=smtp_host,
-        smtp_port=smtp_port,
-        smtp_username=smtp_username,
-        smtp_password=smtp_password,
-        from_email=from_email,
-        register_url=register_url,
-        rate_limit=rate_limit,
-        logger=logger,
+    Exits the process when the CSV can't be read; see read_new_recipients.
+
+    Returns:
+        Tuple of (recipients still to process, checkpoint to save with
+        Database.save_csv_checkpoint once they have all been sent)
+    """
+    try:
+        return read_new_recipients(logger, db, csv_file, extra_columns)
+    except Exception as e:
+        logger.error(f"Error reading CSV: {e}")
+        sys.exit(1)
+
+
+def read_new_recipients(
+    logger,
+    db: Database,
+    csv_file: str,
+    extra_columns: Optional[list] = None,
+    checkpoint: Optional[dict] = None,
+) -> Tuple[list, dict]:
+    """Read the CSV rows appended after a checkpoint.
+
+    Resumes at the checkpoint's byte offset if the consumed prefix still
+    has the same fingerprint; otherwise the whole file is rescanned (rows
+    already sent are still skipped via the database).
+
+    Args:
+        extra_columns: Additional CSV columns to keep on each recipient
+        checkpoint: Checkpoint to resume from (default: the one stored
+            for the file in the database)
+
+    Returns:
+        Tuple of (recipients still to process, checkpoint to save with
+        Database.save_csv_checkpoint once they have all been sent)
+
+    Raises:
+        Exception: If the CSV can't be read
+    """
+    csv_path = os.path.abspath(csv_file)
+    if checkpoint is None:
+        checkpoint = db.get_csv_checkpoint(csv_path)
+    offset, rows_before = 0, 0
+
+    if checkpoint is not None:
+        consumed = checkpoint["byte_offset"]
+        if (
+            os.path.getsize(csv_path) >= consumed
+            and csv_fingerprint(csv_path, consumed) == checkpoint["fingerprint"]
+        ):
+            offset, rows_before = consumed, checkpoint["row_count"]
+            logger.info(f"Reading rows appended to {csv_file} after row {rows_before}")
+        else:
+            logger.warning(
+                f"{csv_file} changed since the last run, rescanning the whole file"
+            )
+    else:
+        logger.info(f"Reading recipients from: {csv_file}")
+
+    new_recipients, end_offset, rows = read_recipients_tail(
+        csv_path, offset, extra_columns
     )
+    fingerprint = csv_fingerprint(csv_path, end_offset)
+    logger.info(f"Found {len(new_recipients)} new recipients in CSV ✓")
+
+    suppressed = SuppressionList(db)
+    unsent_recipients = db.get_unsent_recipients(new_recipients, suppressed)
+    log_skipped(logger, len(new_recipients) - len(unsent_recipients), suppressed)
+
+    return unsent_recipients, {
+        "csv_path": csv_path,
+        "fingerprint": fingerprint,
+        "byte_offset": end_offset,
+        "row_count": rows_before + rows,
+    }
 
-    # Process recipients asynchronously
-    start_time = datetime.now()
-    success_count = [0]  # Using list for mutable reference in closure
-    fail_count = [0]
+
+def run_batch(
+    logger,
+    email_sender: EmailSender,
+    items,
+    total: int,
+    on_result,
+    show_progress: bool,
+    sink=None,
+    worker=None,
+    verbose: bool = False,
+    control_file: Optional[str] = None,
+    profile: Optional[str] = None,
+) -> RunStats:
+    """Run a batch through the sender with progress display.
+
+    Args:
+        logger: Logger instance
+        email_sender: Configured EmailSender (closed before returning)
+        items: Iterable of items for the worker
+        total: Number of items
+        on_result: Callable invoked with each EmailResult
+        show_progress: Whether to render the progress bar
+        sink: Optional ResultSink (closed before returning)
+        worker: Optional blocking worker passed to process_recipients_batch
+        verbose: Include tracebacks for unexpected errors
+        control_file: Optional control file to watch for live changes
+        profile: Path prefix to profile the batch and write reports to
+
+    Returns:
+        RunStats for the batch
+    """
+    import asyncio
+
+    tracker = ProgressTracker(total)
 
     async def run_processing():
         """Run the async email processing."""
-        if no_progress or verbose:
-            # No progress bar, just log results
-            results = await email_sender.process_recipients_batch(unsent_recipients)
-            for result in results:
-                if result.success:
-                    success_count[0] += 1
-                    db.mark_email_sent(
-                        result.recipient["roll_no"],
-                        result.recipient["email"],
-                        result.recipient["name"],
-                        result.recipient["is_paid"],
-                    )
-                else:
-                    fail_count[0] += 1
-            return results
-        else:
-            # With progress bar
-            def progress_callback(current: int, total: int, result: EmailResult):
-                on_progress_update(current, total, result, success_count, fail_count)
-                if result.success:
-                    db.mark_email_sent(
-                        result.recipient["roll_no"],
-                        result.recipient["email"],
-                        result.recipient["name"],
-                        result.recipient["is_paid"],
-                    )
-
+        renderer = ProgressRenderer(tracker) if show_progress else None
+        control = RuntimeControl(email_sender, control_file, logger=logger)
+
+        def progress_callback(current: int, total: int, result: EmailResult):
+            tracker.record(result.success)
+            on_result(result)
+            if not result.success and renderer is not None:
+                renderer.echo(format_failure(result))
+
+        if renderer is not None:
+            renderer.start()
+        control.start()
+        try:
             return await email_sender.process_recipients_batch(
-                unsent_recipients, progress_callback=progress_callback
+                items,
+                progress_callback=progress_callback,
+                sink=sink,
+                total=total,
+                worker=worker,
             )
+        finally:
+            await control.stop()
+            if renderer is not None:
+                await renderer.stop()
 
+    profiler = Profiler() if profile else None
     try:
+        if profiler is not None:
+            profiler.start()
         # Run the async processing
-        results = asyncio.run(run_processing())
-
-        # Clear progress bar line
-        if not no_progress and not verbose:
-            click.echo()
+        stats = asyncio.run(run_processing())
 
     except KeyboardInterrupt:
         logger.warning("Interrupted by user")
@@ -365,53 +810,1460 @@ def main(
         sys.exit(1)
     finally:
         email_sender.close()
+        if sink is not None:
+            sink.close()
+        if profiler is not None:
+            profiler.stop()
+            paths = profiler.write_reports(profile)
+            logger.info("CPU by stage: %s", profiler.summary())
+            logger.info("Profile written to %s", ", ".join(paths))
+
+    flush_logging()
+    return stats
+
+
+def mark_sent_callback(db: Database):
+    """Build a result callback that records successful sends in the DB."""
+
+    def on_result(result: EmailResult):
+        if result.success:
+            db.mark_email_sent(
+                result.recipient["roll_no"],
+                result.recipient["email"],
+                result.recipient["name"],
+                result.recipient["is_paid"],
+            )
 
-    # Calculate statistics
-    end_time = datetime.now()
-    duration = (end_time - start_time).total_seconds()
-    avg_time = (
-        sum(r.processing_time_ms for r in results) / len(results) if results else 0
-    )
+    return on_result
 
-    # Print summary
-    click.echo()
-    click.echo(click.style("═" * 60, fg="cyan", bold=True))
-    click.echo(click.style("📊  PROCESSING SUMMARY", fg="white", bold=True))
-    click.echo(click.style("═" * 60, fg="cyan", bold=True))
 
-    click.echo(f"  {click.style('Total Recipients:', fg='white')}: {len(results)}")
-    click.echo(f"  {click.style('Successful:', fg='green')}: {success_count[0]} ✓")
-    click.echo(f"  {click.style('Failed:', fg='red')}: {fail_count[0]} ✗")
-    click.echo(
-        f"  {click.style('Success Rate:', fg='cyan')}: {(success_count[0] / len(results) * 100):.1f}%"
-    )
-    click.echo()
-    click.echo(f"  {click.style('Duration:', fg='white')}: {duration:.1f} seconds")
-    click.echo(
-        f"  {click.style('Average Time:', fg='white')}: {avg_time:.0f}ms per email"
-    )
-    click.echo(
-        f"  {click.style('Effective Rate:', fg='white')}: {len(results) / duration:.1f} emails/second"
+def record_callback(db: Database, transport: Optional[Transport]):
+    """Result callback marking sends in the database, unless it's a dry run."""
+    if transport is not None and not transport.delivers:
+        return lambda result: None
+    return mark_sent_callback(db)
+
+
+def add_stop_handlers(loop, stop) -> list:
+    """Resolve the ``stop`` future on SIGINT/SIGTERM, where the loop can.
+
+    Returns:
+        Signals handled, for loop.remove_signal_handler
+    """
+    import signal
+
+    installed = []
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(
+                signum, lambda: stop.done() or stop.set_result(None)
+            )
+        except (NotImplementedError, RuntimeError, ValueError):
+            continue
+        installed.append(signum)
+    return installed
+
+
+async def watch_csv(
+    logger,
+    email_sender: EmailSender,
+    db: Database,
+    watcher: "FileWatcher",
+    csv_file: str,
+    on_result,
+    sink=None,
+    dry_run: bool = False,
+    extra_columns: Optional[list] = None,
+    keepalive_interval: float = 30.0,
+    retry_interval: float = 300.0,
+    control_file: Optional[str] = None,
+    verbose: bool = False,
+) -> RunStats:
+    """Send rows appended to a CSV as they appear, until SIGINT/SIGTERM.
+
+    Each change to the file sends the rows after the checkpoint through the
+    already-open sender as one batch; the checkpoint is saved once a batch
+    had no failures (never for dry runs, which keep it in memory). Rows of
+    a batch with failures are read again after ``retry_interval``; until
+    then changes only send the rows appended after that batch. While idle
+    the sender's token and connections are kept warm.
+
+    Args:
+        logger: Logger instance
+        email_sender: Configured EmailSender (left open)
+        db: Tracking database
+        watcher: FileWatcher for ``csv_file``
+        csv_file: CSV file to tail
+        on_result: Callable invoked with each EmailResult
+        sink: Optional ResultSink (left open)
+        dry_run: Whether the transport only pretends to deliver
+        extra_columns: Additional CSV columns to keep on each recipient
+        keepalive_interval: Seconds between keep-alives while idle
+        retry_interval: Seconds before rows of a failed batch are retried
+        control_file: Optional control file to watch for live changes
+        verbose: Include tracebacks for unexpected errors
+
+    Returns:
+        RunStats over every batch sent
+    """
+    import asyncio
+
+    loop = asyncio.get_running_loop()
+    stop = loop.create_future()
+    installed = add_stop_handlers(loop, stop)
+    control = RuntimeControl(email_sender, control_file, logger=logger)
+    control.start()
+
+    totals = RunStats()
+    checkpoint = None
+    # End of the last rows read, ahead of checkpoint while a retry is due
+    frontier = None
+    retry_at = None
+    # Pick up rows appended while nothing was watching
+    changed = True
+    logger.info(f"Watching {csv_file} for new rows ({watcher.mode})")
+
+    def progress_callback(current: int, total: int, result: EmailResult):
+        totals.add(result)
+        on_result(result)
+
+    try:
+        while not stop.done():
+            due = retry_at is not None and loop.time() >= retry_at
+            if changed or due:
+                if retry_at is None or due:
+                    start, retry_at = checkpoint, None
+                else:
+                    # Failed rows wait for retry_at; only send what's new
+                    start = frontier
+                try:
+                    recipients, new_checkpoint = read_new_recipients(
+                        logger, db, csv_file, extra_columns, checkpoint=start
+                    )
+                except Exception as e:
+                    logger.error(f"Error reading CSV, waiting for the next change: {e}")
+                    recipients, new_checkpoint = None, None
+
+                stats = None
+                if recipients:
+                    if email_sender.quota is not None:
+                        email_sender.quota.plan(
+                            len(recipients),
+                            email_sender.rate_limiter.max_requests_per_second,
+                        )
+                    try:
+                        stats = await email_sender.process_recipients_batch(
+                            recipients,
+                            progress_callback=progress_callback,
+                            sink=sink,
+                        )
+                    except Exception as e:
+                        logger.error(
+                            f"Unexpected error during processing: {e}", exc_info=verbose
+                        )
+                        if retry_at is None:
+                            retry_at = loop.time() + retry_interval
+                    else:
+                        logger.info(
+                            f"Batch done: {stats.success_count} sent, "
+                            f"{stats.fail_count} failed",
+                            extra={
+                                "event": "watch_batch",
+                                "sent": stats.success_count,
+                                "failed": stats.fail_count,
+                            },
+                        )
+                        if stats.fail_count and retry_at is None:
+                            retry_at = loop.time() + retry_interval
+                if new_checkpoint is not None:
+                    frontier = new_checkpoint
+                    if retry_at is None:
+                        checkpoint = new_checkpoint
+                        if not dry_run:
+                            db.save_csv_checkpoint(**new_checkpoint)
+                flush_logging()
+            else:
+                try:
+                    await loop.run_in_executor(None, email_sender.keep_alive)
+                except Exception as e:
+                    logger.warning(f"Keep-alive failed: {e}")
+
+            timeout = keepalive_interval
+            if retry_at is not None:
+                timeout = max(0.0, min(timeout, retry_at - loop.time()))
+            waiter = asyncio.ensure_future(watcher.wait(timeout))
+            await asyncio.wait({waiter, stop}, return_when=asyncio.FIRST_COMPLETED)
+            if not waiter.done():
+                waiter.cancel()
+                try:
+                    await waiter
+                except asyncio.CancelledError:
+                    pass
+                break
+            changed = waiter.result()
+    finally:
+        for signum in installed:
+            loop.remove_signal_handler(signum)
+        await control.stop()
+
+    logger.info(
+        f"Stopped watching: {totals.success_count} sent, "
+        f"{totals.fail_count} failed since start"
     )
-    click.echo(click.style("═" * 60, fg="cyan", bold=True))
+    return totals
 
-    if fail_count[0] > 0:
-        click.echo()
-        click.echo(click.style("⚠️  Failed Recipients:", fg="red", bold=True))
-        for result in results:
-            if not result.success:
-                click.echo(
-                    f"   • {result.recipient['name']} ({result.recipient['roll_no']}) - {result.coupon_code}"
-                )
-        click.echo()
-        sys.exit(1)
-    else:
-        click.echo()
-        click.echo(
-            click.style("✨ All emails sent successfully! ✨", fg="green", bold=True)
-        )
-        click.echo()
+
+def skip_unsendable(db: Database, recipients: list, suppressed) -> list:
+    """Mark claimed queue entries that shouldn't be sent as skipped.
+
+    Args:
+        db: Database holding the send queue
+        recipients: Claimed recipients, each with its queue_id
+        suppressed: Container of suppressed addresses
+
+    Returns:
+        The recipients still to send
+    """
+    sendable, seen = [], set()
+    for recipient in recipients:
+        if recipient["email"] in suppressed:
+            reason = "suppressed after a hard bounce or complaint"
+        elif recipient["roll_no"] in seen:
+            reason = "already queued"
+        else:
+            seen.add(recipient["roll_no"])
+            sendable.append(recipient)
+            continue
+        db.finish_queued(recipient["queue_id"], "skipped", error=reason)
+    return sendable
+
+
+async def serve_queue(
+    logger,
+    email_sender: EmailSender,
+    db: Database,
+    server: "SubmissionServer",
+    on_result,
+    claim_size: int = 100,
+    keepalive_interval: float = 30.0,
+    retry_interval: float = 60.0,
+    control_file: Optional[str] = None,
+    verbose: bool = False,
+) -> RunStats:
+    """Send queued submissions as they arrive, until SIGINT/SIGTERM.
+
+    Entries are claimed from the send queue up to ``claim_size`` at a time
+    and run through the already-open sender as one batch; the server wakes
+    the loop whenever recipients are queued. Entries already sent,
+    suppressed or duplicated within a claim are marked skipped. While idle
+    the sender's token and connections are kept warm.
+
+    Args:
+        logger: Logger instance
+        email_sender: Configured EmailSender (left open)
+        db: Database holding the send queue
+        server: SubmissionServer feeding the queue (already started)
+        on_result: Callable invoked with each EmailResult
+        claim_size: Most entries sent per batch
+        keepalive_interval: Seconds between keep-alives while idle
+        retry_interval: Seconds to wait after a batch failed unexpectedly
+        control_file: Optional control file to watch for live changes
+        verbose: Include tracebacks for unexpected errors
+
+    Returns:
+        RunStats over every batch sent
+    """
+    import asyncio
+
+    loop = asyncio.get_running_loop()
+    stop = loop.create_future()
+    installed = add_stop_handlers(loop, stop)
+    wake = asyncio.Event()
+    server.on_enqueue = lambda: loop.call_soon_threadsafe(wake.set)
+    control = RuntimeControl(email_sender, control_file, logger=logger)
+    control.start()
+
+    totals = RunStats()
+    suppressed = SuppressionList(db)
+    requeued = db.requeue_sending()
+    if requeued:
+        logger.warning(f"Requeued {requeued} submissions left sending by the last run")
+    host, port = server.address
+    logger.info(f"Accepting submissions on http://{host}:{port}/recipients")
+
+    def progress_callback(current: int, total: int, result: EmailResult):
+        totals.add(result)
+        on_result(result)
+        db.finish_queued(
+            result.recipient["queue_id"],
+            "sent" if result.success else "failed",
+            coupon_code=result.coupon_code or None,
+            error=result.error_message or None,
+        )
+
+    try:
+        while not stop.done():
+            wake.clear()
+            recipients = db.claim_queued(claim_size)
+            if recipients:
+                if db.suppression_count() != len(suppressed):
+                    suppressed = SuppressionList(db)
+                recipients = skip_unsendable(db, recipients, suppressed)
+            if recipients:
+                if email_sender.quota is not None:
+                    email_sender.quota.plan(
+                        len(recipients),
+                        email_sender.rate_limiter.max_requests_per_second,
+                    )
+                try:
+                    await email_sender.process_recipients_batch(
+                        recipients, progress_callback=progress_callback
+                    )
+                except Exception as e:
+                    logger.error(
+                        f"Unexpected error during processing: {e}", exc_info=verbose
+                    )
+                    db.requeue_sending()
+                    await asyncio.wait({stop}, timeout=retry_interval)
+                flush_logging()
+                continue
+
+            waiter = asyncio.ensure_future(wake.wait())
+            done, _ = await asyncio.wait(
+                {waiter, stop},
+                timeout=keepalive_interval,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            if not waiter.done():
+                waiter.cancel()
+            if not done:
+                try:
+                    await loop.run_in_executor(None, email_sender.keep_alive)
+                except Exception as e:
+                    logger.warning(f"Keep-alive failed: {e}")
+    finally:
+        server.on_enqueue = None
+        for signum in installed:
+            loop.remove_signal_handler(signum)
+        await control.stop()
+
+    logger.info(
+        f"Stopped serving: {totals.success_count} sent, "
+        f"{totals.fail_count} failed since start"
+    )
+    return totals
+
+
+@click.group(cls=DefaultCommandGroup)
+def cli():
+    """Melinia'26 coupon email sender.
+
+    Runs `send` when invoked with a CSV file and no command.
+    """
+
+
+@cli.command("send")
+@click.argument("csv_file", type=click.Path(exists=True))
+@click.option("--username", required=True, help="Username for login authentication")
+@click.option("--password", required=True, help="Password for login authentication")
+@click.option(
+    "--smtp-username",
+    default=None,
+    help="SMTP username for email sending (required with the SMTP transport)",
+)
+@click.option(
+    "--smtp-password",
+    default=None,
+    help="SMTP password for email sending (required with the SMTP transport)",
+)
+@click.option(
+    "--db-path",
+    default="mail_coupons.db",
+    help="Path to SQLite database for tracking sent emails",
+)
+@click.option(
+    "--api-endpoint", default=API_ENDPOINT, help="API endpoint for creating coupons"
+)
+@click.option("--login-url", default=LOGIN_URL, help="Login API endpoint URL")
+@click.option(
+    "--token-cache",
+    default=None,
+    envvar="MAIL_COUPONS_TOKEN_CACHE",
+    help="File to cache the bearer token in between runs (mode 0600)",
+)
+@click.option("--from-email", default=FROM_EMAIL, help="From email address")
+@click.option("--smtp-host", default=SES_SMTP_HOST, help="SMTP server hostname")
+@click.option("--smtp-port", default=SES_SMTP_PORT, help="SMTP server port")
+@relay_options
+@transport_option(
+    "'smtp' (default); ses://REGION[?batch=50&wait=1&template=NAME&endpoint=URL] "
+    "for SES bulk templated sends (credentials from AWS_ACCESS_KEY_ID/"
+    "AWS_SECRET_ACCESS_KEY); http(s)://URL to POST messages to an API "
+    "(token from MAIL_COUPONS_HTTP_TOKEN); or mbox:PATH, maildir:PATH or "
+    "null[?delay=SECONDS] for dry runs that deliver nothing"
+)
+@click.option("--register-url", default=REGISTER_URL, help="Registration URL")
+@campaign_option
+@coupon_option
+@message_options
+@template_options
+@priority_options
+@click.option("--rate-limit", default=12, help="Emails per second rate limit", type=int)
+@concurrency_option
+@quota_option
+@domain_limit_option
+@profile_option
+@click.option(
+    "--max-outage",
+    default=300.0,
+    type=float,
+    help="Seconds to pause for an unavailable API/SMTP relay before failing",
+)
+@click.option("-v", "--verbose", is_flag=True, help="Enable verbose debug logging")
+@click.option("-q", "--quiet", is_flag=True, help="Only show errors")
+@click.option("--no-progress", is_flag=True, help="Disable progress bar")
+@click.option(
+    "--incremental",
+    is_flag=True,
+    help="Only read rows appended to the CSV since the last fully successful run",
+)
+@click.option(
+    "--columnar",
+    is_flag=True,
+    help="Hold recipients in a compact column store (for very large CSVs)",
+)
+@click.option(
+    "--results-path",
+    default=None,
+    help="Stream every result to this file (.db/.sqlite for SQLite, else JSONL)",
+)
+@click.option(
+    "--retry-csv",
+    default="failed_recipients.csv",
+    help="CSV file failed recipients are written to as they happen",
+)
+@click.option(
+    "--log-format",
+    type=click.Choice(["text", "json"]),
+    default="text",
+    help="Log output format (json writes one object per line)",
+)
+def main(
+    csv_file,
+    username,
+    password,
+    smtp_username,
+    smtp_password,
+    db_path,
+    api_endpoint,
+    login_url,
+    token_cache,
+    from_email,
+    smtp_host,
+    smtp_port,
+    relays,
+    relay_strategy,
+    transport,
+    register_url,
+    campaign,
+    coupon_key,
+    no_minify,
+    body_encoding,
+    templates_dir,
+    template,
+    template_column,
+    rate_limit,
+    max_concurrency,
+    control_file,
+    daily_quota,
+    domain_limits,
+    profile,
+    priority,
+    priority_aging,
+    max_outage,
+    verbose,
+    quiet,
+    no_progress,
+    incremental,
+    columnar,
+    results_path,
+    retry_csv,
+    log_format,
+):
+    """Send registration coupons to recipients from CSV file.
+
+    CSV Format: roll_no,email,name,is_paid
+
+    Features:
+    - Parallel processing with configurable rate limiting
+    - Verbose logging with formatted output
+    - Progress tracking with detailed error reporting
+    - SQLite database for tracking sent emails
+    """
+    if transport is None and (smtp_username is None or smtp_password is None):
+        raise click.UsageError(
+            "--smtp-username and --smtp-password are required with the SMTP transport"
+        )
+
+    # Setup logging
+    logger = setup_logging(verbose=verbose, quiet=quiet, log_format=log_format)
+
+    # Print banner
+    print_banner()
+    transport = create_transport_or_exit(logger, transport)
+    templates = create_templates(
+        logger, templates_dir, template, template_column, not no_minify, transport
+    )
+
+    # Authenticate user in the background while the database and CSV load
+    token_provider = create_token_provider(username, password, login_url, token_cache)
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="login") as startup:
+        login = startup.submit(login_or_exit, logger, token_provider, login_url)
+
+        # Initialize database
+        logger.info(f"Initializing database: {db_path}")
+        db = Database(db_path, campaign)
+        logger.info("Database initialized ✓")
+
+        # Read recipients from CSV
+        extra_columns = recipient_columns(
+            priority, csv_file, templates, template_column
+        )
+        csv_checkpoint = None
+        if incremental:
+            unsent_recipients, csv_checkpoint = load_new_recipients(
+                logger, db, csv_file, extra_columns
+            )
+        else:
+            unsent_recipients = load_unsent_recipients(
+                logger, db, csv_file, extra_columns, columnar=columnar
+            )
+
+        if len(unsent_recipients) == 0:
+            login.result()
+            if csv_checkpoint is not None:
+                db.save_csv_checkpoint(**csv_checkpoint)
+            logger.info("No new recipients to process. All emails already sent!")
+            sys.exit(0)
+        load_templates(logger, templates, unsent_recipients, template, template_column)
+
+        # Set up the email sender while login finishes, but only connect to
+        # the relays once the credentials are known to work
+        email_sender = EmailSender(
+            api_endpoint=api_endpoint,
+            bearer_token="",
+            smtp_host=smtp_host,
+            smtp_port=smtp_port,
+            smtp_username=smtp_username,
+            smtp_password=smtp_password,
+            from_email=from_email,
+            register_url=register_url,
+            rate_limit=rate_limit,
+            max_concurrency=max_concurrency,
+            logger=logger,
+            max_outage=max_outage,
+            token_provider=token_provider,
+            relays=relays,
+            relay_strategy=relay_strategy,
+            transport=transport,
+            coupon_codes=create_coupon_codes(logger, db, coupon_key),
+            minify=not no_minify,
+            body_encoding=body_encoding,
+            quota=create_quota(
+                logger, db, daily_quota, len(unsent_recipients), rate_limit
+            ),
+            domain_limits=domain_limits,
+            templates=templates,
+            default_template=template,
+            template_column=template_column,
+        )
+        try:
+            login.result()
+        except BaseException:
+            email_sender.close()
+            raise
+        email_sender.warm_up()
+
+    logger.info(
+        f"Processing {len(unsent_recipients)} new recipients at {rate_limit} emails/second..."
+    )
+
+    # Process recipients asynchronously
+    start_time = datetime.now()
+    stats = run_batch(
+        logger,
+        email_sender,
+        schedule_recipients(logger, unsent_recipients, priority, priority_aging),
+        total=len(unsent_recipients),
+        on_result=record_callback(db, transport),
+        show_progress=not no_progress and not verbose,
+        sink=build_sink(results_path=results_path, retry_csv=retry_csv),
+        verbose=verbose,
+        control_file=control_file,
+        profile=profile_prefix(db_path) if profile else None,
+    )
+
+    duration = (datetime.now() - start_time).total_seconds()
+    print_summary(stats, duration, retry_csv, concurrency=email_sender.concurrency)
+
+    # Only move past these rows once all of them went out, so failed
+    # recipients are picked up again by the next run
+    dry_run = transport is not None and not transport.delivers
+    if csv_checkpoint is not None and stats.fail_count == 0 and not dry_run:
+        db.save_csv_checkpoint(**csv_checkpoint)
+
+    if stats.fail_count > 0:
+        sys.exit(1)
+
+
+@cli.command("render")
+@click.argument("csv_file", type=click.Path(exists=True))
+@click.option(
+    "--spool-dir", required=True, help="Directory to write rendered messages to"
+)
+@click.option("--username", required=True, help="Username for login authentication")
+@click.option("--password", required=True, help="Password for login authentication")
+@click.option(
+    "--db-path",
+    default="mail_coupons.db",
+    help="Path to SQLite database for tracking sent emails",
+)
+@click.option(
+    "--api-endpoint", default=API_ENDPOINT, help="API endpoint for creating coupons"
+)
+@click.option("--login-url", default=LOGIN_URL, help="Login API endpoint URL")
+@click.option(
+    "--token-cache",
+    default=None,
+    envvar="MAIL_COUPONS_TOKEN_CACHE",
+    help="File to cache the bearer token in between runs (mode 0600)",
+)
+@click.option("--from-email", default=FROM_EMAIL, help="From email address")
+@click.option("--register-url", default=REGISTER_URL, help="Registration URL")
+@campaign_option
+@coupon_option
+@message_options
+@template_options
+@priority_options
+@click.option(
+    "--rate-limit", default=12, help="Coupon API requests per second", type=int
+)
+@concurrency_option
+@profile_option
+@click.option(
+    "--max-outage",
+    default=300.0,
+    type=float,
+    help="Seconds to pause for an unavailable API/SMTP relay before failing",
+)
+@click.option("-v", "--verbose", is_flag=True, help="Enable verbose debug logging")
+@click.option("-q", "--quiet", is_flag=True, help="Only show errors")
+@click.option("--no-progress", is_flag=True, help="Disable progress bar")
+@click.option(
+    "--log-format",
+    type=click.Choice(["text", "json"]),
+    default="text",
+    help="Log output format (json writes one object per line)",
+)
+def render(
+    csv_file,
+    spool_dir,
+    username,
+    password,
+    db_path,
+    api_endpoint,
+    login_url,
+    token_cache,
+    from_email,
+    register_url,
+    campaign,
+    coupon_key,
+    no_minify,
+    body_encoding,
+    templates_dir,
+    template,
+    template_column,
+    rate_limit,
+    max_concurrency,
+    control_file,
+    profile,
+    priority,
+    priority_aging,
+    max_outage,
+    verbose,
+    quiet,
+    no_progress,
+    log_format,
+):
+    """Create coupons and write finished messages to a spool.
+
+    Recipients that were already sent or already rendered into the spool
+    are skipped. Deliver the spool later with `send-spool`.
+    """
+    logger = setup_logging(verbose=verbose, quiet=quiet, log_format=log_format)
+    print_banner()
+    templates = create_templates(
+        logger, templates_dir, template, template_column, not no_minify
+    )
+
+    token_provider = authenticate_or_exit(
+        logger, username, password, login_url, token_cache
+    )
+    db = Database(db_path, campaign)
+    spool = Spool(spool_dir)
+
+    rendered = spool.rendered_roll_nos()
+    recipients = [
+        r
+        for r in load_unsent_recipients(
+            logger,
+            db,
+            csv_file,
+            recipient_columns(priority, csv_file, templates, template_column),
+        )
+        if r["roll_no"] not in rendered
+    ]
+
+    if not recipients:
+        logger.info("No new recipients to render.")
+        sys.exit(0)
+    load_templates(logger, templates, recipients, template, template_column)
+
+    logger.info(f"Rendering {len(recipients)} messages into {spool_dir}...")
+
+    email_sender = EmailSender(
+        api_endpoint=api_endpoint,
+        bearer_token=token_provider.get_token(),
+        smtp_host="",
+        smtp_port=0,
+        smtp_username="",
+        smtp_password="",
+        from_email=from_email,
+        register_url=register_url,
+        rate_limit=rate_limit,
+        max_concurrency=max_concurrency,
+        logger=logger,
+        max_outage=max_outage,
+        token_provider=token_provider,
+        coupon_codes=create_coupon_codes(logger, db, coupon_key),
+        minify=not no_minify,
+        body_encoding=body_encoding,
+        templates=templates,
+        default_template=template,
+        template_column=template_column,
+    )
+
+    start_time = datetime.now()
+    stats = run_batch(
+        logger,
+        email_sender,
+        schedule_recipients(logger, recipients, priority, priority_aging),
+        total=len(recipients),
+        on_result=lambda result: None,
+        show_progress=not no_progress and not verbose,
+        worker=lambda recipient: email_sender.render_recipient_sync(recipient, spool),
+        verbose=verbose,
+        control_file=control_file,
+        profile=profile_prefix(db_path) if profile else None,
+    )
+
+    duration = (datetime.now() - start_time).total_seconds()
+    print_summary(
+        stats,
+        duration,
+        done_message="All messages rendered!",
+        concurrency=email_sender.concurrency,
+    )
+
+    if stats.fail_count > 0:
+        sys.exit(1)
+
+
+@cli.command("send-spool")
+@click.argument("spool_dir", type=click.Path(exists=True, file_okay=False))
+@click.option(
+    "--smtp-username",
+    default=None,
+    help="SMTP username for email sending (required with the SMTP transport)",
+)
+@click.option(
+    "--smtp-password",
+    default=None,
+    help="SMTP password for email sending (required with the SMTP transport)",
+)
+@click.option(
+    "--db-path",
+    default="mail_coupons.db",
+    help="Path to SQLite database for tracking sent emails",
+)
+@click.option("--from-email", default=FROM_EMAIL, help="Envelope sender address")
+@click.option("--smtp-host", default=SES_SMTP_HOST, help="SMTP server hostname")
+@click.option("--smtp-port", default=SES_SMTP_PORT, help="SMTP server port")
+@relay_options
+@transport_option(
+    "'smtp' (default); http(s)://URL to POST messages to an API; or mbox:PATH, "
+    "maildir:PATH or null[?delay=SECONDS] for dry runs that deliver nothing"
+)
+@campaign_option
+@click.option("--rate-limit", default=12, help="Emails per second rate limit", type=int)
+@concurrency_option
+@quota_option
+@domain_limit_option
+@profile_option
+@click.option(
+    "--max-outage",
+    default=300.0,
+    type=float,
+    help="Seconds to pause for an unavailable API/SMTP relay before failing",
+)
+@click.option("-v", "--verbose", is_flag=True, help="Enable verbose debug logging")
+@click.option("-q", "--quiet", is_flag=True, help="Only show errors")
+@click.option("--no-progress", is_flag=True, help="Disable progress bar")
+@click.option(
+    "--results-path",
+    default=None,
+    help="Stream every result to this file (.db/.sqlite for SQLite, else JSONL)",
+)
+@click.option(
+    "--log-format",
+    type=click.Choice(["text", "json"]),
+    default="text",
+    help="Log output format (json writes one object per line)",
+)
+def send_spool(
+    spool_dir,
+    smtp_username,
+    smtp_password,
+    db_path,
+    from_email,
+    smtp_host,
+    smtp_port,
+    relays,
+    relay_strategy,
+    transport,
+    campaign,
+    rate_limit,
+    max_concurrency,
+    control_file,
+    daily_quota,
+    domain_limits,
+    profile,
+    max_outage,
+    verbose,
+    quiet,
+    no_progress,
+    results_path,
+    log_format,
+):
+    """Deliver messages previously written by `render`.
+
+    Messages are streamed as raw bytes through the transport (by default
+    over persistent SMTP connections, one per worker) and moved to cur/
+    once accepted. Failed messages stay in new/ and are retried on the next
+    run, as do all messages after a dry run.
+    """
+    if transport is None and (smtp_username is None or smtp_password is None):
+        raise click.UsageError(
+            "--smtp-username and --smtp-password are required with the SMTP transport"
+        )
+
+    logger = setup_logging(verbose=verbose, quiet=quiet, log_format=log_format)
+    print_banner()
+    transport = create_transport_or_exit(logger, transport)
+    if transport is not None and transport.templated:
+        logger.error(f"{transport.name} can't send pre-built messages from a spool")
+        sys.exit(1)
+
+    db = Database(db_path, campaign)
+    spool = Spool(spool_dir)
+    total = spool.count_pending()
+
+    if total == 0:
+        logger.info("Spool is empty. Nothing to send!")
+        sys.exit(0)
+
+    logger.info(f"Sending {total} spooled messages at {rate_limit} emails/second...")
+
+    email_sender = EmailSender(
+        api_endpoint="",
+        bearer_token="",
+        smtp_host=smtp_host,
+        smtp_port=smtp_port,
+        smtp_username=smtp_username,
+        smtp_password=smtp_password,
+        from_email=from_email,
+        rate_limit=rate_limit,
+        max_concurrency=max_concurrency,
+        logger=logger,
+        max_outage=max_outage,
+        relays=relays,
+        relay_strategy=relay_strategy,
+        transport=transport,
+        quota=create_quota(logger, db, daily_quota, total, rate_limit),
+        domain_limits=domain_limits,
+    )
+    email_sender.warm_up()
+
+    start_time = datetime.now()
+    stats = run_batch(
+        logger,
+        email_sender,
+        spool.pending(),
+        total=total,
+        on_result=record_callback(db, transport),
+        show_progress=not no_progress and not verbose,
+        sink=build_sink(results_path=results_path),
+        worker=lambda entry: email_sender.send_spooled_sync(entry, spool),
+        verbose=verbose,
+        control_file=control_file,
+        profile=profile_prefix(db_path) if profile else None,
+    )
+
+    duration = (datetime.now() - start_time).total_seconds()
+    print_summary(stats, duration, concurrency=email_sender.concurrency)
+
+    if stats.fail_count > 0:
+        sys.exit(1)
+
+
+@cli.command("watch")
+@click.argument("csv_file", type=click.Path(exists=True, dir_okay=False))
+@click.option("--username", required=True, help="Username for login authentication")
+@click.option("--password", required=True, help="Password for login authentication")
+@click.option(
+    "--smtp-username",
+    default=None,
+    help="SMTP username for email sending (required with the SMTP transport)",
+)
+@click.option(
+    "--smtp-password",
+    default=None,
+    help="SMTP password for email sending (required with the SMTP transport)",
+)
+@click.option(
+    "--db-path",
+    default="mail_coupons.db",
+    help="Path to SQLite database for tracking sent emails",
+)
+@click.option(
+    "--api-endpoint", default=API_ENDPOINT, help="API endpoint for creating coupons"
+)
+@click.option("--login-url", default=LOGIN_URL, help="Login API endpoint URL")
+@click.option(
+    "--token-cache",
+    default=None,
+    envvar="MAIL_COUPONS_TOKEN_CACHE",
+    help="File to cache the bearer token in between runs (mode 0600)",
+)
+@click.option("--from-email", default=FROM_EMAIL, help="From email address")
+@click.option("--smtp-host", default=SES_SMTP_HOST, help="SMTP server hostname")
+@click.option("--smtp-port", default=SES_SMTP_PORT, help="SMTP server port")
+@relay_options
+@transport_option(
+    "'smtp' (default), ses://REGION[?...], http(s)://URL, or mbox:PATH, "
+    "maildir:PATH or null[?delay=SECONDS] for dry runs (see `send --help`)"
+)
+@click.option("--register-url", default=REGISTER_URL, help="Registration URL")
+@campaign_option
+@coupon_option
+@message_options
+@template_options
+@click.option("--rate-limit", default=12, help="Emails per second rate limit", type=int)
+@concurrency_option
+@quota_option
+@domain_limit_option
+@click.option(
+    "--max-outage",
+    default=300.0,
+    type=float,
+    help="Seconds to pause for an unavailable API/SMTP relay before failing",
+)
+@click.option(
+    "--poll",
+    is_flag=True,
+    help="Poll the CSV instead of using inotify (e.g. on NFS)",
+)
+@click.option(
+    "--poll-interval",
+    default=2.0,
+    type=click.FloatRange(min=0.1),
+    help="Seconds between checks of the CSV when polling",
+)
+@click.option(
+    "--keepalive-interval",
+    default=30.0,
+    type=click.FloatRange(min=1),
+    help="Seconds between SMTP NOOPs and token checks while idle",
+)
+@click.option(
+    "--retry-interval",
+    default=300.0,
+    type=click.FloatRange(min=0),
+    help="Seconds before the rows of a batch with failures are retried",
+)
+@click.option("-v", "--verbose", is_flag=True, help="Enable verbose debug logging")
+@click.option("-q", "--quiet", is_flag=True, help="Only show errors")
+@click.option(
+    "--results-path",
+    default=None,
+    help="Stream every result to this file (.db/.sqlite for SQLite, else JSONL)",
+)
+@click.option(
+    "--retry-csv",
+    default="failed_recipients.csv",
+    help="CSV file failed recipients are written to as they happen",
+)
+@click.option(
+    "--log-format",
+    type=click.Choice(["text", "json"]),
+    default="text",
+    help="Log output format (json writes one object per line)",
+)
+def watch(
+    csv_file,
+    username,
+    password,
+    smtp_username,
+    smtp_password,
+    db_path,
+    api_endpoint,
+    login_url,
+    token_cache,
+    from_email,
+    smtp_host,
+    smtp_port,
+    relays,
+    relay_strategy,
+    transport,
+    register_url,
+    campaign,
+    coupon_key,
+    no_minify,
+    body_encoding,
+    templates_dir,
+    template,
+    template_column,
+    rate_limit,
+    max_concurrency,
+    control_file,
+    daily_quota,
+    domain_limits,
+    max_outage,
+    poll,
+    poll_interval,
+    keepalive_interval,
+    retry_interval,
+    verbose,
+    quiet,
+    results_path,
+    retry_csv,
+    log_format,
+):
+    """Send coupons to rows as they are appended to a CSV.
+
+    Logs in, opens the database and connects to the relays once, then
+    stays running: rows appended to CSV_FILE go out within seconds of being
+    written instead of on the next cron run. Progress is shared with
+    `send --incremental`. Stop with Ctrl-C or SIGTERM; a batch in progress
+    is finished first.
+    """
+    import asyncio
+
+    from mail_coupons.watch import FileWatcher
+
+    if transport is None and (smtp_username is None or smtp_password is None):
+        raise click.UsageError(
+            "--smtp-username and --smtp-password are required with the SMTP transport"
+        )
+
+    logger = setup_logging(verbose=verbose, quiet=quiet, log_format=log_format)
+    print_banner()
+    transport = create_transport_or_exit(logger, transport)
+    templates = create_templates(
+        logger, templates_dir, template, template_column, not no_minify, transport
+    )
+    # Rows arrive later; their own templates are checked as they're sent
+    load_templates(logger, templates, [], template, None)
+    token_provider = authenticate_or_exit(
+        logger, username, password, login_url, token_cache
+    )
+
+    logger.info(f"Initializing database: {db_path}")
+    db = Database(db_path, campaign)
+    logger.info("Database initialized ✓")
+
+    email_sender = EmailSender(
+        api_endpoint=api_endpoint,
+        bearer_token="",
+        smtp_host=smtp_host,
+        smtp_port=smtp_port,
+        smtp_username=smtp_username,
+        smtp_password=smtp_password,
+        from_email=from_email,
+        register_url=register_url,
+        rate_limit=rate_limit,
+        max_concurrency=max_concurrency,
+        logger=logger,
+        max_outage=max_outage,
+        token_provider=token_provider,
+        relays=relays,
+        relay_strategy=relay_strategy,
+        transport=transport,
+        coupon_codes=create_coupon_codes(logger, db, coupon_key),
+        minify=not no_minify,
+        body_encoding=body_encoding,
+        quota=DailyQuota(db, daily_quota, logger=logger) if daily_quota else None,
+        domain_limits=domain_limits,
+        templates=templates,
+        default_template=template,
+        template_column=template_column,
+    )
+    email_sender.warm_up()
+    watcher = FileWatcher(
+        csv_file, poll_interval=poll_interval, use_inotify=not poll, logger=logger
+    )
+    sink = build_sink(results_path=results_path, retry_csv=retry_csv)
+
+    try:
+        asyncio.run(
+            watch_csv(
+                logger,
+                email_sender,
+                db,
+                watcher,
+                csv_file,
+                on_result=record_callback(db, transport),
+                sink=sink,
+                dry_run=transport is not None and not transport.delivers,
+                extra_columns=recipient_columns(
+                    [], csv_file, templates, template_column
+                ),
+                keepalive_interval=keepalive_interval,
+                retry_interval=retry_interval,
+                control_file=control_file,
+                verbose=verbose,
+            )
+        )
+    except KeyboardInterrupt:
+        logger.warning("Interrupted by user")
+    finally:
+        watcher.close()
+        email_sender.close()
+        if sink is not None:
+            sink.close()
+        flush_logging()
+
+
+@cli.command("serve")
+@click.option("--username", required=True, help="Username for login authentication")
+@click.option("--password", required=True, help="Password for login authentication")
+@click.option(
+    "--smtp-username",
+    default=None,
+    help="SMTP username for email sending (required with the SMTP transport)",
+)
+@click.option(
+    "--smtp-password",
+    default=None,
+    help="SMTP password for email sending (required with the SMTP transport)",
+)
+@click.option(
+    "--db-path",
+    default="mail_coupons.db",
+    help="Path to SQLite database for tracking sent emails",
+)
+@click.option(
+    "--api-endpoint", default=API_ENDPOINT, help="API endpoint for creating coupons"
+)
+@click.option("--login-url", default=LOGIN_URL, help="Login API endpoint URL")
+@click.option(
+    "--token-cache",
+    default=None,
+    envvar="MAIL_COUPONS_TOKEN_CACHE",
+    help="File to cache the bearer token in between runs (mode 0600)",
+)
+@click.option("--from-email", default=FROM_EMAIL, help="From email address")
+@click.option("--smtp-host", default=SES_SMTP_HOST, help="SMTP server hostname")
+@click.option("--smtp-port", default=SES_SMTP_PORT, help="SMTP server port")
+@relay_options
+@transport_option(
+    "'smtp' (default), ses://REGION[?...], http(s)://URL, or mbox:PATH, "
+    "maildir:PATH or null[?delay=SECONDS] for dry runs (see `send --help`)"
+)
+@click.option("--register-url", default=REGISTER_URL, help="Registration URL")
+@campaign_option
+@coupon_option
+@message_options
+@click.option("--rate-limit", default=12, help="Emails per second rate limit", type=int)
+@concurrency_option
+@quota_option
+@domain_limit_option
+@click.option(
+    "--max-outage",
+    default=300.0,
+    type=float,
+    help="Seconds to pause for an unavailable API/SMTP relay before failing",
+)
+@click.option("--host", default="127.0.0.1", help="Interface to accept submissions on")
+@click.option("--port", default=8025, type=int, help="Port to accept submissions on")
+@click.option(
+    "--api-token",
+    default=None,
+    envvar="MAIL_COUPONS_SERVE_TOKEN",
+    help="Bearer token submissions must carry (recommended off localhost)",
+)
+@click.option(
+    "--claim-size",
+    default=100,
+    type=click.IntRange(min=1),
+    help="Most queued recipients sent per batch",
+)
+@click.option(
+    "--keepalive-interval",
+    default=30.0,
+    type=click.FloatRange(min=1),
+    help="Seconds between SMTP NOOPs and token checks while idle",
+)
+@click.option("-v", "--verbose", is_flag=True, help="Enable verbose debug logging")
+@click.option("-q", "--quiet", is_flag=True, help="Only show errors")
+@click.option(
+    "--log-format",
+    type=click.Choice(["text", "json"]),
+    default="text",
+    help="Log output format (json writes one object per line)",
+)
+def serve(
+    username,
+    password,
+    smtp_username,
+    smtp_password,
+    db_path,
+    api_endpoint,
+    login_url,
+    token_cache,
+    from_email,
+    smtp_host,
+    smtp_port,
+    relays,
+    relay_strategy,
+    transport,
+    register_url,
+    campaign,
+    coupon_key,
+    no_minify,
+    body_encoding,
+    rate_limit,
+    max_concurrency,
+    control_file,
+    daily_quota,
+    domain_limits,
+    max_outage,
+    host,
+    port,
+    api_token,
+    claim_size,
+    keepalive_interval,
+    verbose,
+    quiet,
+    log_format,
+):
+    """Accept recipients over local HTTP and send them from a queue.
+
+    POST recipients as JSON to /recipients (one object or an array) and
+    poll /recipients/ID for their status. Submissions are stored in the
+    database before they are acknowledged and sent through one long-lived
+    sender, so a restart picks up where it left off. Stop with Ctrl-C or
+    SIGTERM.
+    """
+    import asyncio
+
+    from mail_coupons.service import SubmissionServer
+
+    if transport is None and (smtp_username is None or smtp_password is None):
+        raise click.UsageError(
+            "--smtp-username and --smtp-password are required with the SMTP transport"
+        )
+
+    logger = setup_logging(verbose=verbose, quiet=quiet, log_format=log_format)
+    print_banner()
+    transport = create_transport_or_exit(logger, transport)
+    token_provider = authenticate_or_exit(
+        logger, username, password, login_url, token_cache
+    )
+
+    logger.info(f"Initializing database: {db_path}")
+    db = Database(db_path, campaign)
+    logger.info("Database initialized ✓")
+
+    try:
+        server = SubmissionServer(db, host, port, token=api_token, logger=logger)
+    except OSError as e:
+        logger.error(f"Can't listen on {host}:{port}: {e}")
+        sys.exit(1)
+
+    email_sender = EmailSender(
+        api_endpoint=api_endpoint,
+        bearer_token="",
+        smtp_host=smtp_host,
+        smtp_port=smtp_port,
+        smtp_username=smtp_username,
+        smtp_password=smtp_password,
+        from_email=from_email,
+        register_url=register_url,
+        rate_limit=rate_limit,
+        max_concurrency=max_concurrency,
+        logger=logger,
+        max_outage=max_outage,
+        token_provider=token_provider,
+        relays=relays,
+        relay_strategy=relay_strategy,
+        transport=transport,
+        coupon_codes=create_coupon_codes(logger, db, coupon_key),
+        minify=not no_minify,
+        body_encoding=body_encoding,
+        quota=DailyQuota(db, daily_quota, logger=logger) if daily_quota else None,
+        domain_limits=domain_limits,
+    )
+    email_sender.warm_up()
+    server.start()
+
+    try:
+        asyncio.run(
+            serve_queue(
+                logger,
+                email_sender,
+                db,
+                server,
+                on_result=record_callback(db, transport),
+                claim_size=claim_size,
+                keepalive_interval=keepalive_interval,
+                control_file=control_file,
+                verbose=verbose,
+            )
+        )
+    except KeyboardInterrupt:
+        logger.warning("Interrupted by user")
+    finally:
+        server.close()
+        email_sender.close()
+        flush_logging()
+
+
+@cli.command("suppress")
+@click.argument(
+    "notification_files",
+    nargs=-1,
+    required=True,
+    type=click.Path(exists=True, dir_okay=False),
+)
+@click.option(
+    "--db-path",
+    default="mail_coupons.db",
+    help="Path to SQLite database for tracking sent emails",
+)
+@click.option("-q", "--quiet", is_flag=True, help="Only show errors")
+def suppress(notification_files, db_path, quiet):
+    """Add hard bounces and complaints to the suppression list.
+
+    Reads SES bounce/complaint notifications (raw, wrapped in SNS envelopes,
+    as a JSON array or one per line). Suppressed addresses are skipped by
+    every later run that uses the same database.
+    """
+    logger = setup_logging(quiet=quiet)
+    suppression = SuppressionList(Database(db_path))
+
+    total_added = 0
+    for path in notification_files:
+        try:
+            entries, notifications = parse_notification_file(path)
+        except (OSError, ValueError) as e:
+            logger.error(f"Error reading {path}: {e}")
+            sys.exit(1)
+        added = suppression.add(entries, source=os.path.basename(path))
+        total_added += added
+        logger.info(
+            f"{path}: {notifications} notifications, {len(entries)} hard bounces "
+            f"or complaints, {added} new addresses"
+        )
+
+    logger.info(f"Suppressed {total_added} new addresses ({len(suppression)} in total)")
+    flush_logging()
+
+
+@cli.command("status")
+@click.option(
+    "--db-path",
+    default="mail_coupons.db",
+    help="Path to SQLite database for tracking sent emails",
+)
+def status(db_path):
+    """Show how many emails each campaign in the database has sent."""
+    if not os.path.exists(db_path):
+        raise click.UsageError(f"No database at {db_path}")
+    db = Database(db_path)
+    campaigns = db.campaign_stats()
+    width = max(len("Campaign"), *(len(c["name"]) for c in campaigns))
+    click.echo(f"{'Campaign':<{width}}  {'Sent':>8}  First sent           Last sent")
+    for campaign in campaigns:
+        click.echo(
+            f"{campaign['name']:<{width}}  {campaign['sent']:>8}  "
+            f"{campaign['first_sent_at'] or '-':<19}  {campaign['last_sent_at'] or '-'}"
+        )
+    last_day = sum(db.send_counts(time.time() - WINDOW).values())
+    click.echo(f"\nSent in the last 24 hours (all campaigns): {last_day}")
+
+
+@cli.command("message-size")
+@click.option(
+    "--name",
+    "names",
+    multiple=True,
+    default=("John Doe", "Zoë Ananya"),
+    show_default=True,
+    help="Recipient name to measure a message for (repeatable)",
+)
+@click.option("--from-email", default=FROM_EMAIL, help="From email address")
+@click.option("--register-url", default=REGISTER_URL, help="Registration URL")
+@message_options
+def message_size(names, from_email, register_url, no_minify, body_encoding):
+    """Show bytes per message before and after size reduction.
+
+    "Before" is the template as written with the default MIME encoding
+    (base64 for non-ASCII text); "after" uses --no-minify/--body-encoding.
+    """
+
+    def sender(**kwargs) -> EmailSender:
+        return EmailSender(
+            api_endpoint="",
+            bearer_token="",
+            smtp_host="",
+            smtp_port=0,
+            smtp_username="",
+            smtp_password="",
+            from_email=from_email,
+            register_url=register_url,
+            transport=NullTransport(),
+            **kwargs,
+        )
+
+    before = sender(minify=False, body_encoding="base64")
+    after = sender(minify=not no_minify, body_encoding=body_encoding)
+    width = max(len("Name"), *(len(name) for name in names))
+    click.echo(f"{'Name':<{width}}  {'Before':>7}  {'After':>7}  Saved")
+    try:
+        for name in names:
+            sizes = [
+                len(s.build_message("to@example.com", name, "MLNCAAAAAA").as_bytes())
+                for s in (before, after)
+            ]
+            click.echo(
+                f"{name:<{width}}  {sizes[0]:>7}  {sizes[1]:>7}  "
+                f"{1 - sizes[1] / sizes[0]:.0%}"
+            )
+    finally:
+        before.close()
+        after.close()
 
 
 if __name__ == "__main__":
-    main()
+    cli()
@@ -1,5 +1,12 @@
 """Mail Coupons package."""
 
-from .login import authenticate_user
-
 __all__ = ["authenticate_user"]
+
+
+def __getattr__(name):
+    # Resolve exports on first use so importing a submodule stays cheap
+    if name == "authenticate_user":
+        from .login import authenticate_user
+
+        return authenticate_user
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,38 @@
+"""Deferred imports for modules that are slow to load."""
+
+import importlib.util
+import sys
+import types
+
+
+def lazy_import(name: str) -> types.ModuleType:
+    """Return a module that is only executed on first attribute access.
+
+    Used for dependencies such as ``requests`` and ``smtplib`` that cost tens
+    of milliseconds to import but are not needed by every run (e.g. an
+    incremental run with no new rows never sends anything).
+
+    Not suitable for ``asyncio``: logging checks ``sys.modules["asyncio"]``
+    for every record, which would load it straight away.
+
+    Args:
+        name: Absolute module name
+
+    Returns:
+        The module (already loaded if it was imported before)
+
+    Raises:
+        ModuleNotFoundError: If the module can't be found
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named {name!r}", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
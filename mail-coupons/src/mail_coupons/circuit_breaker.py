@@ -0,0 +1,196 @@
+"""Circuit breaker for external dependencies (coupon API, SMTP relay)."""
+
+import logging
+import threading
+import time
+from collections import deque
+from typing import Callable, Optional
+
+
+class CircuitBreaker:
+    """Closed/open/half-open circuit breaker with error-rate and latency trips.
+
+    A call counts as bad if it failed with an outage-type error or took
+    longer than ``slow_call_seconds``. Once at least ``min_calls`` of the
+    last ``window_size`` calls are recorded and the bad fraction reaches
+    ``failure_rate_threshold``, the breaker opens. After ``open_seconds`` it
+    lets ``half_open_probes`` calls through; if they all succeed it closes,
+    and any bad probe opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str,
+        failure_rate_threshold: float = 0.5,
+        slow_call_seconds: Optional[float] = None,
+        window_size: int = 20,
+        min_calls: int = 5,
+        open_seconds: float = 10.0,
+        half_open_probes: int = 2,
+        logger: Optional[logging.Logger] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """Initialize the breaker.
+
+        Args:
+            name: Dependency name used in logs and errors
+            failure_rate_threshold: Fraction of bad calls that opens the breaker
+            slow_call_seconds: Calls slower than this count as bad (None: off)
+            window_size: Number of recent calls considered
+            min_calls: Calls required in the window before it can trip
+            open_seconds: Time to stay open before probing
+            half_open_probes: Successful probes required to close
+            logger: Optional logger instance
+            clock: Monotonic time source
+        """
+        self.name = name
+        self.failure_rate_threshold = failure_rate_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        self.logger = logger or logging.getLogger(__name__)
+        self._clock = clock
+        self._window: deque = deque(maxlen=window_size)
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        """Current state, moving OPEN to HALF_OPEN once the timeout passed."""
+        with self._lock:
+            self._maybe_half_open()
+            return self._state
+
+    def _maybe_half_open(self):
+        if (
+            self._state == self.OPEN
+            and self._clock() - self._opened_at >= self.open_seconds
+        ):
+            self._state = self.HALF_OPEN
+            self._probes_in_flight = 0
+            self._probe_successes = 0
+            self.logger.info("Circuit '%s' half-open, probing", self.name)
+
+    def _open(self, reason: str):
+        self._state = self.OPEN
+        self._opened_at = self._clock()
+        self._window.clear()
+        self.logger.warning(
+            "Circuit '%s' opened (%s), pausing for %.0fs",
+            self.name,
+            reason,
+            self.open_seconds,
+        )
+
+    def available(self) -> bool:
+        """Whether a call would currently be let through (non-consuming)."""
+        with self._lock:
+            self._maybe_half_open()
+            if self._state == self.HALF_OPEN:
+                return self._probes_in_flight < self.half_open_probes
+            return self._state == self.CLOSED
+
+    def allow_request(self) -> bool:
+        """Reserve permission for one call.
+
+        Returns:
+            True if the call may proceed; it must then be recorded
+        """
+        with self._lock:
+            self._maybe_half_open()
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.HALF_OPEN:
+                if self._probes_in_flight < self.half_open_probes:
+                    self._probes_in_flight += 1
+                    return True
+            return False
+
+    def record(self, success: bool, latency: float = 0.0):
+        """Record the outcome of a call let through by allow_request.
+
+        Args:
+            success: False if the call failed because the dependency is down
+            latency: Call duration in seconds
+        """
+        slow = self.slow_call_seconds is not None and latency >= self.slow_call_seconds
+        bad = not success or slow
+
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._probes_in_flight = max(0, self._probes_in_flight - 1)
+                if bad:
+                    self._open("probe failed")
+                    return
+                self._probe_successes += 1
+                if self._probe_successes >= self.half_open_probes:
+                    self._state = self.CLOSED
+                    self._window.clear()
+                    self.logger.info("Circuit '%s' closed, resuming", self.name)
+                return
+
+            if self._state == self.OPEN:
+                # Late result from a call started before the breaker opened
+                return
+
+            self._window.append(bad)
+            if len(self._window) >= self.min_calls:
+                bad_rate = sum(self._window) / len(self._window)
+                if bad_rate >= self.failure_rate_threshold:
+                    self._open(f"{bad_rate:.0%} of recent calls failed or were slow")
+
+    def _retry_delay(self) -> float:
+        with self._lock:
+            if self._state == self.OPEN:
+                remaining = self.open_seconds - (self._clock() - self._opened_at)
+                return min(max(remaining, 0.05), 1.0)
+        return 0.05
+
+    def wait(self, timeout: float) -> bool:
+        """Block until a call is allowed, reserving it.
+
+        Args:
+            timeout: Maximum seconds to wait
+
+        Returns:
+            True if permission was reserved, False on timeout
+        """
+        deadline = time.monotonic() + timeout
+        while not self.allow_request():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            time.sleep(min(self._retry_delay(), remaining))
+        return True
+
+    def wait_available_sync(self, timeout: float) -> bool:
+        """Block until calls are allowed without reserving one.
+
+        Args:
+            timeout: Maximum seconds to wait
+
+        Returns:
+            True if the breaker is letting calls through, False on timeout
+        """
+        deadline = time.monotonic() + timeout
+        while not self.available():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            time.sleep(min(self._retry_delay(), remaining))
+        return True
+
+    async def wait_available(self):
+        """Wait (without blocking the event loop) until calls are allowed."""
+        import asyncio
+
+        while not self.available():
+            await asyncio.sleep(self._retry_delay())
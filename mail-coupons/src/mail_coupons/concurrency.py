@@ -0,0 +1,134 @@
+"""Latency-aware sizing of the in-flight window (Little's law)."""
+
+import logging
+import math
+from typing import Any, Dict, Optional
+
+
+class ConcurrencyController:
+    """Size the number of in-flight recipients to sustain a target rate.
+
+    By Little's law, sustaining ``target_rate`` recipients per second when
+    each takes ``latency`` seconds needs ``target_rate * latency`` of them
+    in flight. The latency is a moving average of observed per-recipient
+    processing times, and the window adds ``headroom`` for jitter plus one
+    slot for the recipient waiting on the rate limiter, clamped to
+    ``[min_window, max_window]``. Until the first observation the window is
+    ``target_rate`` (one second's worth).
+
+    Decisions that move the window by more than ``log_change`` are logged
+    at INFO with ``event="concurrency"`` fields, so they show up as metrics
+    in JSON logs.
+    """
+
+    def __init__(
+        self,
+        target_rate: float,
+        max_window: int = 256,
+        min_window: int = 1,
+        headroom: float = 1.25,
+        smoothing: float = 0.2,
+        log_change: float = 0.1,
+        logger: Optional[logging.Logger] = None,
+    ):
+        """Initialize the controller.
+
+        Args:
+            target_rate: Recipients per second to sustain
+            max_window: Upper bound on recipients in flight
+            min_window: Lower bound on recipients in flight
+            headroom: Multiplier on the Little's-law estimate
+            smoothing: Weight of each new sample in the latency average
+            log_change: Relative window change that gets logged at INFO
+            logger: Optional logger instance
+
+        Raises:
+            ValueError: If the bounds are inconsistent
+        """
+        if not 1 <= min_window <= max_window:
+            raise ValueError("Need 1 <= min_window <= max_window")
+        self.target_rate = target_rate
+        self.max_window = max_window
+        self.min_window = min_window
+        self.headroom = headroom
+        self.smoothing = smoothing
+        self.log_change = log_change
+        self.logger = logger or logging.getLogger(__name__)
+        self.latency = 0.0
+        self.samples = 0
+        self.window = self._clamp(math.ceil(target_rate))
+        self.peak_window = self.window
+        self._logged_window = self.window
+
+    def _clamp(self, window: int) -> int:
+        return max(self.min_window, min(self.max_window, window))
+
+    def observe(self, latency: float):
+        """Record one recipient's processing time and resize the window.
+
+        Args:
+            latency: Seconds the recipient spent being processed
+        """
+        self.samples += 1
+        if self.samples == 1:
+            self.latency = latency
+        else:
+            self.latency += self.smoothing * (latency - self.latency)
+        self._resize()
+
+    def set_target_rate(self, target_rate: float):
+        """Change the rate to sustain and resize the window for it."""
+        self.target_rate = target_rate
+        if self.samples:
+            self._resize()
+        else:
+            self.window = self._clamp(math.ceil(target_rate))
+
+    def set_max_window(self, max_window: int):
+        """Change the upper bound and re-clamp the window.
+
+        Raises:
+            ValueError: If max_window is below min_window
+        """
+        if max_window < self.min_window:
+            raise ValueError(f"max_window must be at least {self.min_window}")
+        self.max_window = max_window
+        if self.samples:
+            self._resize()
+        else:
+            self.window = self._clamp(math.ceil(self.target_rate))
+
+    def _resize(self):
+        """Recompute the window from the current latency estimate."""
+        needed = math.ceil(self.target_rate * self.latency * self.headroom) + 1
+        self.window = self._clamp(needed)
+        self.peak_window = max(self.peak_window, self.window)
+
+        if abs(self.window - self._logged_window) > max(
+            1, self._logged_window * self.log_change
+        ):
+            level = logging.INFO
+            if self.window == self.max_window and needed > self.max_window:
+                level = logging.WARNING
+            self.logger.log(
+                level,
+                "Concurrency window %d -> %d (latency %.0f ms at %.1f/s%s)",
+                self._logged_window,
+                self.window,
+                self.latency * 1000,
+                self.target_rate,
+                f", capped from {needed}" if needed > self.max_window else "",
+                extra=self.metrics(),
+            )
+            self._logged_window = self.window
+
+    def metrics(self) -> Dict[str, Any]:
+        """Current state as structured log fields."""
+        return {
+            "event": "concurrency",
+            "window": self.window,
+            "peak_window": self.peak_window,
+            "max_window": self.max_window,
+            "latency_ms": round(self.latency * 1000, 1),
+            "target_rate": self.target_rate,
+        }
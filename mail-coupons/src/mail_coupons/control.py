@@ -0,0 +1,235 @@
+"""Live control of a running batch through a control file or signals."""
+
+import logging
+import os
+import signal
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple
+
+if TYPE_CHECKING:
+    import asyncio
+
+    from .email_sender import EmailSender
+
+# Factor SIGUSR1 raises and SIGUSR2 lowers the rate by
+RATE_STEP = 1.25
+
+_TRUE = ("1", "true", "yes", "on")
+_FALSE = ("0", "false", "no", "off")
+
+
+def parse_control_file(text: str) -> Dict[str, Any]:
+    """Parse a control file of ``key = value`` lines.
+
+    Keys are ``rate`` (emails/second), ``max_concurrency`` and ``paused``
+    (true/false). ``pause`` and ``resume`` on a line of their own are
+    shorthand for ``paused = true/false``. Blank lines and ``#`` comments
+    are ignored.
+
+    Args:
+        text: File contents
+
+    Returns:
+        Dict of the settings present
+
+    Raises:
+        ValueError: On an unknown key or invalid value
+    """
+    settings: Dict[str, Any] = {}
+    for number, raw in enumerate(text.splitlines(), 1):
+        line = raw.split("#", 1)[0].strip()
+        if not line:
+            continue
+        if line.lower() in ("pause", "resume"):
+            settings["paused"] = line.lower() == "pause"
+            continue
+
+        key, sep, value = (part.strip() for part in line.partition("="))
+        key = key.lower().replace("-", "_")
+        try:
+            if not sep:
+                raise ValueError("expected key = value")
+            if key == "rate":
+                settings[key] = float(value)
+                if settings[key] <= 0:
+                    raise ValueError("rate must be positive")
+            elif key == "max_concurrency":
+                settings[key] = int(value)
+                if settings[key] < 1:
+                    raise ValueError("max_concurrency must be at least 1")
+            elif key == "paused":
+                if value.lower() not in _TRUE + _FALSE:
+                    raise ValueError("paused must be true or false")
+                settings[key] = value.lower() in _TRUE
+            else:
+                raise ValueError(f"unknown setting {key!r}")
+        except ValueError as e:
+            raise ValueError(f"line {number}: {e}") from None
+    return settings
+
+
+class RuntimeControl:
+    """Apply rate, concurrency and pause changes to a running EmailSender.
+
+    Two ways in:
+
+    - a control file, polled for changes; edits made after the run starts
+      are applied (see parse_control_file for the format)
+    - SIGUSR1 / SIGUSR2, which raise / lower the rate by ``RATE_STEP``
+
+    Changes go through the sender's set_rate / set_max_concurrency /
+    pause / resume, so recipients already in flight are not affected.
+    """
+
+    def __init__(
+        self,
+        sender: "EmailSender",
+        control_file: Optional[str] = None,
+        poll_interval: float = 1.0,
+        logger: Optional[logging.Logger] = None,
+    ):
+        """Initialize the controller.
+
+        Args:
+            sender: Sender to control
+            control_file: Optional path of the control file
+            poll_interval: Seconds between control file checks
+            logger: Optional logger instance
+        """
+        self.sender = sender
+        self.control_file = control_file
+        self.poll_interval = poll_interval
+        self.logger = logger or logging.getLogger(__name__)
+        self._applied: Dict[str, Any] = {}
+        self._stamp = self._file_stamp()
+        self._task: Optional["asyncio.Task"] = None
+        self._signals: Tuple[int, ...] = ()
+
+    def _file_stamp(self) -> Optional[Tuple[int, int]]:
+        """(mtime, size) of the control file, or None if it doesn't exist."""
+        if not self.control_file:
+            return None
+        try:
+            stat = os.stat(self.control_file)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def check_file(self) -> bool:
+        """Apply the control file if it changed since the last check.
+
+        Returns:
+            True if the file changed
+        """
+        stamp = self._file_stamp()
+        if stamp is None or stamp == self._stamp:
+            return False
+        self._stamp = stamp
+        try:
+            with open(self.control_file, "r", encoding="utf-8") as f:
+                settings = parse_control_file(f.read())
+        except (OSError, ValueError) as e:
+            self.logger.warning("Ignoring control file %s: %s", self.control_file, e)
+            return True
+
+        # Only act on settings that changed in the file, so an untouched
+        # line doesn't undo a signal sent in between
+        changed = {k: v for k, v in settings.items() if self._applied.get(k) != v}
+        self._applied.update(settings)
+        self.apply(source="control file", **changed)
+        return True
+
+    def apply(
+        self,
+        source: str,
+        rate: Optional[float] = None,
+        max_concurrency: Optional[int] = None,
+        paused: Optional[bool] = None,
+    ):
+        """Apply settings to the sender and log each change.
+
+        Args:
+            source: What asked for the change, for the log
+            rate: New emails/second
+            max_concurrency: New cap on recipients in flight
+            paused: Pause (True) or resume (False) starting new recipients
+        """
+        sender = self.sender
+        if rate is not None:
+            old = sender.rate_limiter.max_requests_per_second
+            sender.set_rate(rate)
+            self._log(source, "rate", old, rate)
+        if max_concurrency is not None:
+            old = sender.concurrency.max_window
+            sender.set_max_concurrency(max_concurrency)
+            self._log(source, "max_concurrency", old, max_concurrency)
+        if paused is not None and paused != sender.rate_limiter.paused:
+            if paused:
+                sender.pause()
+            else:
+                sender.resume()
+            self._log(source, "paused", not paused, paused)
+
+    def _log(self, source: str, setting: str, old: Any, new: Any):
+        self.logger.info(
+            "%s: %s %s -> %s",
+            source.capitalize(),
+            setting,
+            old,
+            new,
+            extra={"event": "control", "setting": setting, "value": new},
+        )
+
+    def step_rate(self, factor: float):
+        """Multiply the rate by ``factor`` (used by the signal handlers)."""
+        rate = self.sender.rate_limiter.max_requests_per_second * factor
+        self.apply(source="signal", rate=max(round(rate, 2), 0.01))
+
+    async def _run(self):
+        """Poll the control file until cancelled."""
+        import asyncio
+
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            self.check_file()
+
+    def start(self):
+        """Start watching on the running event loop.
+
+        Signal handlers are only installed where the loop supports them
+        (Unix, main thread).
+        """
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        if self.control_file:
+            self._task = loop.create_task(self._run())
+
+        installed = []
+        for signum, factor in (
+            (getattr(signal, "SIGUSR1", None), RATE_STEP),
+            (getattr(signal, "SIGUSR2", None), 1 / RATE_STEP),
+        ):
+            if signum is None:
+                continue
+            try:
+                loop.add_signal_handler(signum, self.step_rate, factor)
+            except (NotImplementedError, RuntimeError, ValueError):
+                continue
+            installed.append(signum)
+        self._signals = tuple(installed)
+
+    async def stop(self):
+        """Stop watching and remove the signal handlers."""
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        for signum in self._signals:
+            loop.remove_signal_handler(signum)
+        self._signals = ()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
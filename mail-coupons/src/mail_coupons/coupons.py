@@ -0,0 +1,256 @@
+"""Collision-free coupon code generation.
+
+Codes are ``MLNC`` followed by three letters and three digits in any order
+(``MLNC7K2Q9X``), the shape codes have always had. Two generators are
+provided:
+
+- ``RandomCouponCodes`` draws codes from the OS CSPRNG in bulk and skips any
+  code already issued in this run or recorded in the database.
+- ``KeyedCouponCodes`` derives each code from a secret, the campaign and
+  the recipient's roll number, so a rerun reproduces the same code without
+  a lookup and an already-created coupon isn't created twice.
+
+Both keep an in-memory map of issued codes to roll numbers, seeded from the
+tracking database, so a collision costs a redraw instead of a failed API
+call.
+"""
+
+import hashlib
+import hmac
+import itertools
+import secrets
+import string
+import threading
+from typing import Callable, Dict, List, Mapping, Optional
+
+CODE_PREFIX = "MLNC"
+CODE_LETTERS = 3
+CODE_DIGITS = 3
+CODE_LENGTH = CODE_LETTERS + CODE_DIGITS
+ALPHABET = string.ascii_uppercase + string.digits
+
+# Positions the letters can take; the digits fill the rest
+_LETTER_SLOTS = tuple(itertools.combinations(range(CODE_LENGTH), CODE_LETTERS))
+_DIGIT_SLOTS = tuple(
+    tuple(i for i in range(CODE_LENGTH) if i not in slots) for slots in _LETTER_SLOTS
+)
+_LETTER_SPACE = len(string.ascii_uppercase) ** CODE_LETTERS
+_DIGIT_SPACE = len(string.digits) ** CODE_DIGITS
+_CODE_SPACE = len(_LETTER_SLOTS) * _LETTER_SPACE * _DIGIT_SPACE
+
+# Each random code takes this many bytes; draws at or above the limit are
+# dropped so ``% _CODE_SPACE`` leaves every code equally likely
+_DRAW_BYTES = 5
+_UNBIASED_LIMIT = 256**_DRAW_BYTES - 256**_DRAW_BYTES % _CODE_SPACE
+
+
+def generate_coupon_code() -> str:
+    """Generate a random coupon code: MLNC + 3 letters and 3 digits.
+
+    Returns:
+        A coupon code string
+    """
+    return encode_code(secrets.randbelow(_CODE_SPACE))
+
+
+def encode_code(value: int) -> str:
+    """Encode an integer as a coupon code (modulo the code space).
+
+    The value picks the letters' positions, then the letters and the digits.
+    """
+    value %= _CODE_SPACE
+    value, slots = divmod(value, len(_LETTER_SLOTS))
+    digits, letters = divmod(value, _LETTER_SPACE)
+    chars = [""] * CODE_LENGTH
+    for positions, value, symbols in (
+        (_LETTER_SLOTS[slots], letters, string.ascii_uppercase),
+        (_DIGIT_SLOTS[slots], digits, string.digits),
+    ):
+        for position in reversed(positions):
+            value, index = divmod(value, len(symbols))
+            chars[position] = symbols[index]
+    return CODE_PREFIX + "".join(chars)
+
+
+class CouponCodes:
+    """Base class for issuing unique coupon codes to recipients.
+
+    Subclasses implement ``_candidate``; ``issue`` keeps drawing candidates
+    until one isn't held by another recipient. Thread-safe.
+    """
+
+    #: Codes to try per recipient before giving up
+    max_attempts = 8
+
+    def __init__(
+        self,
+        created: Optional[Mapping[str, str]] = None,
+        on_created: Optional[Callable[[str, str], None]] = None,
+    ):
+        """Initialize the generator.
+
+        Args:
+            created: Codes already created via the API, mapped to the roll
+                number they were issued to (e.g. Database.coupon_codes())
+            on_created: Called with (code, roll_no) when a coupon has been
+                created, e.g. to record it in the database
+        """
+        self._owners: Dict[str, Optional[str]] = dict(created or {})
+        self._created = set(self._owners)
+        self._on_created = on_created
+        self._lock = threading.Lock()
+        self.issued = 0
+        self.collisions = 0
+
+    def _candidate(self, roll_no: str, attempt: int) -> str:
+        """Return the ``attempt``-th candidate code for a recipient."""
+        raise NotImplementedError
+
+    def issue(self, roll_no: str) -> str:
+        """Pick a code for a recipient that no other recipient holds.
+
+        Args:
+            roll_no: The recipient's roll number
+
+        Returns:
+            The coupon code
+
+        Raises:
+            RuntimeError: If every attempt collided
+        """
+        with self._lock:
+            for attempt in range(self.max_attempts):
+                code = self._candidate(roll_no, attempt)
+                if code not in self._owners:
+                    self._owners[code] = roll_no
+                    self.issued += 1
+                    return code
+                if self._owners[code] == roll_no:
+                    return code
+                self.collisions += 1
+        raise RuntimeError(
+            f"No free coupon code for {roll_no} after {self.max_attempts} attempts"
+        )
+
+    def is_created(self, code: str) -> bool:
+        """Whether a coupon with this code was already created via the API."""
+        with self._lock:
+            return code in self._created
+
+    def confirm(self, code: str, roll_no: str):
+        """Record that the coupon API created ``code`` for ``roll_no``."""
+        with self._lock:
+            self._owners[code] = roll_no
+            self._created.add(code)
+        if self._on_created is not None:
+            self._on_created(code, roll_no)
+
+    def reject(self, code: str):
+        """Mark a code the API reported as already taken by someone else."""
+        with self._lock:
+            self._owners[code] = None
+            self.collisions += 1
+
+
+class RandomCouponCodes(CouponCodes):
+    """Coupon codes drawn from the OS CSPRNG.
+
+    Random bytes are fetched ``batch_size`` codes at a time, five per code,
+    and the rare draws that would bias the code space are rejected, so each
+    code costs a slice of a buffer rather than a ``secrets`` call.
+    """
+
+    def __init__(
+        self,
+        created: Optional[Mapping[str, str]] = None,
+        on_created: Optional[Callable[[str, str], None]] = None,
+        batch_size: int = 4096,
+    ):
+        """Initialize the generator.
+
+        Args:
+            created: Codes already created, mapped to roll numbers
+            on_created: Called with (code, roll_no) after each creation
+            batch_size: Codes to generate per CSPRNG call
+        """
+        super().__init__(created, on_created)
+        self.batch_size = batch_size
+        self._buffer: List[str] = []
+
+    def _refill(self):
+        """Generate the next batch of codes into the buffer."""
+        values: List[int] = []
+        while len(values) < self.batch_size:
+            # Under 0.03% of draws are rejected, so this is one call
+            data = secrets.token_bytes((self.batch_size - len(values)) * _DRAW_BYTES)
+            for i in range(0, len(data), _DRAW_BYTES):
+                value = int.from_bytes(data[i : i + _DRAW_BYTES], "big")
+                if value < _UNBIASED_LIMIT:
+                    values.append(value)
+        self._buffer = [encode_code(value) for value in values]
+
+    def _candidate(self, roll_no: str, attempt: int) -> str:
+        if not self._buffer:
+            self._refill()
+        return self._buffer.pop()
+
+
+class KeyedCouponCodes(CouponCodes):
+    """Deterministic coupon codes derived from a secret.
+
+    Each candidate is HMAC-SHA256(secret, campaign, roll_no, attempt) mapped
+    onto the code space, so the same recipient in the same campaign always gets the same
+    code. Without the secret, codes can't be predicted from roll numbers.
+    """
+
+    def __init__(
+        self,
+        secret: bytes,
+        campaign: str,
+        created: Optional[Mapping[str, str]] = None,
+        on_created: Optional[Callable[[str, str], None]] = None,
+    ):
+        """Initialize the generator.
+
+        Args:
+            secret: Key the codes are derived with
+            campaign: Campaign the codes belong to
+            created: Codes already created, mapped to roll numbers
+            on_created: Called with (code, roll_no) after each creation
+
+        Raises:
+            ValueError: If the secret is empty
+        """
+        if not secret:
+            raise ValueError("Keyed coupon codes need a non-empty secret")
+        super().__init__(created, on_created)
+        self._secret = secret
+        self.campaign = campaign
+
+    def _candidate(self, roll_no: str, attempt: int) -> str:
+        message = f"{self.campaign}\0{roll_no}\0{attempt}".encode("utf-8")
+        digest = hmac.new(self._secret, message, hashlib.sha256).digest()
+        return encode_code(int.from_bytes(digest, "big"))
+
+
+def collision_probability(codes: int, existing: int = 0) -> float:
+    """Chance that drawing ``codes`` random codes hits any duplicate.
+
+    Birthday bound over the code space, counting ``existing`` codes already
+    in use; this is the rate at which an unchecked generator would fail.
+    """
+    probability_clear = 1.0
+    for i in range(codes):
+        probability_clear *= 1 - (existing + i) / _CODE_SPACE
+    return 1 - probability_clear
+
+
+def is_valid_code(code: str) -> bool:
+    """Whether ``code`` is MLNC followed by 3 letters and 3 digits."""
+    rest = code[len(CODE_PREFIX) :]
+    return (
+        code.startswith(CODE_PREFIX)
+        and len(rest) == CODE_LENGTH
+        and all(c in ALPHABET for c in rest)
+        and sum(c in string.digits for c in rest) == CODE_DIGITS
+    )
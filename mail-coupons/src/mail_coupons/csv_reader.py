@@ -1,10 +1,66 @@
 """CSV reader module for reading recipient data."""
 
 import csv
-from typing import List, Dict, Any
+import hashlib
+import io
+from typing import List, Dict, Iterable, Iterator, Optional, Tuple
 
+from .records import RECIPIENT_FIELDS, Recipient, RecipientTable
 
-def read_recipients(csv_path: str) -> List[Dict[str, Any]]:
+# Bytes sampled from each end of the consumed prefix by csv_fingerprint
+FINGERPRINT_BYTES = 4096
+
+
+def _check_columns(fieldnames: Optional[List[str]], extra_columns: List[str]):
+    """Raise ValueError if an extra column is not in the CSV header."""
+    missing = [c for c in extra_columns if c not in (fieldnames or [])]
+    if missing:
+        raise ValueError(f"CSV has no column(s): {', '.join(missing)}")
+
+
+def _parse_rows(
+    rows: Iterable[Dict[str, str]], extra_columns: List[str]
+) -> Iterator[Recipient]:
+    """Turn CSV rows into Recipient records, skipping invalid rows."""
+    for row in rows:
+        # Skip empty rows
+        if not any(row.values()):
+            continue
+
+        roll_no = (row.get("roll_no") or "").strip()
+        email = (row.get("email") or "").strip()
+
+        # Skip if roll_no or email is empty
+        if not roll_no or not email:
+            continue
+
+        # Parse is_paid boolean
+        is_paid_str = (row.get("is_paid") or "").strip().lower()
+
+        yield Recipient(
+            roll_no=roll_no,
+            email=email,
+            name=(row.get("name") or "").strip(),
+            is_paid=is_paid_str in ("true", "1", "yes", "paid"),
+            extra=tuple(
+                (column, (row.get(column) or "").strip()) for column in extra_columns
+            ),
+        )
+
+
+def read_header(csv_path: str) -> List[str]:
+    """Column names in a CSV file's header (empty for an empty file).
+
+    Raises:
+        FileNotFoundError: If the file doesn't exist
+    """
+    with open(csv_path, "r", newline="", encoding="utf-8") as csvfile:
+        return next(csv.reader(csvfile), [])
+
+
+def read_recipients(
+    csv_path: str, extra_columns: Optional[List[str]] = None
+) -> List[Recipient]:
     """Read recipients from CSV file.
 
     Expected CSV format:
@@ -12,38 +68,118 @@ def read_recipients(csv_path: str) -> List[Dict[str, Any]]:
 
     Args:
         csv_path: Path to the CSV file
+        extra_columns: Additional CSV columns to keep on each recipient
+            (as stripped strings), e.g. for priority scheduling
 
     Returns:
-        List of recipient dictionaries
+        List of Recipient records (which also read like dictionaries)
 
     Raises:
         FileNotFoundError: If the file doesn't exist
+        ValueError: If an extra column is not in the CSV header
     """
     recipients = []
+    extra_columns = [c for c in extra_columns or [] if c not in RECIPIENT_FIELDS]
 
     with open(csv_path, "r", newline="", encoding="utf-8") as csvfile:
         reader = csv.DictReader(csvfile)
+        _check_columns(reader.fieldnames, extra_columns)
+        recipients.extend(_parse_rows(reader, extra_columns))
 
-        for row in reader:
-            # Skip empty rows
-            if not any(row.values()):
-                continue
+    return recipients
 
-            # Parse is_paid boolean
-            is_paid_str = row.get("is_paid", "").strip().lower()
-            is_paid = is_paid_str in ("true", "1", "yes", "paid")
 
-            recipient = {
-                "roll_no": row.get("roll_no", "").strip(),
-                "email": row.get("email", "").strip(),
-                "name": row.get("name", "").strip(),
-                "is_paid": is_paid,
-            }
+def read_recipient_table(
+    csv_path: str, extra_columns: Optional[List[str]] = None
+) -> RecipientTable:
+    """Read recipients from CSV file into a column store.
 
-            # Skip if roll_no or email is empty
-            if not recipient["roll_no"] or not recipient["email"]:
-                continue
+    Same parsing as read_recipients, but rows are packed into a
+    RecipientTable as they are read, which needs much less memory for
+    large files.
 
-            recipients.append(recipient)
+    Args:
+        csv_path: Path to the CSV file
+        extra_columns: Additional CSV columns to keep on each recipient
 
-    return recipients
+    Returns:
+        RecipientTable of the valid rows
+
+    Raises:
+        FileNotFoundError: If the file doesn't exist
+        ValueError: If an extra column is not in the CSV header
+    """
+    extra_columns = [c for c in extra_columns or [] if c not in RECIPIENT_FIELDS]
+    table = RecipientTable(extra_columns)
+
+    with open(csv_path, "r", newline="", encoding="utf-8") as csvfile:
+        reader = csv.DictReader(csvfile)
+        _check_columns(reader.fieldnames, extra_columns)
+        table.extend(_parse_rows(reader, extra_columns))
+
+    return table
+
+
+def read_recipients_tail(
+    csv_path: str, offset: int = 0, extra_columns: Optional[List[str]] = None
+) -> Tuple[List[Recipient], int, int]:
+    """Read recipients from the rows that start at or after a byte offset.
+
+    Only complete lines are consumed, so a row that is still being appended
+    is left for the next call.
+
+    Args:
+        csv_path: Path to the CSV file
+        offset: Byte offset to resume from (0 or a previous end offset)
+        extra_columns: Additional CSV columns to keep on each recipient
+
+    Returns:
+        Tuple of (recipients, end_offset, rows) where rows counts the
+        non-empty CSV rows read, valid or not
+
+    Raises:
+        FileNotFoundError: If the file doesn't exist
+        ValueError: If an extra column is not in the CSV header
+    """
+    extra_columns = [c for c in extra_columns or [] if c not in RECIPIENT_FIELDS]
+
+    with open(csv_path, "rb") as f:
+        header = f.readline()
+        if not header.endswith(b"\n"):
+            return [], 0, 0
+        fieldnames = next(csv.reader([header.decode("utf-8")]), [])
+        _check_columns(fieldnames, extra_columns)
+
+        start = max(offset, len(header))
+        f.seek(start)
+        data = f.read()
+
+    complete = data[: data.rfind(b"\n") + 1]
+    reader = csv.DictReader(
+        io.StringIO(complete.decode("utf-8"), newline=""), fieldnames=fieldnames
+    )
+    rows = list(reader)
+    recipients = list(_parse_rows(rows, extra_columns))
+    return recipients, start + len(complete), len(rows)
+
+
+def csv_fingerprint(csv_path: str, length: int) -> str:
+    """Fingerprint the first ``length`` bytes of a file in constant time.
+
+    Hashes the prefix length plus the first and last FINGERPRINT_BYTES of
+    the prefix, which catches rewrites, truncation and edits around the
+    resume point of an append-only file without reading all of it.
+
+    Args:
+        csv_path: Path to the CSV file
+        length: Prefix length in bytes
+
+    Returns:
+        Hex digest
+    """
+    digest = hashlib.sha256(str(length).encode())
+    with open(csv_path, "rb") as f:
+        digest.update(f.read(min(length, FINGERPRINT_BYTES)))
+        f.seek(max(0, length - FINGERPRINT_BYTES))
+        digest.update(f.read(min(length, FINGERPRINT_BYTES)))
+    return digest.hexdigest()
@@ -1,36 +1,211 @@
 """Database module for tracking sent emails."""
 
 import sqlite3
-from typing import List, Dict, Any
+import time
+from functools import cached_property
+from typing import (
+    Any,
+    Container,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
+
+
+# Campaign that rows from before campaigns existed are assigned to
+DEFAULT_CAMPAIGN = "melinia26"
+
+# Lifecycle of a send_queue entry: queued -> sending -> sent/failed/skipped
+QUEUE_STATUSES = ("queued", "sending", "sent", "failed", "skipped")
+
+# Most ids bound in one query (SQLite's default limit is 999)
+_MAX_PARAMS = 900
+
+# Tables keyed by (campaign_id, ...); pre-campaign versions are migrated
+_CAMPAIGN_TABLES = {
+    "sent_emails": """
+        CREATE TABLE IF NOT EXISTS sent_emails (
+            campaign_id INTEGER NOT NULL REFERENCES campaigns (id),
+            roll_no TEXT NOT NULL,
+            email TEXT NOT NULL,
+            name TEXT NOT NULL,
+            is_paid BOOLEAN NOT NULL,
+            sent_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (campaign_id, roll_no)
+        ) WITHOUT ROWID
+    """,
+    "csv_checkpoints": """
+        CREATE TABLE IF NOT EXISTS csv_checkpoints (
+            campaign_id INTEGER NOT NULL REFERENCES campaigns (id),
+            csv_path TEXT NOT NULL,
+            fingerprint TEXT NOT NULL,
+            byte_offset INTEGER NOT NULL,
+            row_count INTEGER NOT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (campaign_id, csv_path)
+        )
+    """,
+}
+
+
+def _columns(conn: sqlite3.Connection, table: str) -> Set[str]:
+    """Column names of a table (empty if it doesn't exist)."""
+    return {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+
+def _count_sends(conn: sqlite3.Connection, count: int, at: float):
+    """Add ``count`` sends to the minute containing ``at``."""
+    conn.execute(
+        """
+        INSERT INTO send_counts (minute, sent) VALUES (?, ?)
+        ON CONFLICT (minute) DO UPDATE SET sent = sent + excluded.sent
+        """,
+        (int(at // 60), count),
+    )
 
 
 class Database:
-    """SQLite database for tracking email recipients."""
+    """SQLite database for tracking email recipients.
+
+    Sends and CSV checkpoints are scoped to a campaign, so one file can
+    track several campaigns; the instance works on the campaign it was
+    opened with. Coupon codes and suppressed addresses are shared.
+    """
 
-    def __init__(self, db_path: str = "mail_coupons.db"):
+    def __init__(
+        self, db_path: str = "mail_coupons.db", campaign: str = DEFAULT_CAMPAIGN
+    ):
         """Initialize database connection and create table if not exists.
 
         Args:
             db_path: Path to the SQLite database file
+            campaign: Campaign to track sends for (created if new)
         """
         self.db_path = db_path
+        self.campaign = campaign
         self._init_table()
 
     def _init_table(self):
-        """Create the sent_emails table if it doesn't exist."""
+        """Create the tracking tables, migrating pre-campaign tables."""
+        conn = sqlite3.connect(self.db_path, isolation_level=None)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS campaigns (
+                    id INTEGER PRIMARY KEY,
+                    name TEXT NOT NULL UNIQUE,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            self._migrate_to_campaigns(conn, "sent_emails")
+            self._migrate_to_campaigns(conn, "csv_checkpoints")
+            conn.execute(_CAMPAIGN_TABLES["sent_emails"])
+            # Covers per-campaign progress and rolling-window counts without
+            # touching the table rows
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS sent_emails_campaign_time
+                ON sent_emails (campaign_id, sent_at)
+            """)
+            conn.execute(_CAMPAIGN_TABLES["csv_checkpoints"])
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS coupon_codes (
+                    code TEXT PRIMARY KEY,
+                    roll_no TEXT NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS suppressed_emails (
+                    email TEXT PRIMARY KEY,
+                    reason TEXT NOT NULL,
+                    source TEXT,
+                    suppressed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                ) WITHOUT ROWID
+            """)
+            # Sends per minute across all campaigns, for the rolling daily
+            # quota (the provider's quota is per account, not per campaign)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS send_counts (
+                    minute INTEGER PRIMARY KEY,
+                    sent INTEGER NOT NULL
+                )
+            """)
+            # Recipients submitted to `serve`, in submission order
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS send_queue (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    campaign_id INTEGER NOT NULL REFERENCES campaigns (id),
+                    roll_no TEXT NOT NULL,
+                    email TEXT NOT NULL,
+                    name TEXT NOT NULL,
+                    is_paid BOOLEAN NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'queued',
+                    coupon_code TEXT,
+                    error TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS send_queue_status
+                ON send_queue (campaign_id, status, id)
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS suppression_filter (
+                    id INTEGER PRIMARY KEY CHECK (id = 1),
+                    entries INTEGER NOT NULL,
+                    data BLOB NOT NULL
+                )
+            """)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def _migrate_to_campaigns(self, conn: sqlite3.Connection, table: str):
+        """Move a table from before campaigns into the default campaign.
+
+        The old table is renamed aside, recreated with a campaign_id column
+        and its rows copied over. Runs inside the
+        caller's transaction, so an interrupted migration leaves the old
+        table untouched.
+        """
+        columns = _columns(conn, table)
+        if not columns or "campaign_id" in columns:
+            return
+        conn.execute(
+            "INSERT OR IGNORE INTO campaigns (name) VALUES (?)", (DEFAULT_CAMPAIGN,)
+        )
+        legacy = f"{table}_before_campaigns"
+        conn.execute(f"ALTER TABLE {table} RENAME TO {legacy}")
+        conn.execute(_CAMPAIGN_TABLES[table])
+        names = ", ".join(sorted(columns))
+        conn.execute(
+            f"INSERT INTO {table} (campaign_id, {names}) "
+            f"SELECT (SELECT id FROM campaigns WHERE name = ?), {names} FROM {legacy}",
+            (DEFAULT_CAMPAIGN,),
+        )
+        conn.execute(f"DROP TABLE {legacy}")
+
+    @cached_property
+    def campaign_id(self) -> int:
+        """Id of this instance's campaign, created on first use."""
         conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS sent_emails (
-                roll_no TEXT PRIMARY KEY,
-                email TEXT NOT NULL,
-                name TEXT NOT NULL,
-                is_paid BOOLEAN NOT NULL,
-                sent_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
+        conn.execute(
+            "INSERT OR IGNORE INTO campaigns (name) VALUES (?)", (self.campaign,)
+        )
+        (campaign_id,) = conn.execute(
+            "SELECT id FROM campaigns WHERE name = ?", (self.campaign,)
+        ).fetchone()
         conn.commit()
         conn.close()
+        return campaign_id
 
     def email_already_sent(self, roll_no: str) -> bool:
         """Check if an email has already been sent to this roll number.
@@ -43,11 +218,63 @@ class Database:
         """
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
-        cursor.execute("SELECT 1 FROM sent_emails WHERE roll_no = ?", (roll_no,))
+        cursor.execute(
+            "SELECT 1 FROM sent_emails WHERE campaign_id = ? AND roll_no = ?",
+            (self.campaign_id, roll_no),
+        )
         result = cursor.fetchone()
         conn.close()
         return result is not None
 
+    def sent_roll_nos(self) -> Set[str]:
+        """Get the roll numbers of every recipient already emailed.
+
+        Reads a range of the (campaign_id, roll_no) primary key only, so
+        other campaigns' rows aren't touched.
+
+        Returns:
+            Set of roll numbers in this campaign
+        """
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT roll_no FROM sent_emails WHERE campaign_id = ?",
+            (self.campaign_id,),
+        )
+        roll_nos = {row[0] for row in cursor}
+        conn.close()
+        return roll_nos
+
+    def sent_among(self, roll_nos: Iterable[str]) -> Set[str]:
+        """Get which of the given roll numbers were already emailed.
+
+        Looks each one up in the (campaign_id, roll_no) primary key, so the
+        cost follows the number of roll numbers asked about rather than the
+        number of emails sent in the campaign.
+
+        Args:
+            roll_nos: Roll numbers to check
+
+        Returns:
+            Set of those roll numbers recorded in this campaign
+        """
+        roll_nos = list(roll_nos)
+        conn = sqlite3.connect(self.db_path)
+        sent = set()
+        # One parameter goes to the campaign id
+        for start in range(0, len(roll_nos), _MAX_PARAMS - 1):
+            chunk = roll_nos[start : start + _MAX_PARAMS - 1]
+            cursor = conn.execute(
+                f"""
+                SELECT roll_no FROM sent_emails
+                WHERE campaign_id = ? AND roll_no IN ({", ".join("?" * len(chunk))})
+                """,
+                [self.campaign_id, *chunk],
+            )
+            sent.update(row[0] for row in cursor)
+        conn.close()
+        return sent
+
     def mark_email_sent(self, roll_no: str, email: str, name: str, is_paid: bool):
         """Mark an email as sent by recording it in the database.
 
@@ -61,30 +288,435 @@ class Database:
         cursor = conn.cursor()
         cursor.execute(
             """
-            INSERT OR REPLACE INTO sent_emails (roll_no, email, name, is_paid)
-            VALUES (?, ?, ?, ?)
+            INSERT OR REPLACE INTO sent_emails
+                (campaign_id, roll_no, email, name, is_paid)
+            VALUES (?, ?, ?, ?, ?)
         """,
-            (roll_no, email, name, is_paid),
+            (self.campaign_id, roll_no, email, name, is_paid),
+        )
+        _count_sends(conn, 1, time.time())
+        conn.commit()
+        conn.close()
+
+    def record_sends(self, count: int, at: Optional[float] = None):
+        """Count sends towards the rolling quota without marking recipients.
+
+        Args:
+            count: Number of messages sent
+            at: Unix time they were sent (default: now)
+        """
+        conn = sqlite3.connect(self.db_path)
+        _count_sends(conn, count, time.time() if at is None else at)
+        conn.commit()
+        conn.close()
+
+    def send_counts(self, since: float) -> Dict[int, int]:
+        """Sends per minute from ``since`` on, across all campaigns.
+
+        Args:
+            since: Unix time; the minute containing it is included
+
+        Returns:
+            Dictionary of minute (Unix time // 60) to messages sent
+        """
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.execute(
+            "SELECT minute, sent FROM send_counts WHERE minute >= ?",
+            (int(since // 60),),
         )
+        counts = dict(cursor)
+        conn.close()
+        return counts
+
+    def prune_send_counts(self, before: float):
+        """Drop send counts for minutes that ended before ``before``."""
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("DELETE FROM send_counts WHERE minute < ?", (int(before // 60),))
         conn.commit()
         conn.close()
 
     def get_unsent_recipients(
-        self, all_recipients: List[Dict[str, Any]]
+        self,
+        all_recipients: List[Dict[str, Any]],
+        suppressed: Optional[Container[str]] = None,
     ) -> List[Dict[str, Any]]:
         """Filter recipients to only those who haven't received emails.
 
         Args:
             all_recipients: List of recipient dictionaries with roll_no, email, name, is_paid
+            suppressed: Optional container of addresses to skip as well
+                (e.g. a SuppressionList)
 
         Returns:
             List of recipients who haven't received emails yet
         """
+        sent = self.sent_among(recipient["roll_no"] for recipient in all_recipients)
         return [
             recipient
             for recipient in all_recipients
-            if not self.email_already_sent(recipient["roll_no"])
+            if recipient["roll_no"] not in sent
+            and (suppressed is None or recipient["email"] not in suppressed)
+        ]
+
+    def campaign_stats(self) -> List[Dict[str, Any]]:
+        """Get sending progress for every campaign in the database.
+
+        Returns:
+            List of dictionaries with name, sent, first_sent_at and
+            last_sent_at, in campaign creation order
+        """
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.execute("""
+            SELECT c.name, COUNT(s.roll_no), MIN(s.sent_at), MAX(s.sent_at)
+            FROM campaigns AS c
+            LEFT JOIN sent_emails AS s ON s.campaign_id = c.id
+            GROUP BY c.id
+            ORDER BY c.id
+        """)
+        stats = [
+            {
+                "name": name,
+                "sent": sent,
+                "first_sent_at": first_sent_at,
+                "last_sent_at": last_sent_at,
+            }
+            for name, sent, first_sent_at, last_sent_at in cursor
+        ]
+        conn.close()
+        return stats
+
+    def add_suppressed_emails(self, entries: Iterable[Tuple[str, str, str]]) -> int:
+        """Add addresses to the suppression list, keeping existing entries.
+
+        Args:
+            entries: (email, reason, source) tuples; emails should already
+                be normalized
+
+        Returns:
+            Number of addresses that weren't suppressed before
+        """
+        conn = sqlite3.connect(self.db_path)
+        before = conn.total_changes
+        conn.executemany(
+            "INSERT OR IGNORE INTO suppressed_emails (email, reason, source) "
+            "VALUES (?, ?, ?)",
+            entries,
+        )
+        added = conn.total_changes - before
+        conn.commit()
+        conn.close()
+        return added
+
+    def is_suppressed(self, email: str) -> bool:
+        """Check whether a normalized address is on the suppression list."""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.execute(
+            "SELECT 1 FROM suppressed_emails WHERE email = ?", (email,)
+        )
+        result = cursor.fetchone()
+        conn.close()
+        return result is not None
+
+    def suppressed_emails(self) -> Iterator[str]:
+        """Iterate over every suppressed address."""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            yield from (
+                row[0] for row in conn.execute("SELECT email FROM suppressed_emails")
+            )
+        finally:
+            conn.close()
+
+    def suppression_count(self) -> int:
+        """Number of suppressed addresses."""
+        conn = sqlite3.connect(self.db_path)
+        (count,) = conn.execute("SELECT COUNT(*) FROM suppressed_emails").fetchone()
+        conn.close()
+        return count
+
+    def get_suppression_filter(self) -> Optional[Tuple[int, bytes]]:
+        """Get the persisted suppression filter.
+
+        Returns:
+            Tuple of (entries it was built from, serialized filter), or None
+        """
+        conn = sqlite3.connect(self.db_path)
+        result = conn.execute(
+            "SELECT entries, data FROM suppression_filter WHERE id = 1"
+        ).fetchone()
+        conn.close()
+        return result
+
+    def save_suppression_filter(self, entries: int, data: bytes):
+        """Persist the suppression filter.
+
+        Args:
+            entries: Number of suppressed addresses it was built from
+            data: Serialized filter
+        """
+        conn = sqlite3.connect(self.db_path)
+        conn.execute(
+            "INSERT OR REPLACE INTO suppression_filter (id, entries, data) "
+            "VALUES (1, ?, ?)",
+            (entries, data),
+        )
+        conn.commit()
+        conn.close()
+
+    def coupon_codes(self) -> Dict[str, str]:
+        """Get every coupon code created so far.
+
+        Returns:
+            Dictionary mapping coupon code to the roll number it was issued to
+        """
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute("SELECT code, roll_no FROM coupon_codes")
+        codes = dict(cursor.fetchall())
+        conn.close()
+        return codes
+
+    def record_coupon_code(self, code: str, roll_no: str):
+        """Record that a coupon code was created for a recipient.
+
+        Args:
+            code: The coupon code
+            roll_no: The recipient's roll number
+        """
+        conn = sqlite3.connect(self.db_path)
+        conn.execute(
+            "INSERT OR IGNORE INTO coupon_codes (code, roll_no) VALUES (?, ?)",
+            (code, roll_no),
+        )
+        conn.commit()
+        conn.close()
+
+    def get_csv_checkpoint(self, csv_path: str) -> Optional[Dict[str, Any]]:
+        """Get how far a CSV file has been consumed.
+
+        Args:
+            csv_path: Absolute path of the CSV file
+
+        Returns:
+            Dictionary with fingerprint, byte_offset and row_count, or None
+        """
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT fingerprint, byte_offset, row_count FROM csv_checkpoints "
+            "WHERE campaign_id = ? AND csv_path = ?",
+            (self.campaign_id, csv_path),
+        )
+        result = cursor.fetchone()
+        conn.close()
+        if result is None:
+            return None
+        return {
+            "fingerprint": result[0],
+            "byte_offset": result[1],
+            "row_count": result[2],
+        }
+
+    def save_csv_checkpoint(
+        self, csv_path: str, fingerprint: str, byte_offset: int, row_count: int
+    ):
+        """Record how far a CSV file has been consumed.
+
+        Args:
+            csv_path: Absolute path of the CSV file
+            fingerprint: csv_fingerprint of the first byte_offset bytes
+            byte_offset: Offset just past the last consumed row
+            row_count: Number of data rows consumed
+        """
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute(
+            """
+            INSERT OR REPLACE INTO csv_checkpoints
+                (campaign_id, csv_path, fingerprint, byte_offset, row_count)
+            VALUES (?, ?, ?, ?, ?)
+        """,
+            (self.campaign_id, csv_path, fingerprint, byte_offset, row_count),
+        )
+        conn.commit()
+        conn.close()
+
+    def enqueue(self, recipients: Iterable[Dict[str, Any]]) -> List[int]:
+        """Add recipients to this campaign's send queue.
+
+        Args:
+            recipients: Dictionaries with roll_no, email, name and is_paid
+
+        Returns:
+            Queue id of each recipient, in order
+        """
+        conn = sqlite3.connect(self.db_path)
+        ids = [
+            conn.execute(
+                """
+                INSERT INTO send_queue (campaign_id, roll_no, email, name, is_paid)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                (
+                    self.campaign_id,
+                    recipient["roll_no"],
+                    recipient["email"],
+                    recipient["name"],
+                    recipient["is_paid"],
+                ),
+            ).lastrowid
+            for recipient in recipients
         ]
+        conn.commit()
+        conn.close()
+        return ids
+
+    def claim_queued(self, limit: int) -> List[Dict[str, Any]]:
+        """Take the oldest queued recipients for sending.
+
+        Queued recipients this campaign already sent to are marked skipped
+        instead. The rest are marked sending until finish_queued is called.
+
+        Args:
+            limit: Most recipients to take
+
+        Returns:
+            Recipient dictionaries with their queue_id, oldest first
+        """
+        # Resolved before the transaction, which would block creating it
+        campaign_id = self.campaign_id
+        conn = sqlite3.connect(self.db_path, isolation_level=None)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                """
+                UPDATE send_queue
+                SET status = 'skipped', error = 'already sent',
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE campaign_id = ? AND status = 'queued' AND EXISTS (
+                    SELECT 1 FROM sent_emails
+                    WHERE sent_emails.campaign_id = send_queue.campaign_id
+                    AND sent_emails.roll_no = send_queue.roll_no
+                )
+                """,
+                (campaign_id,),
+            )
+            rows = conn.execute(
+                """
+                SELECT id, roll_no, email, name, is_paid FROM send_queue
+                WHERE campaign_id = ? AND status = 'queued'
+                ORDER BY id LIMIT ?
+                """,
+                (campaign_id, limit),
+            ).fetchall()
+            conn.executemany(
+                "UPDATE send_queue SET status = 'sending', "
+                "updated_at = CURRENT_TIMESTAMP WHERE id = ?",
+                [(row[0],) for row in rows],
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        return [
+            {
+                "queue_id": row[0],
+                "roll_no": row[1],
+                "email": row[2],
+                "name": row[3],
+                "is_paid": bool(row[4]),
+            }
+            for row in rows
+        ]
+
+    def finish_queued(
+        self,
+        queue_id: int,
+        status: str,
+        coupon_code: Optional[str] = None,
+        error: Optional[str] = None,
+    ):
+        """Record the outcome of a claimed queue entry.
+
+        Args:
+            queue_id: Id returned by enqueue
+            status: 'sent', 'failed' or 'skipped'
+            coupon_code: Coupon code created for the recipient, if any
+            error: Why it failed or was skipped
+        """
+        conn = sqlite3.connect(self.db_path)
+        conn.execute(
+            """
+            UPDATE send_queue
+            SET status = ?, coupon_code = ?, error = ?,
+                updated_at = CURRENT_TIMESTAMP
+            WHERE id = ?
+            """,
+            (status, coupon_code, error, queue_id),
+        )
+        conn.commit()
+        conn.close()
+
+    def requeue_sending(self) -> int:
+        """Put entries left sending (e.g. by a crash) back in the queue.
+
+        Returns:
+            Number of entries requeued
+        """
+        conn = sqlite3.connect(self.db_path)
+        count = conn.execute(
+            "UPDATE send_queue SET status = 'queued', updated_at = CURRENT_TIMESTAMP "
+            "WHERE campaign_id = ? AND status = 'sending'",
+            (self.campaign_id,),
+        ).rowcount
+        conn.commit()
+        conn.close()
+        return count
+
+    def queue_entries(self, ids: Iterable[int]) -> Dict[int, Dict[str, Any]]:
+        """Look up send queue entries of any campaign by id.
+
+        Args:
+            ids: Queue ids
+
+        Returns:
+            Dictionary of id to entry (ids that don't exist are left out)
+        """
+        ids = list(ids)
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        entries = {}
+        for start in range(0, len(ids), _MAX_PARAMS):
+            chunk = ids[start : start + _MAX_PARAMS]
+            cursor = conn.execute(
+                f"""
+                SELECT q.id, c.name AS campaign, q.roll_no, q.email, q.status,
+                       q.coupon_code, q.error, q.created_at, q.updated_at
+                FROM send_queue q JOIN campaigns c ON c.id = q.campaign_id
+                WHERE q.id IN ({", ".join("?" * len(chunk))})
+                """,
+                chunk,
+            )
+            for row in cursor:
+                entries[row["id"]] = dict(row)
+        conn.close()
+        return entries
+
+    def queue_counts(self) -> Dict[str, int]:
+        """Number of this campaign's queue entries in each status."""
+        conn = sqlite3.connect(self.db_path)
+        counts = dict.fromkeys(QUEUE_STATUSES, 0)
+        counts.update(
+            conn.execute(
+                "SELECT status, COUNT(*) FROM send_queue WHERE campaign_id = ? "
+                "GROUP BY status",
+                (self.campaign_id,),
+            )
+        )
+        conn.close()
+        return counts
 
     def close(self):
         """Close database connection."""
@@ -0,0 +1,227 @@
+"""Per-destination-domain rate limits and in-flight caps.
+
+Receiving providers throttle per sender: once one of them (the college
+domain, gmail.com, ...) starts deferring with 4xx replies, everything queued
+behind its recipients waits too. ``DomainScheduler`` groups recipients by
+domain, gives each domain its own token bucket and cap on sends in flight,
+and hands out recipients round-robin across the domains that have room, so
+a throttled domain only slows itself down. The global rate limit still
+applies on top.
+"""
+
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Dict, Iterable, Mapping, Optional, Tuple
+
+# Domain key for the limit applied to every domain not listed explicitly
+DEFAULT_DOMAIN = "*"
+
+
+@dataclass(frozen=True)
+class DomainLimit:
+    """Limits for sending to one domain."""
+
+    rate: float
+    max_in_flight: int = 0
+
+    def __str__(self) -> str:
+        cap = f", at most {self.max_in_flight} in flight" if self.max_in_flight else ""
+        return f"{self.rate:g}/s{cap}"
+
+
+def parse_domain_limit(spec: str) -> Tuple[str, DomainLimit]:
+    """Parse ``DOMAIN=RATE[/MAX_IN_FLIGHT]``, e.g. ``gmail.com=5/20``.
+
+    ``*`` as the domain sets the limit for every domain not listed.
+
+    Returns:
+        Tuple of (lowercased domain, DomainLimit)
+
+    Raises:
+        ValueError: If the spec is malformed
+    """
+    domain, sep, value = spec.partition("=")
+    domain = domain.strip().lower().lstrip("@")
+    rate, _, cap = value.partition("/")
+    try:
+        limit = DomainLimit(float(rate), int(cap) if cap.strip() else 0)
+    except ValueError:
+        limit = None
+    if not sep or not domain or limit is None:
+        raise ValueError(f"Invalid domain limit {spec!r}, expected DOMAIN=RATE[/MAX]")
+    if limit.rate <= 0 or limit.max_in_flight < 0:
+        raise ValueError(f"Invalid domain limit {spec!r}: rate must be positive")
+    return domain, limit
+
+
+def recipient_domain(email: str) -> str:
+    """Lowercased domain of an email address."""
+    return email.rpartition("@")[2].strip().rstrip(">").lower()
+
+
+class TokenBucket:
+    """Token bucket refilled at ``rate`` tokens/second up to ``burst``."""
+
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate: float, burst: float, now: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self, now: float) -> bool:
+        """Take a token if one is available."""
+        self._refill(now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def ready_in(self, now: float) -> float:
+        """Seconds until a token is available."""
+        self._refill(now)
+        return max(0.0, (1 - self.tokens) / self.rate)
+
+
+class DomainScheduler:
+    """Interleave items across recipient domains under per-domain limits.
+
+    Items are read ahead from the source into one queue per domain, up to
+    ``lookahead`` at a time. ``next_ready`` takes the next domain in
+    round-robin order whose bucket has a token and whose sends in flight
+    are under its cap, and returns the oldest item queued for it; the
+    caller reports each item's completion with ``release``.
+    """
+
+    def __init__(
+        self,
+        items: Iterable[Any],
+        limits: Mapping[str, DomainLimit],
+        email: Callable[[Any], str],
+        lookahead: int = 10_000,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """Initialize the scheduler.
+
+        Args:
+            items: Items to schedule, consumed lazily
+            limits: Limit per domain; a domain also matches the limits of
+                its parent domains, and ``*`` applies to all others.
+                Domains without a limit are only bound by the caller.
+            email: Returns an item's recipient address
+            lookahead: Most items to hold queued at once
+            clock: Monotonic time source
+        """
+        self._items = iter(items)
+        self.limits = {domain.lower(): limit for domain, limit in limits.items()}
+        self._email = email
+        self.lookahead = lookahead
+        self._clock = clock
+        self._queues: Dict[str, Deque[Any]] = {}
+        self._rotation: Deque[str] = deque()
+        self._buckets: Dict[str, Optional[TokenBucket]] = {}
+        self._caps: Dict[str, int] = {}
+        self.in_flight: Dict[str, int] = {}
+        self.queued = 0
+        self.exhausted = False
+
+    @property
+    def done(self) -> bool:
+        """Whether every item has been handed out."""
+        return self.exhausted and not self.queued
+
+    def limit_for(self, domain: str) -> Optional[DomainLimit]:
+        """The limit that applies to ``domain``, if any."""
+        parts = domain.split(".")
+        for i in range(len(parts)):
+            limit = self.limits.get(".".join(parts[i:]))
+            if limit is not None:
+                return limit
+        return self.limits.get(DEFAULT_DOMAIN)
+
+    def _add_domain(self, domain: str):
+        limit = self.limit_for(domain)
+        if limit is None:
+            self._buckets[domain] = None
+            self._caps[domain] = 0
+        else:
+            burst = max(1.0, limit.rate)
+            self._buckets[domain] = TokenBucket(limit.rate, burst, self._clock())
+            self._caps[domain] = limit.max_in_flight
+        self.in_flight[domain] = 0
+
+    def _fill(self):
+        """Read items ahead from the source into their domain queues."""
+        while self.queued < self.lookahead and not self.exhausted:
+            item = next(self._items, None)
+            if item is None:
+                self.exhausted = True
+                break
+            domain = recipient_domain(self._email(item))
+            queue = self._queues.get(domain)
+            if queue is None:
+                if domain not in self._buckets:
+                    self._add_domain(domain)
+                queue = self._queues[domain] = deque()
+            if not queue:
+                self._rotation.append(domain)
+            queue.append(item)
+            self.queued += 1
+
+    def _ready(self, domain: str, now: float) -> bool:
+        cap = self._caps[domain]
+        if cap and self.in_flight[domain] >= cap:
+            return False
+        bucket = self._buckets[domain]
+        return bucket is None or bucket.take(now)
+
+    def next_ready(self) -> Optional[Tuple[Any, str]]:
+        """Take the next item whose domain has room.
+
+        Returns:
+            Tuple of (item, domain), or None if every queued domain is
+            throttled or nothing is left
+        """
+        self._fill()
+        now = self._clock()
+        rotation = self._rotation
+        for _ in range(len(rotation)):
+            domain = rotation[0]
+            rotation.rotate(-1)
+            if self._ready(domain, now):
+                queue = self._queues[domain]
+                item = queue.popleft()
+                if not queue:
+                    # The domain was just rotated to the end
+                    rotation.pop()
+                self.queued -= 1
+                self.in_flight[domain] += 1
+                return item, domain
+        return None
+
+    def release(self, domain: str):
+        """Record that an item from ``domain`` finished."""
+        self.in_flight[domain] -= 1
+
+    def wait_time(self) -> Optional[float]:
+        """Seconds until a queued domain's bucket has a token.
+
+        Returns:
+            The shortest wait among domains held back only by their rate,
+            or None if every queued domain is waiting for sends in flight
+            (or nothing is queued)
+        """
+        now = self._clock()
+        waits = []
+        for domain in self._rotation:
+            cap = self._caps[domain]
+            bucket = self._buckets[domain]
+            if bucket is not None and not (cap and self.in_flight[domain] >= cap):
+                waits.append(bucket.ready_in(now))
+        return min(waits) if waits else None
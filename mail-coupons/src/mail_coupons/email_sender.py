@@ -1,35 +1,70 @@
 """Email sender module for sending coupon emails."""
 
-import random
-import string
-import smtplib
-import requests
-import asyncio
+import html
 import time
 import logging
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
-from typing import Dict, Any, Tuple, List, Callable, Optional
-from concurrent.futures import ThreadPoolExecutor
+from typing import (
+    Dict,
+    Any,
+    Tuple,
+    List,
+    Callable,
+    Optional,
+    Iterable,
+    Mapping,
+    TYPE_CHECKING,
+)
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass
 from enum import Enum
 
+from ._lazy import lazy_import
+from .circuit_breaker import CircuitBreaker
+from .concurrency import ConcurrencyController
+from .coupons import CouponCodes, RandomCouponCodes
+from .coupons import generate_coupon_code  # noqa: F401 (used to live here)
+from .domains import DomainLimit, DomainScheduler
+from .login import TokenProvider
+from .minify import BODY_ENCODINGS, SlotTemplate, choose_body_encoding, minify_html
+from .profiling import stage, traced
+from .relays import SmtpRelay
+from .results import ResultSink, RunStats
+from .spool import Spool, SpoolEntry
+from .transports import SmtpTransport, Transport
+
+if TYPE_CHECKING:
+    import asyncio
+    from email.mime.multipart import MIMEMultipart
+    from email.mime.text import MIMEText
+
+    from .quota import DailyQuota
+    from .templates import TemplateRegistry
+
+# Loaded on first use to keep CLI startup fast. asyncio is imported inside
+# the coroutines instead: logging looks it up in sys.modules for every
+# record, which would defeat a lazy module.
+requests = lazy_import("requests")
+
 
 class EmailStatus(Enum):
     """Email processing status."""
 
     PENDING = "pending"
     COUPON_CREATED = "coupon_created"
+    RENDERED = "rendered"
     SENDING = "sending"
     SENT = "sent"
     FAILED = "failed"
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class EmailResult:
-    """Result of email processing."""
+    """Result of email processing.
+
+    Slotted and immutable, since a run can hold one per recipient.
+    """
 
-    recipient: Dict[str, Any]
+    recipient: Mapping[str, Any]
     coupon_code: str
     status: EmailStatus
     success: bool
@@ -37,30 +72,76 @@ class EmailResult:
     processing_time_ms: float = 0.0
 
 
-def generate_coupon_code() -> str:
-    """Generate a random coupon code with format MLNC + 6 alphanumeric chars.
+def _item_email(item: Any) -> str:
+    """Recipient address of a batch item (a recipient or a SpoolEntry)."""
+    email = getattr(item, "email", None)
+    return email if email is not None else item["email"]
 
-    Returns:
-        A unique coupon code string
-    """
-    letters = "".join(random.choices(string.ascii_uppercase, k=3))
-    digits = "".join(random.choices(string.digits, k=3))
-    random_part = "".join(random.sample(letters + digits, 6))
-    return f"MLNC{random_part}"
+
+def _result_extra(result: EmailResult) -> Dict[str, Any]:
+    """Structured fields attached to per-result log records."""
+    return {
+        "event": "email_result",
+        "roll_no": result.recipient["roll_no"],
+        "email": result.recipient["email"],
+        "coupon_code": result.coupon_code,
+        "status": result.status.value,
+        "processing_time_ms": round(result.processing_time_ms, 1),
+    }
+
+
+# Error returned for a coupon the API already has (HTTP 409)
+COUPON_EXISTS = "Coupon code already exists"
 
 
 class AsyncRateLimiter:
-    """Rate limiter for controlling email send rate."""
+    """Rate limiter for controlling email send rate.
 
-    def __init__(self, max_requests_per_second: int = 12):
+    The rate can be changed and acquisition paused while requests are
+    waiting; both take effect from the next acquisition.
+    """
+
+    def __init__(self, max_requests_per_second: float = 12):
+        self.set_rate(max_requests_per_second)
+        self.last_request_time = 0
+        self.paused = False
+        self._lock: Optional["asyncio.Lock"] = None
+        self._resumed: Optional["asyncio.Event"] = None
+
+    def set_rate(self, max_requests_per_second: float):
+        """Change the rate.
+
+        Raises:
+            ValueError: If the rate is not positive
+        """
+        if max_requests_per_second <= 0:
+            raise ValueError("Rate must be positive")
         self.max_requests_per_second = max_requests_per_second
         self.min_interval = 1.0 / max_requests_per_second
-        self.last_request_time = 0
-        self._lock = asyncio.Lock()
+
+    def pause(self):
+        """Hold every acquisition until resume() (call from the event loop)."""
+        self.paused = True
+        if self._resumed is not None:
+            self._resumed.clear()
+
+    def resume(self):
+        """Let acquisitions through again (call from the event loop)."""
+        self.paused = False
+        if self._resumed is not None:
+            self._resumed.set()
 
     async def acquire(self):
         """Acquire permission to make a request, waiting if necessary."""
+        import asyncio
+
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+            self._resumed = asyncio.Event()
+            if not self.paused:
+                self._resumed.set()
         async with self._lock:
+            await self._resumed.wait()
             current_time = time.time()
             time_since_last = current_time - self.last_request_time
 
@@ -86,6 +167,22 @@ class EmailSender:
         register_url: str = "https://melinia.in/register",
         rate_limit: int = 12,
         logger: Optional[logging.Logger] = None,
+        token_provider: Optional[TokenProvider] = None,
+        coupon_breaker: Optional[CircuitBreaker] = None,
+        smtp_breaker: Optional[CircuitBreaker] = None,
+        max_outage: float = 300.0,
+        relays: Optional[List[SmtpRelay]] = None,
+        relay_strategy: str = "least-outstanding",
+        transport: Optional[Transport] = None,
+        max_concurrency: int = 256,
+        coupon_codes: Optional[CouponCodes] = None,
+        minify: bool = True,
+        body_encoding: str = "auto",
+        quota: Optional["DailyQuota"] = None,
+        domain_limits: Optional[Mapping[str, DomainLimit]] = None,
+        templates: Optional["TemplateRegistry"] = None,
+        default_template: Optional[str] = None,
+        template_column: Optional[str] = None,
     ):
         """Initialize EmailSender with configuration.
 
@@ -100,93 +197,318 @@ class EmailSender:
             register_url: Registration URL to include in emails
             rate_limit: Maximum emails per second (default: 12)
             logger: Optional logger instance
+            token_provider: Optional TokenProvider; when set it supplies the
+                bearer token and is asked for a new one after a 401
+            coupon_breaker: Circuit breaker for the coupon API
+            smtp_breaker: Circuit breaker for the transport
+            max_outage: Seconds to pause for an open breaker before failing
+            relays: SMTP relays to balance across instead of smtp_host/port;
+                relays without credentials use smtp_username/password
+            relay_strategy: RelayPool selection strategy
+            transport: Transport to deliver through instead of the SMTP
+                relays; a templated transport gets its template from
+                message_content
+            max_concurrency: Upper bound on recipients in flight; the
+                window below it is sized from observed latency
+            coupon_codes: Generator picking each recipient's coupon code
+                (default: random codes unique within this run)
+            minify: Minify the HTML template once before sending
+            body_encoding: Content-Transfer-Encoding for non-ASCII parts,
+                one of BODY_ENCODINGS; "auto" picks the smaller of
+                quoted-printable and base64 per part
+            quota: Rolling daily quota each send has to fit in; the batch
+                pauses while it's used up
+            domain_limits: Rate and in-flight cap per recipient domain
+                (``*`` for all others); batches interleave domains so a
+                throttled one doesn't hold up the rest
+            templates: Registry of named templates to send instead of the
+                built-in coupon email
+            default_template: Template for recipients that don't name one
+                (default: the built-in coupon email)
+            template_column: Recipient column naming each row's template
+
+        Raises:
+            ValueError: If body_encoding isn't one of BODY_ENCODINGS, or
+                templates are asked for without a registry or with a
+                templated transport
         """
+        if body_encoding not in BODY_ENCODINGS:
+            raise ValueError(f"Unknown body encoding: {body_encoding}")
+        if templates is None and (default_template or template_column):
+            raise ValueError("Named templates need a template registry")
+        if templates is not None and transport is not None and transport.templated:
+            raise ValueError(f"{transport.name} sends a single stored template")
         self.api_endpoint = api_endpoint
         self.bearer_token = bearer_token
+        self.token_provider = token_provider
+        self.logger = logger or logging.getLogger(__name__)
+        self.coupon_breaker = coupon_breaker or CircuitBreaker(
+            "coupon API", slow_call_seconds=8.0, logger=self.logger
+        )
+        if transport is None:
+            if not relays:
+                relays = [SmtpRelay(smtp_host, smtp_port)]
+            for relay in relays:
+                if relay.username is None:
+                    relay.username = smtp_username
+                    relay.password = smtp_password
+            transport = SmtpTransport(
+                relays, relay_strategy, relay_timeout=max_outage, logger=self.logger
+            )
+        transport.envelope_from = from_email
+        self.transport = transport
+        self.smtp_breaker = smtp_breaker or CircuitBreaker(
+            transport.name,
+            slow_call_seconds=30.0,
+            logger=self.logger,
+        )
+        self.max_outage = max_outage
         self.smtp_host = smtp_host
         self.smtp_port = smtp_port
         self.smtp_username = smtp_username
         self.smtp_password = smtp_password
         self.from_email = from_email
         self.register_url = register_url
+        self.coupon_codes = coupon_codes or RandomCouponCodes()
+        self.minify = minify
+        self.body_encoding = body_encoding
+        self.quota = quota
+        self.domain_limits = domain_limits
+        self.templates = templates
+        self.default_template = default_template
+        self.template_column = template_column
+        self._template: Optional[Tuple[SlotTemplate, SlotTemplate, SlotTemplate]] = None
         self.rate_limiter = AsyncRateLimiter(rate_limit)
-        self.logger = logger or logging.getLogger(__name__)
-        self._executor = ThreadPoolExecutor(max_workers=rate_limit)
+        self.concurrency = ConcurrencyController(
+            rate_limit, max_window=max_concurrency, logger=self.logger
+        )
+        # Threads are only started as the window grows into them. Workers
+        # block while their bulk batch fills, so leave room for a full
+        # batch on top of the window
+        self._workers = max_concurrency + transport.batch_size
+        self._executor = ThreadPoolExecutor(max_workers=self._workers)
+        self._retired_executors: List[ThreadPoolExecutor] = []
+
+        if transport.templated:
+            transport.set_message(
+                self.from_header, *(part.text for part in self.template)
+            )
+
+    @property
+    def max_in_flight(self) -> int:
+        """Recipients to keep in flight: the concurrency window plus a batch."""
+        return self.concurrency.window + self.transport.batch_size
+
+    def set_rate(self, rate: float):
+        """Change the target send rate of a running batch.
+
+        Args:
+            rate: Emails per second
+
+        Raises:
+            ValueError: If the rate is not positive
+        """
+        self.rate_limiter.set_rate(rate)
+        self.concurrency.set_target_rate(rate)
+
+    def set_max_concurrency(self, max_concurrency: int):
+        """Change the cap on recipients in flight of a running batch.
+
+        Raising it beyond the worker pool starts a larger pool for new work;
+        the old pool finishes what it is running and is then retired.
+
+        Args:
+            max_concurrency: New upper bound on recipients in flight
+
+        Raises:
+            ValueError: If max_concurrency is less than 1
+        """
+        self.concurrency.set_max_window(max_concurrency)
+        workers = max_concurrency + self.transport.batch_size
+        if workers > self._workers:
+            self._executor.shutdown(wait=False)
+            self._retired_executors.append(self._executor)
+            self._workers = workers
+            self._executor = ThreadPoolExecutor(max_workers=workers)
+
+    def pause(self):
+        """Stop starting new recipients; those in flight finish normally."""
+        self.rate_limiter.pause()
+
+    def resume(self):
+        """Start new recipients again after pause()."""
+        self.rate_limiter.resume()
 
     def _capitalize_name(self, name: str) -> str:
         """Capitalize each word in a name."""
         return " ".join(word.capitalize() for word in name.split())
 
+    def _post_coupon(self, coupon_code: str, token: str) -> "requests.Response":
+        """POST a coupon to the API with the given bearer token."""
+        return requests.post(
+            self.api_endpoint,
+            headers={
+                "Authorization": f"Bearer {token}",
+                "Content-Type": "application/json",
+            },
+            json={"code": coupon_code},
+            timeout=10,
+        )
+
     def create_coupon(self, coupon_code: str) -> Tuple[bool, str]:
         """Create a coupon via the API (blocking operation).
 
+        While the coupon API circuit is open this waits for it to recover
+        (up to ``max_outage`` seconds) instead of failing immediately.
+
         Args:
             coupon_code: The coupon code to create
 
         Returns:
             Tuple of (success: bool, error_message: str)
         """
+        with stage("coupon_api"):
+            return self._guarded(
+                self.coupon_breaker, lambda: self._create_coupon_once(coupon_code)
+            )
+
+    def _create_coupon_once(self, coupon_code: str) -> Tuple[bool, str, bool]:
+        """Make one coupon API call.
+
+        Returns:
+            Tuple of (success, error_message, outage) where outage is True
+            when the failure means the API itself is unavailable
+        """
         try:
-            self.logger.debug(f"Creating coupon: {coupon_code}")
-            response = requests.post(
-                self.api_endpoint,
-                headers={
-                    "Authorization": f"Bearer {self.bearer_token}",
-                    "Content-Type": "application/json",
-                },
-                json={"code": coupon_code},
-                timeout=10,
+            self.logger.debug("Creating coupon: %s", coupon_code)
+            token = (
+                self.token_provider.get_token()
+                if self.token_provider
+                else self.bearer_token
             )
+            response = self._post_coupon(coupon_code, token)
+
+            if response.status_code == 401 and self.token_provider:
+                self.logger.info("Coupon API rejected the token, re-authenticating")
+                token = self.token_provider.refresh(token)
+                response = self._post_coupon(coupon_code, token)
+
+            if response.status_code == 409:
+                self.logger.debug("Coupon code %s is taken", coupon_code)
+                return False, COUPON_EXISTS, False
 
             if response.status_code not in (200, 201):
                 error_msg = (
                     f"API error: Status {response.status_code} - {response.text}"
                 )
                 self.logger.warning(error_msg)
-                return False, error_msg
+                return False, error_msg, response.status_code >= 500
 
-            self.logger.debug(f"Coupon created successfully: {coupon_code}")
-            return True, ""
+            self.logger.debug("Coupon created successfully: %s", coupon_code)
+            return True, "", False
         except requests.exceptions.Timeout:
             error_msg = f"API timeout while creating coupon {coupon_code}"
             self.logger.error(error_msg)
-            return False, error_msg
+            return False, error_msg, True
         except requests.exceptions.ConnectionError as e:
             error_msg = f"API connection error: {str(e)}"
             self.logger.error(error_msg)
-            return False, error_msg
+            return False, error_msg, True
         except Exception as e:
             error_msg = f"API error creating coupon {coupon_code}: {str(e)}"
             self.logger.error(error_msg, exc_info=True)
-            return False, error_msg
+            return False, error_msg, False
 
-    def send_email(
-        self, to_email: str, name: str, coupon_code: str
+    def create_recipient_coupon(self, recipient: Any) -> Tuple[str, bool, str]:
+        """Pick a recipient's coupon code and create it via the API.
+
+        A code the API reports as taken is skipped for the next candidate,
+        and a code already created for this recipient (a keyed code on a
+        rerun) is reused without calling the API.
+
+        Args:
+            recipient: Recipient with a roll_no
+
+        Returns:
+            Tuple of (coupon_code, success, error_message)
+        """
+        roll_no = recipient["roll_no"]
+        coupon_code, error = "", ""
+        for _ in range(self.coupon_codes.max_attempts):
+            try:
+                coupon_code = self.coupon_codes.issue(roll_no)
+            except RuntimeError as e:
+                return coupon_code, False, str(e)
+            if self.coupon_codes.is_created(coupon_code):
+                self.logger.debug("Reusing coupon %s for %s", coupon_code, roll_no)
+                return coupon_code, True, ""
+
+            success, error = self.create_coupon(coupon_code)
+            if success:
+                self.coupon_codes.confirm(coupon_code, roll_no)
+                return coupon_code, True, ""
+            if error != COUPON_EXISTS:
+                return coupon_code, False, error
+            self.coupon_codes.reject(coupon_code)
+        return coupon_code, False, error
+
+    def _guarded(
+        self,
+        breaker: CircuitBreaker,
+        attempt: Callable[[], Tuple[bool, str, bool]],
     ) -> Tuple[bool, str]:
-        """Send coupon email to recipient (blocking operation).
+        """Run a dependency call through its circuit breaker.
+
+        If the call fails with an outage and the breaker is (now) open, wait
+        for the breaker to let calls through again and retry, giving up after
+        ``max_outage`` seconds.
 
         Args:
-            to_email: Recipient email address
-            name: Recipient name
-            coupon_code: The coupon code to send
+            breaker: Breaker guarding the dependency
+            attempt: Callable returning (success, error_message, outage)
 
         Returns:
             Tuple of (success: bool, error_message: str)
         """
-        try:
-            self.logger.debug(
-                f"Preparing email for {to_email} with coupon {coupon_code}"
-            )
-            capitalized_name = self._capitalize_name(name)
+        deadline = time.monotonic() + self.max_outage
+        error_msg = ""
+        while True:
+            if not breaker.wait(deadline - time.monotonic()):
+                return False, (
+                    error_msg
+                    or f"{breaker.name} unavailable for over {self.max_outage:.0f}s"
+                )
+
+            started = time.monotonic()
+            success, error_msg, outage = attempt()
+            breaker.record(not outage, time.monotonic() - started)
 
-            # Create message
-            msg = MIMEMultipart("alternative")
-            msg["Subject"] = "Your Registration Coupon for Melinia'26"
-            msg["From"] = f"Melinia'26 <{self.from_email}>"
-            msg["To"] = to_email
+            if success or not outage or breaker.state == CircuitBreaker.CLOSED:
+                return success, error_msg
 
-            # Plain text version
-            text_content = f"""Hello {capitalized_name},
+            self.logger.info("Waiting for %s to recover before retrying", breaker.name)
+
+    @property
+    def from_header(self) -> str:
+        """From address with display name."""
+        return f"Melinia'26 <{self.from_email}>"
+
+    def message_content(
+        self, capitalized_name: str, coupon_code: str
+    ) -> Tuple[str, str, str]:
+        """Render the coupon email's subject and bodies.
+
+        Args:
+            capitalized_name: Recipient name as shown in the email
+            coupon_code: The coupon code to send
+
+        Returns:
+            Tuple of (subject, html, text)
+        """
+        subject = "Your Registration Coupon for Melinia'26"
+
+        # Plain text version
+        text_content = f"""Hello {capitalized_name},
 
 Your Registration Coupon for Melinia'26
 
@@ -202,8 +524,8 @@ Need assistance? Contact us at helpdesk@melinia.in
 Melinia'26 Dev Team
 """
 
-            # HTML version
-            html_content = f"""<!DOCTYPE html>
+        # HTML version
+        html_content = f"""<!DOCTYPE html>
 <html lang="en">
 <head>
     <meta charset="UTF-8">
@@ -290,45 +612,197 @@ Melinia'26 Dev Team
 </html>
 """
 
-            # Attach both parts
-            part1 = MIMEText(text_content, "plain")
-            part2 = MIMEText(html_content, "html")
-            msg.attach(part1)
-            msg.attach(part2)
+        return subject, html_content, text_content
 
-            # Send email
-            self.logger.debug(
-                f"Connecting to SMTP server {self.smtp_host}:{self.smtp_port}"
+    @property
+    def template(self) -> Tuple[SlotTemplate, SlotTemplate, SlotTemplate]:
+        """The (subject, html, text) template, compiled on first use.
+
+        message_content is rendered once with ``{{name}}`` and
+        ``{{coupon_code}}`` slots, and the HTML minified, so each message
+        only has to fill the slots in.
+        """
+        if self._template is None:
+            subject, html_content, text_content = self.message_content(
+                "{{name}}", "{{coupon_code}}"
+            )
+            if self.minify:
+                html_content = minify_html(html_content)
+            self._template = (
+                SlotTemplate(subject),
+                SlotTemplate(html_content),
+                SlotTemplate(text_content),
             )
-            with smtplib.SMTP(self.smtp_host, self.smtp_port) as server:
-                server.starttls()
-                server.login(self.smtp_username, self.smtp_password)
-                server.send_message(msg)
+        return self._template
 
-            self.logger.debug(f"Email sent successfully to {to_email}")
-            return True, ""
+    def template_for(
+        self, recipient: Mapping[str, Any]
+    ) -> Tuple[SlotTemplate, SlotTemplate, SlotTemplate]:
+        """The (subject, html, text) template a recipient is sent.
 
-        except smtplib.SMTPAuthenticationError as e:
-            error_msg = f"SMTP Authentication Error for {to_email}: {str(e)}"
-            self.logger.error(error_msg)
-            return False, error_msg
-        except smtplib.SMTPRecipientsRefused as e:
-            error_msg = f"SMTP Recipients Refused for {to_email}: {str(e)}"
-            self.logger.error(error_msg)
-            return False, error_msg
-        except smtplib.SMTPSenderRefused as e:
-            error_msg = f"SMTP Sender Refused for {to_email}: {str(e)}"
-            self.logger.error(error_msg)
-            return False, error_msg
-        except smtplib.SMTPException as e:
-            error_msg = f"SMTP Error sending to {to_email}: {str(e)}"
-            self.logger.error(error_msg)
-            return False, error_msg
+        The recipient's template column picks a template from the registry,
+        falling back to default_template and then to the built-in email.
+
+        Raises:
+            ValueError: If the named template is missing or invalid
+        """
+        name = self.default_template
+        if self.template_column is not None:
+            name = recipient.get(self.template_column) or name
+        if not name:
+            return self.template
+        return self.templates.get(name).parts
+
+    def _text_part(self, text: str, subtype: str) -> "MIMEText":
+        """MIME part for ``text`` in the cheapest allowed transfer encoding."""
+        from email import charset
+        from email.mime.text import MIMEText
+
+        encoding = choose_body_encoding(text, self.body_encoding)
+        if encoding == "7bit":
+            return MIMEText(text, subtype, "us-ascii")
+        utf8 = charset.Charset("utf-8")
+        utf8.body_encoding = {
+            "quoted-printable": charset.QP,
+            "base64": charset.BASE64,
+        }.get(encoding)
+        return MIMEText(text, subtype, utf8)
+
+    def build_message(
+        self,
+        to_email: str,
+        name: str,
+        coupon_code: str,
+        template: Optional[Tuple[SlotTemplate, SlotTemplate, SlotTemplate]] = None,
+        fields: Optional[Mapping[str, Any]] = None,
+    ) -> "MIMEMultipart":
+        """Build the coupon email for a recipient.
+
+        Args:
+            to_email: Recipient email address
+            name: Recipient name
+            coupon_code: The coupon code to send
+            template: (subject, html, text) to render (default: the
+                built-in coupon email)
+            fields: Further slot values, such as the recipient's columns
+
+        Returns:
+            The complete MIME message
+        """
+        from email.mime.multipart import MIMEMultipart
+
+        with stage("render"):
+            values = {k: str(v) for k, v in fields.items()} if fields else {}
+            values.update(
+                name=self._capitalize_name(name),
+                coupon_code=coupon_code,
+                register_url=self.register_url,
+            )
+            # Values are text: escape them for the HTML part only
+            html_values = {k: html.escape(v) for k, v in values.items()}
+            subject_template, html_template, text_template = (
+                template or self.template
+            )
+            subject = subject_template.render(values)
+            html_content = html_template.render(html_values)
+            text_content = text_template.render(values)
+
+        # Create message
+        msg = MIMEMultipart("alternative")
+        msg["Subject"] = subject
+        msg["From"] = self.from_header
+        msg["To"] = to_email
+
+        # Attach both parts
+        msg.attach(self._text_part(text_content, "plain"))
+        msg.attach(self._text_part(html_content, "html"))
+
+        return msg
+
+    def send_email(
+        self,
+        to_email: str,
+        name: str,
+        coupon_code: str,
+        template: Optional[Tuple[SlotTemplate, SlotTemplate, SlotTemplate]] = None,
+        fields: Optional[Mapping[str, Any]] = None,
+    ) -> Tuple[bool, str]:
+        """Send coupon email to recipient (blocking operation).
+
+        Args:
+            to_email: Recipient email address
+            name: Recipient name
+            coupon_code: The coupon code to send
+            template: (subject, html, text) to render (default: the
+                built-in coupon email)
+            fields: Further slot values, such as the recipient's columns
+
+        Returns:
+            Tuple of (success: bool, error_message: str)
+        """
+        if self.transport.templated:
+            data = {"name": self._capitalize_name(name), "coupon_code": coupon_code}
+            with stage("transport"):
+                return self._guarded(
+                    self.smtp_breaker, lambda: self.transport.send(to_email, data)
+                )
+
+        try:
+            self.logger.debug(
+                "Preparing email for %s with coupon %s", to_email, coupon_code
+            )
+            with stage("mime"):
+                message = self.build_message(
+                    to_email, name, coupon_code, template, fields
+                ).as_bytes()
         except Exception as e:
             error_msg = f"Unexpected error sending email to {to_email}: {str(e)}"
             self.logger.error(error_msg, exc_info=True)
             return False, error_msg
 
+        return self.send_raw(to_email, message)
+
+    def warm_up(self) -> List[Future]:
+        """Run the transport's setup on the worker threads ahead of the first send.
+
+        For SMTP this loads smtplib/ssl and does the connect/STARTTLS/AUTH
+        handshake to every relay off the caller's thread, leaving the
+        sessions cached in their worker threads; a templated transport
+        stores its template. Failures are only logged, sends retry as usual.
+
+        Returns:
+            One future per setup task
+        """
+        return [self._executor.submit(task) for task in self.transport.warm_up_tasks()]
+
+    def keep_alive(self):
+        """Keep the sender ready while it idles between batches (blocking).
+
+        Refreshes the bearer token ahead of its expiry and keeps the
+        transport's connections open, so the first send of the next batch
+        pays neither a login nor a handshake. Must not overlap a batch.
+        """
+        if self.token_provider is not None:
+            self.token_provider.get_token()
+        self.transport.keep_alive()
+
+    def send_raw(self, to_email: str, message: bytes) -> Tuple[bool, str]:
+        """Send a pre-built message through the transport (blocking).
+
+        Args:
+            to_email: Envelope recipient
+            message: Raw RFC 822 bytes
+
+        Returns:
+            Tuple of (success: bool, error_message: str)
+        """
+        if self.transport.templated:
+            return False, f"{self.transport.name} can't send pre-built messages"
+        with stage("transport"):
+            return self._guarded(
+                self.smtp_breaker, lambda: self.transport.send(to_email, message)
+            )
+
     def process_recipient_sync(self, recipient: Dict[str, Any]) -> EmailResult:
         """Process a single recipient synchronously (used by async wrapper).
 
@@ -339,14 +813,39 @@ Melinia'26 Dev Team
             EmailResult with processing details
         """
         start_time = time.time()
-        coupon_code = generate_coupon_code()
 
         self.logger.debug(
-            f"Processing recipient: {recipient['name']} ({recipient['roll_no']})"
+            "Processing recipient: %s (%s)", recipient["name"], recipient["roll_no"]
         )
 
+        # A recipient whose template can't be rendered gets no coupon
+        try:
+            template = self.template_for(recipient)
+        except ValueError as e:
+            return EmailResult(
+                recipient=recipient,
+                coupon_code="",
+                status=EmailStatus.FAILED,
+                success=False,
+                error_message=f"Template error: {e}",
+                processing_time_ms=(time.time() - start_time) * 1000,
+            )
+
+        # Don't spend a coupon while the relay is known to be down
+        if not self.smtp_breaker.wait_available_sync(self.max_outage):
+            return EmailResult(
+                recipient=recipient,
+                coupon_code="",
+                status=EmailStatus.FAILED,
+                success=False,
+                error_message=f"{self.smtp_breaker.name} unavailable",
+                processing_time_ms=(time.time() - start_time) * 1000,
+            )
+
         # Create coupon via API
-        coupon_success, coupon_error = self.create_coupon(coupon_code)
+        coupon_code, coupon_success, coupon_error = self.create_recipient_coupon(
+            recipient
+        )
         if not coupon_success:
             processing_time = (time.time() - start_time) * 1000
             return EmailResult(
@@ -360,7 +859,7 @@ Melinia'26 Dev Team
 
         # Send email
         email_success, email_error = self.send_email(
-            recipient["email"], recipient["name"], coupon_code
+            recipient["email"], recipient["name"], coupon_code, template, recipient
         )
 
         processing_time = (time.time() - start_time) * 1000
@@ -383,73 +882,282 @@ Melinia'26 Dev Team
                 processing_time_ms=processing_time,
             )
 
-    async def process_recipient_async(self, recipient: Dict[str, Any]) -> EmailResult:
+    def render_recipient_sync(
+        self, recipient: Dict[str, Any], spool: Spool
+    ) -> EmailResult:
+        """Create a coupon and write the finished message to a spool.
+
+        Args:
+            recipient: Dictionary with roll_no, email, name, is_paid
+            spool: Spool to write the message to
+
+        Returns:
+            EmailResult with status RENDERED on success
+        """
+        start_time = time.time()
+        try:
+            template = self.template_for(recipient)
+        except ValueError as e:
+            return EmailResult(
+                recipient=recipient,
+                coupon_code="",
+                status=EmailStatus.FAILED,
+                success=False,
+                error_message=f"Template error: {e}",
+                processing_time_ms=(time.time() - start_time) * 1000,
+            )
+        coupon_code, coupon_success, coupon_error = self.create_recipient_coupon(
+            recipient
+        )
+        if not coupon_success:
+            return EmailResult(
+                recipient=recipient,
+                coupon_code=coupon_code,
+                status=EmailStatus.FAILED,
+                success=False,
+                error_message=f"Coupon creation failed: {coupon_error}",
+                processing_time_ms=(time.time() - start_time) * 1000,
+            )
+
+        with stage("mime"):
+            message = self.build_message(
+                recipient["email"], recipient["name"], coupon_code, template, recipient
+            ).as_bytes()
+        with stage("spool"):
+            spool.add(recipient, coupon_code, message)
+
+        return EmailResult(
+            recipient=recipient,
+            coupon_code=coupon_code,
+            status=EmailStatus.RENDERED,
+            success=True,
+            processing_time_ms=(time.time() - start_time) * 1000,
+        )
+
+    def send_spooled_sync(self, entry: SpoolEntry, spool: Spool) -> EmailResult:
+        """Deliver one spooled message and move it to ``cur/``.
+
+        Dry-run transports leave the message in ``new/``.
+
+        Args:
+            entry: Spool entry to deliver
+            spool: Spool the entry belongs to
+
+        Returns:
+            EmailResult with processing details
+        """
+        start_time = time.time()
+        with stage("spool"):
+            message = spool.read(entry)
+        success, error = self.send_raw(entry.email, message)
+        if success and self.transport.delivers:
+            with stage("spool"):
+                spool.mark_sent(entry)
+
+        return EmailResult(
+            recipient=entry.recipient,
+            coupon_code=entry.coupon_code,
+            status=EmailStatus.SENT if success else EmailStatus.FAILED,
+            success=success,
+            error_message="" if success else f"Email sending failed: {error}",
+            processing_time_ms=(time.time() - start_time) * 1000,
+        )
+
+    async def process_recipient_async(
+        self,
+        recipient: Any,
+        worker: Optional[Callable[[Any], EmailResult]] = None,
+    ) -> EmailResult:
         """Process a single recipient asynchronously with rate limiting.
 
         Args:
             recipient: Dictionary with roll_no, email, name, is_paid
+            worker: Blocking function to run (default: process_recipient_sync)
 
         Returns:
             EmailResult with processing details
         """
-        # Wait for rate limiter
-        await self.rate_limiter.acquire()
+        import asyncio
 
-        # Run blocking operations in thread pool
-        loop = asyncio.get_event_loop()
-        result = await loop.run_in_executor(
-            self._executor, self.process_recipient_sync, recipient
-        )
+        # Hold new work while a dependency's circuit is open
+        await self.coupon_breaker.wait_available()
+        await self.smtp_breaker.wait_available()
+
+        if self.quota is not None:
+            await self.quota.acquire()
+
+        sent = False
+        try:
+            # Wait for rate limiter
+            await self.rate_limiter.acquire()
 
-        return result
+            # Run blocking operations in thread pool
+            loop = asyncio.get_event_loop()
+            result = await loop.run_in_executor(
+                self._executor, worker or self.process_recipient_sync, recipient
+            )
+            sent = result.success
+            return result
+        finally:
+            if self.quota is not None:
+                self.quota.release(sent)
 
     async def process_recipients_batch(
         self,
-        recipients: List[Dict[str, Any]],
+        recipients: Iterable[Dict[str, Any]],
         progress_callback: Optional[Callable[[int, int, EmailResult], None]] = None,
-    ) -> List[EmailResult]:
+        sink: Optional[ResultSink] = None,
+        total: Optional[int] = None,
+        worker: Optional[Callable[[Any], EmailResult]] = None,
+    ) -> RunStats:
         """Process multiple recipients in parallel with rate limiting.
 
+        Results are streamed to ``sink`` and folded into the returned
+        statistics rather than collected, and at most ``max_in_flight``
+        recipients are pulled from ``recipients`` at a time. The window is
+        resized from each result's processing time to keep the rate limit
+        saturated.
+
         Args:
-            recipients: List of recipient dictionaries
+            recipients: Iterable of recipient dictionaries
             progress_callback: Optional callback function(current, total, result)
+            sink: Optional ResultSink receiving every result as it completes
+            total: Number of recipients (default: len(recipients))
+            worker: Blocking function applied to each item
+                (default: process_recipient_sync)
 
         Returns:
-            List of EmailResult objects
+            RunStats summarizing the batch
         """
+        import asyncio
+
+        if total is None:
+            total = len(recipients)
+
         self.logger.info(
-            f"Starting batch processing of {len(recipients)} recipients at {self.rate_limiter.max_requests_per_second} emails/second"
+            "Starting batch processing of %d recipients at %s emails/second",
+            total,
+            self.rate_limiter.max_requests_per_second,
         )
 
-        total = len(recipients)
-        completed = 0
-        results = []
+        stats = RunStats()
+        pending = set()
+        remaining = iter(recipients)
+        exhausted = False
+        worker = traced(worker or self.process_recipient_sync)
+        domains = None
+        task_domains: Dict["asyncio.Future", str] = {}
+        if self.domain_limits:
+            domains = DomainScheduler(remaining, self.domain_limits, _item_email)
+            self.logger.info(
+                "Per-domain limits: %s",
+                ", ".join(f"{d} {limit}" for d, limit in self.domain_limits.items()),
+            )
 
-        # Create tasks for all recipients
-        tasks = [self.process_recipient_async(r) for r in recipients]
+        try:
+            with stage("event_loop"):
+                while True:
+                    # Keep the in-flight window topped up
+                    while len(pending) < self.max_in_flight:
+                        if domains is not None:
+                            ready = domains.next_ready()
+                            if ready is None:
+                                break
+                            recipient, domain = ready
+                        else:
+                            recipient = None if exhausted else next(remaining, None)
+                            if recipient is None:
+                                exhausted = True
+                                break
+                        task = asyncio.ensure_future(
+                            self.process_recipient_async(recipient, worker)
+                        )
+                        pending.add(task)
+                        if domains is not None:
+                            task_domains[task] = domain
+
+                    # Wake up for a throttled domain's next token too
+                    timeout = None
+                    if domains is not None and len(pending) < self.max_in_flight:
+                        timeout = domains.wait_time()
+                        if timeout is not None:
+                            timeout = max(timeout, 0.001)
+                    if not pending:
+                        if domains is None or domains.done:
+                            break
+                        await asyncio.sleep(timeout or 0.001)
+                        continue
+
+                    done, pending = await asyncio.wait(
+                        pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                    )
+                    for task in done:
+                        if domains is not None:
+                            domains.release(task_domains.pop(task))
+                        result = task.result()
+                        self.concurrency.observe(result.processing_time_ms / 1000)
+                        stats.add(result)
+                        self._handle_result(
+                            result, stats.total, total, progress_callback, sink
+                        )
+        finally:
+            for task in pending:
+                task.cancel()
+
+        concurrency = self.concurrency
+        self.logger.info(
+            "Concurrency: window %d (peak %d, cap %d), latency %.0f ms",
+            concurrency.window,
+            concurrency.peak_window,
+            concurrency.max_window,
+            concurrency.latency * 1000,
+            extra=concurrency.metrics(),
+        )
+        return stats
 
-        # Process as they complete
-        for coro in asyncio.as_completed(tasks):
-            result = await coro
-            completed += 1
-            results.append(result)
+    def _handle_result(
+        self,
+        result: EmailResult,
+        completed: int,
+        total: int,
+        progress_callback: Optional[Callable[[int, int, EmailResult], None]],
+        sink: Optional[ResultSink],
+    ):
+        """Dispatch a completed result to the sink, callback and log."""
+        with stage("results"):
+            if sink is not None:
+                sink.write(result)
 
             if progress_callback:
                 progress_callback(completed, total, result)
 
             # Log individual results
-            if result.success:
-                self.logger.info(
-                    f"✓ [{completed}/{total}] Sent to {result.recipient['name']} ({result.recipient['roll_no']}) - Coupon: {result.coupon_code} - {result.processing_time_ms:.0f}ms"
-                )
-            else:
+            if not result.success:
                 self.logger.error(
-                    f"✗ [{completed}/{total}] Failed for {result.recipient['name']} ({result.recipient['roll_no']}) - Coupon: {result.coupon_code} - Error: {result.error_message}"
+                    "✗ [%d/%d] Failed for %s (%s) - Coupon: %s - Error: %s",
+                    completed,
+                    total,
+                    result.recipient["name"],
+                    result.recipient["roll_no"],
+                    result.coupon_code,
+                    result.error_message,
+                    extra=_result_extra(result),
+                )
+            elif self.logger.isEnabledFor(logging.INFO):
+                self.logger.info(
+                    "✓ [%d/%d] Sent to %s (%s) - Coupon: %s - %.0fms",
+                    completed,
+                    total,
+                    result.recipient["name"],
+                    result.recipient["roll_no"],
+                    result.coupon_code,
+                    result.processing_time_ms,
+                    extra=_result_extra(result),
                 )
-
-        return results
 
     def close(self):
         """Clean up resources."""
-        self._executor.shutdown(wait=True)
+        for executor in self._retired_executors + [self._executor]:
+            executor.shutdown(wait=True)
+        self.transport.close()
         self.logger.debug("EmailSender resources cleaned up")
@@ -0,0 +1,183 @@
+"""Logging setup with a queue-backed handler and text/JSON formatters."""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+from datetime import datetime, timezone
+from typing import Optional, TextIO
+
+from .profiling import stage
+
+LOGGER_NAME = "mail_coupons"
+
+# Attributes present on every LogRecord; anything else came from `extra=`
+_RECORD_ATTRS = frozenset(
+    vars(logging.LogRecord("", 0, "", 0, "", (), None)).keys()
+) | {"message", "asctime", "taskName"}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class ColoredFormatter(logging.Formatter):
+    """Custom formatter with colors for console output."""
+
+    # ANSI color codes
+    RESET = "\033[0m"
+    BOLD = "\033[1m"
+    DIM = "\033[2m"
+
+    # Colors
+    RED = "\033[91m"
+    GREEN = "\033[92m"
+    YELLOW = "\033[93m"
+    BLUE = "\033[94m"
+    MAGENTA = "\033[95m"
+    CYAN = "\033[96m"
+    WHITE = "\033[97m"
+    GRAY = "\033[90m"
+
+    # Level colors
+    LEVEL_COLORS = {
+        "DEBUG": GRAY,
+        "INFO": GREEN,
+        "WARNING": YELLOW,
+        "ERROR": RED,
+        "CRITICAL": RED + BOLD,
+    }
+
+    def format(self, record: logging.LogRecord) -> str:
+        # Get color for level
+        level_color = self.LEVEL_COLORS.get(record.levelname, self.WHITE)
+
+        # Format timestamp
+        timestamp = datetime.fromtimestamp(record.created).strftime("%H:%M:%S.%f")[:-3]
+
+        # Build the formatted message
+        level_str = f"{level_color}{record.levelname:8}{self.RESET}"
+
+        # Add emoji indicators for certain log levels
+        emoji = ""
+        if record.levelname == "INFO":
+            emoji = "ℹ️  "
+        elif record.levelname == "WARNING":
+            emoji = "⚠️  "
+        elif record.levelname == "ERROR":
+            emoji = "❌ "
+        elif record.levelname == "DEBUG":
+            emoji = "🔍 "
+
+        # Format the message
+        msg = f"{self.GRAY}[{timestamp}]{self.RESET} {level_str} {emoji}{record.getMessage()}"
+
+        # Add exception info if present
+        if record.exc_info:
+            exc_text = self.formatException(record.exc_info)
+            msg += f"\n{self.RED}{exc_text}{self.RESET}"
+
+        return msg
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as single-line JSON objects.
+
+    Fields passed through ``extra=`` are included as top-level keys.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class _InProcessQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that defers all formatting to the listener thread.
+
+    The stock prepare() formats the message in the caller so the record can
+    be pickled; our queue never leaves the process, so skip that.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def handle(self, record: logging.LogRecord):
+        with stage("logging"):
+            return super().handle(record)
+
+
+class _QueueListener(logging.handlers.QueueListener):
+    """QueueListener whose formatting and writing counts as a profiling stage."""
+
+    def handle(self, record: logging.LogRecord):
+        with stage("logging"):
+            super().handle(record)
+
+
+def setup_logging(
+    verbose: bool = False,
+    quiet: bool = False,
+    log_format: str = "text",
+    stream: Optional[TextIO] = None,
+) -> logging.Logger:
+    """Setup logging through a queue drained by a background listener.
+
+    Args:
+        verbose: Enable debug logging
+        quiet: Only show errors
+        log_format: "text" for colored output or "json" for JSON lines
+        stream: Output stream (default: sys.stdout)
+
+    Returns:
+        Configured logger instance
+    """
+    global _listener
+
+    level = logging.DEBUG if verbose else (logging.ERROR if quiet else logging.INFO)
+    logger = logging.getLogger(LOGGER_NAME)
+    logger.setLevel(level)
+
+    shutdown_logging()
+    logger.handlers = []
+
+    console_handler = logging.StreamHandler(stream or sys.stdout)
+    console_handler.setLevel(level)
+    console_handler.setFormatter(
+        JsonFormatter() if log_format == "json" else ColoredFormatter()
+    )
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    logger.addHandler(_InProcessQueueHandler(log_queue))
+    _listener = _QueueListener(log_queue, console_handler, respect_handler_level=True)
+    _listener.start()
+
+    return logger
+
+
+def flush_logging():
+    """Block until every queued record has been written."""
+    if _listener is not None:
+        _listener.stop()
+        _listener.start()
+
+
+def shutdown_logging():
+    """Flush queued records and stop the background listener."""
+    global _listener
+
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(shutdown_logging)
@@ -1,6 +1,17 @@
 """Login functionality for authentication."""
 
-import requests
+import base64
+import json
+import logging
+import os
+import threading
+import time
+from typing import Callable, Optional
+
+from ._lazy import lazy_import
+
+# Loaded on first use to keep CLI startup fast
+requests = lazy_import("requests")
 
 DEFAULT_LOGIN_URL = "http://localhost:3000/v1/api/login"
 
@@ -36,3 +47,157 @@ def authenticate_user(username: str, password: str, login_url: str = None) -> st
             )
     except Exception as e:
         raise Exception(f"Login failed: {str(e)}")
+
+
+def token_expiry(token: str) -> Optional[float]:
+    """Read the ``exp`` claim from a JWT without verifying it.
+
+    Args:
+        token: The bearer token
+
+    Returns:
+        Expiry as a Unix timestamp, or None if the token isn't a JWT with exp
+    """
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        exp = json.loads(base64.urlsafe_b64decode(payload)).get("exp")
+        return float(exp) if exp is not None else None
+    except (IndexError, ValueError, AttributeError, TypeError):
+        return None
+
+
+class TokenProvider:
+    """Bearer token source that caches, refreshes and re-authenticates.
+
+    The token and its expiry can be cached on disk (mode 0600) so restarts
+    skip the login round-trip. Tokens are refreshed ``refresh_margin``
+    seconds before they expire, and refreshes are single-flight: concurrent
+    callers wait for one login instead of each hitting the endpoint.
+    """
+
+    def __init__(
+        self,
+        username: str,
+        password: str,
+        login_url: str = None,
+        cache_path: Optional[str] = None,
+        refresh_margin: float = 60.0,
+        default_ttl: float = 3600.0,
+        authenticate: Callable[[str, str, str], str] = None,
+        logger: Optional[logging.Logger] = None,
+    ):
+        """Initialize the provider.
+
+        Args:
+            username: The username for login
+            password: The password for login
+            login_url: Optional custom login URL
+            cache_path: Optional file to persist the token in
+            refresh_margin: Seconds before expiry to refresh proactively
+            default_ttl: Lifetime assumed for tokens without an exp claim
+            authenticate: Login function (default: authenticate_user)
+            logger: Optional logger instance
+        """
+        self.username = username
+        self.password = password
+        self.login_url = login_url or DEFAULT_LOGIN_URL
+        self.cache_path = os.path.expanduser(cache_path) if cache_path else None
+        self.refresh_margin = refresh_margin
+        self.default_ttl = default_ttl
+        self._authenticate = authenticate or authenticate_user
+        self.logger = logger or logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._token: Optional[str] = None
+        self._expires_at = 0.0
+        self._load_cache()
+
+    def _fresh(self) -> bool:
+        return (
+            self._token is not None
+            and time.time() < self._expires_at - self.refresh_margin
+        )
+
+    def get_token(self) -> str:
+        """Return a valid token, logging in if it is missing or near expiry.
+
+        Returns:
+            The bearer token string
+
+        Raises:
+            Exception: If login fails
+        """
+        if self._fresh():
+            return self._token
+        with self._lock:
+            if not self._fresh():
+                self._login()
+            return self._token
+
+    def refresh(self, stale_token: Optional[str] = None) -> str:
+        """Force a new login unless another caller already replaced the token.
+
+        Call this after the API rejects ``stale_token`` with a 401.
+
+        Args:
+            stale_token: The token that was rejected
+
+        Returns:
+            The new bearer token string
+        """
+        with self._lock:
+            if self._token is None or self._token == stale_token:
+                self._login()
+            return self._token
+
+    def _login(self):
+        """Log in and store the new token (caller holds the lock)."""
+        token = self._authenticate(self.username, self.password, self.login_url)
+        if not token:
+            raise Exception("Login failed: no access token in response")
+        self._token = token
+        self._expires_at = token_expiry(token) or time.time() + self.default_ttl
+        self._save_cache()
+
+    def _load_cache(self):
+        """Load a cached token for the same user and endpoint, if any."""
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return
+        if (
+            cached.get("username") == self.username
+            and cached.get("login_url") == self.login_url
+        ):
+            self._token = cached.get("token")
+            self._expires_at = float(cached.get("expires_at", 0))
+
+    def _save_cache(self):
+        """Write the token to the cache file, readable by the owner only.
+
+        The cache only saves a login next time, so failing to write it is
+        logged rather than raised.
+        """
+        if not self.cache_path:
+            return
+        try:
+            directory = os.path.dirname(self.cache_path)
+            if directory:
+                os.makedirs(directory, mode=0o700, exist_ok=True)
+            fd = os.open(self.cache_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(
+                    {
+                        "username": self.username,
+                        "login_url": self.login_url,
+                        "token": self._token,
+                        "expires_at": self._expires_at,
+                    },
+                    f,
+                )
+            os.chmod(self.cache_path, 0o600)
+        except OSError as e:
+            self.logger.warning(f"Can't write token cache {self.cache_path}: {e}")
@@ -0,0 +1,307 @@
+"""Build-time size reduction for email templates.
+
+Templates are minified once, when the sender is created, and then filled
+per recipient by splicing values into the compiled pieces:
+
+- ``minify_html`` strips comments and insignificant whitespace, minifies
+  the ``<style>`` block and inline ``style`` attributes, drops CSS rules
+  whose classes/ids don't occur in the document and keyframes nothing
+  animates, and re-wraps lines so they stay short for SMTP.
+- ``choose_body_encoding`` picks the cheapest safe Content-Transfer-Encoding
+  for a rendered part: 7bit for ASCII, otherwise quoted-printable or
+  base64, whichever is estimated to be smaller (or 8bit when allowed).
+"""
+
+import re
+from typing import Dict, List, Set, Tuple
+
+BODY_ENCODINGS = ("auto", "8bit", "quoted-printable", "base64")
+
+# SMTP limit on line length, excluding CRLF (RFC 5321)
+MAX_LINE = 998
+
+# Elements whose surrounding whitespace never renders
+_BLOCK_TAGS = (
+    "html|head|body|title|meta|link|style|div|p|h[1-6]|table|thead|tbody|tfoot|"
+    "tr|td|th|ul|ol|li|center|br|hr|section|header|footer|main|article|nav"
+)
+_BLOCK_TAG_SPACE = re.compile(rf"\s*(</?(?:{_BLOCK_TAGS})\b[^>]*>)\s*", re.I)
+_COMMENT = re.compile(r"<!--(?!\[if).*?-->", re.S)
+_RAW_BLOCK = re.compile(r"<(pre|textarea|script)\b.*?</\1>", re.S | re.I)
+_STYLE_BLOCK = re.compile(r"(<style\b[^>]*>)(.*?)(</style>)", re.S | re.I)
+_STYLE_ATTR = re.compile(r'(\sstyle=")([^"]*)(")', re.I)
+# Attribute value, double-quoted, single-quoted or unquoted; {} is the name
+_ATTR_VALUE = r"""\s{}\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'=<>`]+))"""
+_CLASS_ATTR = re.compile(_ATTR_VALUE.format("class"), re.I)
+_ID_ATTR = re.compile(_ATTR_VALUE.format("id"), re.I)
+_INLINE_STYLE = re.compile(_ATTR_VALUE.format("style"), re.I)
+_CSS_COMMENT = re.compile(r"/\*.*?\*/", re.S)
+_SELECTOR_NAMES = re.compile(r"([.#])(-?[_a-zA-Z][\w-]*)")
+_ANIMATION = re.compile(r"animation(?:-name)?\s*:\s*([^;}\"]*)", re.I)
+
+
+def _minify_declarations(css: str) -> str:
+    """Minify a declaration list such as ``a: b; c: d;``."""
+    declarations = []
+    for declaration in css.split(";"):
+        name, sep, value = declaration.partition(":")
+        if sep and name.strip():
+            value = re.sub(r"\s+", " ", value.strip())
+            value = re.sub(r"\s*([,/])\s*", r"\1", value)
+            declarations.append(f"{name.strip()}:{value}")
+    return ";".join(declarations)
+
+
+def _split_rules(css: str) -> List[Tuple[str, str]]:
+    """Split a style sheet into top-level (prelude, block) pairs."""
+    rules = []
+    depth = 0
+    start = 0
+    prelude = ""
+    for i, char in enumerate(css):
+        if char == "{":
+            if depth == 0:
+                prelude = css[start:i].strip()
+                start = i + 1
+            depth += 1
+        elif char == "}":
+            depth -= 1
+            if depth == 0:
+                rules.append((prelude, css[start:i]))
+                start = i + 1
+    return rules
+
+
+def _attribute_values(pattern: "re.Pattern[str]", html: str) -> List[str]:
+    """Values of one attribute throughout a document, however quoted."""
+    return ["".join(groups) for groups in pattern.findall(html)]
+
+
+def _names(values: List[str]) -> Set[str]:
+    """Whitespace-separated names in attribute values.
+
+    A value filled in from a slot can hold any name, so it matches all.
+    """
+    if any("{{" in value for value in values):
+        return _AnyName()
+    return {name for value in values for name in value.split()}
+
+
+def _selector_used(selector: str, classes: Set[str], ids: Set[str]) -> bool:
+    """Whether every class and id in a selector occurs in the document."""
+    for kind, name in _SELECTOR_NAMES.findall(selector):
+        if name not in (classes if kind == "." else ids):
+            return False
+    return True
+
+
+def _minify_rules(
+    rules: List[Tuple[str, str]], classes: Set[str], ids: Set[str]
+) -> List[Tuple[str, str]]:
+    """Minify rules and drop those that can't match the document.
+
+    Returns:
+        List of (prelude, minified block) pairs, keyframes included
+    """
+    kept = []
+    for prelude, block in rules:
+        prelude = re.sub(r"\s+", " ", prelude)
+        lowered = prelude.lower()
+        if lowered.startswith(("@media", "@supports")):
+            inner = _minify_rules(_split_rules(block), classes, ids)
+            if inner:
+                prelude = re.sub(r"\s*([(:),])\s*", r"\1", prelude)
+                prelude = prelude.replace("and(", "and (")
+                kept.append((prelude, "".join(f"{p}{{{b}}}" for p, b in inner)))
+        elif lowered.startswith(("@keyframes", "@-webkit-keyframes")):
+            steps = _split_rules(block)
+            body = "".join(
+                f"{re.sub(r'\s*,\s*', ',', step)}{{{_minify_declarations(decls)}}}"
+                for step, decls in steps
+            )
+            kept.append((prelude, body))
+        elif lowered.startswith("@"):
+            kept.append((prelude, _minify_declarations(block)))
+        else:
+            selectors = [
+                s.strip()
+                for s in prelude.split(",")
+                if _selector_used(s.strip(), classes, ids)
+            ]
+            if selectors:
+                selector = ",".join(
+                    re.sub(r"\s*([>+~])\s*", r"\1", s) for s in selectors
+                )
+                kept.append((selector, _minify_declarations(block)))
+    return kept
+
+
+def minify_css(css: str, html: str = "") -> str:
+    """Minify a style sheet, dropping rules ``html`` can't use.
+
+    Args:
+        css: Contents of a ``<style>`` block
+        html: Document the style sheet belongs to; when given, rules for
+            absent classes/ids and keyframes nothing animates are removed
+
+    Returns:
+        The minified style sheet
+    """
+    css = _CSS_COMMENT.sub("", css)
+    if html:
+        classes = _names(_attribute_values(_CLASS_ATTR, html))
+        ids = _names(_attribute_values(_ID_ATTR, html))
+    else:
+        classes, ids = _AnyName(), _AnyName()
+    rules = _minify_rules(_split_rules(css), classes, ids)
+
+    if html:
+        # Keyframes are only live if a remaining rule or inline style uses them
+        used_css = " ".join(
+            block for prelude, block in rules if "keyframes" not in prelude
+        )
+        inline = " ".join(_attribute_values(_INLINE_STYLE, html))
+        animated = {
+            word
+            for value in _ANIMATION.findall(used_css + ";" + inline)
+            for word in re.split(r"[\s,]+", value)
+        }
+        rules = [
+            (prelude, block)
+            for prelude, block in rules
+            if "keyframes" not in prelude.lower() or prelude.split()[-1] in animated
+        ]
+    return "".join(f"{prelude}{{{block}}}" for prelude, block in rules)
+
+
+class _AnyName(set):
+    """Set that contains every name, for minifying CSS without a document."""
+
+    def __contains__(self, item: object) -> bool:
+        return True
+
+
+def wrap_lines(html: str, width: int = 76) -> str:
+    """Break long lines at whitespace that doesn't change the rendering.
+
+    Only spaces in text or between attributes are turned into newlines,
+    never spaces inside quoted attribute values. Lines with no such space
+    are left long.
+    """
+    chars = list(html)
+    line_start = 0
+    last_break = -1
+    in_tag = False
+    quote = ""
+    for i, char in enumerate(chars):
+        if char == "\n":
+            line_start, last_break = i + 1, -1
+            continue
+        if quote:
+            if char == quote:
+                quote = ""
+        elif in_tag and char in "\"'":
+            quote = char
+        elif char == "<":
+            in_tag = True
+        elif char == ">":
+            in_tag = False
+        elif char == " ":
+            if i - line_start >= width and last_break >= 0:
+                chars[last_break] = "\n"
+                line_start = last_break + 1
+            last_break = i
+    if len(chars) - line_start > width and last_break >= line_start:
+        chars[last_break] = "\n"
+    return "".join(chars)
+
+
+def minify_html(html: str, width: int = 76) -> str:
+    """Minify an HTML email body.
+
+    Args:
+        html: The document
+        width: Line length to re-wrap to (whitespace permitting)
+
+    Returns:
+        The minified document
+    """
+    raw_blocks: Dict[str, str] = {}
+
+    def stash(match: "re.Match[str]") -> str:
+        key = f"\x00{len(raw_blocks)}\x00"
+        raw_blocks[key] = match.group(0)
+        return key
+
+    html = _COMMENT.sub("", html)
+    html = _RAW_BLOCK.sub(stash, html)
+    html = _STYLE_ATTR.sub(
+        lambda m: m.group(1) + _minify_declarations(m.group(2)) + m.group(3), html
+    )
+    html = _STYLE_BLOCK.sub(
+        lambda m: m.group(1) + minify_css(m.group(2), html) + m.group(3), html
+    )
+    html = re.sub(r"\s+", " ", html)
+    html = _BLOCK_TAG_SPACE.sub(r"\1", html)
+    html = wrap_lines(html.strip(), width) + "\n"
+    for key, block in raw_blocks.items():
+        html = html.replace(key, block)
+    return html
+
+
+def choose_body_encoding(text: str, body_encoding: str = "auto") -> str:
+    """Pick the Content-Transfer-Encoding for a rendered text part.
+
+    ASCII text with short lines is sent as 7bit whatever the setting. For
+    anything else, ``auto`` estimates the quoted-printable and base64 sizes
+    and picks the smaller; ``8bit`` sends UTF-8 as-is (the relay must
+    support 8BITMIME) unless a line is too long for SMTP.
+
+    Args:
+        text: The rendered part
+        body_encoding: One of BODY_ENCODINGS
+
+    Returns:
+        "7bit", "8bit", "quoted-printable" or "base64"
+    """
+    long_lines = any(len(line) > MAX_LINE for line in text.split("\n"))
+    if text.isascii() and not long_lines:
+        return "7bit"
+    if body_encoding == "8bit" and not long_lines:
+        return "8bit"
+    if body_encoding in ("quoted-printable", "base64"):
+        return body_encoding
+
+    data = text.encode("utf-8")
+    escaped = len(data) - len(data.decode("ascii", "ignore")) + data.count(b"=")
+    # =XX per escaped byte, plus a soft line break per 75 characters of
+    # lines longer than 76
+    soft_breaks = sum(len(line) // 75 for line in text.split("\n") if len(line) > 76)
+    quoted_printable = len(data) + 2 * escaped + 3 * soft_breaks
+    base64 = (len(data) + 2) // 3 * 4 * 77 // 76
+    return "quoted-printable" if quoted_printable <= base64 else "base64"
+
+
+class SlotTemplate:
+    """Text with ``{{name}}`` slots, split once so filling it is a join."""
+
+    _SLOT = re.compile(r"\{\{(\w+)\}\}")
+
+    def __init__(self, text: str):
+        """Compile a template.
+
+        Args:
+            text: Template text with ``{{name}}`` slots
+        """
+        self.text = text
+        self._parts = self._SLOT.split(text)
+
+    def render(self, values: Dict[str, str]) -> str:
+        """Fill the slots; unknown slots are left as they are."""
+        parts = self._parts
+        out = [parts[0]]
+        for i in range(1, len(parts), 2):
+            name = parts[i]
+            out.append(values[name] if name in values else f"{{{{{name}}}}}")
+            out.append(parts[i + 1])
+        return "".join(out)
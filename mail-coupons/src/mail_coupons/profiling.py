@@ -0,0 +1,552 @@
+"""Per-stage CPU/allocation profiling of a batch (``--profile``).
+
+Three views of a run, all cheap enough to leave on for a real send:
+
+- Stage timers: the pipeline wraps its stages (coupon API call, template
+  render, MIME build, transport, logging, ...) in ``stage(name)``. While a
+  Profiler is active each stage's exclusive CPU time (``time.thread_time``)
+  and wall time are added up per stage; otherwise ``stage()`` is a no-op.
+- Call tracing: one recipient in ``trace_every`` runs under a deterministic
+  per-thread profiler, giving a pstats file and collapsed stacks for flame
+  graphs. cProfile can't be used here: since Python 3.12 it keeps a single
+  call stack for all threads, and the work happens on many of them. A
+  sampling thread is no better, as it only gets the GIL when a worker
+  releases it and so sees every worker at its I/O calls.
+- Allocations: tracemalloc is switched on for short windows, and what each
+  window allocated that is still live at its end is attributed to stages
+  and allocation sites. Tracing continuously slows a threaded send down
+  several times over.
+"""
+
+import contextlib
+import itertools
+import logging
+import marshal
+import os
+import sys
+import threading
+import time
+import types
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+# Pipeline stages, in report order
+STAGES = (
+    "coupon_api",
+    "render",
+    "mime",
+    "transport",
+    "connect",
+    "logging",
+    "spool",
+    "results",
+    "event_loop",
+    "other",
+)
+
+# (filename, first line, function name), as pstats keys functions
+FunctionKey = Tuple[str, int, str]
+
+_active: Optional["Profiler"] = None
+_local = threading.local()
+_NO_STAGE = contextlib.nullcontext()
+
+
+class _StageTimer:
+    """Time one stage on the current thread, excluding nested stages."""
+
+    __slots__ = ("profiler", "name", "cpu", "wall", "child_cpu", "child_wall")
+
+    def __init__(self, profiler: "Profiler", name: str):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        try:
+            stack = _local.stages
+        except AttributeError:
+            stack = _local.stages = []
+        stack.append(self)
+        self.child_cpu = self.child_wall = 0.0
+        self.cpu = time.thread_time()
+        self.wall = time.perf_counter()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        cpu = time.thread_time() - self.cpu
+        wall = time.perf_counter() - self.wall
+        stack = _local.stages
+        stack.pop()
+        if stack:
+            stack[-1].child_cpu += cpu
+            stack[-1].child_wall += wall
+        self.profiler._add_stage(
+            self.name, cpu - self.child_cpu, wall - self.child_wall
+        )
+
+
+def stage(name: str):
+    """Context manager attributing the enclosed work to a pipeline stage.
+
+    A no-op unless a Profiler is running. Time spent in stages nested
+    inside is counted towards those stages only.
+
+    Args:
+        name: One of STAGES
+    """
+    profiler = _active
+    if profiler is None:
+        return _NO_STAGE
+    return _StageTimer(profiler, name)
+
+
+def traced(func: Callable[[Any], Any]) -> Callable[[Any], Any]:
+    """Wrap a per-recipient worker for call tracing if a Profiler is running."""
+    profiler = _active
+    if profiler is None:
+        return func
+    return profiler.wrap(func)
+
+
+def _package_dir(module) -> str:
+    return os.path.dirname(module.__file__) + os.sep
+
+
+class StageClassifier:
+    """Map code locations to pipeline stages, for allocation tracebacks.
+
+    A traceback belongs to the stage of its innermost frame that matches a
+    rule, so a log call made while rendering counts as ``logging``. Rules
+    are either whole files or packages, or the line range of a function,
+    mirroring where the pipeline's stage timers sit.
+    """
+
+    def __init__(self):
+        """Build the rules from the loaded modules."""
+        import asyncio
+        import email
+
+        from . import database, log, minify, results, ses, spool, transports
+        from .email_sender import EmailSender
+
+        self._files: List[Tuple[str, str]] = [
+            (_package_dir(logging), "logging"),
+            (log.__file__, "logging"),
+            (_package_dir(email), "mime"),
+            (minify.__file__, "render"),
+            (transports.__file__, "transport"),
+            (ses.__file__, "transport"),
+            (spool.__file__, "spool"),
+            (results.__file__, "results"),
+            (database.__file__, "results"),
+            (_package_dir(asyncio), "event_loop"),
+        ]
+        self._functions: Dict[str, List[Tuple[int, int, str]]] = {}
+        for function, stage_name in (
+            (transports.SmtpTransport._open_smtp, "connect"),
+            (EmailSender.create_coupon, "coupon_api"),
+            (EmailSender._create_coupon_once, "coupon_api"),
+            (EmailSender.message_content, "render"),
+            (EmailSender.build_message, "mime"),
+            (EmailSender._text_part, "mime"),
+            (EmailSender.send_raw, "transport"),
+        ):
+            code = function.__code__
+            last = max(line for _, _, line in code.co_lines() if line is not None)
+            self._functions.setdefault(code.co_filename, []).append(
+                (code.co_firstlineno, last, stage_name)
+            )
+        self._cache: Dict[Tuple[str, int], Optional[str]] = {}
+
+    def stage_at(self, filename: str, lineno: int) -> Optional[str]:
+        """Stage of a single code location, or None if no rule matches."""
+        key = (filename, lineno)
+        try:
+            return self._cache[key]
+        except KeyError:
+            pass
+        found = None
+        for first, last, function_stage in self._functions.get(filename, ()):
+            if first <= lineno <= last:
+                found = function_stage
+                break
+        else:
+            for prefix, file_stage in self._files:
+                if filename.startswith(prefix):
+                    found = file_stage
+                    break
+        self._cache[key] = found
+        return found
+
+    def classify(self, locations: Iterable[Tuple[str, int]]) -> str:
+        """Stage of a traceback given as (filename, lineno), innermost first."""
+        for filename, lineno in locations:
+            found = self.stage_at(filename, lineno)
+            if found is not None:
+                return found
+        return "other"
+
+
+class CallTracer:
+    """Deterministic profile of calls on the current thread (sys.setprofile).
+
+    Times are CPU seconds of the traced thread (``time.thread_time``), so
+    waiting on the network or for the GIL isn't charged to whatever
+    function happened to be running.
+    """
+
+    def __init__(self):
+        """Initialize empty statistics."""
+        # key -> [calls, own time, cumulative time, {caller: [calls, own, cumulative]}]
+        self.functions: Dict[FunctionKey, list] = {}
+        # call path (root first) -> own time
+        self.stacks: Dict[Tuple[FunctionKey, ...], float] = {}
+        # [key, path, start, child time]
+        self._stack: List[list] = []
+        self._depth: Dict[FunctionKey, int] = {}
+        self._c_keys: Dict[Any, FunctionKey] = {}
+
+    def run(self, func: Callable, *args) -> Any:
+        """Call ``func(*args)`` with tracing on and return its result."""
+        sys.setprofile(self._event)
+        try:
+            return func(*args)
+        finally:
+            sys.setprofile(None)
+            # Calls left open when tracing stopped
+            now = time.thread_time()
+            while self._stack:
+                self._pop(now)
+
+    def _c_key(self, func) -> FunctionKey:
+        """pstats-style key for a builtin function or method."""
+        owner = getattr(func, "__self__", None)
+        cache_key = (
+            func
+            if owner is None or isinstance(owner, types.ModuleType)
+            else (type(owner), func.__name__)
+        )
+        try:
+            return self._c_keys[cache_key]
+        except KeyError:
+            pass
+        if cache_key is func:
+            module = getattr(func, "__module__", None)
+            name = f"{module}.{func.__name__}" if module else func.__name__
+            key = ("~", 0, f"<built-in method {name}>")
+        else:
+            key = (
+                "~",
+                0,
+                f"<method '{func.__name__}' of '{type(owner).__name__}' objects>",
+            )
+        self._c_keys[cache_key] = key
+        return key
+
+    def _event(self, frame, event: str, arg):
+        now = time.thread_time()
+        if event == "call":
+            code = frame.f_code
+            self._push((code.co_filename, code.co_firstlineno, code.co_name), now)
+        elif event == "c_call":
+            self._push(self._c_key(arg), now)
+        elif self._stack:
+            self._pop(now)
+
+    def _push(self, key: FunctionKey, now: float):
+        path = self._stack[-1][1] + (key,) if self._stack else (key,)
+        self._stack.append([key, path, now, 0.0])
+        self._depth[key] = self._depth.get(key, 0) + 1
+
+    def _pop(self, now: float):
+        key, path, start, child = self._stack.pop()
+        elapsed = now - start
+        own = elapsed - child
+        depth = self._depth[key] - 1
+        self._depth[key] = depth
+        # Only the outermost of recursive calls adds to cumulative time
+        cumulative = elapsed if depth == 0 else 0.0
+
+        entry = self.functions.get(key)
+        if entry is None:
+            entry = self.functions[key] = [0, 0.0, 0.0, {}]
+        entry[0] += 1
+        entry[1] += own
+        entry[2] += cumulative
+        self.stacks[path] = self.stacks.get(path, 0.0) + own
+
+        if self._stack:
+            parent = self._stack[-1]
+            parent[3] += elapsed
+            edge = entry[3].get(parent[0])
+            if edge is None:
+                edge = entry[3][parent[0]] = [0, 0.0, 0.0]
+            edge[0] += 1
+            edge[1] += own
+            edge[2] += cumulative
+
+
+def _label(key: FunctionKey) -> str:
+    """Flame graph label for a function: ``name (dir/file.py:line)``."""
+    filename, line, name = key
+    if filename == "~":
+        return name
+    short = os.path.join(
+        os.path.basename(os.path.dirname(filename)), os.path.basename(filename)
+    )
+    return f"{name} ({short}:{line})"
+
+
+def _format_size(size: float) -> str:
+    for unit in ("B", "KiB", "MiB"):
+        if abs(size) < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GiB"
+
+
+class Profiler:
+    """Collect stage timings, traced calls and allocations for a batch.
+
+    Usage:
+        with Profiler() as profiler:
+            ...run the batch...
+        profiler.write_reports("run.profile")
+    """
+
+    def __init__(
+        self,
+        trace_every: int = 100,
+        trace_frames: int = 4,
+        trace_window: float = 0.05,
+        trace_period: float = 2.0,
+        top: int = 20,
+    ):
+        """Initialize the profiler.
+
+        Args:
+            trace_every: Trace the calls of one recipient in this many
+                (0 disables call tracing)
+            trace_frames: Frames stored per allocation traceback (0 disables
+                allocation tracing)
+            trace_window: Seconds allocation tracing stays on each period
+            trace_period: Seconds between the starts of allocation windows
+            top: Allocation sites listed in the report
+        """
+        self.trace_every = trace_every
+        self.trace_frames = trace_frames
+        self.trace_window = trace_window
+        self.trace_period = trace_period
+        self.top = top
+        self.duration = 0.0
+        # stage -> [count, cpu seconds, wall seconds], exclusive of nested stages
+        self.stage_times: Dict[str, List[float]] = {s: [0, 0.0, 0.0] for s in STAGES}
+        # Merged CallTracer results
+        self.functions: Dict[FunctionKey, list] = {}
+        self.stacks: Dict[Tuple[FunctionKey, ...], float] = {}
+        self.traced_calls = 0
+        # Allocations still live at the end of each tracing window
+        self.stage_bytes: Dict[str, int] = dict.fromkeys(STAGES, 0)
+        self.sites: Dict[Tuple[str, int], List[int]] = {}
+        self.allocation_windows = 0
+        self._calls = itertools.count()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._start_time = 0.0
+
+    def start(self):
+        """Activate stage timers and start the allocation tracing thread.
+
+        Raises:
+            RuntimeError: If another Profiler is already running
+        """
+        global _active
+
+        if _active is not None:
+            raise RuntimeError("A profiler is already running")
+        self._stop.clear()
+        self._start_time = time.perf_counter()
+        _active = self
+        self._thread = threading.Thread(
+            target=self._trace_allocations, name="profiler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        """Deactivate the profiler; the collected data stays available."""
+        global _active
+
+        if _active is not self:
+            return
+        _active = None
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self.duration = time.perf_counter() - self._start_time
+
+    def __enter__(self) -> "Profiler":
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def _add_stage(self, name: str, cpu: float, wall: float):
+        with self._lock:
+            totals = self.stage_times[name]
+            totals[0] += 1
+            totals[1] += cpu
+            totals[2] += wall
+
+    def wrap(self, func: Callable[[Any], Any]) -> Callable[[Any], Any]:
+        """Wrap a per-item worker so every ``trace_every``-th call is traced."""
+        if not self.trace_every:
+            return func
+
+        def worker(item):
+            if next(self._calls) % self.trace_every:
+                return func(item)
+            tracer = CallTracer()
+            try:
+                return tracer.run(func, item)
+            finally:
+                self._merge(tracer)
+
+        return worker
+
+    def _merge(self, tracer: CallTracer):
+        """Fold one traced call into the totals."""
+        with self._lock:
+            self.traced_calls += 1
+            for key, (calls, own, cumulative, callers) in tracer.functions.items():
+                entry = self.functions.get(key)
+                if entry is None:
+                    entry = self.functions[key] = [0, 0.0, 0.0, {}]
+                entry[0] += calls
+                entry[1] += own
+                entry[2] += cumulative
+                for caller, edge in callers.items():
+                    total = entry[3].setdefault(caller, [0, 0.0, 0.0])
+                    for i in range(3):
+                        total[i] += edge[i]
+            for path, own in tracer.stacks.items():
+                self.stacks[path] = self.stacks.get(path, 0.0) + own
+
+    def _trace_allocations(self):
+        """Switch tracemalloc on for a window every period until stopped."""
+        import tracemalloc
+
+        # Leave tracing alone if something else (python -X tracemalloc) owns it
+        if not self.trace_frames or tracemalloc.is_tracing():
+            return
+        classifier = StageClassifier()
+        while not self._stop.is_set():
+            tracemalloc.start(self.trace_frames)
+            self._stop.wait(self.trace_window)
+            snapshot = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+            self._add_snapshot(snapshot, classifier)
+            self._stop.wait(self.trace_period - self.trace_window)
+
+    def _add_snapshot(self, snapshot, classifier: StageClassifier):
+        import tracemalloc
+
+        snapshot = snapshot.filter_traces(
+            [
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, __file__),
+            ]
+        )
+        self.allocation_windows += 1
+        for stat in snapshot.statistics("traceback"):
+            # Traceback frames run from the oldest to the innermost
+            locations = [(frame.filename, frame.lineno) for frame in stat.traceback]
+            self.stage_bytes[classifier.classify(reversed(locations))] += stat.size
+            site = self.sites.setdefault(locations[-1], [0, 0])
+            site[0] += stat.size
+            site[1] += stat.count
+
+    def summary(self) -> str:
+        """One-line breakdown of CPU time by stage, largest first."""
+        total = sum(cpu for _, cpu, _ in self.stage_times.values()) or 1.0
+        parts = [
+            f"{name} {cpu / total:.0%}"
+            for name, (_, cpu, _) in sorted(
+                self.stage_times.items(), key=lambda item: -item[1][1]
+            )
+            if cpu / total >= 0.01
+        ]
+        return ", ".join(parts) or "nothing recorded"
+
+    def write_reports(self, prefix: str) -> List[str]:
+        """Write the reports and return their paths.
+
+        - ``<prefix>.pstats``: traced calls, loadable with ``pstats`` or
+          snakeviz
+        - ``<prefix>.collapsed.txt``: collapsed stacks in microseconds, for
+          flame graph tools (flamegraph.pl, speedscope, inferno)
+        - ``<prefix>.txt``: stage breakdown and top allocation sites
+
+        Args:
+            prefix: Path prefix for the report files
+
+        Returns:
+            Paths written
+        """
+        paths = [f"{prefix}.pstats", f"{prefix}.collapsed.txt", f"{prefix}.txt"]
+        stats = {
+            key: (
+                calls,
+                calls,
+                own,
+                cumulative,
+                {caller: (n, n, t, c) for caller, (n, t, c) in callers.items()},
+            )
+            for key, (calls, own, cumulative, callers) in self.functions.items()
+        }
+        with open(paths[0], "wb") as f:
+            marshal.dump(stats, f)
+        with open(paths[1], "w", encoding="utf-8") as f:
+            for path, own in self.stacks.items():
+                micros = round(own * 1e6)
+                if micros:
+                    f.write(";".join(_label(key) for key in path) + f" {micros}\n")
+        with open(paths[2], "w", encoding="utf-8") as f:
+            f.write(self.report())
+        return paths
+
+    def report(self) -> str:
+        """Stage breakdown and top allocation sites as text."""
+        cpu_total = sum(cpu for _, cpu, _ in self.stage_times.values())
+        windows = self.allocation_windows or 1
+        lines = [
+            f"Profiled {self.duration:.1f}s; {self.traced_calls} recipients "
+            f"call-traced, {self.allocation_windows} allocation windows of "
+            f"{self.trace_window * 1000:.0f} ms",
+            "",
+            "CPU and wall time by stage (exclusive of nested stages; wall time",
+            "includes waiting on the network, locks and the GIL):",
+            "",
+            f"{'Stage':<12} {'Calls':>8} {'CPU':>9} {'Share':>7} {'Wall':>9} "
+            f"{'Allocated':>11}",
+        ]
+        for name in STAGES:
+            count, cpu, wall = self.stage_times[name]
+            if not count and not self.stage_bytes[name]:
+                continue
+            lines.append(
+                f"{name:<12} {count:>8} {cpu:>8.2f}s {cpu / (cpu_total or 1):>7.1%} "
+                f"{wall:>8.2f}s {_format_size(self.stage_bytes[name] / windows):>11}"
+            )
+
+        if self.sites:
+            lines += [
+                "",
+                "Top allocation sites (live at the end of a window, per window):",
+            ]
+            top = sorted(self.sites.items(), key=lambda item: -item[1][0])
+            for (filename, lineno), (size, count) in top[: self.top]:
+                lines.append(
+                    f"{_format_size(size / windows):>11} {count / windows:>9.1f} "
+                    f"blocks  {filename}:{lineno}"
+                )
+        return "\n".join(lines) + "\n"
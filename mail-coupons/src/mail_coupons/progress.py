@@ -0,0 +1,192 @@
+"""Progress tracking and frame-rate-limited terminal rendering."""
+
+import sys
+import time
+from collections import deque
+from typing import Optional, TextIO, TYPE_CHECKING
+
+import click
+
+if TYPE_CHECKING:
+    import asyncio
+
+
+class ProgressTracker:
+    """Counters updated once per result.
+
+    Recording a result only bumps integers, so it is safe to call from the
+    hot path. All formatting and rate math happens in ProgressRenderer.
+    """
+
+    def __init__(self, total: int):
+        """Initialize tracker.
+
+        Args:
+            total: Total number of items expected
+        """
+        self.total = total
+        self.success_count = 0
+        self.fail_count = 0
+        self.start_time = time.monotonic()
+
+    @property
+    def completed(self) -> int:
+        """Number of items finished (successful or failed)."""
+        return self.success_count + self.fail_count
+
+    def record(self, success: bool):
+        """Record a finished item.
+
+        Args:
+            success: Whether the item succeeded
+        """
+        if success:
+            self.success_count += 1
+        else:
+            self.fail_count += 1
+
+
+class ProgressRenderer:
+    """Redraw a ProgressTracker at a fixed frame rate from a separate task.
+
+    On a TTY the bar is redrawn in place; otherwise a plain status line is
+    written every ``plain_interval`` seconds.
+    """
+
+    def __init__(
+        self,
+        tracker: ProgressTracker,
+        stream: Optional[TextIO] = None,
+        fps: float = 10.0,
+        window: float = 10.0,
+        plain_interval: float = 5.0,
+        width: int = 50,
+    ):
+        """Initialize renderer.
+
+        Args:
+            tracker: Tracker to read counters from
+            stream: Output stream (default: sys.stdout)
+            fps: Redraw frequency on a TTY
+            window: Length in seconds of the moving window used for rate/ETA
+            plain_interval: Seconds between lines when not on a TTY
+            width: Width of the progress bar
+        """
+        self.tracker = tracker
+        self.stream = stream or sys.stdout
+        self.is_tty = self.stream.isatty()
+        self.interval = 1.0 / fps if self.is_tty else plain_interval
+        self.window = window
+        self.width = width
+        self._samples: deque = deque()
+        self._task: Optional["asyncio.Task"] = None
+        self._drawn = False
+
+    def rate(self, now: Optional[float] = None) -> float:
+        """Return items per second over the moving window.
+
+        Args:
+            now: Current monotonic time (default: time.monotonic())
+
+        Returns:
+            Observed rate, or 0.0 before two samples exist
+        """
+        now = time.monotonic() if now is None else now
+        samples = self._samples
+        samples.append((now, self.tracker.completed))
+        while len(samples) > 2 and now - samples[1][0] >= self.window:
+            samples.popleft()
+
+        t0, c0 = samples[0]
+        if now - t0 <= 0:
+            return 0.0
+        return (self.tracker.completed - c0) / (now - t0)
+
+    def format_line(self, now: Optional[float] = None) -> str:
+        """Build the current status line.
+
+        Args:
+            now: Current monotonic time (default: time.monotonic())
+
+        Returns:
+            Status line, styled when writing to a TTY
+        """
+        tracker = self.tracker
+        total = tracker.total or 1
+        current = tracker.completed
+        rate = self.rate(now)
+        remaining = tracker.total - current
+        eta = f"{remaining / rate:.0f}s" if rate > 0 else "--"
+        percentage = current / total * 100
+
+        if not self.is_tty:
+            return (
+                f"{percentage:5.1f}% | {current}/{tracker.total} | "
+                f"ok {tracker.success_count} failed {tracker.fail_count} | "
+                f"{rate:.1f} emails/s | ETA {eta}"
+            )
+
+        filled = int(self.width * current / total)
+        bar = click.style("█" * filled, fg="green") + click.style(
+            "░" * (self.width - filled), fg="bright_black"
+        )
+        line = f"\r{bar} {percentage:5.1f}% | {click.style(str(current), fg='cyan')}/{click.style(str(tracker.total), fg='white')} | "
+        line += f"✓{click.style(str(tracker.success_count), fg='green')} ✗{click.style(str(tracker.fail_count), fg='red')} | "
+        line += f"{rate:.1f} emails/s | ETA {eta}"
+        return line
+
+    def draw(self):
+        """Write one frame."""
+        line = self.format_line()
+        if self.is_tty:
+            self.stream.write(line)
+        else:
+            self.stream.write(line + "\n")
+        self.stream.flush()
+        self._drawn = True
+
+    def echo(self, text: str):
+        """Write a message above the bar without corrupting it.
+
+        Styling is stripped when the stream isn't a TTY, as click.echo does.
+
+        Args:
+            text: Message to write
+        """
+        if not self.is_tty:
+            text = click.unstyle(text)
+        elif self._drawn:
+            self.stream.write("\r\033[K")
+        self.stream.write(text + "\n")
+        self.stream.flush()
+
+    async def _run(self):
+        """Redraw loop."""
+        import asyncio
+
+        while True:
+            await asyncio.sleep(self.interval)
+            self.draw()
+
+    def start(self):
+        """Start the redraw task on the running event loop."""
+        import asyncio
+
+        self._samples.append((time.monotonic(), self.tracker.completed))
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """Stop the redraw task and draw the final frame."""
+        import asyncio
+
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.draw()
+        if self.is_tty:
+            self.stream.write("\n")
+            self.stream.flush()
@@ -0,0 +1,283 @@
+"""Rolling 24-hour send quota, shared by every run against a database.
+
+Providers such as SES cap both the send rate and the number of messages
+sent in any rolling 24 hours. Every successful send is counted per minute
+in the tracking database (see ``Database.mark_email_sent``), so a run knows
+what earlier runs and other processes already used. ``DailyQuota`` admits
+sends while the window has room, pauses the batch when it's full and
+resumes as the oldest minutes fall out of the window.
+"""
+
+import logging
+import math
+import time
+from collections import deque
+from datetime import datetime
+from typing import TYPE_CHECKING, Callable, Dict, Optional
+
+if TYPE_CHECKING:
+    import asyncio
+
+    from .database import Database
+
+# Length of the quota window in seconds
+WINDOW = 24 * 60 * 60
+
+
+def project_completion(
+    counts: Dict[int, int],
+    limit: int,
+    rate: float,
+    remaining: int,
+    now: float,
+    window: float = WINDOW,
+) -> float:
+    """Estimate when ``remaining`` sends will be done under a rolling quota.
+
+    Sends go out at ``rate`` while the window has room; when it's full they
+    wait for the oldest minute to expire. Sends made along the way expire
+    in turn, so campaigns several times the quota are projected over as
+    many days.
+
+    Args:
+        counts: Sends per minute (Unix time // 60) already in the window
+        limit: Maximum sends per window
+        rate: Sends per second while there is room
+        remaining: Sends still to make
+        now: Current Unix time
+        window: Window length in seconds
+
+    Returns:
+        Projected Unix time of the last send (``now`` if nothing remains)
+
+    Raises:
+        ValueError: If limit or rate is not positive
+    """
+    if limit <= 0 or rate <= 0:
+        raise ValueError("limit and rate must be positive")
+    # (time the sends leave the window, how many), oldest first
+    expiries = deque(
+        (minute * 60 + 60 + window, sent)
+        for minute, sent in sorted(counts.items())
+        if minute * 60 + 60 + window > now
+    )
+    used = sum(sent for _, sent in expiries)
+    t = now
+    while remaining > 0:
+        while expiries and expiries[0][0] <= t:
+            used -= expiries.popleft()[1]
+        room = limit - used
+        if room <= 0:
+            t = expiries[0][0]
+            continue
+        batch = min(room, remaining)
+        if expiries:
+            # Stop at the next expiry to free its room in time
+            batch = min(batch, max(1, math.floor(rate * (expiries[0][0] - t))))
+        t += batch / rate
+        used += batch
+        remaining -= batch
+        expiries.append((t + window, batch))
+    return t
+
+
+class DailyQuota:
+    """Admission control for a rolling send quota.
+
+    ``acquire`` is awaited before each send and ``release`` called with its
+    outcome. Sends in flight count against the quota until they finish;
+    successful ones are then counted in their minute. The per-minute counts
+    are re-read from the database periodically and whenever the quota runs
+    out, which picks up sends by other processes.
+    """
+
+    def __init__(
+        self,
+        db: "Database",
+        limit: int,
+        window: float = WINDOW,
+        refresh_interval: float = 60.0,
+        logger: Optional[logging.Logger] = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        """Initialize the quota.
+
+        Args:
+            db: Tracking database the sends are counted in
+            limit: Maximum sends per window, e.g. SES Max24HourSend
+            window: Window length in seconds
+            refresh_interval: Seconds between re-reading the counts
+            logger: Optional logger instance
+            clock: Returns the current Unix time
+
+        Raises:
+            ValueError: If limit is less than 1
+        """
+        if limit < 1:
+            raise ValueError("Daily quota must be at least 1")
+        self.db = db
+        self.limit = limit
+        self.window = window
+        self.refresh_interval = refresh_interval
+        self.logger = logger or logging.getLogger(__name__)
+        self.clock = clock
+        self.in_flight = 0
+        self.remaining = 0
+        self.rate = 1.0
+        self.pauses = 0
+        self._counts: Dict[int, int] = {}
+        self._refreshed = -math.inf
+        self._lock: Optional["asyncio.Lock"] = None
+
+    def refresh(self):
+        """Re-read the per-minute counts, dropping expired minutes.
+
+        A minute keeps the higher of the stored and the local count, since
+        this run's latest sends may not have been written yet.
+        """
+        now = self.clock()
+        self.db.prune_send_counts(now - self.window)
+        stored = self.db.send_counts(now - self.window)
+        first = int((now - self.window) // 60)
+        for minute, sent in self._counts.items():
+            if minute >= first and sent > stored.get(minute, 0):
+                stored[minute] = sent
+        self._counts = stored
+        self._refreshed = now
+
+    def used(self, now: Optional[float] = None) -> int:
+        """Sends in the window, plus sends in flight."""
+        if now is None:
+            now = self.clock()
+        start = now - self.window
+        return self.in_flight + sum(
+            sent for minute, sent in self._counts.items() if minute * 60 + 60 > start
+        )
+
+    def available(self, now: Optional[float] = None) -> int:
+        """Sends the quota has room for right now."""
+        return self.limit - self.used(now)
+
+    def next_free_at(self, now: Optional[float] = None) -> Optional[float]:
+        """When the oldest minute in the window expires, if any."""
+        if now is None:
+            now = self.clock()
+        start = now - self.window
+        minutes = [m for m in self._counts if m * 60 + 60 > start]
+        return min(minutes) * 60 + 60 + self.window if minutes else None
+
+    def plan(self, remaining: int, rate: float) -> float:
+        """Start tracking a batch and log when it's projected to finish.
+
+        Args:
+            remaining: Sends in the batch
+            rate: Sends per second while there is room
+
+        Returns:
+            Projected Unix time of the last send
+        """
+        self.remaining = remaining
+        self.rate = rate
+        self.refresh()
+        finish = self.projected_completion()
+        self.logger.info(
+            "Daily quota: %d of %d used in the last 24h; %d emails projected "
+            "to finish %s",
+            self.used(),
+            self.limit,
+            remaining,
+            _format_time(finish),
+            extra={
+                "event": "quota_plan",
+                "quota_used": self.used(),
+                "quota_limit": self.limit,
+                "projected_completion": finish,
+            },
+        )
+        return finish
+
+    def projected_completion(self) -> float:
+        """Projected Unix time of the last send of the current batch."""
+        counts = dict(self._counts)
+        if self.in_flight:
+            minute = int(self.clock() // 60)
+            counts[minute] = counts.get(minute, 0) + self.in_flight
+        return project_completion(
+            counts,
+            self.limit,
+            self.rate,
+            max(0, self.remaining - self.in_flight),
+            self.clock(),
+            self.window,
+        )
+
+    async def acquire(self):
+        """Wait until the quota has room for one more send, and take it."""
+        import asyncio
+
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            now = self.clock()
+            if now - self._refreshed >= self.refresh_interval:
+                self.refresh()
+            if self.available(now) <= 0:
+                self.refresh()
+            paused = False
+            logged_resume_at: Optional[float] = None
+            while self.available(now) <= 0:
+                resume_at = self.next_free_at(now)
+                if not paused:
+                    paused = True
+                    self.pauses += 1
+                    self._log_pause(resume_at)
+                elif logged_resume_at is None and resume_at is not None:
+                    # Sends that were in flight finished and took the room
+                    self._log_pause(resume_at)
+                logged_resume_at = resume_at
+                # Only sends in flight left: wait for them to finish
+                delay = resume_at - now if resume_at is not None else 1.0
+                await asyncio.sleep(max(delay, 0.5))
+                self.refresh()
+                now = self.clock()
+            if paused:
+                self.logger.info(
+                    "Daily quota has room again, resuming (%d available)",
+                    self.available(now),
+                    extra={"event": "quota_resume", "available": self.available(now)},
+                )
+            self.in_flight += 1
+
+    def _log_pause(self, resume_at: Optional[float]):
+        finish = self.projected_completion()
+        self.logger.warning(
+            "Daily quota of %d reached, pausing until %s; %d emails left, "
+            "projected to finish %s",
+            self.limit,
+            _format_time(resume_at) if resume_at else "sends in flight finish",
+            self.remaining,
+            _format_time(finish),
+            extra={
+                "event": "quota_pause",
+                "resume_at": resume_at,
+                "remaining": self.remaining,
+                "projected_completion": finish,
+            },
+        )
+
+    def release(self, sent: bool):
+        """Finish a send taken with acquire.
+
+        Args:
+            sent: Whether the message was sent (failed sends free their slot)
+        """
+        self.in_flight -= 1
+        self.remaining = max(0, self.remaining - 1)
+        if sent:
+            minute = int(self.clock() // 60)
+            self._counts[minute] = self._counts.get(minute, 0) + 1
+
+
+def _format_time(timestamp: float) -> str:
+    """Local date and time of a Unix timestamp, to the minute."""
+    return datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M")
@@ -0,0 +1,259 @@
+"""Streaming result sinks and incremental run statistics."""
+
+import csv
+import json
+import os
+import sqlite3
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional
+
+if TYPE_CHECKING:
+    from .email_sender import EmailResult
+
+
+def result_to_dict(result: "EmailResult") -> Dict[str, Any]:
+    """Flatten an EmailResult into a JSON-serializable dict.
+
+    Args:
+        result: The result to flatten
+
+    Returns:
+        Dictionary with recipient fields and outcome
+    """
+    return {
+        "roll_no": result.recipient["roll_no"],
+        "email": result.recipient["email"],
+        "name": result.recipient["name"],
+        "is_paid": result.recipient["is_paid"],
+        "coupon_code": result.coupon_code,
+        "status": result.status.value,
+        "success": result.success,
+        "error_message": result.error_message,
+        "processing_time_ms": result.processing_time_ms,
+    }
+
+
+class ResultSink:
+    """Destination for results as they complete."""
+
+    def write(self, result: "EmailResult"):
+        """Consume one result.
+
+        Args:
+            result: The completed EmailResult
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """Flush and release resources."""
+
+
+class CallbackSink(ResultSink):
+    """Pass each result to a callable."""
+
+    def __init__(self, callback: Callable[["EmailResult"], None]):
+        self.callback = callback
+
+    def write(self, result: "EmailResult"):
+        self.callback(result)
+
+
+class JsonlSink(ResultSink):
+    """Append one JSON object per result to a file.
+
+    Each line is flushed as it is written so partial results survive a crash.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "a", encoding="utf-8")
+
+    def write(self, result: "EmailResult"):
+        self._file.write(json.dumps(result_to_dict(result)) + "\n")
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class SqliteSink(ResultSink):
+    """Insert each result into an SQLite `email_results` table."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS email_results (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                roll_no TEXT NOT NULL,
+                email TEXT NOT NULL,
+                name TEXT NOT NULL,
+                is_paid BOOLEAN NOT NULL,
+                coupon_code TEXT NOT NULL,
+                status TEXT NOT NULL,
+                success BOOLEAN NOT NULL,
+                error_message TEXT,
+                processing_time_ms REAL,
+                recorded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        self._conn.commit()
+
+    def write(self, result: "EmailResult"):
+        row = result_to_dict(result)
+        self._conn.execute(
+            """
+            INSERT INTO email_results (roll_no, email, name, is_paid, coupon_code,
+                status, success, error_message, processing_time_ms)
+            VALUES (:roll_no, :email, :name, :is_paid, :coupon_code,
+                :status, :success, :error_message, :processing_time_ms)
+        """,
+            row,
+        )
+        self._conn.commit()
+
+    def close(self):
+        self._conn.close()
+
+
+class RetryCsvSink(ResultSink):
+    """Write failed recipients to a CSV that can be fed back to the CLI.
+
+    Every column of the recipient is kept, so the CSV works with the same
+    --priority and --template-column options. A list left by a previous run
+    is removed when the sink opens; the file is only created again once the
+    first failure arrives.
+    """
+
+    FIELDS = ["roll_no", "email", "name", "is_paid"]
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+        self._writer = None
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def write(self, result: "EmailResult"):
+        if result.success:
+            return
+        if self._writer is None:
+            extra = [key for key in result.recipient if key not in self.FIELDS]
+            self._file = open(self.path, "w", newline="", encoding="utf-8")
+            self._writer = csv.DictWriter(
+                self._file,
+                fieldnames=self.FIELDS + extra,
+                restval="",
+                extrasaction="ignore",
+            )
+            self._writer.writeheader()
+        row = dict(result.recipient)
+        row["is_paid"] = "true" if row["is_paid"] else "false"
+        self._writer.writerow(row)
+        self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+
+
+class MultiSink(ResultSink):
+    """Fan results out to several sinks."""
+
+    def __init__(self, sinks: List[ResultSink]):
+        self.sinks = sinks
+
+    def write(self, result: "EmailResult"):
+        for sink in self.sinks:
+            sink.write(result)
+
+    def close(self):
+        for sink in self.sinks:
+            sink.close()
+
+
+def open_result_sink(path: str) -> ResultSink:
+    """Open a sink based on the file extension (.db/.sqlite or JSONL).
+
+    Args:
+        path: Output path
+
+    Returns:
+        SqliteSink for .db/.sqlite/.sqlite3 paths, JsonlSink otherwise
+    """
+    if path.endswith((".db", ".sqlite", ".sqlite3")):
+        return SqliteSink(path)
+    return JsonlSink(path)
+
+
+class RunStats:
+    """Summary statistics computed incrementally from streamed results.
+
+    Only the first ``max_failures`` failed results are retained for display.
+    """
+
+    def __init__(self, max_failures: int = 50):
+        self.total = 0
+        self.success_count = 0
+        self.fail_count = 0
+        self.total_time_ms = 0.0
+        self.max_failures = max_failures
+        self.failures: List["EmailResult"] = []
+
+    def add(self, result: "EmailResult"):
+        """Fold one result into the statistics.
+
+        Args:
+            result: The completed EmailResult
+        """
+        self.total += 1
+        self.total_time_ms += result.processing_time_ms
+        if result.success:
+            self.success_count += 1
+        else:
+            self.fail_count += 1
+            if len(self.failures) < self.max_failures:
+                self.failures.append(result)
+
+    @property
+    def average_time_ms(self) -> float:
+        """Mean processing time per result in milliseconds."""
+        return self.total_time_ms / self.total if self.total else 0.0
+
+    @property
+    def success_rate(self) -> float:
+        """Percentage of successful results."""
+        return self.success_count / self.total * 100 if self.total else 0.0
+
+    @property
+    def failures_truncated(self) -> bool:
+        """Whether some failures were not retained."""
+        return self.fail_count > len(self.failures)
+
+
+def build_sink(
+    results_path: Optional[str] = None,
+    retry_csv: Optional[str] = None,
+    callback: Optional[Callable[["EmailResult"], None]] = None,
+) -> Optional[ResultSink]:
+    """Combine the configured sinks into one.
+
+    Args:
+        results_path: Optional JSONL or SQLite path for every result
+        retry_csv: Optional CSV path for failed recipients
+        callback: Optional callable invoked per result
+
+    Returns:
+        A sink, or None if nothing is configured
+    """
+    sinks: List[ResultSink] = []
+    if callback is not None:
+        sinks.append(CallbackSink(callback))
+    if results_path:
+        sinks.append(open_result_sink(results_path))
+    if retry_csv:
+        sinks.append(RetryCsvSink(retry_csv))
+    if not sinks:
+        return None
+    return sinks[0] if len(sinks) == 1 else MultiSink(sinks)
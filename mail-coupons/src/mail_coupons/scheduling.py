@@ -0,0 +1,231 @@
+"""Priority scheduling of recipients with starvation protection."""
+
+import heapq
+import itertools
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+TRUE_VALUES = ("true", "1", "yes", "paid")
+
+
+@dataclass(frozen=True)
+class PriorityKey:
+    """One term of a priority expression."""
+
+    column: str
+    descending: bool = True
+
+
+def parse_priority(spec: Optional[str]) -> List[PriorityKey]:
+    """Parse a priority expression such as ``is_paid,year:asc``.
+
+    Terms are comma-separated column names, most significant first. Each
+    term sorts descending (true / larger values first) unless suffixed with
+    ``:asc``. An empty spec or ``none`` means CSV order.
+
+    Args:
+        spec: Priority expression
+
+    Returns:
+        List of PriorityKey
+
+    Raises:
+        ValueError: If a term is malformed
+    """
+    if not spec or spec.strip().lower() == "none":
+        return []
+
+    keys = []
+    for term in spec.split(","):
+        column, _, direction = term.strip().partition(":")
+        direction = direction.strip().lower() or "desc"
+        if not column or direction not in ("asc", "desc"):
+            raise ValueError(f"Invalid priority term: {term.strip()!r}")
+        keys.append(PriorityKey(column.strip(), descending=direction == "desc"))
+    return keys
+
+
+def _sortable(value: Any) -> Tuple[int, Any]:
+    """Normalize a column value so mixed types compare sensibly."""
+    if isinstance(value, bool):
+        return (0, int(value))
+    if isinstance(value, (int, float)):
+        return (0, value)
+    text = str(value).strip()
+    if text.lower() in TRUE_VALUES + ("false", "0", "no", ""):
+        return (0, int(text.lower() in TRUE_VALUES))
+    try:
+        return (0, float(text))
+    except ValueError:
+        return (1, text.lower())
+
+
+class _Reversed:
+    """Wrapper inverting the order of a value."""
+
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __lt__(self, other):
+        return other.value < self.value
+
+    def __eq__(self, other):
+        return self.value == other.value
+
+    def __hash__(self):
+        return hash(self.value)
+
+
+class PriorityScheduler:
+    """Queue that releases items by priority class, oldest first within a class.
+
+    Items are grouped into classes by their priority key values. ``pop``
+    returns the head of the best class, except that a class's rank improves
+    by one for every ``aging_seconds`` its head has waited longer than the
+    head of the best class. High-priority arrivals therefore go first, but
+    a steady stream of them can't hold lower classes back indefinitely.
+
+    Classes are kept in a heap and only those with queued items count as
+    ranks; emptied classes are dropped. A second heap of class heads finds
+    the oldest waiting item, which bounds how many ranks aging can jump, so
+    ``pop`` walks only the leading classes that could win instead of
+    comparing every class.
+    """
+
+    def __init__(
+        self,
+        keys: List[PriorityKey],
+        aging_seconds: float = 60.0,
+        record: Callable[[Any], Dict[str, Any]] = lambda item: item,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """Initialize the scheduler.
+
+        Args:
+            keys: Priority keys, most significant first
+            aging_seconds: Extra wait that promotes a class by one rank
+                (0 disables aging)
+            record: Maps an item to the dictionary the keys are read from
+            clock: Monotonic time source
+        """
+        self.keys = keys
+        self.aging_seconds = aging_seconds
+        self._record = record
+        self._clock = clock
+        self._classes: Dict[Tuple, deque] = {}
+        # Heap of classes, best first; may still hold classes that emptied
+        self._ranked: List[Tuple] = []
+        self._in_ranked = set()
+        # (enqueued, seq, class) per class head; entries for heads that have
+        # since been popped are skipped lazily
+        self._heads: List[Tuple[float, int, Tuple]] = []
+        self._seq = itertools.count()
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _class_of(self, item: Any) -> Tuple:
+        record = self._record(item)
+        values = []
+        for key in self.keys:
+            value = _sortable(record.get(key.column, ""))
+            values.append(_Reversed(value) if key.descending else value)
+        return tuple(values)
+
+    def push(self, item: Any):
+        """Add an item to the queue.
+
+        Args:
+            item: Item to schedule
+        """
+        cls = self._class_of(item)
+        entry = (self._clock(), next(self._seq), item)
+        queue = self._classes.get(cls)
+        if queue is None:
+            queue = self._classes[cls] = deque()
+            if cls not in self._in_ranked:
+                heapq.heappush(self._ranked, cls)
+                self._in_ranked.add(cls)
+            heapq.heappush(self._heads, (entry[0], entry[1], cls))
+        queue.append(entry)
+        self._size += 1
+
+    def extend(self, items: Iterable[Any]):
+        """Add several items to the queue."""
+        for item in items:
+            self.push(item)
+
+    def pop(self) -> Any:
+        """Remove and return the next item to process.
+
+        Raises:
+            IndexError: If the queue is empty
+        """
+        if not self._size:
+            raise IndexError("pop from empty PriorityScheduler")
+
+        while self._ranked[0] not in self._classes:
+            self._in_ranked.discard(heapq.heappop(self._ranked))
+        best_cls = self._ranked[0]
+        if self.aging_seconds > 0:
+            best_enqueued = self._classes[best_cls][0][0]
+            # A class at rank r wins only if it is promoted by more than r,
+            # so the oldest head bounds the ranks worth comparing
+            reach = (best_enqueued - self._oldest_head()) / self.aging_seconds
+            best_rank = 0.0
+            for rank, cls in enumerate(self._leading(int(reach) + 1)):
+                promotion = (
+                    best_enqueued - self._classes[cls][0][0]
+                ) / self.aging_seconds
+                if rank - promotion < best_rank:
+                    best_rank, best_cls = rank - promotion, cls
+
+        queue = self._classes[best_cls]
+        item = queue.popleft()[2]
+        if queue:
+            enqueued, seq, _ = queue[0]
+            heapq.heappush(self._heads, (enqueued, seq, best_cls))
+        else:
+            del self._classes[best_cls]
+        self._size -= 1
+        return item
+
+    def _leading(self, count: int) -> Iterator[Tuple]:
+        """Yield the ``count`` best classes with queued items, best first.
+
+        Walks the heap in order from its root, so the cost grows with
+        ``count`` rather than with the number of classes.
+        """
+        ranked = self._ranked
+        frontier = [(ranked[0], 0)]
+        while frontier and count:
+            cls, index = heapq.heappop(frontier)
+            if cls in self._classes:
+                yield cls
+                count -= 1
+            for child in (2 * index + 1, 2 * index + 2):
+                if child < len(ranked):
+                    heapq.heappush(frontier, (ranked[child], child))
+
+    def _oldest_head(self) -> float:
+        """Enqueue time of the longest-waiting class head."""
+        while True:
+            enqueued, seq, cls = self._heads[0]
+            queue = self._classes.get(cls)
+            if queue and queue[0][1] == seq:
+                return enqueued
+            heapq.heappop(self._heads)
+
+    def drain(self) -> Iterator[Any]:
+        """Yield items in scheduling order until the queue is empty.
+
+        The generator is lazy, so items pushed while it is being consumed
+        are scheduled too.
+        """
+        while self._size:
+            yield self.pop()
@@ -0,0 +1,279 @@
+"""Local HTTP service that queues recipients for sending.
+
+``serve`` mode runs this next to the send loop, so the registration backend
+and admin scripts can trigger coupon emails without writing a CSV and
+starting the CLI. Submissions are written to the database's send queue
+before they're acknowledged, and the send loop drains that queue through
+the same sender, connections and token for every request.
+
+Endpoints (JSON in and out):
+
+- ``POST /recipients``: one recipient object, an array of them or
+  ``{"recipients": [...]}``; each needs roll_no, email and name, and may
+  set is_paid. Answers 202 with ``{"ids": [...]}`` in submission order.
+- ``GET /recipients/ID`` or ``GET /recipients?ids=1,2,3``: status of
+  submissions (queued, sending, sent, failed or skipped), with the coupon
+  code once sent.
+- ``GET /health``: number of this campaign's entries in each status.
+"""
+
+import hmac
+import json
+import logging
+import threading
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from .database import Database
+
+# Largest request body accepted, in bytes
+MAX_BODY = 1024 * 1024
+# Most recipients accepted in one request
+MAX_BATCH = 1000
+
+
+def parse_submission(body: bytes) -> List[Dict[str, Any]]:
+    """Parse and validate the recipients in a submission.
+
+    Args:
+        body: JSON request body
+
+    Returns:
+        Recipient dictionaries with roll_no, email, name and is_paid
+
+    Raises:
+        ValueError: If the body is malformed or a recipient is invalid
+    """
+    try:
+        data = json.loads(body)
+    except (UnicodeDecodeError, ValueError) as e:
+        raise ValueError(f"Invalid JSON: {e}") from None
+    if isinstance(data, dict) and "recipients" in data:
+        data = data["recipients"]
+    items = data if isinstance(data, list) else [data]
+    if not items:
+        raise ValueError("No recipients submitted")
+    if len(items) > MAX_BATCH:
+        raise ValueError(f"At most {MAX_BATCH} recipients per request")
+    return [_parse_recipient(item, i) for i, item in enumerate(items)]
+
+
+def _parse_recipient(item: Any, index: int) -> Dict[str, Any]:
+    """Validate one submitted recipient (``index`` is for the error)."""
+    if not isinstance(item, dict):
+        raise ValueError(f"Recipient {index}: expected an object")
+    fields = {}
+    for field in ("roll_no", "email", "name"):
+        value = item.get(field)
+        if not isinstance(value, (str, int)) or not str(value).strip():
+            raise ValueError(f"Recipient {index}: {field} is required")
+        fields[field] = str(value).strip()
+    local, _, domain = fields["email"].rpartition("@")
+    if not local or "." not in domain:
+        raise ValueError(f"Recipient {index}: invalid email {fields['email']!r}")
+    is_paid = item.get("is_paid", False)
+    if isinstance(is_paid, str):
+        is_paid = is_paid.strip().lower() in ("true", "1", "yes", "paid")
+    fields["is_paid"] = bool(is_paid)
+    return fields
+
+
+class SubmissionServer:
+    """HTTP front end of the send queue.
+
+    Requests are handled on their own threads; each opens its own database
+    connection like every other Database call.
+    """
+
+    def __init__(
+        self,
+        db: Database,
+        host: str = "127.0.0.1",
+        port: int = 8025,
+        token: Optional[str] = None,
+        on_enqueue: Optional[Callable[[], None]] = None,
+        logger: Optional[logging.Logger] = None,
+    ):
+        """Bind the server (it starts answering on ``start``).
+
+        Args:
+            db: Database holding the send queue, opened on the campaign
+                submissions are queued for
+            host: Interface to listen on
+            port: Port to listen on (0 picks a free one)
+            token: Bearer token required on every request, if set
+            on_enqueue: Called (from a request thread) after recipients
+                are queued
+            logger: Optional logger instance
+
+        Raises:
+            OSError: If the address can't be bound
+        """
+        self.db = db
+        self.token = token
+        self.on_enqueue = on_enqueue
+        self.logger = logger or logging.getLogger(__name__)
+        self._httpd = ThreadingHTTPServer((host, port), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.service = self
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        """(host, port) the server listens on."""
+        return self._httpd.server_address[:2]
+
+    def start(self):
+        """Serve requests on a background thread."""
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever, name="serve-http", daemon=True
+        )
+        self._thread.start()
+
+    def close(self):
+        """Stop serving and release the socket."""
+        if self._thread is not None:
+            self._httpd.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._httpd.server_close()
+
+    def authorized(self, header: Optional[str]) -> bool:
+        """Whether an Authorization header carries the configured token."""
+        if not self.token:
+            return True
+        expected = f"Bearer {self.token}"
+        return header is not None and hmac.compare_digest(
+            header.encode(), expected.encode()
+        )
+
+    def submit(self, body: bytes) -> Tuple[int, Dict[str, Any]]:
+        """Queue the recipients in a request body.
+
+        Returns:
+            Tuple of (HTTP status, response body)
+        """
+        try:
+            recipients = parse_submission(body)
+        except ValueError as e:
+            return HTTPStatus.BAD_REQUEST, {"error": str(e)}
+        ids = self.db.enqueue(recipients)
+        self.logger.info(
+            "Queued %d recipients (ids %d-%d)",
+            len(ids),
+            ids[0],
+            ids[-1],
+            extra={"event": "serve_enqueue", "count": len(ids)},
+        )
+        if self.on_enqueue is not None:
+            self.on_enqueue()
+        return HTTPStatus.ACCEPTED, {"ids": ids}
+
+    def status(self, ids: List[int]) -> Tuple[int, Dict[str, Any]]:
+        """Look up submissions by id.
+
+        Returns:
+            Tuple of (HTTP status, response body)
+        """
+        entries = self.db.queue_entries(ids)
+        missing = [i for i in ids if i not in entries]
+        return HTTPStatus.OK, {
+            "recipients": [entries[i] for i in ids if i in entries],
+            "missing": missing,
+        }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Routes requests to the SubmissionServer."""
+
+    server_version = "mail-coupons"
+    protocol_version = "HTTP/1.1"
+
+    @property
+    def service(self) -> SubmissionServer:
+        return self.server.service
+
+    def log_message(self, format: str, *args):
+        self.service.logger.debug("%s %s", self.address_string(), format % args)
+
+    def _reply(self, status: int, body: Dict[str, Any]):
+        if status >= 400 and self.command == "POST":
+            # The request body may not have been read
+            self.close_connection = True
+        data = json.dumps(body, default=str).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _check_auth(self) -> bool:
+        if self.service.authorized(self.headers.get("Authorization")):
+            return True
+        self._reply(HTTPStatus.UNAUTHORIZED, {"error": "Missing or invalid token"})
+        return False
+
+    def do_POST(self):
+        if not self._check_auth():
+            return
+        if urlsplit(self.path).path.rstrip("/") != "/recipients":
+            self._reply(HTTPStatus.NOT_FOUND, {"error": "Not found"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", ""))
+        except ValueError:
+            self._reply(
+                HTTPStatus.LENGTH_REQUIRED, {"error": "Content-Length required"}
+            )
+            return
+        if length < 0:
+            # rfile.read(-1) would block until the client closes
+            self._reply(HTTPStatus.BAD_REQUEST, {"error": "Invalid Content-Length"})
+            return
+        if length > MAX_BODY:
+            self._reply(
+                HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                {"error": f"Body over {MAX_BODY} bytes"},
+            )
+            return
+        try:
+            status, body = self.service.submit(self.rfile.read(length))
+        except Exception as e:
+            self.service.logger.error("Could not queue submission: %s", e)
+            status, body = HTTPStatus.SERVICE_UNAVAILABLE, {"error": str(e)}
+        self._reply(status, body)
+
+    def do_GET(self):
+        if not self._check_auth():
+            return
+        url = urlsplit(self.path)
+        path = url.path.rstrip("/")
+        if path == "/health":
+            self._reply(HTTPStatus.OK, {"queue": self.service.db.queue_counts()})
+            return
+        try:
+            if path.startswith("/recipients/"):
+                ids = [int(path.rpartition("/")[2])]
+            elif path == "/recipients":
+                query = parse_qs(url.query).get("ids", [""])[0]
+                ids = [int(i) for i in query.split(",") if i.strip()]
+                if not ids or len(ids) > MAX_BATCH:
+                    raise ValueError
+            else:
+                self._reply(HTTPStatus.NOT_FOUND, {"error": "Not found"})
+                return
+        except ValueError:
+            self._reply(
+                HTTPStatus.BAD_REQUEST,
+                {"error": f"Expected 1 to {MAX_BATCH} comma-separated integer ids"},
+            )
+            return
+        status, body = self.service.status(ids)
+        if len(ids) == 1 and path != "/recipients":
+            if not body["recipients"]:
+                self._reply(HTTPStatus.NOT_FOUND, {"error": f"No submission {ids[0]}"})
+                return
+            body = body["recipients"][0]
+        self._reply(status, body)
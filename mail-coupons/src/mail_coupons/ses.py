@@ -0,0 +1,521 @@
+"""Amazon SES v2 HTTP API transport with bulk templated sends."""
+
+import hashlib
+import hmac
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, parse_qsl, quote, urlsplit
+
+from ._lazy import lazy_import
+from .transports import Transport
+
+requests = lazy_import("requests")
+
+# SendBulkEmail accepts at most this many destinations per call
+SES_MAX_BATCH = 50
+
+# Per-destination statuses that mean SES itself can't send right now,
+# as opposed to a problem with this recipient or the request
+OUTAGE_STATUSES = frozenset(
+    {
+        "TRANSIENT_FAILURE",
+        "FAILED",
+        "ACCOUNT_THROTTLED",
+        "ACCOUNT_DAILY_QUOTA_EXCEEDED",
+        "ACCOUNT_SENDING_PAUSED",
+    }
+)
+
+
+def sign_v4(
+    method: str,
+    url: str,
+    body: bytes,
+    region: str,
+    access_key: str,
+    secret_key: str,
+    session_token: Optional[str] = None,
+    service: str = "ses",
+    headers: Optional[Dict[str, str]] = None,
+    now: Optional[datetime] = None,
+) -> Dict[str, str]:
+    """Sign a request with AWS Signature Version 4.
+
+    Args:
+        method: HTTP method
+        url: Full request URL
+        body: Request body
+        region: AWS region
+        access_key: AWS access key ID
+        secret_key: AWS secret access key
+        session_token: Optional session token for temporary credentials
+        service: AWS service name
+        headers: Extra headers to sign and send (e.g. Content-Type)
+        now: Signing time (default: current UTC time)
+
+    Returns:
+        Headers to send, including Authorization and X-Amz-Date
+    """
+    parts = urlsplit(url)
+    amz_date = (now or datetime.now(timezone.utc)).strftime("%Y%m%dT%H%M%SZ")
+    date = amz_date[:8]
+
+    signed = {k.lower(): " ".join(v.split()) for k, v in (headers or {}).items()}
+    signed["host"] = parts.netloc
+    signed["x-amz-date"] = amz_date
+    if session_token:
+        signed["x-amz-security-token"] = session_token
+    names = sorted(signed)
+    signed_headers = ";".join(names)
+
+    query = "&".join(
+        sorted(
+            f"{quote(k, safe='-_.~')}={quote(v, safe='-_.~')}"
+            for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        )
+    )
+    canonical_request = "\n".join(
+        [
+            method.upper(),
+            quote(parts.path or "/", safe="/-_.~"),
+            query,
+            "".join(f"{name}:{signed[name]}\n" for name in names),
+            signed_headers,
+            hashlib.sha256(body).hexdigest(),
+        ]
+    )
+    scope = f"{date}/{region}/{service}/aws4_request"
+    string_to_sign = "\n".join(
+        [
+            "AWS4-HMAC-SHA256",
+            amz_date,
+            scope,
+            hashlib.sha256(canonical_request.encode()).hexdigest(),
+        ]
+    )
+
+    key = f"AWS4{secret_key}".encode()
+    for part in (date, region, service, "aws4_request"):
+        key = hmac.new(key, part.encode(), hashlib.sha256).digest()
+    signature = hmac.new(key, string_to_sign.encode(), hashlib.sha256).hexdigest()
+
+    del signed["host"]
+    signed["authorization"] = (
+        f"AWS4-HMAC-SHA256 Credential={access_key}/{scope}, "
+        f"SignedHeaders={signed_headers}, Signature={signature}"
+    )
+    return signed
+
+
+class SesError(Exception):
+    """A failed SES API call."""
+
+    def __init__(self, message: str, status: int = 0, outage: bool = False):
+        """Initialize the error.
+
+        Args:
+            message: Error description
+            status: HTTP status (0 if no response was received)
+            outage: Whether the failure means SES is unavailable
+        """
+        super().__init__(message)
+        self.status = status
+        self.outage = outage
+
+
+class SesClient:
+    """Minimal SES v2 API client for templates and bulk sends."""
+
+    def __init__(
+        self,
+        region: str,
+        access_key: str,
+        secret_key: str,
+        session_token: Optional[str] = None,
+        endpoint: Optional[str] = None,
+        timeout: float = 30.0,
+    ):
+        """Initialize the client.
+
+        Args:
+            region: AWS region, e.g. ap-south-1
+            access_key: AWS access key ID
+            secret_key: AWS secret access key
+            session_token: Optional session token for temporary credentials
+            endpoint: API base URL (default: https://email.REGION.amazonaws.com)
+            timeout: Request timeout in seconds
+        """
+        self.region = region
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.session_token = session_token
+        self.endpoint = (endpoint or f"https://email.{region}.amazonaws.com").rstrip(
+            "/"
+        )
+        self.timeout = timeout
+
+    @classmethod
+    def from_environment(
+        cls, region: str, endpoint: Optional[str] = None
+    ) -> "SesClient":
+        """Create a client from the standard AWS_* environment variables.
+
+        Raises:
+            ValueError: If AWS_ACCESS_KEY_ID or AWS_SECRET_ACCESS_KEY is unset
+        """
+        access_key = os.environ.get("AWS_ACCESS_KEY_ID")
+        secret_key = os.environ.get("AWS_SECRET_ACCESS_KEY")
+        if not access_key or not secret_key:
+            raise ValueError(
+                "SES transport needs AWS_ACCESS_KEY_ID and AWS_SECRET_ACCESS_KEY"
+            )
+        return cls(
+            region,
+            access_key,
+            secret_key,
+            session_token=os.environ.get("AWS_SESSION_TOKEN"),
+            endpoint=endpoint,
+        )
+
+    def _request(
+        self, method: str, path: str, payload: Dict[str, Any]
+    ) -> "requests.Response":
+        """Send a signed JSON request.
+
+        Raises:
+            SesError: If the request could not be sent (an outage)
+        """
+        url = f"{self.endpoint}{path}"
+        body = json.dumps(payload).encode()
+        headers = sign_v4(
+            method,
+            url,
+            body,
+            self.region,
+            self.access_key,
+            self.secret_key,
+            session_token=self.session_token,
+            headers={"Content-Type": "application/json"},
+        )
+        try:
+            return requests.request(
+                method, url, data=body, headers=headers, timeout=self.timeout
+            )
+        except requests.RequestException as e:
+            raise SesError(f"SES request failed: {e}", outage=True)
+
+    def _raise_for_status(self, response: "requests.Response"):
+        if response.status_code >= 300:
+            error_type = response.headers.get("x-amzn-ErrorType", "").split(":")[0]
+            raise SesError(
+                f"SES error {response.status_code} {error_type}: {response.text}".strip(),
+                status=response.status_code,
+                outage=response.status_code >= 500 or response.status_code == 429,
+            )
+
+    def put_template(self, name: str, subject: str, html: str, text: str):
+        """Create an email template, or update it if it already exists.
+
+        Raises:
+            SesError: If the template can't be stored
+        """
+        content = {"Subject": subject, "Html": html, "Text": text}
+        response = self._request(
+            "POST",
+            "/v2/email/templates",
+            {"TemplateName": name, "TemplateContent": content},
+        )
+        if response.status_code in (400, 409) and "AlreadyExists" in (
+            response.headers.get("x-amzn-ErrorType", "") + response.text
+        ):
+            response = self._request(
+                "PUT",
+                f"/v2/email/templates/{quote(name, safe='')}",
+                {"TemplateContent": content},
+            )
+        self._raise_for_status(response)
+
+    def send_bulk(
+        self,
+        from_email: str,
+        template_name: str,
+        entries: List[Tuple[str, Dict[str, str]]],
+    ) -> List[Dict[str, Any]]:
+        """Send one templated email to each destination in a single call.
+
+        Args:
+            from_email: From address (may include a display name)
+            template_name: Stored template to render
+            entries: (to_email, replacement data) pairs, at most SES_MAX_BATCH
+
+        Returns:
+            One BulkEmailEntryResult dict per entry, in order
+
+        Raises:
+            SesError: If the call as a whole failed
+        """
+        payload = {
+            "FromEmailAddress": from_email,
+            "DefaultContent": {
+                "Template": {"TemplateName": template_name, "TemplateData": "{}"}
+            },
+            "BulkEmailEntries": [
+                {
+                    "Destination": {"ToAddresses": [to_email]},
+                    "ReplacementEmailContent": {
+                        "ReplacementTemplate": {
+                            "ReplacementTemplateData": json.dumps(data)
+                        }
+                    },
+                }
+                for to_email, data in entries
+            ],
+        }
+        response = self._request("POST", "/v2/email/outbound-bulk-emails", payload)
+        self._raise_for_status(response)
+        return response.json().get("BulkEmailEntryResults", [])
+
+
+def parse_ses_url(spec: str) -> Dict[str, Any]:
+    """Parse a transport spec such as ``ses://ap-south-1?batch=50&wait=1``.
+
+    Query parameters: ``template`` (template name), ``batch`` (destinations
+    per call, at most 50), ``wait`` (seconds to wait for a batch to fill)
+    and ``endpoint`` (API base URL, e.g. a local stand-in).
+
+    Args:
+        spec: Transport URL
+
+    Returns:
+        Dict with region, endpoint, template_name, batch_size and batch_wait
+
+    Raises:
+        ValueError: If the URL is malformed
+    """
+    parts = urlsplit(spec)
+    if parts.scheme != "ses":
+        raise ValueError(f"Not an SES transport: {spec}")
+    query = {k: v[-1] for k, v in parse_qs(parts.query).items()}
+    batch_size = int(query.get("batch", SES_MAX_BATCH))
+    if not 1 <= batch_size <= SES_MAX_BATCH:
+        raise ValueError(f"SES batch size must be 1-{SES_MAX_BATCH}: {batch_size}")
+    return {
+        "region": parts.netloc or "ap-south-1",
+        "endpoint": query.get("endpoint"),
+        "template_name": query.get("template", "mail-coupons-coupon"),
+        "batch_size": batch_size,
+        "batch_wait": float(query.get("wait", 1.0)),
+    }
+
+
+class _Pending:
+    """A destination waiting for its batch to be sent."""
+
+    __slots__ = ("to_email", "data", "future")
+
+    def __init__(self, to_email: str, data: Dict[str, str]):
+        self.to_email = to_email
+        self.data = data
+        self.future: Future = Future()
+
+
+class SesBulkTransport(Transport):
+    """Send templated emails through SES, many destinations per API call.
+
+    ``send`` is called from the sender's worker threads and blocks until the
+    message's batch has been sent. A background thread sends a batch once
+    ``batch_size`` destinations are waiting or the oldest has waited
+    ``batch_wait`` seconds, then maps each destination's status back to the
+    caller. The sender and template are set with ``set_message``; the
+    template is stored (created or updated) before the first batch.
+    """
+
+    name = "SES API"
+    templated = True
+
+    def __init__(
+        self,
+        client: SesClient,
+        template_name: str = "mail-coupons-coupon",
+        batch_size: int = SES_MAX_BATCH,
+        batch_wait: float = 1.0,
+        logger: Optional[logging.Logger] = None,
+    ):
+        """Initialize the transport.
+
+        Args:
+            client: SES API client
+            template_name: Name to store the template under
+            batch_size: Destinations per SendBulkEmail call (at most 50)
+            batch_wait: Seconds to wait for a batch to fill before sending it
+            logger: Optional logger instance
+        """
+        self.client = client
+        self.from_email = ""
+        self.template_name = template_name
+        self.batch_size = min(batch_size, SES_MAX_BATCH)
+        self.batch_wait = batch_wait
+        self.logger = logger or logging.getLogger(__name__)
+        self.batches_sent = 0
+        self._template: Optional[Tuple[str, str, str]] = None
+        self._template_stored = False
+        self._template_lock = threading.Lock()
+        self._pending: List[_Pending] = []
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+
+    @classmethod
+    def from_url(
+        cls, spec: str, logger: Optional[logging.Logger] = None
+    ) -> "SesBulkTransport":
+        """Create a transport from an ``ses://`` spec and AWS_* credentials.
+
+        Raises:
+            ValueError: If the spec is malformed or credentials are missing
+        """
+        settings = parse_ses_url(spec)
+        client = SesClient.from_environment(
+            settings.pop("region"), endpoint=settings.pop("endpoint")
+        )
+        return cls(client, logger=logger, **settings)
+
+    def set_message(self, from_email: str, subject: str, html: str, text: str):
+        """Set the sender and the template content.
+
+        The template is stored in SES on first use. Placeholders are
+        Handlebars-style, e.g. ``{{name}}``.
+
+        Args:
+            from_email: From address (may include a display name)
+            subject: Subject template
+            html: HTML body template
+            text: Plain text body template
+        """
+        self.from_email = from_email
+        self._template = (subject, html, text)
+        self._template_stored = False
+
+    def ensure_template(self):
+        """Store the template in SES if that hasn't been done yet.
+
+        Raises:
+            SesError: If the template can't be stored
+        """
+        with self._template_lock:
+            if self._template_stored or self._template is None:
+                return
+            self.client.put_template(self.template_name, *self._template)
+            self._template_stored = True
+            self.logger.debug("SES template %s stored", self.template_name)
+
+    def warm_up_tasks(self) -> List[Callable[[], None]]:
+        """Store the template ahead of the first batch."""
+        return [self._warm_template]
+
+    def _warm_template(self):
+        """Store the template, logging failures (the first batch retries)."""
+        try:
+            self.ensure_template()
+        except Exception as e:
+            self.logger.warning("Could not store the email template: %s", e)
+
+    def send(self, to_email: str, data: Dict[str, str]) -> Tuple[bool, str, bool]:
+        """Queue a destination and wait for its batch to be sent (blocking).
+
+        Args:
+            to_email: Recipient email address
+            data: Template replacement data for this recipient
+
+        Returns:
+            Tuple of (success, error_message, outage)
+        """
+        pending = _Pending(to_email, data)
+        with self._cond:
+            if self._closed:
+                return False, "SES transport is closed", False
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="ses-batcher", daemon=True
+                )
+                self._thread.start()
+            self._pending.append(pending)
+            self._cond.notify()
+        return pending.future.result()
+
+    def _next_batch(self) -> Optional[List[_Pending]]:
+        """Wait for a full or timed-out batch; None once closed and drained."""
+        with self._cond:
+            while not self._pending:
+                if self._closed:
+                    return None
+                self._cond.wait()
+
+            deadline = time.monotonic() + self.batch_wait
+            while len(self._pending) < self.batch_size and not self._closed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+            batch = self._pending[: self.batch_size]
+            del self._pending[: self.batch_size]
+            return batch
+
+    def _run(self):
+        """Background loop sending batches until closed."""
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            for pending, outcome in zip(batch, self._send_batch(batch)):
+                pending.future.set_result(outcome)
+
+    def _send_batch(self, batch: List[_Pending]) -> List[Tuple[bool, str, bool]]:
+        """Send one batch and map each destination to (success, error, outage)."""
+        try:
+            self.ensure_template()
+            results = self.client.send_bulk(
+                self.from_email,
+                self.template_name,
+                [(p.to_email, p.data) for p in batch],
+            )
+        except SesError as e:
+            self.logger.warning("SES bulk send of %d failed: %s", len(batch), e)
+            return [(False, str(e), e.outage)] * len(batch)
+        except Exception as e:
+            self.logger.error("SES bulk send of %d failed: %s", len(batch), e)
+            return [(False, f"SES bulk send failed: {e}", True)] * len(batch)
+
+        self.batches_sent += 1
+        outcomes = []
+        for i, pending in enumerate(batch):
+            result = results[i] if i < len(results) else {}
+            status = result.get("Status", "MISSING")
+            if status == "SUCCESS":
+                outcomes.append((True, "", False))
+            else:
+                error = f"SES {status}: {result.get('Error') or 'no result'}"
+                self.logger.debug("%s for %s", error, pending.to_email)
+                outcomes.append((False, error, status in OUTAGE_STATUSES))
+
+        self.logger.debug(
+            "SES bulk send: %d/%d accepted",
+            sum(1 for ok, _, _ in outcomes if ok),
+            len(batch),
+        )
+        return outcomes
+
+    def close(self):
+        """Send anything still queued and stop the background thread."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
@@ -0,0 +1,131 @@
+"""On-disk spool of pre-rendered messages.
+
+The layout follows Maildir: messages are written to ``tmp/`` and renamed
+into ``new/`` once complete, and moved to ``cur/`` after delivery.
+``index.jsonl`` records the recipient and coupon bound to each message.
+"""
+
+import json
+import os
+import threading
+import uuid
+from dataclasses import asdict, dataclass
+from typing import Iterator, Mapping, Set
+
+from .records import Recipient
+
+
+@dataclass
+class SpoolEntry:
+    """A rendered message waiting in the spool."""
+
+    id: str
+    roll_no: str
+    email: str
+    name: str
+    is_paid: bool
+    coupon_code: str
+
+    @property
+    def recipient(self) -> Recipient:
+        """Recipient record in the shape returned by read_recipients."""
+        return Recipient(self.roll_no, self.email, self.name, self.is_paid)
+
+
+class Spool:
+    """Maildir-like directory of fully built RFC 822 messages."""
+
+    INDEX_FILE = "index.jsonl"
+
+    def __init__(self, path: str):
+        """Open a spool, creating its directories if needed.
+
+        Args:
+            path: Spool directory
+        """
+        self.path = path
+        for sub in ("tmp", "new", "cur"):
+            os.makedirs(os.path.join(path, sub), exist_ok=True)
+        self._index_path = os.path.join(path, self.INDEX_FILE)
+        self._lock = threading.Lock()
+
+    def _message_path(self, folder: str, entry_id: str) -> str:
+        return os.path.join(self.path, folder, f"{entry_id}.eml")
+
+    def add(self, recipient: Mapping, coupon_code: str, message: bytes) -> SpoolEntry:
+        """Write a message to the spool and record it in the index.
+
+        Args:
+            recipient: Recipient dictionary
+            coupon_code: Coupon bound to the message
+            message: Raw RFC 822 bytes
+
+        Returns:
+            The new SpoolEntry
+        """
+        entry = SpoolEntry(
+            id=uuid.uuid4().hex,
+            roll_no=recipient["roll_no"],
+            email=recipient["email"],
+            name=recipient["name"],
+            is_paid=recipient["is_paid"],
+            coupon_code=coupon_code,
+        )
+
+        tmp_path = self._message_path("tmp", entry.id)
+        with open(tmp_path, "wb") as f:
+            f.write(message)
+            f.flush()
+            os.fsync(f.fileno())
+        os.rename(tmp_path, self._message_path("new", entry.id))
+
+        with self._lock:
+            with open(self._index_path, "a", encoding="utf-8") as index:
+                index.write(json.dumps(asdict(entry)) + "\n")
+
+        return entry
+
+    def entries(self) -> Iterator[SpoolEntry]:
+        """Iterate over every indexed entry, delivered or not."""
+        if not os.path.exists(self._index_path):
+            return
+        with open(self._index_path, "r", encoding="utf-8") as index:
+            for line in index:
+                if line.strip():
+                    yield SpoolEntry(**json.loads(line))
+
+    def pending(self) -> Iterator[SpoolEntry]:
+        """Iterate over entries that have not been delivered yet."""
+        for entry in self.entries():
+            if os.path.exists(self._message_path("new", entry.id)):
+                yield entry
+
+    def count_pending(self) -> int:
+        """Number of messages waiting in ``new/``."""
+        return sum(1 for name in os.listdir(os.path.join(self.path, "new")))
+
+    def rendered_roll_nos(self) -> Set[str]:
+        """Roll numbers that already have a message in the spool."""
+        return {entry.roll_no for entry in self.entries()}
+
+    def read(self, entry: SpoolEntry) -> bytes:
+        """Read the raw message for an entry.
+
+        Args:
+            entry: Entry to read
+
+        Returns:
+            Raw RFC 822 bytes
+        """
+        with open(self._message_path("new", entry.id), "rb") as f:
+            return f.read()
+
+    def mark_sent(self, entry: SpoolEntry):
+        """Move a delivered message from ``new/`` to ``cur/``.
+
+        Args:
+            entry: Entry that was delivered
+        """
+        os.rename(
+            self._message_path("new", entry.id), self._message_path("cur", entry.id)
+        )
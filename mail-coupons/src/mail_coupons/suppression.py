@@ -0,0 +1,247 @@
+"""Suppression list of addresses that hard-bounced or complained.
+
+SES bounce and complaint notifications (as delivered by SNS, or saved from
+SES event publishing) are ingested into the ``suppressed_emails`` table.
+Lookups go through a Bloom filter persisted next to it, so checking a
+recipient that isn't suppressed costs a few hashes and no query; only
+filter hits are confirmed against SQLite.
+"""
+
+import hashlib
+import json
+import math
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .database import Database
+
+# Bounce types that mean the address will never accept mail
+HARD_BOUNCE_TYPES = {"Permanent"}
+
+
+def normalize_email(email: str) -> str:
+    """Normalize an address for suppression lookups.
+
+    Strips a display name and surrounding whitespace and lowercases the
+    address; providers treat local parts case-insensitively in practice.
+    """
+    email = email.strip()
+    if email.endswith(">") and "<" in email:
+        email = email.rsplit("<", 1)[1][:-1]
+    return email.strip().lower()
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings.
+
+    Uses double hashing of a BLAKE2b digest to derive the bit positions,
+    and serializes to bytes so it can be stored in the database.
+    """
+
+    _HEADER = 8
+
+    def __init__(self, bits: int, hashes: int, data: Optional[bytes] = None):
+        """Initialize an empty filter, or load one from ``data``.
+
+        Args:
+            bits: Number of bits in the filter
+            hashes: Bit positions set per item
+            data: Bit array from a previous filter of the same shape
+        """
+        self.bits = max(8, bits)
+        self.hashes = max(1, hashes)
+        self._array = bytearray(data) if data else bytearray((self.bits + 7) // 8)
+
+    @classmethod
+    def for_capacity(cls, capacity: int, error_rate: float = 0.001) -> "BloomFilter":
+        """Create a filter sized for ``capacity`` items at ``error_rate``."""
+        capacity = max(1, capacity)
+        bits = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        hashes = round(bits / capacity * math.log(2))
+        return cls(bits, hashes)
+
+    def _positions(self, item: str) -> Iterator[int]:
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hashes):
+            yield (h1 + i * h2) % self.bits
+
+    def add(self, item: str):
+        """Add an item."""
+        for position in self._positions(item):
+            self._array[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item: object) -> bool:
+        if not isinstance(item, str):
+            return False
+        return all(
+            self._array[position >> 3] & (1 << (position & 7))
+            for position in self._positions(item)
+        )
+
+    def to_bytes(self) -> bytes:
+        """Serialize the filter's shape and bits."""
+        header = self.bits.to_bytes(6, "little") + self.hashes.to_bytes(2, "little")
+        return header + bytes(self._array)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "BloomFilter":
+        """Load a filter serialized by ``to_bytes``."""
+        bits = int.from_bytes(data[:6], "little")
+        hashes = int.from_bytes(data[6 : cls._HEADER], "little")
+        return cls(bits, hashes, data[cls._HEADER :])
+
+
+def _notification_entries(notification: Dict[str, Any]) -> List[Tuple[str, str]]:
+    """Suppressible (email, reason) pairs in one SES notification."""
+    message = notification.get("Message")
+    if isinstance(message, str):
+        # SNS envelope around the SES notification
+        try:
+            notification = json.loads(message)
+        except ValueError:
+            return []
+
+    kind = notification.get("notificationType") or notification.get("eventType")
+    if kind == "Bounce":
+        bounce = notification.get("bounce") or {}
+        if bounce.get("bounceType") not in HARD_BOUNCE_TYPES:
+            return []
+        reason = f"bounce:{bounce.get('bounceSubType') or 'General'}"
+        recipients = bounce.get("bouncedRecipients") or []
+    elif kind == "Complaint":
+        complaint = notification.get("complaint") or {}
+        reason = f"complaint:{complaint.get('complaintFeedbackType') or 'unknown'}"
+        recipients = complaint.get("complainedRecipients") or []
+    else:
+        return []
+
+    return [
+        (normalize_email(recipient["emailAddress"]), reason)
+        for recipient in recipients
+        if recipient.get("emailAddress")
+    ]
+
+
+def read_notifications(path: str) -> Iterator[Dict[str, Any]]:
+    """Read SES notifications from a file.
+
+    Accepts a single JSON object, a JSON array of them, or one object per
+    line (JSON Lines).
+
+    Raises:
+        ValueError: If the file isn't valid JSON in any of those forms
+    """
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    try:
+        data = json.loads(text)
+    except ValueError:
+        for number, line in enumerate(text.splitlines(), 1):
+            if line.strip():
+                try:
+                    yield json.loads(line)
+                except ValueError as e:
+                    raise ValueError(f"{path}:{number}: {e}") from None
+        return
+    if isinstance(data, list):
+        yield from data
+    else:
+        yield data
+
+
+def parse_notification_file(path: str) -> Tuple[List[Tuple[str, str]], int]:
+    """Extract suppressible addresses from a notification file.
+
+    Returns:
+        Tuple of ((email, reason) pairs, number of notifications read)
+    """
+    entries = []
+    count = 0
+    for notification in read_notifications(path):
+        count += 1
+        if isinstance(notification, dict):
+            entries.extend(_notification_entries(notification))
+    return entries, count
+
+
+class SuppressionList:
+    """Membership test for suppressed addresses.
+
+    Use as a container: ``email in suppression_list``. The Bloom filter is
+    loaded from the database on first use (and rebuilt if it's missing or
+    out of date); filter hits are confirmed with an indexed lookup, so
+    false positives never drop a recipient.
+    """
+
+    def __init__(self, db: Database, error_rate: float = 0.001):
+        """Initialize the suppression index.
+
+        Args:
+            db: Tracking database holding the suppression list
+            error_rate: False positive rate to size a rebuilt filter for
+        """
+        self.db = db
+        self.error_rate = error_rate
+        self.hits = 0
+        self.size = 0
+        self._filter: Optional[BloomFilter] = None
+        self._loaded = False
+
+    def _load(self):
+        """Load the persisted filter, rebuilding it if it's stale."""
+        self._loaded = True
+        self.size = self.db.suppression_count()
+        if not self.size:
+            return
+        stored = self.db.get_suppression_filter()
+        if stored is not None and stored[0] == self.size:
+            self._filter = BloomFilter.from_bytes(stored[1])
+        else:
+            self.rebuild()
+
+    def rebuild(self) -> BloomFilter:
+        """Rebuild the filter from the suppression table and persist it."""
+        self.size = self.db.suppression_count()
+        bloom = BloomFilter.for_capacity(self.size, self.error_rate)
+        for email in self.db.suppressed_emails():
+            bloom.add(email)
+        self.db.save_suppression_filter(self.size, bloom.to_bytes())
+        self._filter = bloom
+        self._loaded = True
+        return bloom
+
+    def add(self, entries: List[Tuple[str, str]], source: str = "") -> int:
+        """Suppress addresses and update the filter.
+
+        Args:
+            entries: (email, reason) pairs
+            source: Where the entries came from, e.g. the file name
+
+        Returns:
+            Number of addresses that weren't suppressed before
+        """
+        added = self.db.add_suppressed_emails(
+            (normalize_email(email), reason, source) for email, reason in entries
+        )
+        if added:
+            self.rebuild()
+        return added
+
+    def __contains__(self, email: object) -> bool:
+        if not self._loaded:
+            self._load()
+        if self._filter is None or not isinstance(email, str):
+            return False
+        email = normalize_email(email)
+        if email not in self._filter:
+            return False
+        if self.db.is_suppressed(email):
+            self.hits += 1
+            return True
+        return False
+
+    def __len__(self) -> int:
+        if not self._loaded:
+            self._load()
+        return self.size
@@ -0,0 +1,219 @@
+"""Email templates loaded by name from a directory.
+
+A template ``NAME`` is ``NAME.html`` in the templates directory, starting
+with the same front matter the ``mailer`` tool's templates use::
+
+    ---
+    subject: Your coupon for {{event}}
+    ---
+    <p>Hello {{name}}, your code is {{coupon_code}}.</p>
+
+The plain-text part comes from ``NAME.txt`` next to it if there is one,
+and is derived from the HTML otherwise. Slots are ``{{column}}``: name,
+coupon_code, register_url and the columns of the recipient's CSV row.
+
+``TemplateRegistry`` compiles each template once (front matter split off,
+HTML minified, every part turned into a SlotTemplate) and keeps the
+compiled templates in an LRU cache keyed by path and file stamp. A lookup
+costs a ``stat`` of the files, so a template edited during a run is
+recompiled on its next use without re-reading anything that didn't change.
+"""
+
+import html as html_module
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from .minify import SlotTemplate, minify_html
+from .watch import file_stamp
+
+# Template names are file names without the extension, no paths
+_NAME = re.compile(r"^[\w-]+$")
+_FRONT_MATTER = re.compile(r"\A---\r?\n(.*?)\r?\n---[ \t]*\r?\n?", re.S)
+
+_TEXT_HIDDEN = re.compile(r"<(head|style|script|title)\b.*?</\1>", re.S | re.I)
+_TEXT_LINK = re.compile(r'<a\b[^>]*\shref="([^"]*)"[^>]*>(.*?)</a>', re.S | re.I)
+_TEXT_BREAK = re.compile(
+    r"<(?:br|hr|/?p|/div|/h[1-6]|/tr|/li|/table|/blockquote)\b[^>]*>", re.I
+)
+_TEXT_TAG = re.compile(r"<[^>]*>")
+
+
+def split_front_matter(source: str) -> Tuple[Dict[str, str], str]:
+    """Split ``key: value`` front matter from a template.
+
+    Returns:
+        Tuple of (front matter fields, rest of the template)
+    """
+    match = _FRONT_MATTER.match(source)
+    if match is None:
+        return {}, source
+    fields = {}
+    for line in match.group(1).splitlines():
+        key, sep, value = line.partition(":")
+        if sep and key.strip():
+            fields[key.strip()] = value.strip()
+    return fields, source[match.end() :]
+
+
+def html_to_text(html: str) -> str:
+    """Plain-text rendering of an HTML email body.
+
+    Links keep their target after the label, block ends become line
+    breaks and runs of blank lines are collapsed.
+    """
+
+    def link(match: "re.Match[str]") -> str:
+        label = _TEXT_TAG.sub("", match.group(2)).strip()
+        target = match.group(1).removeprefix("mailto:")
+        return label if target in ("", label) else f"{label} ({target})"
+
+    text = _TEXT_HIDDEN.sub("", html)
+    text = _TEXT_LINK.sub(link, text)
+    text = _TEXT_BREAK.sub("\n", text)
+    text = html_module.unescape(_TEXT_TAG.sub("", text))
+    lines = []
+    for line in text.splitlines():
+        line = " ".join(line.split())
+        if line or (lines and lines[-1]):
+            lines.append(line)
+    return "\n".join(lines).strip() + "\n"
+
+
+@dataclass(frozen=True)
+class CompiledTemplate:
+    """A template ready to render: subject, HTML and text slot templates."""
+
+    name: str
+    subject: SlotTemplate
+    html: SlotTemplate
+    text: SlotTemplate
+
+    @property
+    def parts(self) -> Tuple[SlotTemplate, SlotTemplate, SlotTemplate]:
+        """(subject, html, text), the shape of EmailSender.template."""
+        return self.subject, self.html, self.text
+
+
+class TemplateRegistry:
+    """Templates in a directory, compiled on first use and cached.
+
+    Safe to use from the sender's worker threads. Two threads missing the
+    same template at once may both compile it; the second result wins.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        minify: bool = True,
+        max_size: int = 32,
+        logger: Optional[logging.Logger] = None,
+    ):
+        """Initialize the registry.
+
+        Args:
+            directory: Directory holding NAME.html (and NAME.txt) files
+            minify: Minify the HTML of each template when compiling it
+            max_size: Most compiled templates to keep
+            logger: Optional logger instance
+
+        Raises:
+            ValueError: If max_size is less than 1
+        """
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self.directory = os.path.abspath(directory)
+        self.minify = minify
+        self.max_size = max_size
+        self.logger = logger or logging.getLogger(__name__)
+        self.hits = 0
+        self.misses = 0
+        self._cache: "OrderedDict[tuple, CompiledTemplate]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def names(self) -> List[str]:
+        """Names of the templates in the directory, sorted."""
+        try:
+            files = os.listdir(self.directory)
+        except OSError:
+            return []
+        return sorted(
+            name
+            for name, ext in map(os.path.splitext, files)
+            if ext == ".html" and _NAME.match(name)
+        )
+
+    def path(self, name: str) -> str:
+        """Path of a template's HTML file.
+
+        Raises:
+            ValueError: If ``name`` isn't a valid template name
+        """
+        if not _NAME.match(name):
+            raise ValueError(f"Invalid template name: {name!r}")
+        return os.path.join(self.directory, f"{name}.html")
+
+    def get(self, name: str) -> CompiledTemplate:
+        """Compiled template by name, recompiled if its files changed.
+
+        Raises:
+            ValueError: If there is no such template or it can't be compiled
+        """
+        html_path = self.path(name)
+        text_path = html_path[: -len(".html")] + ".txt"
+        html_stamp = file_stamp(html_path)
+        if html_stamp is None:
+            raise ValueError(f"No template {name!r} in {self.directory}")
+        key = (html_path, html_stamp, file_stamp(text_path))
+
+        with self._lock:
+            template = self._cache.get(key)
+            if template is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return template
+
+        template = self._compile(name, html_path, text_path)
+        with self._lock:
+            self.misses += 1
+            # Drop the versions the files no longer match
+            for stale in [k for k in self._cache if k[0] == html_path]:
+                del self._cache[stale]
+            self._cache[key] = template
+            while len(self._cache) > self.max_size:
+                self._cache.popitem(last=False)
+        self.logger.debug("Compiled template %s", name)
+        return template
+
+    def clear(self):
+        """Drop every compiled template."""
+        with self._lock:
+            self._cache.clear()
+
+    def _compile(self, name: str, html_path: str, text_path: str) -> CompiledTemplate:
+        """Read and compile a template's files."""
+        try:
+            with open(html_path, encoding="utf-8") as f:
+                fields, html_content = split_front_matter(f.read())
+            try:
+                with open(text_path, encoding="utf-8") as f:
+                    text_content = f.read()
+            except FileNotFoundError:
+                text_content = html_to_text(html_content)
+        except (OSError, UnicodeDecodeError) as e:
+            raise ValueError(f"Can't read template {name!r}: {e}") from None
+        subject = fields.get("subject")
+        if not subject:
+            raise ValueError(f"Template {name!r} has no subject in its front matter")
+        if self.minify:
+            html_content = minify_html(html_content)
+        return CompiledTemplate(
+            name=name,
+            subject=SlotTemplate(subject),
+            html=SlotTemplate(html_content),
+            text=SlotTemplate(text_content),
+        )
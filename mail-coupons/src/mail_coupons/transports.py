@@ -0,0 +1,569 @@
+"""Message transports: SMTP relays, an HTTP API, mbox/Maildir files and a null sink.
+
+Every transport answers ``send`` with ``(success, error_message, outage)``,
+where outage means the destination itself is unavailable (so the sender's
+circuit breaker should pause) rather than this message being rejected.
+"""
+
+import base64
+import itertools
+import logging
+import os
+import re
+import socket
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from ._lazy import lazy_import
+from .profiling import stage
+from .relays import RelayPool, SmtpRelay
+
+requests = lazy_import("requests")
+smtplib = lazy_import("smtplib")
+
+# Schemes accepted by --transport besides plain "smtp"
+TRANSPORT_SCHEMES = ("ses", "http", "https", "mbox", "maildir", "null")
+
+
+class Transport:
+    """Base class for message transports.
+
+    Raw transports are handed finished RFC 822 bytes. Templated transports
+    (``templated = True``) render on the far side instead: they get the
+    message content once through ``set_message`` and the per-recipient
+    template data in ``send``.
+    """
+
+    name = "transport"
+    templated = False
+    # False for dry-run sinks: their sends aren't recorded as delivered
+    delivers = True
+    # Sends that may block waiting on each other (e.g. to fill a batch)
+    batch_size = 0
+
+    # Envelope sender, set by the EmailSender using the transport
+    envelope_from = ""
+
+    def set_message(self, from_email: str, subject: str, html: str, text: str):
+        """Set the sender and content templates (templated transports only)."""
+
+    def warm_up_tasks(self) -> List[Callable[[], None]]:
+        """Setup steps to run on the sender's worker threads before sending."""
+        return []
+
+    def keep_alive(self):
+        """Keep idle connections open; only called while nothing is sending."""
+
+    def send(self, to_email: str, message: Any) -> Tuple[bool, str, bool]:
+        """Deliver one message (blocking).
+
+        Args:
+            to_email: Envelope recipient
+            message: Raw RFC 822 bytes, or template data for templated
+                transports
+
+        Returns:
+            Tuple of (success, error_message, outage)
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """Flush and release resources."""
+
+
+class SmtpTransport(Transport):
+    """Send over SMTP, balancing and failing over across relays.
+
+    Each worker thread keeps its session to each relay open across
+    messages, so the connect/STARTTLS/AUTH handshake is paid once per
+    thread and relay.
+    """
+
+    name = "SMTP relay"
+
+    def __init__(
+        self,
+        relays: Iterable[SmtpRelay],
+        relay_strategy: str = "least-outstanding",
+        relay_timeout: float = 60.0,
+        logger: Optional[logging.Logger] = None,
+    ):
+        """Initialize the transport.
+
+        Args:
+            relays: Relays to send through
+            relay_strategy: RelayPool selection strategy
+            relay_timeout: Seconds to wait for a relay with capacity
+            logger: Optional logger instance
+        """
+        self.logger = logger or logging.getLogger(__name__)
+        self.relay_pool = RelayPool(relays, relay_strategy, logger=self.logger)
+        self.relay_timeout = relay_timeout
+        self._local = threading.local()
+        self._connections: List["smtplib.SMTP"] = []
+        self._connections_lock = threading.Lock()
+
+    def warm_up_tasks(self) -> List[Callable[[], None]]:
+        """Open a session to every relay, one task per relay."""
+        return [
+            lambda relay=relay: self._warm_relay(relay)
+            for relay in self.relay_pool.relays
+        ]
+
+    def _warm_relay(self, relay: SmtpRelay):
+        """Open this worker thread's session to a relay, logging failures."""
+        try:
+            self._thread_smtp(relay)
+            self.logger.debug("SMTP session to %s ready", relay.name)
+        except Exception as e:
+            self.logger.warning("Could not pre-connect to %s: %s", relay.name, e)
+
+    def keep_alive(self):
+        """NOOP every open session so relays don't drop it for being idle.
+
+        A session that fails is closed; its worker thread reconnects on its
+        next send.
+        """
+        for server in list(self._connections):
+            try:
+                server.noop()
+            except Exception:
+                self._discard_smtp(server)
+
+    def send(self, to_email: str, message: bytes) -> Tuple[bool, str, bool]:
+        """Send raw bytes through the best relay, failing over to the others.
+
+        A relay that fails with an outage is skipped for the rest of this
+        send; permanent rejections are returned without failover.
+
+        Returns:
+            Tuple of (success, error_message, outage); outage is only True
+            when every relay failed
+        """
+        tried: List[SmtpRelay] = []
+        error_msg = "No SMTP relay available"
+        while True:
+            relay = self.relay_pool.acquire(exclude=tried, timeout=self.relay_timeout)
+            if relay is None:
+                return False, error_msg, True
+
+            started = time.monotonic()
+            success, error_msg, outage = self._send_once(relay, to_email, message)
+            self.relay_pool.release(relay, success, time.monotonic() - started, outage)
+            if success or not outage:
+                return success, error_msg, outage
+
+            tried.append(relay)
+            if len(tried) < len(self.relay_pool.relays):
+                self.logger.warning("Relay %s failed, failing over", relay.name)
+
+    def _send_once(
+        self, relay: SmtpRelay, to_email: str, message: bytes
+    ) -> Tuple[bool, str, bool]:
+        """Send raw bytes over this thread's persistent connection to a relay.
+
+        Returns:
+            Tuple of (success, error_message, outage)
+        """
+        try:
+            try:
+                self._sendmail(self._thread_smtp(relay), to_email, message)
+            except smtplib.SMTPServerDisconnected:
+                self.logger.debug("SMTP connection dropped, reconnecting")
+                self._sendmail(
+                    self._thread_smtp(relay, reconnect=True), to_email, message
+                )
+            self.logger.debug("Email sent successfully to %s", to_email)
+            return True, "", False
+        except Exception as e:
+            error_msg = self._error_message(to_email, e)
+            self.logger.error(
+                error_msg, exc_info=not isinstance(e, smtplib.SMTPException)
+            )
+            if self._is_outage(e):
+                self._thread_smtp_discard(relay)
+                return False, error_msg, True
+            return False, error_msg, False
+
+    def _sendmail(self, smtp: "smtplib.SMTP", to_email: str, message: bytes):
+        """Send one message, declaring 8-bit bodies to relays that take them."""
+        if not message.isascii() and smtp.has_extn("8bitmime"):
+            smtp.sendmail(self.envelope_from, [to_email], message, ["BODY=8BITMIME"])
+        else:
+            smtp.sendmail(self.envelope_from, [to_email], message)
+
+    def _is_outage(self, error: Exception) -> bool:
+        """Whether an SMTP error means the relay itself is unavailable.
+
+        Connection failures, disconnects and transient 4xx replies count;
+        permanent rejections of a sender or recipient do not.
+        """
+        if isinstance(error, smtplib.SMTPRecipientsRefused):
+            return False
+        if isinstance(error, smtplib.SMTPResponseException):
+            return 400 <= error.smtp_code < 500
+        return isinstance(
+            error, (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, OSError)
+        )
+
+    def _error_message(self, to_email: str, error: Exception) -> str:
+        """Describe an exception raised while talking to the SMTP server."""
+        if isinstance(error, smtplib.SMTPAuthenticationError):
+            return f"SMTP Authentication Error for {to_email}: {str(error)}"
+        if isinstance(error, smtplib.SMTPRecipientsRefused):
+            return f"SMTP Recipients Refused for {to_email}: {str(error)}"
+        if isinstance(error, smtplib.SMTPSenderRefused):
+            return f"SMTP Sender Refused for {to_email}: {str(error)}"
+        if isinstance(error, smtplib.SMTPException):
+            return f"SMTP Error sending to {to_email}: {str(error)}"
+        return f"Unexpected error sending email to {to_email}: {str(error)}"
+
+    def _open_smtp(self, relay: SmtpRelay) -> "smtplib.SMTP":
+        """Open and authenticate a new SMTP connection to a relay."""
+        self.logger.debug("Connecting to SMTP server %s", relay.name)
+        with stage("connect"):
+            server = smtplib.SMTP(relay.host, relay.port)
+            if relay.starttls:
+                server.starttls()
+            if relay.username:
+                server.login(relay.username, relay.password)
+        with self._connections_lock:
+            self._connections.append(server)
+        return server
+
+    def _thread_connections(self) -> Dict[int, "smtplib.SMTP"]:
+        """This worker thread's persistent connections, keyed by relay."""
+        connections = getattr(self._local, "smtp", None)
+        if connections is None:
+            connections = self._local.smtp = {}
+        return connections
+
+    def _thread_smtp(self, relay: SmtpRelay, reconnect: bool = False) -> "smtplib.SMTP":
+        """Return this worker thread's persistent connection to a relay."""
+        connections = self._thread_connections()
+        server = connections.get(id(relay))
+        if server is None or reconnect:
+            if server is not None:
+                self._discard_smtp(server)
+            server = connections[id(relay)] = self._open_smtp(relay)
+        return server
+
+    def _thread_smtp_discard(self, relay: SmtpRelay):
+        """Drop this thread's connection to a relay so the next send reconnects."""
+        server = self._thread_connections().pop(id(relay), None)
+        if server is not None:
+            self._discard_smtp(server)
+
+    def _discard_smtp(self, server: "smtplib.SMTP"):
+        """Close a connection and forget it."""
+        with self._connections_lock:
+            if server in self._connections:
+                self._connections.remove(server)
+        try:
+            server.close()
+        except Exception:
+            pass
+
+    def close(self):
+        """QUIT every open session."""
+        for server in list(self._connections):
+            try:
+                server.quit()
+            except Exception:
+                pass
+            self._discard_smtp(server)
+
+
+class HttpTransport(Transport):
+    """POST each message to an HTTP API as JSON.
+
+    The body is ``{"from": ..., "to": [...], "raw": <base64 message>}``.
+    Each worker thread reuses one keep-alive session. 429 and 5xx replies
+    and connection failures are outages; other 4xx replies reject the
+    message.
+    """
+
+    name = "HTTP API"
+
+    def __init__(
+        self,
+        url: str,
+        token: Optional[str] = None,
+        timeout: float = 10.0,
+        logger: Optional[logging.Logger] = None,
+    ):
+        """Initialize the transport.
+
+        Args:
+            url: Endpoint to POST messages to
+            token: Optional bearer token
+            timeout: Request timeout in seconds
+            logger: Optional logger instance
+        """
+        self.url = url
+        self.token = token
+        self.timeout = timeout
+        self.logger = logger or logging.getLogger(__name__)
+        self._local = threading.local()
+
+    def _session(self) -> "requests.Session":
+        """This worker thread's keep-alive session."""
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = requests.Session()
+            if self.token:
+                session.headers["Authorization"] = f"Bearer {self.token}"
+        return session
+
+    def send(self, to_email: str, message: bytes) -> Tuple[bool, str, bool]:
+        """POST one message to the API (blocking)."""
+        payload = {
+            "from": self.envelope_from,
+            "to": [to_email],
+            "raw": base64.b64encode(message).decode("ascii"),
+        }
+        try:
+            response = self._session().post(
+                self.url, json=payload, timeout=self.timeout
+            )
+        except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
+            error_msg = f"HTTP API unavailable sending to {to_email}: {str(e)}"
+            self.logger.error(error_msg)
+            return False, error_msg, True
+
+        if 200 <= response.status_code < 300:
+            self.logger.debug("Email sent successfully to %s", to_email)
+            return True, "", False
+        error_msg = (
+            f"HTTP API error for {to_email}: "
+            f"Status {response.status_code} - {response.text}"
+        )
+        self.logger.error(error_msg)
+        return (
+            False,
+            error_msg,
+            response.status_code == 429 or (response.status_code >= 500),
+        )
+
+
+# Body lines that would read as a message separator, with any existing quoting
+_FROM_LINE = re.compile(rb"^(>*From )", re.MULTILINE)
+
+
+def _with_delivered_to(to_email: str, message: bytes) -> bytes:
+    """Prefix the envelope recipient the way a local delivery agent does."""
+    return b"Delivered-To: " + to_email.encode() + b"\n" + message
+
+
+class MboxTransport(Transport):
+    """Append messages to an mbox file (mboxrd quoting).
+
+    Writes go through one buffered file handle, so this runs at the speed
+    of message building; the file is flushed on close.
+    """
+
+    name = "mbox file"
+    delivers = False
+
+    def __init__(self, path: str, logger: Optional[logging.Logger] = None):
+        """Initialize the transport.
+
+        Args:
+            path: mbox file to append to (created if missing)
+            logger: Optional logger instance
+        """
+        self.path = path
+        self.logger = logger or logging.getLogger(__name__)
+        self._file = None
+        self._lock = threading.Lock()
+
+    def send(self, to_email: str, message: bytes) -> Tuple[bool, str, bool]:
+        """Append one message to the mbox file."""
+        body = _FROM_LINE.sub(
+            rb">\1", _with_delivered_to(to_email, message.replace(b"\r\n", b"\n"))
+        )
+        if not body.endswith(b"\n"):
+            body += b"\n"
+        separator = f"From {self.envelope_from or 'MAILER-DAEMON'} {time.asctime()}\n"
+        try:
+            with self._lock:
+                if self._file is None:
+                    self._file = open(self.path, "ab")
+                self._file.write(separator.encode() + body + b"\n")
+        except OSError as e:
+            error_msg = f"Could not write to {self.path}: {str(e)}"
+            self.logger.error(error_msg)
+            return False, error_msg, True
+        return True, "", False
+
+    def close(self):
+        """Flush and close the mbox file."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class MaildirTransport(Transport):
+    """Deliver each message as a file in a Maildir's ``new/`` directory.
+
+    Messages are written to ``tmp/`` and renamed into place. Unlike the
+    spool they are not fsynced, since this is an output sink for dry runs
+    rather than a record that must survive a crash.
+    """
+
+    name = "Maildir"
+    delivers = False
+
+    def __init__(self, path: str, logger: Optional[logging.Logger] = None):
+        """Initialize the transport, creating the Maildir if needed.
+
+        Args:
+            path: Maildir directory
+            logger: Optional logger instance
+        """
+        self.path = path
+        self.logger = logger or logging.getLogger(__name__)
+        for sub in ("tmp", "new", "cur"):
+            os.makedirs(os.path.join(path, sub), exist_ok=True)
+        self._prefix = f"P{os.getpid()}Q"
+        self._suffix = socket.gethostname().replace("/", "\\057").replace(":", "\\072")
+        self._counter = itertools.count(1)
+
+    def send(self, to_email: str, message: bytes) -> Tuple[bool, str, bool]:
+        """Write one message into the Maildir."""
+        name = f"{int(time.time())}.{self._prefix}{next(self._counter)}.{self._suffix}"
+        tmp_path = os.path.join(self.path, "tmp", name)
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(_with_delivered_to(to_email, message))
+            os.rename(tmp_path, os.path.join(self.path, "new", name))
+        except OSError as e:
+            error_msg = f"Could not write to {self.path}: {str(e)}"
+            self.logger.error(error_msg)
+            return False, error_msg, True
+        return True, "", False
+
+
+class NullTransport(Transport):
+    """Accept and discard every message.
+
+    Measures the rest of the pipeline without any delivery cost, or, with
+    ``delay``, against a simulated delivery latency.
+    """
+
+    name = "null transport"
+    delivers = False
+
+    def __init__(self, delay: float = 0.0):
+        """Initialize the transport.
+
+        Args:
+            delay: Seconds each send takes
+        """
+        self.delay = delay
+        self.sent = 0
+        self.bytes_sent = 0
+        self._lock = threading.Lock()
+
+    def send(self, to_email: str, message: bytes) -> Tuple[bool, str, bool]:
+        """Count the message and drop it."""
+        if self.delay:
+            time.sleep(self.delay)
+        with self._lock:
+            self.sent += 1
+            self.bytes_sent += len(message)
+        return True, "", False
+
+
+def _split_spec(spec: str) -> Tuple[str, str, Dict[str, str]]:
+    """Split a transport spec into (scheme, target, query)."""
+    head, _, query = spec.partition("?")
+    scheme, _, target = head.partition(":")
+    scheme = scheme.lower()
+    if scheme not in TRANSPORT_SCHEMES:
+        raise ValueError(
+            f"Unknown transport {spec!r} "
+            f"(expected smtp or one of {', '.join(TRANSPORT_SCHEMES)})"
+        )
+    return scheme, target, {k: v[-1] for k, v in parse_qs(query).items()}
+
+
+def parse_transport(spec: str) -> Optional[Tuple[str, str, Dict[str, str]]]:
+    """Validate a ``--transport`` spec.
+
+    Accepted forms are ``smtp``, ``ses://REGION[?...]``,
+    ``http(s)://HOST/PATH``, ``mbox:PATH``, ``maildir:PATH`` and
+    ``null[?delay=SECONDS]``.
+
+    Args:
+        spec: Transport spec
+
+    Returns:
+        Tuple of (scheme, target, query), or None for SMTP
+
+    Raises:
+        ValueError: If the spec is malformed
+    """
+    if spec.lower() == "smtp":
+        return None
+    scheme, target, query = _split_spec(spec)
+
+    if scheme == "ses":
+        from .ses import parse_ses_url
+
+        parse_ses_url(spec)
+    elif scheme in ("http", "https"):
+        if not urlsplit(spec).hostname:
+            raise ValueError(f"HTTP transport has no host: {spec}")
+    elif scheme in ("mbox", "maildir"):
+        if not target:
+            raise ValueError(f"{scheme} transport needs a path, e.g. {scheme}:out")
+    elif target:
+        raise ValueError(f"Unexpected target in {spec!r}, use null[?delay=SECONDS]")
+    if scheme == "null":
+        try:
+            float(query.get("delay", 0))
+        except ValueError:
+            raise ValueError(f"Invalid delay in {spec!r}")
+    return scheme, target, query
+
+
+def create_transport(
+    spec: str, logger: Optional[logging.Logger] = None
+) -> Optional[Transport]:
+    """Create the transport for a ``--transport`` spec.
+
+    HTTP transports read an optional bearer token from
+    ``MAIL_COUPONS_HTTP_TOKEN``; SES reads the AWS_* credentials.
+
+    Args:
+        spec: Transport spec (see parse_transport)
+        logger: Optional logger instance
+
+    Returns:
+        The transport, or None for SMTP (built from the relay options)
+
+    Raises:
+        ValueError: If the spec is malformed or credentials are missing
+    """
+    parsed = parse_transport(spec)
+    if parsed is None:
+        return None
+    scheme, target, query = parsed
+
+    if scheme == "ses":
+        from .ses import SesBulkTransport
+
+        return SesBulkTransport.from_url(spec, logger=logger)
+    if scheme in ("http", "https"):
+        return HttpTransport(
+            spec, token=os.environ.get("MAIL_COUPONS_HTTP_TOKEN"), logger=logger
+        )
+    if scheme == "mbox":
+        return MboxTransport(target, logger=logger)
+    if scheme == "maildir":
+        return MaildirTransport(target, logger=logger)
+    return NullTransport(delay=float(query.get("delay", 0)))
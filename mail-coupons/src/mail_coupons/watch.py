@@ -0,0 +1,224 @@
+"""Wait for a file to change: inotify on Linux, stat polling elsewhere.
+
+``watch`` mode keeps one process alive between registrations and tails the
+CSV as rows are appended. ``FileWatcher`` wakes it as soon as the file is
+written by watching its directory through inotify (bound with ctypes, no
+extra dependency), which also catches editors and exporters that replace
+the file by renaming a new one over it. Where inotify isn't available, or
+on file systems that don't deliver its events (NFS, some container
+mounts), it polls the file's inode, size and mtime instead.
+"""
+
+import logging
+import os
+import struct
+import sys
+from typing import List, Optional, Tuple
+
+# inotify event masks, from <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+# Directory events that can change the watched file
+WATCH_MASK = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+
+# struct inotify_event: wd, mask, cookie, len, then len bytes of name
+_EVENT = struct.Struct("iIII")
+
+
+def file_stamp(path: str) -> Optional[Tuple[int, int, int]]:
+    """(inode, size, mtime) of a file, or None if it doesn't exist."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+
+class Inotify:
+    """Minimal non-blocking inotify instance."""
+
+    def __init__(self):
+        """Create the instance.
+
+        Raises:
+            OSError: If inotify isn't available
+        """
+        # ctypes is only loaded when a watcher starts, not on every import
+        import ctypes
+        import ctypes.util
+
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify is only available on Linux")
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        if not hasattr(libc, "inotify_init1"):
+            raise OSError("libc has no inotify support")
+        self._libc = libc
+        self.fd = self._check(libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC))
+
+    @staticmethod
+    def _check(result: int) -> int:
+        if result < 0:
+            import ctypes
+
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        return result
+
+    def add_watch(self, path: str, mask: int) -> int:
+        """Watch ``path`` for the events in ``mask``.
+
+        Returns:
+            The watch descriptor
+
+        Raises:
+            OSError: If the watch can't be added
+        """
+        import ctypes
+
+        return self._check(
+            self._libc.inotify_add_watch(
+                self.fd, os.fsencode(path), ctypes.c_uint32(mask)
+            )
+        )
+
+    def read(self) -> List[Tuple[int, bytes]]:
+        """Drain the pending events.
+
+        Returns:
+            (mask, name) per event; name is empty for events on the
+            watched path itself
+        """
+        events = []
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return events
+            offset = 0
+            while offset < len(data):
+                _, mask, _, length = _EVENT.unpack_from(data, offset)
+                offset += _EVENT.size
+                events.append((mask, data[offset : offset + length].rstrip(b"\0")))
+                offset += length
+
+    def close(self):
+        """Close the instance and its watches."""
+        os.close(self.fd)
+
+
+class FileWatcher:
+    """Wait for changes to one file.
+
+    Changes are detected through inotify on the file's directory where
+    possible and by comparing ``file_stamp`` every ``poll_interval``
+    seconds otherwise. Either way a wait that times out also compares the
+    stamp, which catches events inotify missed.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        poll_interval: float = 2.0,
+        use_inotify: bool = True,
+        logger: Optional[logging.Logger] = None,
+    ):
+        """Initialize the watcher.
+
+        Args:
+            path: File to watch; it may not exist yet
+            poll_interval: Seconds between checks when polling
+            use_inotify: Try inotify before falling back to polling
+            logger: Optional logger instance
+        """
+        self.path = os.path.abspath(path)
+        self.poll_interval = poll_interval
+        self.logger = logger or logging.getLogger(__name__)
+        self._name = os.fsencode(os.path.basename(self.path))
+        self._stamp = file_stamp(self.path)
+        self._inotify: Optional[Inotify] = None
+        if use_inotify:
+            try:
+                inotify = Inotify()
+            except OSError as e:
+                self.logger.info("inotify unavailable (%s), polling instead", e)
+                return
+            try:
+                inotify.add_watch(os.path.dirname(self.path), WATCH_MASK)
+            except OSError as e:
+                inotify.close()
+                self.logger.info("Can't watch %s (%s), polling instead", path, e)
+                return
+            self._inotify = inotify
+
+    @property
+    def mode(self) -> str:
+        """'inotify' or 'polling'."""
+        return "polling" if self._inotify is None else "inotify"
+
+    def changed(self) -> bool:
+        """Whether the file changed since the last check."""
+        stamp = file_stamp(self.path)
+        if stamp == self._stamp:
+            return False
+        self._stamp = stamp
+        return True
+
+    def _notified(self) -> bool:
+        """Whether pending inotify events concern the file (draining them)."""
+        hit = False
+        for mask, name in self._inotify.read():
+            if name == self._name or mask & IN_Q_OVERFLOW:
+                hit = True
+        if hit:
+            self._stamp = file_stamp(self.path)
+        return hit
+
+    async def wait(self, timeout: Optional[float] = None) -> bool:
+        """Wait until the file changes or ``timeout`` seconds pass.
+
+        Args:
+            timeout: Most seconds to wait (None waits indefinitely)
+
+        Returns:
+            True if the file changed
+        """
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+        if self._inotify is None:
+            while not self.changed():
+                delay = self.poll_interval
+                if deadline is not None:
+                    delay = min(delay, deadline - loop.time())
+                    if delay <= 0:
+                        return False
+                await asyncio.sleep(delay)
+            return True
+
+        ready = asyncio.Event()
+        loop.add_reader(self._inotify.fd, ready.set)
+        try:
+            while not self._notified():
+                ready.clear()
+                left = None if deadline is None else deadline - loop.time()
+                try:
+                    await asyncio.wait_for(ready.wait(), left)
+                except asyncio.TimeoutError:
+                    return self.changed()
+            return True
+        finally:
+            loop.remove_reader(self._inotify.fd)
+
+    def close(self):
+        """Release the inotify instance, if any."""
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
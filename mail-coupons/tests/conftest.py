@@ -0,0 +1,39 @@
+"""Shared fixtures for the test suite."""
+
+import pytest
+from mail_coupons.email_sender import EmailSender
+from mail_coupons.transports import NullTransport
+
+# Constructor arguments every test sender shares
+SENDER_DEFAULTS = {
+    "api_endpoint": "https://api.example.com/coupons",
+    "bearer_token": "test_token_123",
+    "smtp_host": "unused",
+    "smtp_port": 0,
+    "smtp_username": "",
+    "smtp_password": "",
+    "from_email": "noreply@example.com",
+}
+
+
+@pytest.fixture
+def make_sender():
+    """Factory for EmailSenders that never touch the network.
+
+    Call it with only the EmailSender options a test changes. Senders
+    deliver to a NullTransport unless ``transport`` is given (pass
+    ``transport=None`` for the SMTP relays), their coupon API accepts
+    every code, and they are closed when the test ends.
+    """
+    senders = []
+
+    def factory(**options) -> EmailSender:
+        options.setdefault("transport", NullTransport())
+        sender = EmailSender(**{**SENDER_DEFAULTS, **options})
+        sender.create_coupon = lambda coupon_code: (True, "")
+        senders.append(sender)
+        return sender
+
+    yield factory
+    for sender in senders:
+        sender.close()
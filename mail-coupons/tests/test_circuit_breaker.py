@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""Tests for the circuit breaker."""
+
+import smtplib
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+from mail_coupons.circuit_breaker import CircuitBreaker
+from mail_coupons.email_sender import EmailSender
+
+
+class FakeClock:
+    """Manually advanced monotonic clock."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestCircuitBreaker:
+    """Test cases for breaker state transitions."""
+
+    @pytest.fixture
+    def clock(self):
+        """Provide a fake clock."""
+        return FakeClock()
+
+    @pytest.fixture
+    def breaker(self, clock):
+        """Create a breaker that trips after 4 calls at 50% errors."""
+        return CircuitBreaker(
+            "api",
+            failure_rate_threshold=0.5,
+            slow_call_seconds=2.0,
+            window_size=4,
+            min_calls=4,
+            open_seconds=10.0,
+            half_open_probes=2,
+            clock=clock,
+        )
+
+    def test_opens_on_error_rate(self, breaker):
+        """Test breaker opens once the bad fraction reaches the threshold."""
+        for success in (True, False, True):
+            assert breaker.allow_request()
+            breaker.record(success)
+        assert breaker.state == CircuitBreaker.CLOSED
+
+        breaker.record(False)
+
+        assert breaker.state == CircuitBreaker.OPEN
+        assert breaker.allow_request() is False
+
+    def test_slow_calls_count_as_bad(self, breaker):
+        """Test calls over the latency threshold trip the breaker."""
+        for _ in range(4):
+            breaker.record(True, latency=5.0)
+
+        assert breaker.state == CircuitBreaker.OPEN
+
+    def test_half_open_probes_close_breaker(self, breaker, clock):
+        """Test successful probes after the timeout close the breaker."""
+        for _ in range(4):
+            breaker.record(False)
+        clock.now = 10.0
+
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        assert breaker.allow_request()
+        assert breaker.allow_request()
+        assert breaker.allow_request() is False  # probe slots exhausted
+
+        breaker.record(True)
+        breaker.record(True)
+
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    def test_failed_probe_reopens(self, breaker, clock):
+        """Test a failed probe opens the breaker again."""
+        for _ in range(4):
+            breaker.record(False)
+        clock.now = 10.0
+        assert breaker.allow_request()
+
+        breaker.record(False)
+
+        assert breaker.state == CircuitBreaker.OPEN
+        clock.now = 15.0
+        assert breaker.available() is False
+
+    def test_wait_times_out_while_open(self, breaker):
+        """Test wait gives up after the timeout."""
+        for _ in range(4):
+            breaker.record(False)
+
+        assert breaker.wait(0.05) is False
+
+
+class TestSenderWithBreaker:
+    """Test cases for pausing sends while a dependency is down."""
+
+    @pytest.fixture
+    def email_sender(self):
+        """Create EmailSender with a fast-recovering SMTP breaker."""
+        sender = EmailSender(
+            api_endpoint="https://api.example.com/coupons",
+            bearer_token="test_token_123",
+            smtp_host="smtp.example.com",
+            smtp_port=587,
+            smtp_username="user@example.com",
+            smtp_password="password123",
+            from_email="noreply@example.com",
+            smtp_breaker=CircuitBreaker(
+                "SMTP relay", min_calls=1, open_seconds=0.05, half_open_probes=1
+            ),
+            max_outage=5.0,
+        )
+        yield sender
+        sender.close()
+
+    def test_outage_pauses_and_retries(self, email_sender):
+        """Test a send during an outage waits for recovery instead of failing."""
+        server = MagicMock()
+        server.sendmail.side_effect = [smtplib.SMTPServerDisconnected("down")] * 2 + [
+            {}
+        ]
+
+        with patch("mail_coupons.transports.smtplib.SMTP", return_value=server):
+            start = time.monotonic()
+            success, _ = email_sender.send_raw("a@example.com", b"msg")
+
+        assert success is True
+        assert time.monotonic() - start >= 0.05
+        assert email_sender.smtp_breaker.state == CircuitBreaker.CLOSED
+
+    def test_recipient_rejection_does_not_trip(self, email_sender):
+        """Test permanent per-recipient errors fail without opening the breaker."""
+        server = MagicMock()
+        server.sendmail.side_effect = smtplib.SMTPRecipientsRefused(
+            {"a@example.com": (550, b"no such user")}
+        )
+
+        with patch("mail_coupons.transports.smtplib.SMTP", return_value=server):
+            success, error = email_sender.send_raw("a@example.com", b"msg")
+
+        assert success is False
+        assert "Recipients Refused" in error
+        assert email_sender.smtp_breaker.state == CircuitBreaker.CLOSED
+
+    def test_gives_up_after_max_outage(self, email_sender):
+        """Test a persistent outage fails after max_outage."""
+        email_sender.max_outage = 0.2
+        with patch(
+            "mail_coupons.transports.smtplib.SMTP",
+            side_effect=ConnectionRefusedError("refused"),
+        ):
+            success, error = email_sender.send_raw("a@example.com", b"msg")
+
+        assert success is False
+        assert "refused" in error
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
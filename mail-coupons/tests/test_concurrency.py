@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""Tests for latency-aware concurrency sizing."""
+
+import asyncio
+import logging
+import threading
+import time
+
+import pytest
+from mail_coupons.concurrency import ConcurrencyController
+from mail_coupons.records import Recipient
+from mail_coupons.transports import Transport
+
+
+class SlowTransport(Transport):
+    """Transport that takes ``delay`` per send and tracks peak concurrency."""
+
+    name = "slow"
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def send(self, to_email, message):
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(self.delay)
+        with self._lock:
+            self.active -= 1
+        return True, "", False
+
+
+class TestConcurrencyController:
+    """Test cases for window sizing."""
+
+    def test_starts_at_one_second_of_rate(self):
+        """Test the window before any measurement is the target rate."""
+        assert ConcurrencyController(12).window == 12
+
+    def test_littles_law_with_headroom(self):
+        """Test 12/s at 2.5s per recipient needs about 30 in flight, plus headroom."""
+        controller = ConcurrencyController(12, headroom=1.25)
+        controller.observe(2.5)
+
+        # 37.5 rounded up, plus the recipient waiting on the rate limiter
+        assert controller.window == 39
+        assert controller.peak_window == 39
+
+    def test_latency_is_smoothed(self):
+        """Test later samples move the estimate by the smoothing weight."""
+        controller = ConcurrencyController(10, smoothing=0.5, headroom=1.0)
+        controller.observe(1.0)
+        controller.observe(3.0)
+
+        assert controller.latency == pytest.approx(2.0)
+        assert controller.window == 21
+
+    def test_window_is_bounded(self):
+        """Test the window stays within its bounds."""
+        controller = ConcurrencyController(100, max_window=50, min_window=4)
+        controller.observe(10.0)
+        assert controller.window == 50
+
+        for _ in range(50):
+            controller.observe(0.001)
+        assert controller.window == 4
+
+    def test_rate_change_resizes(self):
+        """Test changing the target rate rescales the window."""
+        controller = ConcurrencyController(10, headroom=1.0)
+        controller.observe(2.0)
+        controller.set_target_rate(5)
+
+        assert controller.window == 11
+
+    def test_decisions_are_logged_with_metrics(self, caplog):
+        """Test resizes and caps are logged with structured fields."""
+        controller = ConcurrencyController(
+            12, max_window=20, logger=logging.getLogger("test_concurrency")
+        )
+        with caplog.at_level(logging.INFO, logger="test_concurrency"):
+            controller.observe(2.5)
+            controller.observe(2.5)
+
+        [record] = caplog.records
+        assert record.levelno == logging.WARNING
+        assert "capped from 39" in record.getMessage()
+        assert record.event == "concurrency"
+        assert record.window == 20
+        assert record.latency_ms == 2500.0
+
+    def test_invalid_bounds_rejected(self):
+        """Test a minimum above the maximum raises."""
+        with pytest.raises(ValueError):
+            ConcurrencyController(10, max_window=2, min_window=3)
+
+
+class TestSenderConcurrency:
+    """Test cases for the sender's in-flight window."""
+
+    def recipients(self, count):
+        return [
+            Recipient(f"R{i}", f"u{i}@example.com", "john doe", True)
+            for i in range(count)
+        ]
+
+    def test_window_follows_observed_latency(self, make_sender):
+        """Test the window settles near rate x latency."""
+        transport = SlowTransport(0.05)
+        sender = make_sender(transport=transport, rate_limit=200)
+        try:
+            stats = asyncio.run(sender.process_recipients_batch(self.recipients(80)))
+        finally:
+            sender.close()
+
+        assert stats.success_count == 80
+        assert sender.concurrency.samples == 80
+        # 200/s x ~50ms x 1.25 headroom + 1
+        assert 11 <= sender.concurrency.window <= 26
+
+    def test_in_flight_never_exceeds_cap(self, make_sender):
+        """Test max_concurrency bounds the sends running at once."""
+        transport = SlowTransport(0.02)
+        sender = make_sender(transport=transport, rate_limit=500, max_concurrency=3)
+        try:
+            asyncio.run(sender.process_recipients_batch(self.recipients(30)))
+        finally:
+            sender.close()
+
+        assert transport.peak <= 3
+        assert sender.max_in_flight == 3
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
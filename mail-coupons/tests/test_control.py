@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""Tests for live rate/concurrency control."""
+
+import asyncio
+import logging
+import os
+import signal
+import tempfile
+import time
+
+import pytest
+from mail_coupons.control import RATE_STEP, RuntimeControl, parse_control_file
+from mail_coupons.email_sender import AsyncRateLimiter
+from mail_coupons.records import Recipient
+
+
+def write(path: str, text: str):
+    """Rewrite a file and make sure its mtime changes."""
+    stamp = os.stat(path).st_mtime_ns + 1_000_000 if os.path.exists(path) else None
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+    if stamp is not None:
+        os.utime(path, ns=(stamp, stamp))
+
+
+@pytest.fixture
+def control_path():
+    """Path for a control file in a temporary directory."""
+    with tempfile.TemporaryDirectory() as path:
+        yield os.path.join(path, "control")
+
+
+class TestParseControlFile:
+    """Test cases for the control file format."""
+
+    def test_settings_and_comments(self):
+        """Test key = value lines are typed and comments ignored."""
+        text = "# ramp\nrate = 20.5\nmax-concurrency=64\n\npaused = no  # go\n"
+
+        assert parse_control_file(text) == {
+            "rate": 20.5,
+            "max_concurrency": 64,
+            "paused": False,
+        }
+
+    def test_pause_shorthand(self):
+        """Test bare pause/resume lines set paused."""
+        assert parse_control_file("pause\n") == {"paused": True}
+        assert parse_control_file("RESUME") == {"paused": False}
+
+    @pytest.mark.parametrize(
+        "text", ["rate = fast", "rate = 0", "max_concurrency = 0", "speed = 3", "rate"]
+    )
+    def test_invalid_lines_rejected(self, text):
+        """Test bad values and unknown keys raise with the line number."""
+        with pytest.raises(ValueError, match="line 1"):
+            parse_control_file(text)
+
+
+class TestAsyncRateLimiter:
+    """Test cases for live rate changes and pausing."""
+
+    def test_set_rate_changes_interval(self):
+        """Test a new rate applies to the next acquisition."""
+        limiter = AsyncRateLimiter(1)
+        limiter.set_rate(50)
+
+        assert limiter.min_interval == pytest.approx(0.02)
+        with pytest.raises(ValueError):
+            limiter.set_rate(0)
+
+    def test_pause_holds_acquisition_until_resume(self):
+        """Test acquire waits while paused and proceeds after resume."""
+
+        async def scenario():
+            limiter = AsyncRateLimiter(1000)
+            limiter.pause()
+            waiter = asyncio.ensure_future(limiter.acquire())
+            await asyncio.sleep(0.05)
+            blocked = not waiter.done()
+            limiter.resume()
+            await asyncio.wait_for(waiter, 1)
+            return blocked
+
+        assert asyncio.run(scenario()) is True
+
+
+class TestRuntimeControl:
+    """Test cases for applying changes to a sender."""
+
+    def test_existing_file_is_not_applied_at_start(self, make_sender, control_path):
+        """Test a control file left from an earlier run is only a baseline."""
+        write(control_path, "rate = 99\n")
+        sender = make_sender(rate_limit=10, max_concurrency=4)
+        try:
+            control = RuntimeControl(sender, control_path)
+            assert control.check_file() is False
+            assert sender.rate_limiter.max_requests_per_second == 10
+        finally:
+            sender.close()
+
+    def test_edits_are_applied(self, make_sender, control_path):
+        """Test rate, concurrency and pause edits reach the sender."""
+        sender = make_sender(rate_limit=10, max_concurrency=4)
+        try:
+            control = RuntimeControl(sender, control_path)
+            write(control_path, "rate = 25\nmax_concurrency = 40\npause\n")
+            assert control.check_file() is True
+
+            assert sender.rate_limiter.max_requests_per_second == 25
+            assert sender.concurrency.target_rate == 25
+            assert sender.concurrency.max_window == 40
+            assert sender.rate_limiter.paused is True
+
+            write(control_path, "rate = 25\nmax_concurrency = 40\nresume\n")
+            control.check_file()
+            assert sender.rate_limiter.paused is False
+        finally:
+            sender.close()
+
+    def test_unchanged_lines_do_not_undo_signals(self, make_sender, control_path):
+        """Test only settings edited in the file are re-applied."""
+        sender = make_sender(rate_limit=10, max_concurrency=4)
+        try:
+            control = RuntimeControl(sender, control_path)
+            write(control_path, "rate = 20\n")
+            control.check_file()
+            control.step_rate(RATE_STEP)
+            write(control_path, "rate = 20\npaused = false\n")
+            control.check_file()
+
+            assert sender.rate_limiter.max_requests_per_second == 25
+        finally:
+            sender.close()
+
+    def test_invalid_file_is_ignored(self, make_sender, control_path, caplog):
+        """Test a malformed edit is logged and leaves settings alone."""
+        sender = make_sender(rate_limit=10, max_concurrency=4)
+        try:
+            control = RuntimeControl(sender, control_path)
+            write(control_path, "rate = lots\n")
+            with caplog.at_level(logging.WARNING):
+                control.check_file()
+
+            assert sender.rate_limiter.max_requests_per_second == 10
+            assert "Ignoring control file" in caplog.text
+        finally:
+            sender.close()
+
+    @pytest.mark.skipif(not hasattr(signal, "SIGUSR1"), reason="needs SIGUSR1/2")
+    def test_signals_step_the_rate(self, make_sender):
+        """Test SIGUSR1 raises and SIGUSR2 lowers the rate."""
+        sender = make_sender(rate_limit=16, max_concurrency=4)
+
+        async def scenario():
+            control = RuntimeControl(sender)
+            control.start()
+            try:
+                os.kill(os.getpid(), signal.SIGUSR1)
+                await asyncio.sleep(0.05)
+                raised = sender.rate_limiter.max_requests_per_second
+                os.kill(os.getpid(), signal.SIGUSR2)
+                os.kill(os.getpid(), signal.SIGUSR2)
+                await asyncio.sleep(0.05)
+                return raised, sender.rate_limiter.max_requests_per_second
+            finally:
+                await control.stop()
+
+        try:
+            assert asyncio.run(scenario()) == (20, 12.8)
+        finally:
+            sender.close()
+
+
+class TestLiveChanges:
+    """Test cases for changing a batch while it runs."""
+
+    def test_pause_and_resume_mid_batch(self, make_sender):
+        """Test a paused batch starts nothing new and completes after resume."""
+        sender = make_sender(rate_limit=500, max_concurrency=4)
+        recipients = [
+            Recipient(f"R{i}", f"u{i}@example.com", "john doe", True) for i in range(5)
+        ]
+
+        async def scenario():
+            sender.pause()
+            asyncio.get_running_loop().call_later(0.2, sender.resume)
+            return await sender.process_recipients_batch(recipients)
+
+        try:
+            start = time.monotonic()
+            stats = asyncio.run(scenario())
+        finally:
+            sender.close()
+
+        assert stats.success_count == 5
+        assert time.monotonic() - start >= 0.2
+
+    def test_raising_concurrency_keeps_in_flight_work(self, make_sender):
+        """Test growing the worker pool doesn't drop work already running."""
+        sender = make_sender(rate_limit=10, max_concurrency=1)
+        try:
+            running = sender._executor.submit(time.sleep, 0.1)
+            old_executor = sender._executor
+            sender.set_max_concurrency(8)
+
+            assert sender._executor is not old_executor
+            assert sender._executor.submit(lambda: "new").result(timeout=1) == "new"
+            assert running.result(timeout=1) is None
+        finally:
+            sender.close()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""Tests for coupon code generation."""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from mail_coupons.coupons import (
+    KeyedCouponCodes,
+    RandomCouponCodes,
+    collision_probability,
+    encode_code,
+    is_valid_code,
+)
+from mail_coupons.email_sender import COUPON_EXISTS
+from mail_coupons.records import Recipient
+
+SECRET = b"test-secret"
+
+
+class FixedCodes(RandomCouponCodes):
+    """Random generator whose draws are scripted, to force collisions."""
+
+    def __init__(self, draws, **kwargs):
+        super().__init__(**kwargs)
+        self.draws = list(draws)
+
+    def _candidate(self, roll_no, attempt):
+        return self.draws.pop(0)
+
+
+def stub_coupon_api(sender, taken=()):
+    """Make the sender's coupon API reject codes in ``taken`` and log calls."""
+    sender.api_calls = []
+
+    def create_coupon(coupon_code):
+        sender.api_calls.append(coupon_code)
+        if coupon_code in taken:
+            return False, COUPON_EXISTS
+        return True, ""
+
+    sender.create_coupon = create_coupon
+    return sender
+
+
+RECIPIENT = Recipient("R001", "john@example.com", "john doe", True)
+
+
+class TestRandomCouponCodes:
+    """Test cases for CSPRNG batch generation."""
+
+    def test_codes_are_valid_and_unique(self):
+        """Test a large batch has the right format and no duplicates."""
+        codes = RandomCouponCodes(batch_size=256)
+        issued = [codes.issue(f"R{i}") for i in range(5000)]
+
+        assert all(is_valid_code(code) for code in issued)
+        assert len(set(issued)) == 5000
+        assert codes.issued == 5000
+
+    def test_three_letters_and_three_digits(self):
+        """Test codes keep the 3-letter, 3-digit shape in every arrangement."""
+        codes = RandomCouponCodes()
+        issued = [codes.issue(f"R{i}") for i in range(2000)]
+        shapes = {
+            "".join("9" if c.isdigit() else "A" for c in code[4:]) for code in issued
+        }
+
+        assert all(sorted(shape) == list("999AAA") for shape in shapes)
+        assert len(shapes) == 20
+        assert not is_valid_code("MLNCAAAAAA")
+        assert not is_valid_code("MLNC123456")
+        assert is_valid_code("MLNC7K2Q9X")
+
+    def test_characters_are_uniform(self):
+        """Test rejection sampling leaves no bias towards early characters."""
+        codes = RandomCouponCodes()
+        text = "".join(codes.issue(f"R{i}")[4:] for i in range(20000))
+        letters = [text.count(c) for c in "ABCXYZ"]
+        digits = [text.count(c) for c in "0129"]
+
+        for counts, expected in (
+            (letters, len(text) / 2 / 26),
+            (digits, len(text) / 2 / 10),
+        ):
+            assert all(abs(count - expected) < expected * 0.15 for count in counts)
+
+    def test_existing_codes_are_skipped(self):
+        """Test codes already in the database are never issued again."""
+        codes = FixedCodes(["MLNCAAA000", "MLNCBBB111"], created={"MLNCAAA000": "R000"})
+
+        assert codes.issue("R001") == "MLNCBBB111"
+        assert codes.collisions == 1
+
+    def test_thread_safe(self):
+        """Test concurrent issuers never receive the same code."""
+        codes = RandomCouponCodes(batch_size=64)
+        barrier = threading.Barrier(8)
+
+        def issue_many(worker):
+            barrier.wait()
+            return [codes.issue(f"R{worker}-{i}") for i in range(500)]
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            issued = [
+                code for batch in pool.map(issue_many, range(8)) for code in batch
+            ]
+
+        assert len(set(issued)) == 4000
+
+
+class TestKeyedCouponCodes:
+    """Test cases for deterministic keyed codes."""
+
+    def test_same_inputs_same_code(self):
+        """Test a rerun reproduces each recipient's code."""
+        first = KeyedCouponCodes(SECRET, "melinia26")
+        second = KeyedCouponCodes(SECRET, "melinia26")
+
+        assert first.issue("R001") == second.issue("R001")
+        assert is_valid_code(first.issue("R001"))
+
+    def test_secret_and_campaign_change_the_code(self):
+        """Test codes depend on the secret and campaign."""
+        code = KeyedCouponCodes(SECRET, "melinia26").issue("R001")
+
+        assert KeyedCouponCodes(b"other", "melinia26").issue("R001") != code
+        assert KeyedCouponCodes(SECRET, "reminder").issue("R001") != code
+
+    def test_collision_moves_to_next_candidate(self):
+        """Test a code held by another recipient is skipped deterministically."""
+        taken = KeyedCouponCodes(SECRET, "melinia26").issue("R001")
+        codes = KeyedCouponCodes(SECRET, "melinia26", created={taken: "R999"})
+
+        code = codes.issue("R001")
+        assert code != taken
+        assert code == codes._candidate("R001", 1)
+        assert codes.collisions == 1
+
+    def test_empty_secret_rejected(self):
+        """Test an empty secret raises."""
+        with pytest.raises(ValueError):
+            KeyedCouponCodes(b"", "melinia26")
+
+
+class TestCreateRecipientCoupon:
+    """Test cases for creating a recipient's coupon through the API."""
+
+    def test_taken_code_is_redrawn(self, make_sender):
+        """Test a 409 from the API moves on to a fresh code."""
+        recorded = []
+        codes = FixedCodes(
+            ["MLNCAAA000", "MLNCBBB111"],
+            on_created=lambda code, roll_no: recorded.append((code, roll_no)),
+        )
+        sender = stub_coupon_api(make_sender(coupon_codes=codes), taken={"MLNCAAA000"})
+        try:
+            result = sender.process_recipient_sync(RECIPIENT)
+        finally:
+            sender.close()
+
+        assert result.success
+        assert result.coupon_code == "MLNCBBB111"
+        assert sender.api_calls == ["MLNCAAA000", "MLNCBBB111"]
+        assert recorded == [("MLNCBBB111", "R001")]
+
+    def test_keyed_rerun_reuses_created_coupon(self, make_sender):
+        """Test a rerun sends the same keyed code without creating it again."""
+        recorded = {}
+        first = stub_coupon_api(
+            make_sender(
+                coupon_codes=KeyedCouponCodes(
+                    SECRET, "melinia26", on_created=recorded.__setitem__
+                )
+            )
+        )
+        try:
+            code = first.process_recipient_sync(RECIPIENT).coupon_code
+        finally:
+            first.close()
+
+        second = stub_coupon_api(
+            make_sender(
+                coupon_codes=KeyedCouponCodes(SECRET, "melinia26", created=recorded)
+            )
+        )
+        try:
+            result = second.process_recipient_sync(RECIPIENT)
+        finally:
+            second.close()
+
+        assert result.success
+        assert result.coupon_code == code
+        assert second.api_calls == []
+
+    def test_other_api_errors_are_not_retried(self, make_sender):
+        """Test failures other than a taken code fail the recipient."""
+        sender = make_sender(coupon_codes=FixedCodes(["MLNCAAA000"]))
+        sender.create_coupon = lambda coupon_code: (False, "API error: Status 500")
+        try:
+            result = sender.process_recipient_sync(RECIPIENT)
+        finally:
+            sender.close()
+
+        assert not result.success
+        assert "Status 500" in result.error_message
+
+
+class TestHelpers:
+    """Test cases for encoding and the collision estimate."""
+
+    def test_encode_code(self):
+        """Test integers map onto letter positions, letters, then digits."""
+        assert encode_code(0) == "MLNCAAA000"
+        assert encode_code(1) == "MLNCAA0A00"
+        assert encode_code(20) == "MLNCAAB000"
+        assert encode_code(20 * 26**3) == "MLNCAAA001"
+        assert encode_code(20 * 26**3 * 1000) == "MLNCAAA000"
+
+    def test_collision_probability(self):
+        """Test the birthday bound grows with the number of codes."""
+        assert collision_probability(1) == 0
+        assert 0.01 < collision_probability(5000) < 0.1
+        assert collision_probability(100_000) > 0.85
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -4,7 +4,12 @@
 import pytest
 import tempfile
 import os
-from mail_coupons.csv_reader import read_recipients
+from mail_coupons.csv_reader import (
+    csv_fingerprint,
+    read_recipient_table,
+    read_recipients,
+    read_recipients_tail,
+)
 
 
 class TestCSVReader:
@@ -124,6 +129,113 @@ class TestCSVReader:
         finally:
             os.unlink(temp_path)
 
+    def test_read_recipients_keeps_extra_columns(self):
+        """Test requested extra columns are kept and unknown ones rejected."""
+        content = (
+            "roll_no,email,name,is_paid,year\n"
+            "ROLL001,student1@college.edu,John Doe,true, 3 \n"
+        )
+
+        with tempfile.NamedTemporaryFile(mode="w", suffix=".csv", delete=False) as f:
+            f.write(content)
+            temp_path = f.name
+
+        try:
+            recipients = read_recipients(temp_path, extra_columns=["is_paid", "year"])
+
+            assert recipients[0]["year"] == "3"
+            assert recipients[0]["is_paid"] is True
+            assert "year" not in read_recipients(temp_path)[0]
+
+            with pytest.raises(ValueError):
+                read_recipients(temp_path, extra_columns=["tier"])
+        finally:
+            os.unlink(temp_path)
+
+    def test_read_recipient_table_matches_read_recipients(self):
+        """Test the column store holds the same rows as the list reader."""
+        content = (
+            "roll_no,email,name,is_paid,year\n"
+            "ROLL001,student1@college.edu,John Doe,true,3\n"
+            ",missing@college.edu,No Roll,true,1\n"
+            "ROLL002,student2@college.edu,Zoë Smith,no,2\n"
+        )
+
+        with tempfile.NamedTemporaryFile(mode="w", suffix=".csv", delete=False) as f:
+            f.write(content)
+            temp_path = f.name
+
+        try:
+            table = read_recipient_table(temp_path, extra_columns=["year"])
+
+            assert len(table) == 2
+            assert list(table) == read_recipients(temp_path, extra_columns=["year"])
+        finally:
+            os.unlink(temp_path)
+
+
+class TestIncrementalRead:
+    """Test cases for reading appended rows."""
+
+    HEADER = "roll_no,email,name,is_paid\n"
+
+    @pytest.fixture
+    def csv_path(self):
+        """Create an append-only CSV with two rows."""
+        with tempfile.NamedTemporaryFile(mode="w", suffix=".csv", delete=False) as f:
+            f.write(self.HEADER)
+            f.write("ROLL001,a@example.com,A,true\n")
+            f.write("ROLL002,b@example.com,B,false\n")
+        yield f.name
+        os.unlink(f.name)
+
+    def append(self, path, text):
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(text)
+
+    def test_full_read_matches_read_recipients(self, csv_path):
+        """Test reading from offset 0 returns every row."""
+        recipients, end, rows = read_recipients_tail(csv_path)
+
+        assert recipients == read_recipients(csv_path)
+        assert end == os.path.getsize(csv_path)
+        assert rows == 2
+
+    def test_resume_reads_only_appended_rows(self, csv_path):
+        """Test resuming at the end offset returns just the new rows."""
+        _, end, _ = read_recipients_tail(csv_path)
+        self.append(csv_path, "ROLL003,c@example.com,C,true\n")
+
+        recipients, new_end, rows = read_recipients_tail(csv_path, end)
+
+        assert [r["roll_no"] for r in recipients] == ["ROLL003"]
+        assert rows == 1
+        assert new_end == os.path.getsize(csv_path)
+
+    def test_partial_last_line_is_left_for_later(self, csv_path):
+        """Test a row still being written is not consumed."""
+        _, end, _ = read_recipients_tail(csv_path)
+        self.append(csv_path, "ROLL003,c@exam")
+
+        recipients, new_end, rows = read_recipients_tail(csv_path, end)
+        assert (recipients, new_end, rows) == ([], end, 0)
+
+        self.append(csv_path, "ple.com,C,true\n")
+        recipients, _, _ = read_recipients_tail(csv_path, new_end)
+        assert recipients[0]["email"] == "c@example.com"
+
+    def test_fingerprint_detects_rewrites_not_appends(self, csv_path):
+        """Test appends keep the prefix fingerprint while rewrites change it."""
+        _, end, _ = read_recipients_tail(csv_path)
+        before = csv_fingerprint(csv_path, end)
+
+        self.append(csv_path, "ROLL003,c@example.com,C,true\n")
+        assert csv_fingerprint(csv_path, end) == before
+
+        with open(csv_path, "w", encoding="utf-8") as f:
+            f.write(self.HEADER + "ROLL009,z@example.com,Z,true\n" * 3)
+        assert csv_fingerprint(csv_path, end) != before
+
 
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
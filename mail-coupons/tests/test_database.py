@@ -5,7 +5,7 @@ import pytest
 import sqlite3
 import tempfile
 import os
-from mail_coupons.database import Database
+from mail_coupons.database import DEFAULT_CAMPAIGN, Database
 
 
 class TestDatabase:
@@ -106,3 +106,135 @@ class TestDatabase:
         conn.close()
 
         assert count == 1
+
+    def test_sent_roll_nos(self, temp_db):
+        """Test every recorded roll number is returned as a set."""
+        assert temp_db.sent_roll_nos() == set()
+
+        temp_db.mark_email_sent("ROLL001", "a@example.com", "A", True)
+        temp_db.mark_email_sent("ROLL002", "b@example.com", "B", False)
+
+        assert temp_db.sent_roll_nos() == {"ROLL001", "ROLL002"}
+
+    def test_sent_among(self, temp_db):
+        """Test only the asked-about roll numbers are looked up."""
+        temp_db.mark_email_sent("ROLL001", "a@example.com", "A", True)
+        temp_db.mark_email_sent("ROLL002", "b@example.com", "B", False)
+        asked = ["ROLL002", "ROLL003"] + [f"NEW{i}" for i in range(2000)]
+
+        assert temp_db.sent_among(asked) == {"ROLL002"}
+        assert temp_db.sent_among([]) == set()
+
+    def test_csv_checkpoint_round_trip(self, temp_db):
+        """Test CSV checkpoints are stored and replaced per file."""
+        assert temp_db.get_csv_checkpoint("/data/export.csv") is None
+
+        temp_db.save_csv_checkpoint("/data/export.csv", "abc", 120, 3)
+        temp_db.save_csv_checkpoint("/data/export.csv", "def", 180, 5)
+
+        assert temp_db.get_csv_checkpoint("/data/export.csv") == {
+            "fingerprint": "def",
+            "byte_offset": 180,
+            "row_count": 5,
+        }
+
+    def test_coupon_codes_round_trip(self, temp_db):
+        """Test created coupon codes are recorded once per code."""
+        temp_db.record_coupon_code("MLNCAAA000", "R001")
+        temp_db.record_coupon_code("MLNCBBB111", "R002")
+        temp_db.record_coupon_code("MLNCAAA000", "R003")
+
+        assert temp_db.coupon_codes() == {"MLNCAAA000": "R001", "MLNCBBB111": "R002"}
+
+
+class TestCampaigns:
+    """Test cases for campaign-scoped tracking."""
+
+    @pytest.fixture
+    def db_path(self):
+        """Path for a database in a temporary directory."""
+        with tempfile.TemporaryDirectory() as path:
+            yield os.path.join(path, "campaigns.db")
+
+    def test_sends_are_scoped_to_the_campaign(self, db_path):
+        """Test a recipient sent in one campaign is unsent in another."""
+        coupon = Database(db_path)
+        reminder = Database(db_path, campaign="reminder")
+        coupon.mark_email_sent("ROLL001", "a@example.com", "A", True)
+
+        assert coupon.email_already_sent("ROLL001") is True
+        assert reminder.email_already_sent("ROLL001") is False
+        assert reminder.sent_roll_nos() == set()
+
+        reminder.save_csv_checkpoint("/data/export.csv", "abc", 120, 3)
+        assert coupon.get_csv_checkpoint("/data/export.csv") is None
+
+    def test_campaign_stats(self, db_path):
+        """Test per-campaign counts, including campaigns with no sends."""
+        Database(db_path, campaign="hackathon").mark_email_sent("R1", "a@x", "A", True)
+        Database(db_path, campaign="hackathon").mark_email_sent("R2", "b@x", "B", True)
+        Database(db_path, campaign="reminder").sent_roll_nos()
+
+        stats = {c["name"]: c["sent"] for c in Database(db_path).campaign_stats()}
+
+        assert stats == {"hackathon": 2, "reminder": 0}
+
+    def test_lookups_use_covering_indexes(self, db_path):
+        """Test the unsent filter and progress queries never scan sent_emails."""
+        Database(db_path)
+        conn = sqlite3.connect(db_path)
+        plans = [
+            conn.execute("EXPLAIN QUERY PLAN " + query, params).fetchall()
+            for query, params in [
+                ("SELECT roll_no FROM sent_emails WHERE campaign_id = ?", (1,)),
+                (
+                    "SELECT 1 FROM sent_emails WHERE campaign_id = ? AND roll_no = ?",
+                    (1, "R1"),
+                ),
+                (
+                    "SELECT COUNT(*) FROM sent_emails "
+                    "WHERE campaign_id = ? AND sent_at >= ?",
+                    (1, "2026-01-01"),
+                ),
+            ]
+        ]
+        conn.close()
+
+        for plan in plans:
+            detail = " ".join(row[3] for row in plan)
+            assert "SCAN" not in detail
+            assert "COVERING INDEX" in detail or "PRIMARY KEY" in detail
+
+    def test_migrates_pre_campaign_tables(self, db_path):
+        """Test rows from the old roll_no-keyed tables move to the default campaign."""
+        conn = sqlite3.connect(db_path)
+        conn.executescript("""
+            CREATE TABLE sent_emails (
+                roll_no TEXT PRIMARY KEY,
+                email TEXT NOT NULL,
+                name TEXT NOT NULL,
+                is_paid BOOLEAN NOT NULL,
+                sent_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            );
+            CREATE TABLE csv_checkpoints (
+                csv_path TEXT PRIMARY KEY,
+                fingerprint TEXT NOT NULL,
+                byte_offset INTEGER NOT NULL,
+                row_count INTEGER NOT NULL,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            );
+            INSERT INTO sent_emails (roll_no, email, name, is_paid, sent_at)
+            VALUES ('ROLL001', 'a@example.com', 'A', 1, '2026-01-02 03:04:05');
+            INSERT INTO csv_checkpoints (csv_path, fingerprint, byte_offset, row_count)
+            VALUES ('/data/export.csv', 'abc', 120, 3);
+        """)
+        conn.close()
+
+        db = Database(db_path)
+        Database(db_path)  # a second open leaves the migrated tables alone
+
+        assert db.campaign == DEFAULT_CAMPAIGN
+        assert db.sent_roll_nos() == {"ROLL001"}
+        assert db.get_csv_checkpoint("/data/export.csv")["row_count"] == 3
+        assert db.campaign_stats()[0]["first_sent_at"] == "2026-01-02 03:04:05"
+        assert Database(db_path, campaign="reminder").sent_roll_nos() == set()
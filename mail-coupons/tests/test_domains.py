@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""Tests for per-domain rate limits and interleaving."""
+
+import asyncio
+import threading
+import time
+
+import pytest
+from mail_coupons.domains import (
+    DomainLimit,
+    DomainScheduler,
+    TokenBucket,
+    parse_domain_limit,
+    recipient_domain,
+)
+from mail_coupons.email_sender import EmailResult, EmailStatus
+
+
+class FakeClock:
+    """Monotonic clock moved by hand."""
+
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def recipients(*emails):
+    """Recipient dicts for ``emails``."""
+    return [{"roll_no": f"R{i}", "email": email} for i, email in enumerate(emails)]
+
+
+def scheduler(items, limits, clock=None):
+    """DomainScheduler over recipient dicts."""
+    return DomainScheduler(
+        items, limits, lambda r: r["email"], clock=clock or FakeClock()
+    )
+
+
+def drain(domains):
+    """Emails handed out until the scheduler has nothing ready."""
+    emails = []
+    while (ready := domains.next_ready()) is not None:
+        emails.append(ready[0]["email"])
+    return emails
+
+
+class TestParsing:
+    """Test cases for limit specs and domains."""
+
+    def test_parse_domain_limit(self):
+        """Test rate and optional cap are parsed."""
+        assert parse_domain_limit("Gmail.com=5/20") == ("gmail.com", DomainLimit(5, 20))
+        assert parse_domain_limit("*=0.5") == ("*", DomainLimit(0.5, 0))
+
+    @pytest.mark.parametrize("spec", ["gmail.com", "=5", "x.com=fast", "x.com=0"])
+    def test_invalid_specs(self, spec):
+        """Test malformed or non-positive limits raise."""
+        with pytest.raises(ValueError):
+            parse_domain_limit(spec)
+
+    def test_recipient_domain(self):
+        """Test the domain is lowercased and stripped."""
+        assert recipient_domain("Jane <Jane@Example.COM>") == "example.com"
+
+
+class TestTokenBucket:
+    """Test cases for the token bucket."""
+
+    def test_refills_at_rate(self):
+        """Test tokens run out and come back at the configured rate."""
+        bucket = TokenBucket(rate=2, burst=2, now=0)
+
+        assert bucket.take(0) and bucket.take(0)
+        assert not bucket.take(0)
+        assert bucket.ready_in(0) == pytest.approx(0.5)
+        assert bucket.take(0.5)
+
+
+class TestDomainScheduler:
+    """Test cases for interleaving and limits."""
+
+    def test_round_robin_across_domains(self):
+        """Test domains take turns instead of running in source order."""
+        items = recipients("a@x.com", "b@x.com", "c@x.com", "d@y.com", "e@z.com")
+        domains = scheduler(items, {"*": DomainLimit(100)})
+
+        assert drain(domains) == [
+            "a@x.com",
+            "d@y.com",
+            "e@z.com",
+            "b@x.com",
+            "c@x.com",
+        ]
+        assert domains.done
+
+    def test_in_flight_cap(self):
+        """Test a capped domain waits for a release while others continue."""
+        items = recipients("a@x.com", "b@x.com", "c@y.com", "d@y.com")
+        domains = scheduler(items, {"x.com": DomainLimit(100, max_in_flight=1)})
+
+        assert drain(domains) == ["a@x.com", "c@y.com", "d@y.com"]
+        assert domains.wait_time() is None
+        domains.release("x.com")
+        assert drain(domains) == ["b@x.com"]
+
+    def test_rate_limit(self):
+        """Test a domain out of tokens is skipped until its bucket refills."""
+        clock = FakeClock()
+        items = recipients("a@x.com", "b@x.com", "c@y.com")
+        domains = scheduler(items, {"x.com": DomainLimit(1)}, clock)
+
+        assert drain(domains) == ["a@x.com", "c@y.com"]
+        assert domains.wait_time() == pytest.approx(1.0)
+        clock.now += 1.0
+        assert drain(domains) == ["b@x.com"]
+
+    def test_subdomains_use_parent_limit(self):
+        """Test a limit for a domain applies to its subdomains."""
+        domains = scheduler([], {"college.edu": DomainLimit(3), "*": DomainLimit(9)})
+
+        assert domains.limit_for("cs.college.edu") == DomainLimit(3)
+        assert domains.limit_for("gmail.com") == DomainLimit(9)
+
+    def test_lookahead_bounds_buffer(self):
+        """Test only ``lookahead`` items are read ahead of the ones handed out."""
+        items = iter(recipients(*[f"u{i}@x.com" for i in range(100)]))
+        domains = DomainScheduler(
+            items, {}, lambda r: r["email"], lookahead=10, clock=FakeClock()
+        )
+
+        domains.next_ready()
+        assert domains.queued == 9
+        assert len(list(items)) == 90
+
+
+class TestSenderDomainLimits:
+    """Test cases for domain limits in EmailSender's batch loop."""
+
+    def test_throttled_domain_does_not_block_others(self, make_sender):
+        """Test a slow domain's recipients don't hold up other domains."""
+        sender = make_sender(
+            rate_limit=1000,
+            max_concurrency=8,
+            domain_limits={"slow.com": DomainLimit(rate=5, max_in_flight=1)},
+        )
+        lock = threading.Lock()
+        finished = []
+        in_flight = {"slow.com": 0}
+        peak = {"slow.com": 0}
+
+        def worker(recipient):
+            domain = recipient["email"].split("@")[1]
+            with lock:
+                if domain == "slow.com":
+                    in_flight[domain] += 1
+                    peak[domain] = max(peak[domain], in_flight[domain])
+            time.sleep(0.005)
+            with lock:
+                if domain == "slow.com":
+                    in_flight[domain] -= 1
+                finished.append(domain)
+            return EmailResult(
+                recipient=recipient,
+                coupon_code="MLNCAAA000",
+                status=EmailStatus.SENT,
+                success=True,
+            )
+
+        items = recipients(
+            *[f"s{i}@slow.com" for i in range(7)],
+            *[f"f{i}@fast.com" for i in range(20)],
+        )
+        for item in items:
+            item["name"] = "x"
+        try:
+            stats = asyncio.run(sender.process_recipients_batch(items, worker=worker))
+        finally:
+            sender.close()
+
+        assert stats.success_count == 27
+        assert peak["slow.com"] == 1
+        # The fast domain finished while the slow one was still trickling out
+        assert max(i for i, d in enumerate(finished) if d == "fast.com") < max(
+            i for i, d in enumerate(finished) if d == "slow.com"
+        )
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
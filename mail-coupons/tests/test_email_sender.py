@@ -72,7 +72,7 @@ class TestEmailSender:
 
     def test_send_email_success(self, email_sender):
         """Test successful email sending."""
-        with patch("mail_coupons.email_sender.smtplib.SMTP") as mock_smtp:
+        with patch("mail_coupons.transports.smtplib.SMTP") as mock_smtp:
             mock_server = MagicMock()
             mock_smtp.return_value.__enter__.return_value = mock_server
 
@@ -90,7 +90,7 @@ class TestEmailSender:
     def test_send_email_smtp_failure(self, email_sender):
         """Test email sending handles SMTP failure."""
         with patch(
-            "mail_coupons.email_sender.smtplib.SMTP",
+            "mail_coupons.transports.smtplib.SMTP",
             side_effect=Exception("SMTP connection failed"),
         ):
             result = email_sender.send_email(
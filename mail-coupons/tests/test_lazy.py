@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""Tests for deferred imports."""
+
+import sys
+
+import pytest
+from mail_coupons._lazy import lazy_import
+
+
+class TestLazyImport:
+    """Test cases for lazy_import."""
+
+    def test_module_loads_on_first_attribute_access(self, tmp_path, monkeypatch):
+        """Test the module body only runs when an attribute is used."""
+        (tmp_path / "lazy_probe.py").write_text(
+            "import sys\nsys.lazy_probe_loaded = True\nVALUE = 42\n"
+        )
+        monkeypatch.syspath_prepend(str(tmp_path))
+        monkeypatch.delitem(sys.modules, "lazy_probe", raising=False)
+        monkeypatch.setattr(sys, "lazy_probe_loaded", False, raising=False)
+
+        module = lazy_import("lazy_probe")
+        assert sys.modules["lazy_probe"] is module
+        assert sys.lazy_probe_loaded is False
+
+        assert module.VALUE == 42
+        assert sys.lazy_probe_loaded is True
+
+    def test_already_imported_module_is_returned(self):
+        """Test a loaded module is returned as-is."""
+        assert lazy_import("json") is __import__("json")
+
+    def test_missing_module_raises(self):
+        """Test an unknown module fails at lazy_import time."""
+        with pytest.raises(ModuleNotFoundError):
+            lazy_import("mail_coupons_no_such_module")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""Tests for logging setup."""
+
+import io
+import json
+import logging
+
+import pytest
+from mail_coupons.log import setup_logging, flush_logging, shutdown_logging
+
+
+class TestLogging:
+    """Test cases for the queued logging pipeline."""
+
+    @pytest.fixture
+    def stream(self):
+        """Provide a stream and tear down the listener afterwards."""
+        stream = io.StringIO()
+        yield stream
+        shutdown_logging()
+
+    def test_json_format_includes_extra_fields(self, stream):
+        """Test JSON output is one object per line with extra fields."""
+        logger = setup_logging(log_format="json", stream=stream)
+        logger.info("Sent to %s", "ROLL001", extra={"coupon_code": "MLNCAB12C3"})
+        flush_logging()
+
+        entry = json.loads(stream.getvalue().strip())
+        assert entry["msg"] == "Sent to ROLL001"
+        assert entry["level"] == "INFO"
+        assert entry["coupon_code"] == "MLNCAB12C3"
+
+    def test_child_loggers_go_through_queue(self, stream):
+        """Test module loggers propagate into the queued handler."""
+        setup_logging(stream=stream)
+        logging.getLogger("mail_coupons.email_sender").warning("relay slow")
+        flush_logging()
+
+        assert "relay slow" in stream.getvalue()
+
+    def test_disabled_levels_are_not_formatted(self, stream):
+        """Test arguments of disabled log calls are never rendered."""
+
+        class Exploding:
+            def __str__(self):
+                raise AssertionError("formatted a disabled record")
+
+        logger = setup_logging(quiet=True, stream=stream)
+        logger.debug("value: %s", Exploding())
+        logger.info("value: %s", Exploding())
+        flush_logging()
+
+        assert stream.getvalue() == ""
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
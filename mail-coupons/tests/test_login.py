@@ -1,9 +1,24 @@
 #!/usr/bin/env python3
 """Tests for login functionality."""
 
+import base64
+import json
+import os
+import stat
+import tempfile
+import threading
+import time
+
 import pytest
 from unittest.mock import patch, MagicMock
-from mail_coupons.login import authenticate_user
+from mail_coupons.login import authenticate_user, token_expiry, TokenProvider
+from mail_coupons.email_sender import EmailSender
+
+
+def make_jwt(exp: float) -> str:
+    """Build an unsigned JWT with the given exp claim."""
+    payload = base64.urlsafe_b64encode(json.dumps({"exp": exp}).encode()).decode()
+    return f"eyJhbGciOiJub25lIn0.{payload.rstrip('=')}.sig"
 
 
 class TestLoginFunctionality:
@@ -50,3 +65,129 @@ class TestLoginFunctionality:
             with pytest.raises(Exception) as exc_info:
                 authenticate_user("user", "pass")
             assert "Connection error" in str(exc_info.value)
+
+
+class TestTokenProvider:
+    """Test cases for cached, refreshing bearer tokens."""
+
+    @pytest.fixture
+    def cache_path(self):
+        """Provide a token cache path in a temporary directory."""
+        with tempfile.TemporaryDirectory() as path:
+            yield os.path.join(path, "sub", "token.json")
+
+    def test_token_expiry_reads_jwt_exp(self):
+        """Test exp claim is decoded from a JWT."""
+        assert token_expiry(make_jwt(1234567890)) == 1234567890
+        assert token_expiry("opaque-token") is None
+
+    def test_token_is_cached_on_disk_owner_only(self, cache_path):
+        """Test a second provider reuses the cached token without login."""
+        auth = MagicMock(return_value=make_jwt(time.time() + 3600))
+        first = TokenProvider(
+            "user", "pass", "http://login", cache_path, authenticate=auth
+        )
+        token = first.get_token()
+
+        assert stat.S_IMODE(os.stat(cache_path).st_mode) == 0o600
+
+        second = TokenProvider(
+            "user", "pass", "http://login", cache_path, authenticate=auth
+        )
+        assert second.get_token() == token
+        assert auth.call_count == 1
+
+    def test_unwritable_cache_is_only_a_warning(self, cache_path):
+        """Test a login succeeds even when its token can't be cached."""
+        # A file where the cache directory should be makes the write fail
+        open(os.path.dirname(cache_path), "w").close()
+        token = make_jwt(time.time() + 3600)
+        logger = MagicMock()
+        provider = TokenProvider(
+            "user",
+            "pass",
+            "http://login",
+            cache_path,
+            authenticate=lambda *a: token,
+            logger=logger,
+        )
+
+        assert provider.get_token() == token
+        assert "Can't write token cache" in logger.warning.call_args.args[0]
+
+    def test_cache_ignored_for_other_user(self, cache_path):
+        """Test a cached token is not reused for a different username."""
+        auth = MagicMock(return_value=make_jwt(time.time() + 3600))
+        TokenProvider(
+            "user", "pass", "http://login", cache_path, authenticate=auth
+        ).get_token()
+        TokenProvider(
+            "other", "pass", "http://login", cache_path, authenticate=auth
+        ).get_token()
+
+        assert auth.call_count == 2
+
+    def test_refreshes_before_expiry(self):
+        """Test a token inside the refresh margin is replaced proactively."""
+        auth = MagicMock(
+            side_effect=[make_jwt(time.time() + 30), make_jwt(time.time() + 3600)]
+        )
+        provider = TokenProvider("user", "pass", refresh_margin=60, authenticate=auth)
+
+        first = provider.get_token()
+        second = provider.get_token()
+
+        assert first != second
+        assert auth.call_count == 2
+
+    def test_concurrent_refresh_is_single_flight(self):
+        """Test many workers refreshing the same stale token log in once."""
+        tokens = iter(f"token-{i}" for i in range(100))
+
+        def slow_auth(username, password, login_url):
+            time.sleep(0.05)
+            return next(tokens)
+
+        auth = MagicMock(side_effect=slow_auth)
+        provider = TokenProvider("user", "pass", authenticate=auth)
+        stale = provider.get_token()
+
+        threads = [
+            threading.Thread(target=provider.refresh, args=(stale,)) for _ in range(10)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert auth.call_count == 2
+        assert provider.get_token() == "token-1"
+
+    def test_create_coupon_reauthenticates_once_on_401(self):
+        """Test a 401 triggers one refresh and a retry with the new token."""
+        auth = MagicMock(side_effect=["old-token", "new-token"])
+        provider = TokenProvider("user", "pass", authenticate=auth)
+        sender = EmailSender(
+            api_endpoint="https://api.example.com/coupons",
+            bearer_token=None,
+            smtp_host="smtp.example.com",
+            smtp_port=587,
+            smtp_username="user",
+            smtp_password="pass",
+            from_email="noreply@example.com",
+            token_provider=provider,
+        )
+        rejected = MagicMock(status_code=401, text="Unauthorized")
+        accepted = MagicMock(status_code=201)
+
+        with patch(
+            "mail_coupons.email_sender.requests.post", side_effect=[rejected, accepted]
+        ) as mock_post:
+            success, _ = sender.create_coupon("MLNCAB12C3")
+        sender.close()
+
+        assert success is True
+        headers = [
+            call.kwargs["headers"]["Authorization"] for call in mock_post.call_args_list
+        ]
+        assert headers == ["Bearer old-token", "Bearer new-token"]
@@ -84,6 +84,118 @@ class TestMainCLI:
             assert mock_auth.called
             assert result.exit_code == 0
 
+    def test_cli_group_defaults_to_send(self, sample_csv):
+        """Test the command group runs send when given a CSV file."""
+        from click.testing import CliRunner
+        import main as main_module
+
+        runner = CliRunner()
+
+        with (
+            patch.object(main_module, "authenticate_user") as mock_auth,
+            patch.object(main_module, "Database") as mock_db_class,
+            patch.object(main_module, "read_recipients", return_value=[]),
+        ):
+            mock_auth.return_value = "test_token"
+            mock_db_class.return_value.get_unsent_recipients.return_value = []
+
+            result = runner.invoke(
+                main_module.cli,
+                [
+                    sample_csv,
+                    "--username",
+                    "testuser",
+                    "--password",
+                    "testpass",
+                    "--smtp-username",
+                    "smtp@example.com",
+                    "--smtp-password",
+                    "smtppass",
+                ],
+            )
+
+            assert mock_auth.called
+            assert result.exit_code == 0
+
+    def test_failed_login_skips_relay_handshakes(self, sample_csv):
+        """Test a failed login closes the sender before it connects anywhere."""
+        from click.testing import CliRunner
+        import main as main_module
+
+        recipient = {
+            "roll_no": "ROLL001",
+            "email": "student1@college.edu",
+            "name": "John Doe",
+            "is_paid": True,
+        }
+        with (
+            patch.object(
+                main_module, "authenticate_user", side_effect=Exception("bad password")
+            ),
+            patch.object(main_module, "Database"),
+            patch.object(
+                main_module, "load_unsent_recipients", return_value=[recipient]
+            ),
+            patch.object(main_module, "create_coupon_codes"),
+            patch.object(main_module, "EmailSender") as mock_sender_class,
+        ):
+            result = CliRunner().invoke(
+                main_module.cli,
+                [
+                    sample_csv,
+                    "--username",
+                    "testuser",
+                    "--password",
+                    "wrong",
+                    "--smtp-username",
+                    "smtp@example.com",
+                    "--smtp-password",
+                    "smtppass",
+                ],
+            )
+
+        sender = mock_sender_class.return_value
+        assert result.exit_code == 1
+        sender.warm_up.assert_not_called()
+        sender.close.assert_called_once()
+
+    def test_incremental_read_checks_only_new_rows(self):
+        """Test an incremental rerun looks up just the appended roll numbers."""
+        import logging
+        import main as main_module
+        from mail_coupons.database import Database
+
+        logger = logging.getLogger(__name__)
+        with tempfile.TemporaryDirectory() as tmp:
+            db = Database(os.path.join(tmp, "test.db"))
+            sample_csv = os.path.join(tmp, "recipients.csv")
+            with open(sample_csv, "w") as f:
+                f.write("roll_no,email,name,is_paid\nROLL001,s1@college.edu,Jo,true\n")
+            _, checkpoint = main_module.read_new_recipients(logger, db, sample_csv)
+            db.mark_email_sent("ROLL003", "s3@college.edu", "Ann Lee", False)
+            with open(sample_csv, "a") as f:
+                f.write("ROLL003,s3@college.edu,Ann Lee,false\n")
+                f.write("ROLL004,s4@college.edu,Bob Roy,true\n")
+
+            asked = []
+            sent_among = db.sent_among
+            with (
+                patch.object(db, "sent_roll_nos", side_effect=AssertionError),
+                patch.object(
+                    db,
+                    "sent_among",
+                    side_effect=lambda roll_nos: sent_among(
+                        asked.extend(roll_nos) or asked
+                    ),
+                ),
+            ):
+                unsent, _ = main_module.read_new_recipients(
+                    logger, db, sample_csv, checkpoint=checkpoint
+                )
+
+        assert [r["roll_no"] for r in unsent] == ["ROLL004"]
+        assert asked == ["ROLL003", "ROLL004"]
+
 
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""Tests for template minification and body encoding selection."""
+
+import email
+
+import pytest
+from mail_coupons.minify import (
+    MAX_LINE,
+    SlotTemplate,
+    choose_body_encoding,
+    minify_css,
+    minify_html,
+    wrap_lines,
+)
+
+
+def message_bytes(sender, name="john doe"):
+    """Wire bytes of the coupon email for ``name``."""
+    return sender.build_message("john@example.com", name, "MLNCABC123").as_bytes()
+
+
+class TestMinifyCss:
+    """Test cases for style sheet minification."""
+
+    def test_whitespace_and_comments_removed(self):
+        """Test declarations are compacted and comments dropped."""
+        css = """
+            /* layout */
+            body { margin: 0; font-family: a, b ; }
+            @media screen and (max-width: 480px) {
+                .box { padding: 20px 10px !important; }
+            }
+        """
+
+        assert minify_css(css) == (
+            "body{margin:0;font-family:a,b}"
+            "@media screen and (max-width:480px){.box{padding:20px 10px !important}}"
+        )
+
+    def test_unused_rules_dropped(self):
+        """Test rules for classes/ids absent from the document are removed."""
+        html = '<div class="used" id="main"></div>'
+        css = ".used{color:red}.unused{color:blue}#main,#other{margin:0}p{margin:0}"
+
+        assert minify_css(css, html) == ".used{color:red}#main{margin:0}p{margin:0}"
+
+    def test_single_quoted_and_unquoted_attributes(self):
+        """Test classes and ids count however their attributes are quoted."""
+        html = (
+            "<a class='btn big'>x</a><td class=z id=q>y</td><p style='animation:k 1s'>"
+        )
+        css = ".btn{color:red}td.z{c:d}#q{a:b}.gone{x:y}@keyframes k{to{opacity:1}}"
+
+        assert minify_css(css, html) == (
+            ".btn{color:red}td.z{c:d}#q{a:b}@keyframes k{to{opacity:1}}"
+        )
+
+    def test_slot_in_class_keeps_every_rule(self):
+        """Test a class filled in per recipient leaves class rules alone."""
+        html = '<p class="{{tier}}" id="main"></p>'
+        css = ".gold{color:gold}.silver{color:gray}#other{margin:0}"
+
+        assert minify_css(css, html) == ".gold{color:gold}.silver{color:gray}"
+
+    def test_empty_media_query_dropped(self):
+        """Test a media query whose rules are all unused disappears."""
+        css = "@media (max-width:480px){.gone{padding:0}}"
+
+        assert minify_css(css, '<div class="here"></div>') == ""
+
+    def test_unreferenced_keyframes_dropped(self):
+        """Test keyframes are kept only while an animation names them."""
+        css = (
+            "@keyframes spin{from{opacity:0}to{opacity:1}}"
+            "@keyframes fade{from{opacity:0}to{opacity:1}}"
+            ".spinner{animation:spin 1s linear infinite}"
+        )
+
+        minified = minify_css(css, '<div class="spinner"></div>')
+        assert "@keyframes spin{" in minified
+        assert "fade" not in minified
+        assert "spin" not in minify_css(css, "<div></div>")
+
+
+class TestMinifyHtml:
+    """Test cases for HTML minification."""
+
+    def test_comments_and_block_whitespace_removed(self):
+        """Test comments go and whitespace around block tags is dropped."""
+        html = """
+            <!-- header -->
+            <div>
+                <p style="margin: 0; color: #fff;">
+                    Hello, <span>{{name}}</span>
+                </p>
+            </div>
+        """
+
+        assert minify_html(html) == (
+            '<div><p style="margin:0;color:#fff">Hello, <span>{{name}}</span></p></div>\n'
+        )
+
+    def test_style_kept_for_single_quoted_class(self):
+        """Test rules used through single-quoted or bare classes survive."""
+        html = (
+            "<style>.btn{color:red} td.z{c:d}</style>"
+            "<a class='btn'>Go</a><table><tr><td class=z>x</td></tr></table>"
+        )
+
+        assert "<style>.btn{color:red}td.z{c:d}</style>" in minify_html(html)
+
+    def test_conditional_comments_and_pre_kept(self):
+        """Test Outlook conditional comments and preformatted text survive."""
+        html = "<!--[if mso]><table><![endif]-->\n<pre>  a\n   b</pre>"
+
+        minified = minify_html(html)
+        assert "<!--[if mso]>" in minified
+        assert "<pre>  a\n   b</pre>" in minified
+
+    def test_coupon_template_is_smaller(self, make_sender):
+        """Test the coupon email's HTML shrinks but keeps its content."""
+        sender = make_sender()
+        try:
+            html = sender.template[1].text
+            original = sender.message_content("{{name}}", "{{coupon_code}}")[1]
+        finally:
+            sender.close()
+
+        assert len(html) < len(original) * 0.8
+        assert "{{name}}" in html and "{{coupon_code}}" in html
+        assert "borderFlow{" in html
+        assert max(len(line) for line in html.splitlines()) < MAX_LINE
+
+
+class TestWrapLines:
+    """Test cases for re-wrapping long lines."""
+
+    def test_breaks_between_attributes_not_inside_values(self):
+        """Test only spaces outside quoted attribute values become newlines."""
+        html = '<a title="one two three four" href="x">some words here</a>'
+
+        wrapped = wrap_lines(html, width=10)
+        assert 'title="one two three four"' in wrapped
+        assert wrapped.replace("\n", " ") == html
+        assert wrapped.count("\n") >= 2
+
+    def test_short_lines_untouched(self):
+        """Test text within the width is left alone."""
+        assert wrap_lines("<p>short</p>", width=76) == "<p>short</p>"
+
+
+class TestChooseBodyEncoding:
+    """Test cases for picking a Content-Transfer-Encoding."""
+
+    def test_ascii_is_7bit(self):
+        """Test ASCII text is never encoded."""
+        assert choose_body_encoding("plain text") == "7bit"
+        assert choose_body_encoding("plain text", "base64") == "7bit"
+
+    def test_mostly_ascii_prefers_quoted_printable(self):
+        """Test a few non-ASCII characters are cheaper as quoted-printable."""
+        assert choose_body_encoding("Hello, Zoë\n" * 20) == "quoted-printable"
+
+    def test_mostly_non_ascii_prefers_base64(self):
+        """Test text that is mostly multibyte is cheaper as base64."""
+        assert choose_body_encoding("வணக்கம் " * 50) == "base64"
+
+    def test_8bit_needs_short_lines(self):
+        """Test 8bit is used when allowed, unless a line is too long for SMTP."""
+        assert choose_body_encoding("Zoë", "8bit") == "8bit"
+        assert choose_body_encoding("ë" * (MAX_LINE + 1), "8bit") != "8bit"
+
+    def test_long_ascii_lines_are_encoded(self):
+        """Test ASCII lines over the SMTP limit aren't sent as 7bit."""
+        assert choose_body_encoding("a" * (MAX_LINE + 1)) == "quoted-printable"
+
+
+class TestSlotTemplate:
+    """Test cases for slot filling."""
+
+    def test_render(self):
+        """Test slots are filled and unknown slots kept."""
+        template = SlotTemplate("Hi {{name}}, code {{coupon_code}} {{other}}")
+
+        assert (
+            template.render({"name": "Ann", "coupon_code": "X1"})
+            == "Hi Ann, code X1 {{other}}"
+        )
+
+    def test_values_are_not_reparsed(self):
+        """Test braces in a value are inserted literally."""
+        assert SlotTemplate("{{name}}!").render({"name": "{{x}}"}) == "{{x}}!"
+
+
+class TestMessageSize:
+    """Test cases for the messages EmailSender builds."""
+
+    def test_minified_message_is_smaller(self, make_sender):
+        """Test minification shrinks the ASCII message by at least a quarter."""
+        before = make_sender(minify=False)
+        after = make_sender()
+        try:
+            assert len(message_bytes(after)) < len(message_bytes(before)) * 0.75
+        finally:
+            before.close()
+            after.close()
+
+    def test_non_ascii_name_uses_smallest_encoding(self, make_sender):
+        """Test a non-ASCII name picks quoted-printable over base64."""
+        auto = make_sender()
+        base64 = make_sender(body_encoding="base64")
+        try:
+            data = message_bytes(auto, "zoë ananya")
+            assert len(data) < len(message_bytes(base64, "zoë ananya"))
+        finally:
+            auto.close()
+            base64.close()
+
+        message = email.message_from_bytes(data)
+        plain, html = message.get_payload()
+        assert html["Content-Transfer-Encoding"] == "quoted-printable"
+        assert "Zoë Ananya" in html.get_payload(decode=True).decode("utf-8")
+        assert "MLNCABC123" in plain.get_payload(decode=True).decode("utf-8")
+
+    def test_8bit_body(self, make_sender):
+        """Test 8bit sends UTF-8 unencoded with lines within the SMTP limit."""
+        sender = make_sender(body_encoding="8bit")
+        try:
+            data = message_bytes(sender, "zoë ananya")
+        finally:
+            sender.close()
+
+        assert b"Content-Transfer-Encoding: 8bit" in data
+        assert "Zoë Ananya".encode("utf-8") in data
+        assert max(len(line) for line in data.splitlines()) <= MAX_LINE
+
+    def test_unknown_body_encoding_rejected(self, make_sender):
+        """Test an unsupported encoding raises."""
+        with pytest.raises(ValueError):
+            make_sender(body_encoding="uuencode")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
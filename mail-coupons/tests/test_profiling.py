@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""Tests for per-stage profiling."""
+
+import asyncio
+import email.generator
+import os
+import pstats
+import tempfile
+import time
+
+import pytest
+from mail_coupons.email_sender import EmailSender
+from mail_coupons.profiling import (
+    CallTracer,
+    Profiler,
+    StageClassifier,
+    stage,
+    traced,
+)
+from mail_coupons.records import Recipient
+
+
+def spin(seconds: float):
+    """Burn CPU on this thread for about ``seconds``."""
+    end = time.thread_time() + seconds
+    while time.thread_time() < end:
+        pass
+
+
+def fib(n: int) -> int:
+    """Recursive Fibonacci, for recursion accounting."""
+    return n if n < 2 else fib(n - 1) + fib(n - 2)
+
+
+class TestStages:
+    """Test cases for stage timers."""
+
+    def test_no_op_without_profiler(self):
+        """Test stage() and traced() do nothing when not profiling."""
+
+        def worker(item):
+            return item
+
+        with stage("mime"):
+            pass
+        assert traced(worker) is worker
+
+    def test_nested_stages_are_exclusive(self):
+        """Test time in a nested stage isn't counted for the outer one."""
+        with Profiler(trace_frames=0) as profiler:
+            with stage("mime"):
+                spin(0.02)
+                with stage("render"):
+                    spin(0.05)
+
+        mime_count, mime_cpu, _ = profiler.stage_times["mime"]
+        render_count, render_cpu, _ = profiler.stage_times["render"]
+        assert mime_count == render_count == 1
+        assert render_cpu >= 0.05
+        assert 0.02 <= mime_cpu < 0.04
+        assert profiler.summary().startswith("render")
+
+    def test_only_one_profiler_at_a_time(self):
+        """Test starting a second profiler raises."""
+        with Profiler(trace_frames=0):
+            with pytest.raises(RuntimeError):
+                Profiler().start()
+
+
+class TestCallTracer:
+    """Test cases for the per-thread deterministic tracer."""
+
+    def test_counts_calls_and_paths(self):
+        """Test calls, callers and call paths are recorded."""
+        tracer = CallTracer()
+
+        def outer():
+            spin(0.01)
+            return sorted([3, 1, 2])
+
+        assert tracer.run(outer) == [1, 2, 3]
+
+        by_name = {key[2]: value for key, value in tracer.functions.items()}
+        assert by_name["outer"][0] == 1
+        assert by_name["spin"][0] == 1
+        assert by_name["spin"][2] >= 0.01
+        assert "<built-in method builtins.sorted>" in by_name
+        assert any(
+            [key[2] for key in path] == ["outer", "spin"] for path in tracer.stacks
+        )
+
+    def test_recursion_counted_once_in_cumulative_time(self):
+        """Test recursive calls don't inflate cumulative time."""
+        tracer = CallTracer()
+        tracer.run(fib, 12)
+
+        calls, own, cumulative, callers = next(
+            value for key, value in tracer.functions.items() if key[2] == "fib"
+        )
+        assert calls == 465
+        assert cumulative == pytest.approx(own, rel=0.5)
+
+
+class TestStageClassifier:
+    """Test cases for mapping allocation sites to stages."""
+
+    def test_innermost_matching_frame_wins(self):
+        """Test a traceback takes the stage of its innermost known frame."""
+        classifier = StageClassifier()
+        code = EmailSender.message_content.__code__
+        render_line = (code.co_filename, code.co_firstlineno + 1)
+        mime_line = (email.generator.__file__, 10)
+
+        assert classifier.classify([render_line]) == "render"
+        assert classifier.classify([mime_line, render_line]) == "mime"
+        assert classifier.classify([("/elsewhere.py", 1)]) == "other"
+
+
+class TestProfiler:
+    """Test cases for profiling a batch."""
+
+    def test_batch_is_attributed_and_reported(self, make_sender):
+        """Test a batch fills the stages and writes readable reports."""
+        sender = make_sender(rate_limit=1000)
+        recipients = [
+            Recipient(f"R{i}", f"u{i}@example.com", "john doe", True) for i in range(20)
+        ]
+        try:
+            with Profiler(trace_every=5, trace_period=0.05, trace_window=0.02) as p:
+                stats = asyncio.run(sender.process_recipients_batch(recipients))
+        finally:
+            sender.close()
+
+        assert stats.success_count == 20
+        assert p.stage_times["mime"][0] == 20
+        assert p.stage_times["transport"][0] == 20
+        assert p.stage_times["results"][0] == 20
+        assert p.stage_times["event_loop"][0] == 1
+        assert p.traced_calls == 4
+        assert p.allocation_windows >= 1
+
+        with tempfile.TemporaryDirectory() as tmp:
+            pstats_path, collapsed_path, report_path = p.write_reports(
+                os.path.join(tmp, "run.profile")
+            )
+            functions = {key[2] for key in pstats.Stats(pstats_path).stats}
+            with open(collapsed_path, encoding="utf-8") as f:
+                collapsed = f.read().splitlines()
+            with open(report_path, encoding="utf-8") as f:
+                report = f.read()
+
+        assert {"process_recipient_sync", "build_message", "as_bytes"} <= functions
+        assert all(line.rsplit(" ", 1)[1].isdigit() for line in collapsed)
+        assert collapsed[0].startswith("process_recipient_sync")
+        assert "mime" in report
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
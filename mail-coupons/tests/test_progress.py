@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""Tests for progress tracking and rendering."""
+
+import asyncio
+import io
+
+import click
+import pytest
+from mail_coupons.progress import ProgressTracker, ProgressRenderer
+
+
+class TestProgressTracker:
+    """Test cases for progress counters."""
+
+    def test_record_updates_counters(self):
+        """Test record increments success and failure counts."""
+        tracker = ProgressTracker(total=3)
+        tracker.record(True)
+        tracker.record(False)
+        tracker.record(True)
+
+        assert tracker.success_count == 2
+        assert tracker.fail_count == 1
+        assert tracker.completed == 3
+
+
+class TestProgressRenderer:
+    """Test cases for progress rendering."""
+
+    def test_rate_uses_moving_window(self):
+        """Test rate reflects only samples inside the window."""
+        tracker = ProgressTracker(total=1000)
+        renderer = ProgressRenderer(tracker, stream=io.StringIO(), window=10.0)
+
+        renderer.rate(now=0.0)
+        tracker.success_count = 500
+        renderer.rate(now=10.0)
+        tracker.success_count = 520
+        renderer.rate(now=20.0)
+
+        # Only the last 10s (20 items) count, not the initial burst
+        assert renderer.rate(now=20.0) == pytest.approx(2.0)
+
+    def test_non_tty_writes_plain_lines(self):
+        """Test plain output has no ANSI codes or carriage returns."""
+        stream = io.StringIO()
+        tracker = ProgressTracker(total=4)
+        renderer = ProgressRenderer(tracker, stream=stream)
+        tracker.record(True)
+        tracker.record(False)
+
+        renderer.draw()
+
+        output = stream.getvalue()
+        assert "\r" not in output
+        assert "\033[" not in output
+        assert "2/4" in output
+        assert output.endswith("\n")
+
+    def test_echo_unstyles_off_a_tty(self):
+        """Test styled messages lose their ANSI codes unless on a TTY."""
+        message = click.style("ROLL001 failed", fg="red")
+
+        plain = io.StringIO()
+        ProgressRenderer(ProgressTracker(total=1), stream=plain).echo(message)
+
+        tty = io.StringIO()
+        tty.isatty = lambda: True
+        ProgressRenderer(ProgressTracker(total=1), stream=tty).echo(message)
+
+        assert plain.getvalue() == "ROLL001 failed\n"
+        assert tty.getvalue() == message + "\n"
+
+    def test_start_stop_draws_final_frame(self):
+        """Test stop draws the final state."""
+        stream = io.StringIO()
+        tracker = ProgressTracker(total=2)
+        renderer = ProgressRenderer(tracker, stream=stream)
+
+        async def run():
+            renderer.start()
+            tracker.record(True)
+            tracker.record(True)
+            await renderer.stop()
+
+        asyncio.run(run())
+
+        assert "100.0%" in stream.getvalue()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
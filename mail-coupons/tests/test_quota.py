@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""Tests for the rolling daily send quota."""
+
+import asyncio
+import os
+import tempfile
+
+import pytest
+from mail_coupons.database import Database
+from mail_coupons.email_sender import EmailResult, EmailSender, EmailStatus
+from mail_coupons.quota import WINDOW, DailyQuota, project_completion
+from mail_coupons.transports import NullTransport
+
+NOW = 1_800_000_000.0
+
+_sleep = asyncio.sleep
+
+
+class FakeClock:
+    """Clock that only moves when told to, or when asyncio.sleep is awaited."""
+
+    def __init__(self, now=NOW):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        self.now += seconds
+        await _sleep(0)
+
+
+@pytest.fixture
+def db():
+    """Tracking database in a temporary directory."""
+    with tempfile.TemporaryDirectory() as path:
+        yield Database(os.path.join(path, "test.db"))
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Fake clock that asyncio.sleep advances."""
+    clock = FakeClock()
+    monkeypatch.setattr(asyncio, "sleep", clock.sleep)
+    return clock
+
+
+class TestProjectCompletion:
+    """Test cases for the completion estimate."""
+
+    def test_fits_in_quota(self):
+        """Test a batch within the quota is limited by the rate only."""
+        assert project_completion({}, 1000, 10.0, 500, NOW) == NOW + 50
+
+    def test_waits_for_window_to_free(self):
+        """Test a full window delays sending until its oldest minute expires."""
+        minute = int((NOW - 3600) // 60)
+        finish = project_completion({minute: 100}, 100, 10.0, 50, NOW)
+
+        assert finish == minute * 60 + 60 + WINDOW + 5
+
+    def test_spans_several_days(self):
+        """Test a campaign of 2.5x the quota takes a little over two days."""
+        finish = project_completion({}, 1000, 100.0, 2500, NOW)
+
+        assert NOW + 2 * WINDOW < finish < NOW + 2 * WINDOW + 60
+
+    def test_nothing_remaining(self):
+        """Test an empty batch finishes now."""
+        assert project_completion({}, 10, 1.0, 0, NOW) == NOW
+
+    def test_invalid_limit(self):
+        """Test a non-positive quota raises."""
+        with pytest.raises(ValueError):
+            project_completion({}, 0, 1.0, 10, NOW)
+
+
+class TestSendCounts:
+    """Test cases for the per-minute counts in the database."""
+
+    def test_mark_email_sent_counts(self, db):
+        """Test every recorded send is counted for the quota."""
+        db.mark_email_sent("R1", "a@example.com", "A", True)
+        db.mark_email_sent("R2", "b@example.com", "B", False)
+
+        assert sum(db.send_counts(0).values()) == 2
+
+    def test_counts_are_shared_across_campaigns(self, db):
+        """Test sends from every campaign count towards one quota."""
+        db.mark_email_sent("R1", "a@example.com", "A", True)
+        Database(db.db_path, "reminder").mark_email_sent("R1", "a@example.com", "A", 1)
+
+        assert sum(db.send_counts(0).values()) == 2
+
+    def test_prune(self, db):
+        """Test minutes before the cutoff are dropped."""
+        db.record_sends(5, at=NOW - WINDOW - 120)
+        db.record_sends(3, at=NOW - 60)
+        db.prune_send_counts(NOW - WINDOW)
+
+        assert db.send_counts(0) == {int((NOW - 60) // 60): 3}
+
+
+class TestDailyQuota:
+    """Test cases for quota admission."""
+
+    def test_earlier_sends_count(self, db, clock):
+        """Test sends made by earlier runs use up the quota."""
+        db.record_sends(7, at=NOW - 3600)
+        db.record_sends(50, at=NOW - WINDOW - 120)
+        quota = DailyQuota(db, 10, clock=clock)
+        quota.refresh()
+
+        assert quota.used() == 7
+        assert quota.available() == 3
+
+    def test_pauses_until_window_frees(self, db, clock):
+        """Test acquire waits for the oldest minute to leave the window."""
+        db.record_sends(10, at=NOW - 3600)
+        quota = DailyQuota(db, 10, clock=clock)
+        quota.plan(5, 10.0)
+        free_at = quota.next_free_at()
+
+        asyncio.run(quota.acquire())
+
+        assert clock.now >= free_at
+        assert quota.pauses == 1
+        assert quota.in_flight == 1
+
+    def test_release(self, db, clock):
+        """Test only successful sends keep using the quota."""
+        quota = DailyQuota(db, 2, clock=clock)
+
+        async def take_two():
+            await quota.acquire()
+            await quota.acquire()
+
+        asyncio.run(take_two())
+        assert quota.available() == 0
+        quota.release(sent=True)
+        quota.release(sent=False)
+
+        assert quota.in_flight == 0
+        assert quota.used() == 1
+
+    def test_refresh_keeps_unwritten_local_sends(self, db, clock):
+        """Test sends not yet in the database survive a refresh."""
+        quota = DailyQuota(db, 10, clock=clock)
+        asyncio.run(quota.acquire())
+        quota.release(sent=True)
+        quota.refresh()
+
+        assert quota.used() == 1
+
+    def test_invalid_limit(self, db):
+        """Test a quota below one raises."""
+        with pytest.raises(ValueError):
+            DailyQuota(db, 0)
+
+
+class TestSenderQuota:
+    """Test cases for the quota in EmailSender's batch loop."""
+
+    def test_batch_stops_at_quota(self, db, clock):
+        """Test a batch larger than the quota pauses once it's used up."""
+        quota = DailyQuota(db, 3, clock=clock)
+        quota.plan(5, 100.0)
+        sender = EmailSender(
+            api_endpoint="https://api.example.com/coupons",
+            bearer_token="test_token_123",
+            smtp_host="unused",
+            smtp_port=0,
+            smtp_username="",
+            smtp_password="",
+            from_email="noreply@example.com",
+            rate_limit=100,
+            transport=NullTransport(),
+            quota=quota,
+        )
+        sent_at = []
+
+        def worker(recipient):
+            sent_at.append(clock.now)
+            return EmailResult(
+                recipient=recipient,
+                coupon_code="MLNCAAA000",
+                status=EmailStatus.SENT,
+                success=True,
+            )
+
+        recipients = [
+            {"roll_no": f"R{i}", "email": f"r{i}@example.com", "name": "x"}
+            for i in range(5)
+        ]
+        try:
+            stats = asyncio.run(
+                sender.process_recipients_batch(recipients, worker=worker)
+            )
+        finally:
+            sender.close()
+
+        # No 24 hours (less the minute granularity) hold more than 3 sends
+        assert stats.success_count == 5
+        assert quota.pauses >= 1
+        assert all(b - a > WINDOW - 60 for a, b in zip(sent_at, sent_at[3:]))
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""Tests for compact recipient records and the column store."""
+
+import dataclasses
+
+import pytest
+from mail_coupons.email_sender import EmailResult, EmailStatus
+from mail_coupons.records import Recipient, RecipientTable
+
+
+def recipient(roll_no="ROLL001", is_paid=True, **extra):
+    return Recipient(
+        roll_no=roll_no,
+        email=f"{roll_no.lower()}@example.com",
+        name=f"Student {roll_no}",
+        is_paid=is_paid,
+        extra=tuple(extra.items()),
+    )
+
+
+class TestRecipient:
+    """Test cases for the Recipient record."""
+
+    def test_reads_like_a_dict(self):
+        """Test item access, get, membership and dict() conversion."""
+        r = recipient(year="3")
+
+        assert r["roll_no"] == "ROLL001"
+        assert r["year"] == "3"
+        assert r.get("tier") is None
+        assert "year" in r and "tier" not in r
+        assert dict(r) == {
+            "roll_no": "ROLL001",
+            "email": "roll001@example.com",
+            "name": "Student ROLL001",
+            "is_paid": True,
+            "year": "3",
+        }
+        with pytest.raises(KeyError):
+            r["tier"]
+
+    def test_equals_matching_dict(self):
+        """Test a record compares equal to a dict with the same items."""
+        assert recipient() == dict(recipient())
+        assert recipient() != recipient("ROLL002")
+
+    def test_frozen_and_slotted(self):
+        """Test records can't be modified and carry no instance dict."""
+        r = recipient()
+
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            r.name = "Someone Else"
+        assert not hasattr(r, "__dict__")
+
+    def test_email_result_frozen_and_slotted(self):
+        """Test results are immutable slotted records too."""
+        result = EmailResult(recipient(), "MLNCAB12C3", EmailStatus.SENT, True)
+
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            result.success = False
+        assert not hasattr(result, "__dict__")
+
+
+class TestRecipientTable:
+    """Test cases for the column store."""
+
+    @pytest.fixture
+    def table(self):
+        """Three rows with an extra column."""
+        return RecipientTable.from_recipients(
+            [
+                recipient("ROLL001", True, year="3"),
+                recipient("ROLL002", False, year="1"),
+                recipient("RÖLL003", True, year="2"),
+            ],
+            extra_columns=["year"],
+        )
+
+    def test_rows_round_trip(self, table):
+        """Test rows come back as equal Recipient records."""
+        assert len(table) == 3
+        assert table[0] == recipient("ROLL001", True, year="3")
+        assert table[-1]["roll_no"] == "RÖLL003"
+        assert [r["is_paid"] for r in table] == [True, False, True]
+        with pytest.raises(IndexError):
+            table[3]
+
+    def test_column_access(self, table):
+        """Test whole columns are readable without building rows."""
+        assert list(table.column("year")) == ["3", "1", "2"]
+        assert list(table.column("is_paid")) == [True, False, True]
+
+    def test_exclude_filters_in_bulk(self, table):
+        """Test exclude keeps order and drops the listed values."""
+        unsent = table.exclude("roll_no", {"ROLL002"})
+
+        assert [r["roll_no"] for r in unsent] == ["ROLL001", "RÖLL003"]
+        assert unsent[1]["year"] == "2"
+        assert len(table) == 3
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""Tests for result sinks and run statistics."""
+
+import asyncio
+import csv
+import json
+import os
+import sqlite3
+import tempfile
+from unittest.mock import patch
+
+import pytest
+from mail_coupons.csv_reader import read_recipients
+from mail_coupons.email_sender import EmailSender, EmailResult, EmailStatus
+from mail_coupons.results import (
+    JsonlSink,
+    RetryCsvSink,
+    RunStats,
+    SqliteSink,
+    build_sink,
+)
+
+
+def make_result(roll_no: str, success: bool, time_ms: float = 100.0) -> EmailResult:
+    """Build an EmailResult for a synthetic recipient."""
+    return EmailResult(
+        recipient={
+            "roll_no": roll_no,
+            "email": f"{roll_no.lower()}@example.com",
+            "name": f"User {roll_no}",
+            "is_paid": True,
+        },
+        coupon_code="MLNCAB12C3",
+        status=EmailStatus.SENT if success else EmailStatus.FAILED,
+        success=success,
+        error_message="" if success else "boom",
+        processing_time_ms=time_ms,
+    )
+
+
+class TestRunStats:
+    """Test cases for incremental statistics."""
+
+    def test_stats_are_computed_incrementally(self):
+        """Test totals, average and success rate."""
+        stats = RunStats()
+        stats.add(make_result("ROLL001", True, 100.0))
+        stats.add(make_result("ROLL002", False, 300.0))
+
+        assert stats.total == 2
+        assert stats.success_count == 1
+        assert stats.fail_count == 1
+        assert stats.average_time_ms == pytest.approx(200.0)
+        assert stats.success_rate == pytest.approx(50.0)
+
+    def test_failures_are_capped(self):
+        """Test only max_failures failed results are retained."""
+        stats = RunStats(max_failures=2)
+        for i in range(5):
+            stats.add(make_result(f"ROLL{i:03}", False))
+
+        assert stats.fail_count == 5
+        assert len(stats.failures) == 2
+        assert stats.failures_truncated is True
+
+
+class TestSinks:
+    """Test cases for result sinks."""
+
+    @pytest.fixture
+    def temp_dir(self):
+        """Provide a temporary directory."""
+        with tempfile.TemporaryDirectory() as path:
+            yield path
+
+    def test_jsonl_sink_writes_one_line_per_result(self, temp_dir):
+        """Test JSONL sink output."""
+        path = os.path.join(temp_dir, "results.jsonl")
+        sink = JsonlSink(path)
+        sink.write(make_result("ROLL001", True))
+        sink.write(make_result("ROLL002", False))
+        sink.close()
+
+        with open(path) as f:
+            rows = [json.loads(line) for line in f]
+        assert [r["roll_no"] for r in rows] == ["ROLL001", "ROLL002"]
+        assert rows[1]["status"] == "failed"
+
+    def test_sqlite_sink_inserts_rows(self, temp_dir):
+        """Test SQLite sink output."""
+        path = os.path.join(temp_dir, "results.db")
+        sink = SqliteSink(path)
+        sink.write(make_result("ROLL001", True))
+        sink.close()
+
+        conn = sqlite3.connect(path)
+        rows = conn.execute("SELECT roll_no, success FROM email_results").fetchall()
+        conn.close()
+        assert rows == [("ROLL001", 1)]
+
+    def test_retry_csv_contains_only_failures(self, temp_dir):
+        """Test retry CSV is readable back as recipients."""
+        path = os.path.join(temp_dir, "retry.csv")
+        sink = RetryCsvSink(path)
+        sink.write(make_result("ROLL001", True))
+        sink.write(make_result("ROLL002", False))
+        sink.close()
+
+        with open(path, newline="") as f:
+            rows = list(csv.DictReader(f))
+        assert [r["roll_no"] for r in rows] == ["ROLL002"]
+        assert rows[0]["is_paid"] == "true"
+
+    def test_retry_csv_keeps_extra_columns(self, temp_dir):
+        """Test columns beyond the recipient fields are written back."""
+        path = os.path.join(temp_dir, "retry.csv")
+        result = make_result("ROLL002", False)
+        result.recipient.update(year="2", template="hackathon")
+        sink = RetryCsvSink(path)
+        sink.write(result)
+        sink.close()
+
+        recipients = read_recipients(path, ["year", "template"])
+        assert recipients[0]["year"] == "2"
+        assert recipients[0]["template"] == "hackathon"
+
+    def test_retry_csv_removes_previous_list(self, temp_dir):
+        """Test a clean run doesn't leave the last run's failures behind."""
+        path = os.path.join(temp_dir, "retry.csv")
+        with open(path, "w") as f:
+            f.write("roll_no,email,name,is_paid\nOLD,old@example.com,Old,false\n")
+
+        sink = RetryCsvSink(path)
+        sink.write(make_result("ROLL001", True))
+        sink.close()
+
+        assert not os.path.exists(path)
+
+    def test_retry_csv_not_created_without_failures(self, temp_dir):
+        """Test retry CSV is only created on the first failure."""
+        path = os.path.join(temp_dir, "retry.csv")
+        sink = RetryCsvSink(path)
+        sink.write(make_result("ROLL001", True))
+        sink.close()
+
+        assert not os.path.exists(path)
+
+    def test_build_sink_returns_none_when_unconfigured(self):
+        """Test no sink is built without configuration."""
+        assert build_sink() is None
+
+
+class TestBatchStreaming:
+    """Test cases for streaming batch processing."""
+
+    def test_batch_streams_results_to_sink(self):
+        """Test every result reaches the sink and stats are returned."""
+        sender = EmailSender(
+            api_endpoint="https://api.example.com/coupons",
+            bearer_token="token",
+            smtp_host="smtp.example.com",
+            smtp_port=587,
+            smtp_username="user",
+            smtp_password="pass",
+            from_email="noreply@example.com",
+            rate_limit=1000,
+        )
+        recipients = [make_result(f"ROLL{i:03}", True).recipient for i in range(20)]
+        received = []
+
+        def fake_process(recipient):
+            return make_result(recipient["roll_no"], recipient["roll_no"] != "ROLL005")
+
+        with patch.object(sender, "process_recipient_sync", side_effect=fake_process):
+            stats = asyncio.run(
+                sender.process_recipients_batch(
+                    recipients, sink=build_sink(callback=received.append)
+                )
+            )
+        sender.close()
+
+        assert stats.total == 20
+        assert stats.fail_count == 1
+        assert sorted(r.recipient["roll_no"] for r in received) == sorted(
+            r["roll_no"] for r in recipients
+        )
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
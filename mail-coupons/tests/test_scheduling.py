@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""Tests for priority scheduling."""
+
+import pytest
+from mail_coupons.scheduling import PriorityKey, PriorityScheduler, parse_priority
+
+
+class FakeClock:
+    """Manually advanced monotonic clock."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def recipient(roll_no, is_paid=False, **extra):
+    return {"roll_no": roll_no, "is_paid": is_paid, **extra}
+
+
+class TestParsePriority:
+    """Test cases for priority expressions."""
+
+    def test_default_direction_is_descending(self):
+        """Test bare columns sort true/larger first."""
+        assert parse_priority("is_paid, year:asc") == [
+            PriorityKey("is_paid", descending=True),
+            PriorityKey("year", descending=False),
+        ]
+
+    def test_none_keeps_csv_order(self):
+        """Test empty and 'none' specs disable scheduling."""
+        assert parse_priority("none") == []
+        assert parse_priority("") == []
+
+    def test_invalid_direction_rejected(self):
+        """Test an unknown direction raises."""
+        with pytest.raises(ValueError):
+            parse_priority("is_paid:sideways")
+
+
+class TestPriorityScheduler:
+    """Test cases for scheduling order."""
+
+    def test_paid_first_then_fifo(self):
+        """Test paid recipients go first, each class in arrival order."""
+        scheduler = PriorityScheduler(parse_priority("is_paid"))
+        scheduler.extend(
+            [
+                recipient("R1"),
+                recipient("R2", True),
+                recipient("R3"),
+                recipient("R4", True),
+            ]
+        )
+
+        assert [r["roll_no"] for r in scheduler.drain()] == ["R2", "R4", "R1", "R3"]
+        assert len(scheduler) == 0
+
+    def test_secondary_column_numeric_and_ascending(self):
+        """Test named columns compare numerically and honour :asc."""
+        scheduler = PriorityScheduler(parse_priority("is_paid,year:asc"))
+        scheduler.extend(
+            [
+                recipient("R1", True, year="10"),
+                recipient("R2", True, year="9"),
+                recipient("R3", False, year="1"),
+            ]
+        )
+
+        assert [r["roll_no"] for r in scheduler.drain()] == ["R2", "R1", "R3"]
+
+    def test_aging_promotes_waiting_class(self):
+        """Test a long-waiting low class overtakes fresh high-priority work."""
+        clock = FakeClock()
+        scheduler = PriorityScheduler(
+            parse_priority("is_paid"), aging_seconds=10, clock=clock
+        )
+        scheduler.push(recipient("FREE"))
+        clock.now = 5
+        scheduler.push(recipient("PAID1", True))
+
+        assert scheduler.pop()["roll_no"] == "PAID1"
+
+        clock.now = 20
+        scheduler.push(recipient("PAID2", True))
+
+        assert scheduler.pop()["roll_no"] == "FREE"
+        assert scheduler.pop()["roll_no"] == "PAID2"
+
+    def test_aging_disabled(self):
+        """Test aging_seconds=0 gives strict priority."""
+        clock = FakeClock()
+        scheduler = PriorityScheduler(
+            parse_priority("is_paid"), aging_seconds=0, clock=clock
+        )
+        scheduler.push(recipient("FREE"))
+        clock.now = 1000
+        scheduler.push(recipient("PAID", True))
+
+        assert [r["roll_no"] for r in scheduler.drain()] == ["PAID", "FREE"]
+
+    def test_drain_sees_items_pushed_while_consuming(self):
+        """Test the lazy drain picks up late high-priority arrivals."""
+        scheduler = PriorityScheduler(parse_priority("is_paid"))
+        scheduler.extend([recipient("R1"), recipient("R2")])
+
+        order = []
+        for item in scheduler.drain():
+            order.append(item["roll_no"])
+            if item["roll_no"] == "R1":
+                scheduler.push(recipient("VIP", True))
+
+        assert order == ["R1", "VIP", "R2"]
+
+    def test_emptied_classes_do_not_count_as_ranks(self):
+        """Test aging compares ranks among classes that still hold items."""
+        clock = FakeClock()
+        scheduler = PriorityScheduler(
+            parse_priority("year"), aging_seconds=10, clock=clock
+        )
+        scheduler.extend(recipient(f"Y{year}", year=year) for year in (4, 3, 2))
+        scheduler.push(recipient("OLD", year=1))
+        assert [scheduler.pop()["roll_no"] for _ in range(3)] == ["Y4", "Y3", "Y2"]
+
+        clock.now = 15
+        scheduler.push(recipient("NEW", year=5))
+
+        assert scheduler.pop()["roll_no"] == "OLD"
+        assert scheduler.pop()["roll_no"] == "NEW"
+
+    def test_many_distinct_classes(self):
+        """Test one class per row schedules in order without slowing down."""
+        clock = FakeClock()
+        scheduler = PriorityScheduler(
+            parse_priority("year"), aging_seconds=10, clock=clock
+        )
+        years = [(i * 7919) % 20000 for i in range(20000)]
+        for year in years:
+            scheduler.push(recipient(f"R{year}", year=year))
+            clock.now += 0.001
+
+        order = [int(r["year"]) for r in scheduler.drain()]
+
+        assert len(scheduler._classes) == 0
+        assert order[:3] == [19999, 19998, 19997]
+        assert sorted(order) == sorted(years)
+
+    def test_pop_empty_raises(self):
+        """Test popping an empty scheduler raises IndexError."""
+        with pytest.raises(IndexError):
+            PriorityScheduler([]).pop()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
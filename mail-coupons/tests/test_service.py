@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""Tests for serve mode: submission parsing, the send queue and the HTTP API."""
+
+import asyncio
+import json
+import logging
+import os
+import signal
+import socket
+import sys
+import tempfile
+import urllib.error
+import urllib.request
+
+import pytest
+from mail_coupons.database import Database
+from mail_coupons.email_sender import EmailResult, EmailStatus
+from mail_coupons.service import MAX_BATCH, SubmissionServer, parse_submission
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+
+@pytest.fixture
+def db():
+    """Tracking database in a temporary directory."""
+    with tempfile.TemporaryDirectory() as path:
+        yield Database(os.path.join(path, "test.db"))
+
+
+@pytest.fixture
+def server(db):
+    """Running SubmissionServer on a free port, requiring a token."""
+    server = SubmissionServer(db, port=0, token="secret")
+    server.start()
+    yield server
+    server.close()
+
+
+def recipient(roll_no, email=None, **fields):
+    """Submitted recipient fields."""
+    return {
+        "roll_no": roll_no,
+        "email": email or f"{roll_no.lower()}@example.com",
+        "name": "Student",
+        "is_paid": False,
+        **fields,
+    }
+
+
+def request(server, method, path, body=None, token="secret", raw=None):
+    """Call the server; returns (status, decoded JSON body)."""
+    host, port = server.address
+    data = raw if raw is not None else None if body is None else json.dumps(body)
+    req = urllib.request.Request(
+        f"http://{host}:{port}{path}",
+        method=method,
+        data=data.encode() if isinstance(data, str) else data,
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    try:
+        with urllib.request.urlopen(req, timeout=5) as response:
+            return response.status, json.load(response)
+    except urllib.error.HTTPError as e:
+        return e.code, json.load(e)
+
+
+class TestParseSubmission:
+    """Test cases for validating submitted recipients."""
+
+    def test_single_list_and_wrapped(self):
+        """Test an object, an array and a wrapped array are all accepted."""
+        one = recipient("R1", is_paid="yes")
+
+        assert parse_submission(json.dumps(one).encode()) == [{**one, "is_paid": True}]
+        assert len(parse_submission(json.dumps([one, one]).encode())) == 2
+        assert len(parse_submission(json.dumps({"recipients": [one]}).encode())) == 1
+
+    def test_fields_are_normalized(self):
+        """Test values are stripped and is_paid defaults to False."""
+        parsed = parse_submission(b'{"roll_no": 7, "email": " a@b.co ", "name": "A"}')
+
+        assert parsed == [
+            {"roll_no": "7", "email": "a@b.co", "name": "A", "is_paid": False}
+        ]
+
+    @pytest.mark.parametrize(
+        "body",
+        [
+            b"not json",
+            b"[]",
+            b"[1]",
+            json.dumps({"roll_no": "R1", "email": "a@b.co"}).encode(),
+            json.dumps(recipient("R1", email="nobody")).encode(),
+            json.dumps([recipient("R1")] * (MAX_BATCH + 1)).encode(),
+        ],
+    )
+    def test_invalid(self, body):
+        """Test malformed bodies and recipients raise."""
+        with pytest.raises(ValueError):
+            parse_submission(body)
+
+
+class TestSendQueue:
+    """Test cases for the send queue in the database."""
+
+    def test_claim_in_order_and_finish(self, db):
+        """Test entries are claimed oldest first and their outcome recorded."""
+        ids = db.enqueue([recipient("R1"), recipient("R2"), recipient("R3")])
+
+        claimed = db.claim_queued(2)
+        assert [r["queue_id"] for r in claimed] == ids[:2]
+        db.finish_queued(ids[0], "sent", coupon_code="MLNCAAA000")
+
+        entries = db.queue_entries(ids)
+        assert entries[ids[0]]["status"] == "sent"
+        assert entries[ids[0]]["coupon_code"] == "MLNCAAA000"
+        assert entries[ids[1]]["status"] == "sending"
+        assert db.queue_counts()["queued"] == 1
+
+    def test_already_sent_is_skipped(self, db):
+        """Test recipients this campaign already emailed aren't claimed."""
+        db.mark_email_sent("R1", "r1@example.com", "Student", False)
+        (queue_id,) = db.enqueue([recipient("R1")])
+
+        assert db.claim_queued(10) == []
+        assert db.queue_entries([queue_id])[queue_id]["status"] == "skipped"
+
+    def test_requeue_sending(self, db):
+        """Test entries a crashed run left sending go back in the queue."""
+        db.enqueue([recipient("R1")])
+        db.claim_queued(10)
+
+        assert db.requeue_sending() == 1
+        assert len(db.claim_queued(10)) == 1
+
+    def test_queue_is_per_campaign(self, db):
+        """Test each campaign only claims its own entries."""
+        Database(db.db_path, "reminder").enqueue([recipient("R1")])
+
+        assert db.claim_queued(10) == []
+
+
+class TestSubmissionServer:
+    """Test cases for the HTTP API."""
+
+    def test_submit_and_poll(self, server, db):
+        """Test a submission is queued, acknowledged and can be polled."""
+        woken = []
+        server.on_enqueue = lambda: woken.append(True)
+
+        status, body = request(
+            server, "POST", "/recipients", [recipient("R1"), recipient("R2")]
+        )
+        assert status == 202
+        assert woken == [True]
+
+        status, entry = request(server, "GET", f"/recipients/{body['ids'][0]}")
+        assert status == 200
+        assert entry["status"] == "queued"
+        assert entry["roll_no"] == "R1"
+
+        ids = ",".join(str(i) for i in body["ids"] + [999])
+        status, many = request(server, "GET", f"/recipients?ids={ids}")
+        assert [e["roll_no"] for e in many["recipients"]] == ["R1", "R2"]
+        assert many["missing"] == [999]
+
+    def test_requires_token(self, server):
+        """Test requests without the token are rejected."""
+        status, _ = request(server, "POST", "/recipients", recipient("R1"), token="x")
+
+        assert status == 401
+
+    def test_errors(self, server):
+        """Test bad submissions, unknown ids and paths get 4xx replies."""
+        assert request(server, "POST", "/recipients", raw="{")[0] == 400
+        assert request(server, "GET", "/recipients/999")[0] == 404
+        assert request(server, "GET", "/recipients?ids=a")[0] == 400
+        assert request(server, "GET", "/other")[0] == 404
+
+    def test_negative_content_length(self, server):
+        """Test a negative Content-Length is rejected instead of read to EOF."""
+        host, port = server.address
+        with socket.create_connection((host, port), timeout=5) as sock:
+            sock.sendall(
+                b"POST /recipients HTTP/1.1\r\nHost: x\r\n"
+                b"Authorization: Bearer secret\r\nContent-Length: -1\r\n\r\n"
+            )
+            # The connection stays open, so this only returns if the server replied
+            reply = sock.recv(1024)
+
+        assert reply.startswith(b"HTTP/1.1 400")
+
+    def test_health(self, server, db):
+        """Test /health counts entries by status."""
+        db.enqueue([recipient("R1")])
+
+        status, body = request(server, "GET", "/health")
+        assert status == 200
+        assert body["queue"]["queued"] == 1
+
+
+class TestServeQueue:
+    """Test cases for the serve send loop."""
+
+    def test_sends_submissions_until_stopped(self, make_sender, db):
+        """Test queued submissions are sent once and their status recorded."""
+        import main as main_module
+
+        server = SubmissionServer(db, port=0)
+        sender = make_sender(rate_limit=100)
+        sent = []
+
+        def worker(item):
+            sent.append(item["roll_no"])
+            return EmailResult(
+                recipient=item,
+                coupon_code="MLNCAAA000",
+                status=EmailStatus.SENT,
+                success=True,
+            )
+
+        sender.process_recipient_sync = worker
+        ids = db.enqueue([recipient("R0")])
+
+        async def submit():
+            await asyncio.sleep(0.1)
+            ids.extend(
+                server.submit(json.dumps([recipient("R1")] * 2).encode())[1]["ids"]
+            )
+            while db.queue_counts()["queued"] or db.queue_counts()["sending"]:
+                await asyncio.sleep(0.01)
+            os.kill(os.getpid(), signal.SIGTERM)
+
+        async def run():
+            submitter = asyncio.ensure_future(submit())
+            stats = await main_module.serve_queue(
+                logging.getLogger(__name__),
+                sender,
+                db,
+                server,
+                on_result=main_module.mark_sent_callback(db),
+                keepalive_interval=0.05,
+            )
+            await submitter
+            return stats
+
+        try:
+            stats = asyncio.run(run())
+        finally:
+            server.close()
+            sender.close()
+
+        entries = db.queue_entries(ids)
+        assert sent == ["R0", "R1"]
+        assert stats.success_count == 2
+        assert [entries[i]["status"] for i in ids] == ["sent", "sent", "skipped"]
+        assert db.email_already_sent("R1")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
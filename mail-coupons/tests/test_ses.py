@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""Tests for the SES bulk templated transport."""
+
+import json
+import threading
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+import pytest
+from mail_coupons.email_sender import EmailSender, EmailStatus
+from mail_coupons.ses import (
+    SesBulkTransport,
+    SesClient,
+    parse_ses_url,
+    sign_v4,
+)
+
+
+class SesStandIn(ThreadingHTTPServer):
+    """Local stand-in for the SES v2 template and bulk-send endpoints.
+
+    Addresses containing ``reject`` get MESSAGE_REJECTED; ``fail_next``
+    answers that many requests with 503.
+    """
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), SesStandInHandler)
+        self.templates = {}
+        self.requests = []
+        self.fail_next = 0
+        self.lock = threading.Lock()
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    @property
+    def endpoint(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    @property
+    def bulk_calls(self):
+        return [r for r in self.requests if r["path"].endswith("outbound-bulk-emails")]
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+class SesStandInHandler(BaseHTTPRequestHandler):
+    """Handle CreateEmailTemplate, UpdateEmailTemplate and SendBulkEmail."""
+
+    def respond(self, status: int, body: dict, error_type: str = ""):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        if error_type:
+            self.send_header("x-amzn-ErrorType", error_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def handle_request(self):
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        server = self.server
+        with server.lock:
+            server.requests.append(
+                {
+                    "method": self.command,
+                    "path": self.path,
+                    "authorization": self.headers.get("Authorization", ""),
+                    "payload": payload,
+                }
+            )
+            if server.fail_next:
+                server.fail_next -= 1
+                return self.respond(503, {"message": "unavailable"})
+
+            if self.command == "POST" and self.path == "/v2/email/templates":
+                name = payload["TemplateName"]
+                if name in server.templates:
+                    return self.respond(
+                        400, {"message": "exists"}, "AlreadyExistsException"
+                    )
+                server.templates[name] = payload["TemplateContent"]
+                return self.respond(200, {})
+
+            if self.command == "PUT" and self.path.startswith("/v2/email/templates/"):
+                name = self.path.rsplit("/", 1)[1]
+                server.templates[name] = payload["TemplateContent"]
+                return self.respond(200, {})
+
+        results = []
+        for entry in payload["BulkEmailEntries"]:
+            to_email = entry["Destination"]["ToAddresses"][0]
+            if "reject" in to_email:
+                results.append({"Status": "MESSAGE_REJECTED", "Error": "bad address"})
+            else:
+                results.append({"Status": "SUCCESS", "MessageId": f"id-{to_email}"})
+        self.respond(200, {"BulkEmailEntryResults": results})
+
+    do_POST = handle_request
+    do_PUT = handle_request
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def ses():
+    """Start a local SES stand-in."""
+    server = SesStandIn()
+    yield server
+    server.stop()
+
+
+def make_transport(ses, **kwargs) -> SesBulkTransport:
+    client = SesClient("ap-south-1", "AKIDTEST", "secret", endpoint=ses.endpoint)
+    transport = SesBulkTransport(client, template_name="coupon", **kwargs)
+    transport.set_message("Test <noreply@example.com>", "Hi", "<p>{{name}}</p>", "")
+    return transport
+
+
+def send_all(transport, addresses):
+    """Send to every address from its own thread; return outcomes in order."""
+    outcomes = [None] * len(addresses)
+
+    def worker(i, address):
+        outcomes[i] = transport.send(address, {"name": f"N{i}", "coupon_code": "C"})
+
+    threads = [
+        threading.Thread(target=worker, args=(i, a)) for i, a in enumerate(addresses)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+    return outcomes
+
+
+class TestSignV4:
+    """Test cases for request signing."""
+
+    def test_matches_aws_get_vanilla_vector(self):
+        """Test the signature matches the AWS SigV4 test suite's get-vanilla case."""
+        headers = sign_v4(
+            "GET",
+            "https://example.amazonaws.com/",
+            b"",
+            "us-east-1",
+            "AKIDEXAMPLE",
+            "wJalrXUtnFEMI/K7MDENG+bPxRfiCYEXAMPLEKEY",
+            service="service",
+            now=datetime(2015, 8, 30, 12, 36, tzinfo=timezone.utc),
+        )
+
+        assert headers["x-amz-date"] == "20150830T123600Z"
+        assert headers["authorization"] == (
+            "AWS4-HMAC-SHA256 "
+            "Credential=AKIDEXAMPLE/20150830/us-east-1/service/aws4_request, "
+            "SignedHeaders=host;x-amz-date, "
+            "Signature=5fa00fa31553b73ebf1942676e86291e8372ff2a2260956d9b8aae1d763fbf31"
+        )
+
+    def test_session_token_is_signed(self):
+        """Test temporary credentials add a signed security token header."""
+        headers = sign_v4(
+            "POST", "https://h/", b"{}", "r", "AK", "SK", session_token="TOKEN"
+        )
+
+        assert headers["x-amz-security-token"] == "TOKEN"
+        assert "x-amz-security-token" in headers["authorization"]
+
+
+class TestParseSesUrl:
+    """Test cases for ses:// transport specs."""
+
+    def test_defaults(self):
+        """Test a bare spec gets the region and 50-per-call batches."""
+        settings = parse_ses_url("ses://eu-west-1")
+
+        assert settings["region"] == "eu-west-1"
+        assert settings["batch_size"] == 50
+        assert settings["endpoint"] is None
+
+    def test_batch_over_limit_rejected(self):
+        """Test batches larger than SES allows are refused."""
+        with pytest.raises(ValueError):
+            parse_ses_url("ses://eu-west-1?batch=51")
+
+
+class TestSesBulkTransport:
+    """Test cases for batching against the local stand-in."""
+
+    def test_batches_up_to_fifty_per_call(self, ses):
+        """Test 120 concurrent sends go out in three bulk calls."""
+        transport = make_transport(ses, batch_wait=1.0)
+        try:
+            outcomes = send_all(transport, [f"u{i}@example.com" for i in range(120)])
+        finally:
+            transport.close()
+
+        assert outcomes == [(True, "", False)] * 120
+        assert sorted(
+            len(r["payload"]["BulkEmailEntries"]) for r in ses.bulk_calls
+        ) == [20, 50, 50]
+        assert ses.templates["coupon"]["Html"] == "<p>{{name}}</p>"
+        assert all(
+            r["authorization"].startswith("AWS4-HMAC-SHA256") for r in ses.requests
+        )
+
+    def test_partial_batch_sent_after_wait(self, ses):
+        """Test a lone send is flushed once batch_wait elapses."""
+        transport = make_transport(ses, batch_wait=0.05)
+        try:
+            assert transport.send("solo@example.com", {"name": "Solo"}) == (
+                True,
+                "",
+                False,
+            )
+        finally:
+            transport.close()
+
+        entry = ses.bulk_calls[0]["payload"]["BulkEmailEntries"][0]
+        replacement = entry["ReplacementEmailContent"]["ReplacementTemplate"]
+        assert json.loads(replacement["ReplacementTemplateData"]) == {"name": "Solo"}
+
+    def test_per_destination_status_mapped(self, ses):
+        """Test rejected destinations fail without failing the rest."""
+        transport = make_transport(ses, batch_wait=0.5)
+        try:
+            ok, rejected = send_all(transport, ["ok@example.com", "reject@example.com"])
+        finally:
+            transport.close()
+
+        assert ok == (True, "", False)
+        assert rejected[0] is False
+        assert "MESSAGE_REJECTED" in rejected[1]
+        assert rejected[2] is False
+
+    def test_service_error_is_an_outage(self, ses):
+        """Test a 503 fails the whole batch as an outage."""
+        ses.fail_next = 1
+        transport = make_transport(ses, batch_wait=0.05)
+        try:
+            success, error, outage = transport.send("a@example.com", {})
+        finally:
+            transport.close()
+
+        assert (success, outage) == (False, True)
+        assert "503" in error
+
+    def test_existing_template_is_updated(self, ses):
+        """Test an existing template is replaced rather than failing."""
+        ses.templates["coupon"] = {"Html": "old"}
+        transport = make_transport(ses)
+        transport.ensure_template()
+
+        assert ses.templates["coupon"]["Html"] == "<p>{{name}}</p>"
+        assert [r["method"] for r in ses.requests] == ["POST", "PUT"]
+
+
+class TestEmailSenderWithSes:
+    """Test cases for EmailSender routed through the SES transport."""
+
+    def test_recipients_sent_via_bulk_template(self, ses):
+        """Test coupon emails use the stored template and per-recipient data."""
+        transport = make_transport(ses, batch_wait=0.05)
+        sender = EmailSender(
+            api_endpoint="https://api.example.com/coupons",
+            bearer_token="test_token_123",
+            smtp_host="unused",
+            smtp_port=0,
+            smtp_username="",
+            smtp_password="",
+            from_email="noreply@example.com",
+            max_outage=5.0,
+            transport=transport,
+        )
+        try:
+            with patch.object(sender, "create_coupon", return_value=(True, "")):
+                result = sender.process_recipient_sync(
+                    {
+                        "roll_no": "R1",
+                        "email": "john@example.com",
+                        "name": "john doe",
+                        "is_paid": True,
+                    }
+                )
+        finally:
+            sender.close()
+
+        assert result.status == EmailStatus.SENT
+        assert "{{coupon_code}}" in ses.templates["coupon"]["Html"]
+        assert "{{name}}" in ses.templates["coupon"]["Text"]
+        payload = ses.bulk_calls[0]["payload"]
+        assert payload["FromEmailAddress"] == "Melinia'26 <noreply@example.com>"
+        data = json.loads(
+            payload["BulkEmailEntries"][0]["ReplacementEmailContent"][
+                "ReplacementTemplate"
+            ]["ReplacementTemplateData"]
+        )
+        assert data == {"name": "John Doe", "coupon_code": result.coupon_code}
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""Tests for the render spool."""
+
+import email
+import os
+import tempfile
+from unittest.mock import patch
+
+import pytest
+from mail_coupons.email_sender import EmailSender, EmailStatus
+from mail_coupons.spool import Spool
+
+
+RECIPIENT = {
+    "roll_no": "ROLL001",
+    "email": "student@example.com",
+    "name": "john doe",
+    "is_paid": True,
+}
+
+
+class TestSpool:
+    """Test cases for spool storage."""
+
+    @pytest.fixture
+    def spool(self):
+        """Create a spool in a temporary directory."""
+        with tempfile.TemporaryDirectory() as path:
+            yield Spool(path)
+
+    def test_add_writes_message_into_new(self, spool):
+        """Test added messages land in new/ and the index."""
+        entry = spool.add(RECIPIENT, "MLNCAB12C3", b"Subject: hi\r\n\r\nbody\r\n")
+
+        assert os.listdir(os.path.join(spool.path, "new")) == [f"{entry.id}.eml"]
+        assert os.listdir(os.path.join(spool.path, "tmp")) == []
+        assert [e.roll_no for e in spool.pending()] == ["ROLL001"]
+        assert spool.read(entry).startswith(b"Subject: hi")
+
+    def test_mark_sent_moves_to_cur(self, spool):
+        """Test delivered messages leave the pending set."""
+        entry = spool.add(RECIPIENT, "MLNCAB12C3", b"body")
+        spool.mark_sent(entry)
+
+        assert list(spool.pending()) == []
+        assert spool.count_pending() == 0
+        assert spool.rendered_roll_nos() == {"ROLL001"}
+
+
+class TestSpoolSender:
+    """Test cases for rendering into and sending from a spool."""
+
+    @pytest.fixture
+    def email_sender(self):
+        """Create EmailSender instance for testing."""
+        sender = EmailSender(
+            api_endpoint="https://api.example.com/coupons",
+            bearer_token="test_token_123",
+            smtp_host="smtp.example.com",
+            smtp_port=587,
+            smtp_username="user@example.com",
+            smtp_password="password123",
+            from_email="noreply@example.com",
+        )
+        yield sender
+        sender.close()
+
+    @pytest.fixture
+    def spool(self):
+        """Create a spool in a temporary directory."""
+        with tempfile.TemporaryDirectory() as path:
+            yield Spool(path)
+
+    def test_render_writes_coupon_bound_message(self, email_sender, spool):
+        """Test rendering creates the coupon and spools the full message."""
+        with patch.object(email_sender, "create_coupon", return_value=(True, "")):
+            result = email_sender.render_recipient_sync(RECIPIENT, spool)
+
+        assert result.success is True
+        assert result.status == EmailStatus.RENDERED
+        (entry,) = spool.pending()
+        assert entry.coupon_code == result.coupon_code
+
+        message = email.message_from_bytes(spool.read(entry))
+        assert message["To"] == "student@example.com"
+        assert result.coupon_code in message.get_payload(0).get_payload()
+
+    def test_render_skips_spool_when_coupon_fails(self, email_sender, spool):
+        """Test nothing is spooled if coupon creation fails."""
+        with patch.object(
+            email_sender, "create_coupon", return_value=(False, "API error")
+        ):
+            result = email_sender.render_recipient_sync(RECIPIENT, spool)
+
+        assert result.success is False
+        assert list(spool.pending()) == []
+
+    def test_send_spooled_delivers_raw_bytes(self, email_sender, spool):
+        """Test spooled bytes are sent unchanged and marked delivered."""
+        entry = spool.add(RECIPIENT, "MLNCAB12C3", b"raw message")
+
+        with patch.object(email_sender, "send_raw", return_value=(True, "")) as send:
+            result = email_sender.send_spooled_sync(entry, spool)
+
+        send.assert_called_once_with("student@example.com", b"raw message")
+        assert result.success is True
+        assert result.coupon_code == "MLNCAB12C3"
+        assert list(spool.pending()) == []
+
+    def test_send_spooled_failure_keeps_message(self, email_sender, spool):
+        """Test failed deliveries stay in new/ for the next run."""
+        entry = spool.add(RECIPIENT, "MLNCAB12C3", b"raw message")
+
+        with patch.object(email_sender, "send_raw", return_value=(False, "refused")):
+            result = email_sender.send_spooled_sync(entry, spool)
+
+        assert result.success is False
+        assert [e.id for e in spool.pending()] == [entry.id]
+
+    def test_send_raw_reuses_thread_connection(self, email_sender):
+        """Test consecutive raw sends share one SMTP session."""
+        with patch("mail_coupons.transports.smtplib.SMTP") as mock_smtp:
+            email_sender.send_raw("a@example.com", b"one")
+            email_sender.send_raw("b@example.com", b"two")
+
+        assert mock_smtp.call_count == 1
+        assert mock_smtp.return_value.sendmail.call_count == 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
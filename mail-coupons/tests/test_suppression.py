@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""Tests for the bounce/complaint suppression list."""
+
+import json
+import os
+import tempfile
+
+import pytest
+from mail_coupons.database import Database
+from mail_coupons.suppression import (
+    BloomFilter,
+    SuppressionList,
+    normalize_email,
+    parse_notification_file,
+)
+
+
+def bounce(*emails, bounce_type="Permanent"):
+    """SES bounce notification for ``emails``."""
+    return {
+        "notificationType": "Bounce",
+        "bounce": {
+            "bounceType": bounce_type,
+            "bounceSubType": "General",
+            "bouncedRecipients": [{"emailAddress": email} for email in emails],
+        },
+    }
+
+
+def complaint(*emails):
+    """SES complaint notification for ``emails``."""
+    return {
+        "eventType": "Complaint",
+        "complaint": {
+            "complaintFeedbackType": "abuse",
+            "complainedRecipients": [{"emailAddress": email} for email in emails],
+        },
+    }
+
+
+@pytest.fixture
+def tmp_dir():
+    """Temporary directory for databases and notification files."""
+    with tempfile.TemporaryDirectory() as path:
+        yield path
+
+
+@pytest.fixture
+def db(tmp_dir):
+    """Tracking database in a temporary directory."""
+    return Database(os.path.join(tmp_dir, "test.db"))
+
+
+class TestBloomFilter:
+    """Test cases for the Bloom filter."""
+
+    def test_no_false_negatives(self):
+        """Test every added item is found."""
+        bloom = BloomFilter.for_capacity(1000)
+        items = [f"user{i}@example.com" for i in range(1000)]
+        for item in items:
+            bloom.add(item)
+
+        assert all(item in bloom for item in items)
+
+    def test_false_positive_rate(self):
+        """Test the false positive rate stays near the configured rate."""
+        bloom = BloomFilter.for_capacity(1000, error_rate=0.01)
+        for i in range(1000):
+            bloom.add(f"user{i}@example.com")
+
+        false_positives = sum(f"other{i}@example.com" in bloom for i in range(10000))
+        assert false_positives < 250
+
+    def test_round_trip(self):
+        """Test a serialized filter answers the same."""
+        bloom = BloomFilter.for_capacity(10)
+        bloom.add("a@example.com")
+        loaded = BloomFilter.from_bytes(bloom.to_bytes())
+
+        assert "a@example.com" in loaded
+        assert (loaded.bits, loaded.hashes) == (bloom.bits, bloom.hashes)
+
+
+class TestParseNotifications:
+    """Test cases for reading SES notification files."""
+
+    def test_hard_bounces_and_complaints(self, tmp_dir):
+        """Test permanent bounces and complaints are kept, transient ones not."""
+        path = os.path.join(tmp_dir, "events.json")
+        with open(path, "w") as f:
+            json.dump(
+                [
+                    bounce("Gone@Example.com"),
+                    bounce("full@example.com", bounce_type="Transient"),
+                    complaint("angry@example.com"),
+                    {"notificationType": "Delivery"},
+                ],
+                f,
+            )
+
+        entries, count = parse_notification_file(path)
+
+        assert count == 4
+        assert entries == [
+            ("gone@example.com", "bounce:General"),
+            ("angry@example.com", "complaint:abuse"),
+        ]
+
+    def test_sns_envelopes_as_json_lines(self, tmp_dir):
+        """Test one SNS envelope per line is unwrapped."""
+        path = os.path.join(tmp_dir, "sns.jsonl")
+        with open(path, "w") as f:
+            for email in ("a@example.com", "b@example.com"):
+                envelope = {
+                    "Type": "Notification",
+                    "Message": json.dumps(bounce(email)),
+                }
+                f.write(json.dumps(envelope) + "\n")
+
+        entries, count = parse_notification_file(path)
+
+        assert count == 2
+        assert [email for email, _ in entries] == ["a@example.com", "b@example.com"]
+
+    def test_invalid_line_reports_position(self, tmp_dir):
+        """Test a malformed JSON Lines file names the bad line."""
+        path = os.path.join(tmp_dir, "bad.jsonl")
+        with open(path, "w") as f:
+            f.write(json.dumps(bounce("a@example.com")) + "\nnot json\n")
+
+        with pytest.raises(ValueError, match="bad.jsonl:2"):
+            parse_notification_file(path)
+
+    def test_normalize_email(self):
+        """Test display names, whitespace and case are normalized."""
+        assert (
+            normalize_email(" Jane <Jane.Doe@Example.COM> ") == "jane.doe@example.com"
+        )
+
+
+class TestSuppressionList:
+    """Test cases for suppression lookups."""
+
+    def test_empty_list_suppresses_nothing(self, db):
+        """Test an empty database suppresses no one."""
+        suppressed = SuppressionList(db)
+
+        assert "a@example.com" not in suppressed
+        assert len(suppressed) == 0
+
+    def test_added_addresses_are_suppressed(self, db):
+        """Test ingested addresses are found case-insensitively and persist."""
+        suppressed = SuppressionList(db)
+        added = suppressed.add(
+            [("gone@example.com", "bounce:General"), ("gone@example.com", "x")]
+        )
+
+        assert added == 1
+        assert "Gone@Example.com" in suppressed
+        assert "other@example.com" not in suppressed
+        assert suppressed.hits == 1
+        assert "gone@example.com" in SuppressionList(db)
+
+    def test_stale_filter_is_rebuilt(self, db):
+        """Test rows added without the filter are picked up on load."""
+        SuppressionList(db).add([("a@example.com", "bounce:General")])
+        db.add_suppressed_emails([("b@example.com", "complaint:abuse", "manual")])
+
+        suppressed = SuppressionList(db)
+
+        assert "b@example.com" in suppressed
+        assert db.get_suppression_filter()[0] == 2
+
+    def test_false_positive_confirmed_in_database(self, db):
+        """Test a filter hit that isn't in the table doesn't suppress."""
+        suppressed = SuppressionList(db)
+        suppressed.add([("a@example.com", "bounce:General")])
+        suppressed._filter.add("b@example.com")
+
+        assert "b@example.com" not in suppressed
+
+    def test_unsent_recipients_skip_suppressed(self, db):
+        """Test get_unsent_recipients drops sent and suppressed recipients."""
+        SuppressionList(db).add([("gone@example.com", "bounce:General")])
+        db.mark_email_sent("R1", "sent@example.com", "Sent", True)
+        recipients = [
+            {"roll_no": "R1", "email": "sent@example.com"},
+            {"roll_no": "R2", "email": "GONE@example.com"},
+            {"roll_no": "R3", "email": "ok@example.com"},
+        ]
+
+        unsent = db.get_unsent_recipients(recipients, SuppressionList(db))
+
+        assert [r["roll_no"] for r in unsent] == ["R3"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""Tests for named templates: parsing, the compiled-template cache and sending."""
+
+import logging
+import os
+import sys
+import tempfile
+from email import message_from_bytes
+
+import pytest
+from mail_coupons.email_sender import EmailStatus
+from mail_coupons.records import Recipient
+from mail_coupons.templates import TemplateRegistry, html_to_text, split_front_matter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+OUTREACH = """---
+subject: Hello {{name}}
+---
+<p>Dear {{name}},</p><p>Your code is {{coupon_code}}.</p>
+"""
+
+
+@pytest.fixture
+def templates_dir():
+    """Directory with an ``outreach`` and a ``hackathon`` template."""
+    with tempfile.TemporaryDirectory() as path:
+        write(path, "outreach.html", OUTREACH)
+        write(
+            path,
+            "hackathon.html",
+            "---\nsubject: Hackathon pass for {{team}}\n---\n<p>{{coupon_code}}</p>",
+        )
+        write(path, "hackathon.txt", "Team {{team}}: {{coupon_code}}\n")
+        yield path
+
+
+def write(directory, name, content, mtime=None):
+    """Write a file, optionally setting its mtime."""
+    path = os.path.join(directory, name)
+    with open(path, "w") as f:
+        f.write(content)
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+    return path
+
+
+def rendered(message):
+    """(subject, text, html) of a built message."""
+    msg = message_from_bytes(message.as_bytes())
+    text, html = (
+        part.get_payload(decode=True).decode()
+        for part in msg.walk()
+        if not part.is_multipart()
+    )
+    return msg["Subject"], text, html
+
+
+class TestParsing:
+    """Test cases for front matter and the derived text part."""
+
+    def test_split_front_matter(self):
+        """Test the subject is read and removed from the body."""
+        fields, body = split_front_matter(OUTREACH)
+
+        assert fields == {"subject": "Hello {{name}}"}
+        assert body.startswith("<p>Dear")
+
+    def test_no_front_matter(self):
+        """Test a template without front matter is all body."""
+        assert split_front_matter("<p>x</p>") == ({}, "<p>x</p>")
+
+    def test_html_to_text(self):
+        """Test tags go, blocks break lines and links keep their target."""
+        html = (
+            "<html><head><style>p{color:red}</style></head><body>"
+            "<p>Hi &amp; welcome</p>\n\n\n<p>Go <a href='x'>n</a>"
+            '<a href="https://melinia.in">Register</a></p></body></html>'
+        )
+
+        assert html_to_text(html) == (
+            "Hi & welcome\n\nGo nRegister (https://melinia.in)\n"
+        )
+
+
+class TestTemplateRegistry:
+    """Test cases for compiling and caching templates."""
+
+    def test_compiles_once(self, templates_dir):
+        """Test repeated lookups reuse the compiled template."""
+        registry = TemplateRegistry(templates_dir)
+
+        first = registry.get("outreach")
+        assert registry.get("outreach") is first
+        assert (registry.hits, registry.misses) == (1, 1)
+        assert first.subject.render({"name": "Ann"}) == "Hello Ann"
+        assert "Your code is {{coupon_code}}" in first.text.text
+
+    def test_recompiles_after_change(self, templates_dir):
+        """Test an edited template replaces its stale compiled version."""
+        registry = TemplateRegistry(templates_dir)
+        registry.get("outreach")
+
+        write(templates_dir, "outreach.html", "---\nsubject: New\n---\n<p>x</p>", 1)
+
+        assert registry.get("outreach").subject.text == "New"
+        assert registry.misses == 2
+        assert len(registry._cache) == 1
+
+    def test_text_file_overrides_derived_text(self, templates_dir):
+        """Test NAME.txt is used as the text part when present."""
+        template = TemplateRegistry(templates_dir).get("hackathon")
+
+        assert template.text.text == "Team {{team}}: {{coupon_code}}\n"
+
+    def test_lru_eviction(self, templates_dir):
+        """Test the least recently used template is evicted first."""
+        write(templates_dir, "remainder.html", "---\nsubject: R\n---\nr")
+        registry = TemplateRegistry(templates_dir, max_size=2)
+        registry.get("outreach")
+        registry.get("hackathon")
+        registry.get("outreach")
+        registry.get("remainder")
+
+        assert [key[0] for key in registry._cache] == [
+            registry.path("outreach"),
+            registry.path("remainder"),
+        ]
+
+    def test_names(self, templates_dir):
+        """Test the templates in the directory are listed."""
+        assert TemplateRegistry(templates_dir).names() == ["hackathon", "outreach"]
+
+    @pytest.mark.parametrize("name", ["missing", "../outreach", "a/b", ""])
+    def test_unknown_or_invalid_names(self, templates_dir, name):
+        """Test missing templates and path-like names raise ValueError."""
+        with pytest.raises(ValueError):
+            TemplateRegistry(templates_dir).get(name)
+
+    def test_subject_required(self, templates_dir):
+        """Test a template without a subject is rejected."""
+        write(templates_dir, "broken.html", "<p>no front matter</p>")
+
+        with pytest.raises(ValueError, match="no subject"):
+            TemplateRegistry(templates_dir).get("broken")
+
+
+class TestSenderTemplates:
+    """Test cases for per-recipient templates in EmailSender."""
+
+    def test_mixed_templates(self, make_sender, templates_dir):
+        """Test each row gets the template its column names, or the default."""
+        registry = TemplateRegistry(templates_dir)
+        sender = make_sender(
+            templates=registry, default_template="outreach", template_column="template"
+        )
+        rows = [
+            Recipient("R1", "a@x.com", "ann lee", False, (("template", ""),)),
+            Recipient(
+                "R2",
+                "b@x.com",
+                "bob",
+                True,
+                (("template", "hackathon"), ("team", "Null Ptr")),
+            ),
+        ]
+        try:
+            first, second = (
+                rendered(
+                    sender.build_message(
+                        r["email"], r["name"], "MLNCAAA000", sender.template_for(r), r
+                    )
+                )
+                for r in rows
+            )
+        finally:
+            sender.close()
+
+        assert first[0] == "Hello Ann Lee"
+        assert "Your code is MLNCAAA000." in first[1]
+        assert second[0] == "Hackathon pass for Null Ptr"
+        assert second[1] == "Team Null Ptr: MLNCAAA000\n"
+        assert registry.misses == 2
+
+    def test_values_escaped_in_html_only(self, make_sender, templates_dir):
+        """Test markup in values is escaped in the HTML part, kept elsewhere."""
+        write(
+            templates_dir,
+            "club.html",
+            "---\nsubject: {{name}} / {{club}}\n---\n"
+            '<p title="{{club}}">Hi {{name}} of {{club}}</p>',
+        )
+        write(templates_dir, "club.txt", "Hi {{name}} of {{club}}\n")
+        sender = make_sender(
+            templates=TemplateRegistry(templates_dir), default_template="club"
+        )
+        name = '<a href="x">Ann</a> & co'
+        row = Recipient(
+            "R1", "a@x.com", name, False, (("club", '<img src="y"> & "Z"'),)
+        )
+        try:
+            subject, text, body = rendered(
+                sender.build_message(
+                    row["email"], name, "MLNCAAA000", sender.template_for(row), row
+                )
+            )
+            builtin = rendered(sender.build_message("a@x.com", name, "MLNCAAA000"))[2]
+        finally:
+            sender.close()
+
+        assert subject == '<a Href="x">ann</a> & Co / <img src="y"> & "Z"'
+        assert text == 'Hi <a Href="x">ann</a> & Co of <img src="y"> & "Z"\n'
+        assert "<img" not in body and "<a " not in body
+        assert 'title="&lt;img src=&quot;y&quot;&gt; &amp; &quot;Z&quot;"' in body
+        assert "Hi &lt;a Href=&quot;x&quot;&gt;ann&lt;/a&gt; &amp; Co of" in body
+        assert "&lt;a Href=&quot;x&quot;&gt;ann&lt;/a&gt; &amp; Co" in builtin
+
+    def test_builtin_template_without_name(self, make_sender, templates_dir):
+        """Test rows without a template get the built-in coupon email."""
+        sender = make_sender(
+            templates=TemplateRegistry(templates_dir), template_column="template"
+        )
+        try:
+            template = sender.template_for({"template": ""})
+        finally:
+            sender.close()
+
+        assert template is sender.template
+
+    def test_missing_template_fails_without_coupon(self, make_sender, templates_dir):
+        """Test a row naming an unknown template fails before its coupon."""
+        sender = make_sender(
+            templates=TemplateRegistry(templates_dir), template_column="template"
+        )
+        coupons = []
+        sender.create_recipient_coupon = lambda r: coupons.append(r) or ("", True, "")
+        recipient = {
+            "roll_no": "R1",
+            "email": "a@x.com",
+            "name": "Ann",
+            "is_paid": False,
+            "template": "gone",
+        }
+        try:
+            result = sender.process_recipient_sync(recipient)
+        finally:
+            sender.close()
+
+        assert result.status == EmailStatus.FAILED
+        assert result.error_message.startswith("Template error")
+        assert coupons == []
+
+    def test_registry_required_for_named_templates(self, make_sender):
+        """Test naming a template without a registry is rejected."""
+        with pytest.raises(ValueError):
+            make_sender(default_template="outreach")
+
+
+class TestTemplateOptions:
+    """Test cases for preparing templates before a run."""
+
+    def test_templates_read_every_column(self, templates_dir):
+        """Test all CSV columns are kept when templates may fill them in."""
+        import main as main_module
+        from mail_coupons.scheduling import parse_priority
+
+        csv_path = write(
+            templates_dir, "r.csv", "roll_no,email,name,is_paid,team,template\n"
+        )
+        priority = parse_priority("is_paid,year")
+        registry = TemplateRegistry(templates_dir)
+
+        assert main_module.recipient_columns(priority, csv_path, None, None) == [
+            "is_paid",
+            "year",
+        ]
+        assert main_module.recipient_columns(
+            priority, csv_path, registry, "template"
+        ) == ["is_paid", "year", "roll_no", "email", "name", "team", "template"]
+
+    def test_exits_on_unknown_template(self, templates_dir):
+        """Test a row naming a missing template stops the run up front."""
+        import main as main_module
+
+        rows = [{"template": "outreach"}, {"template": "gone"}]
+        with pytest.raises(SystemExit):
+            main_module.load_templates(
+                logging.getLogger(__name__),
+                TemplateRegistry(templates_dir),
+                rows,
+                None,
+                "template",
+            )
+
+    def test_compiles_used_templates(self, templates_dir):
+        """Test every template the rows use is compiled ahead of sending."""
+        import main as main_module
+
+        registry = TemplateRegistry(templates_dir)
+        rows = [{"template": "hackathon"}, {"template": ""}]
+        main_module.load_templates(
+            logging.getLogger(__name__), registry, rows, "outreach", "template"
+        )
+
+        assert registry.misses == 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""Tests for the pluggable message transports."""
+
+import base64
+import json
+import mailbox
+import os
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+import pytest
+from mail_coupons.email_sender import EmailStatus
+from mail_coupons.spool import Spool
+from mail_coupons.transports import (
+    HttpTransport,
+    MaildirTransport,
+    MboxTransport,
+    NullTransport,
+    SmtpTransport,
+    Transport,
+    create_transport,
+    parse_transport,
+)
+
+RECIPIENT = {
+    "roll_no": "ROLL001",
+    "email": "student@example.com",
+    "name": "john doe",
+    "is_paid": True,
+}
+
+MESSAGE = b"Subject: hi\nTo: a@example.com\n\nFrom here on\n>From quoted\nbye\n"
+
+
+class RecordingTransport(Transport):
+    """Transport that keeps every message it is given."""
+
+    name = "recording"
+
+    def __init__(self):
+        self.messages = []
+
+    def send(self, to_email, message):
+        self.messages.append((to_email, message))
+        return True, "", False
+
+
+class ApiStandIn(ThreadingHTTPServer):
+    """Local HTTP API recording posted messages; ``status`` sets the reply."""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), ApiStandInHandler)
+        self.requests = []
+        self.status = 202
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/send"
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+class ApiStandInHandler(BaseHTTPRequestHandler):
+    """Accept POSTs of JSON messages."""
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.requests.append(
+            {"authorization": self.headers.get("Authorization"), "payload": payload}
+        )
+        self.send_response(self.server.status)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"no")
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def tmpdir_path():
+    """Temporary directory path."""
+    with tempfile.TemporaryDirectory() as path:
+        yield path
+
+
+@pytest.fixture
+def api():
+    """Start a local HTTP API stand-in."""
+    server = ApiStandIn()
+    yield server
+    server.stop()
+
+
+class TestParseTransport:
+    """Test cases for --transport specs."""
+
+    def test_smtp_is_default_transport(self):
+        """Test 'smtp' leaves the sender to build the relay transport."""
+        assert parse_transport("smtp") is None
+        assert create_transport("SMTP") is None
+
+    def test_file_transports_need_a_path(self):
+        """Test mbox and maildir specs without a path are rejected."""
+        with pytest.raises(ValueError):
+            parse_transport("mbox:")
+        with pytest.raises(ValueError):
+            parse_transport("maildir")
+
+    def test_unknown_scheme_rejected(self):
+        """Test unrecognized transports are rejected."""
+        with pytest.raises(ValueError, match="Unknown transport"):
+            parse_transport("carrier-pigeon:coop")
+
+    def test_creates_each_kind(self, tmpdir_path):
+        """Test each spec builds the matching transport."""
+        mbox_path = os.path.join(tmpdir_path, "out.mbox")
+        null = create_transport("null?delay=0.5")
+
+        assert isinstance(create_transport(f"mbox:{mbox_path}"), MboxTransport)
+        assert isinstance(create_transport(f"maildir:{tmpdir_path}"), MaildirTransport)
+        assert isinstance(
+            create_transport("https://api.example.com/v1/send"), HttpTransport
+        )
+        assert isinstance(null, NullTransport)
+        assert null.delay == 0.5
+
+
+class TestFileTransports:
+    """Test cases for the mbox and Maildir sinks."""
+
+    def test_mbox_appends_quoted_messages(self, tmpdir_path):
+        """Test messages are appended with From_ lines and mboxrd quoting."""
+        path = os.path.join(tmpdir_path, "out.mbox")
+        transport = MboxTransport(path)
+        transport.envelope_from = "noreply@example.com"
+        assert transport.send("a@example.com", MESSAGE) == (True, "", False)
+        assert transport.send("b@example.com", MESSAGE.replace(b"\n", b"\r\n"))[0]
+        transport.close()
+
+        messages = list(mailbox.mbox(path))
+        assert [m["Delivered-To"] for m in messages] == [
+            "a@example.com",
+            "b@example.com",
+        ]
+        assert messages[0].get_from().startswith("noreply@example.com ")
+        assert messages[0].get_payload() == ">From here on\n>>From quoted\nbye\n"
+        assert messages[1].get_payload() == messages[0].get_payload()
+
+    def test_maildir_delivers_into_new(self, tmpdir_path):
+        """Test each message becomes its own file in new/."""
+        transport = MaildirTransport(tmpdir_path)
+        for i in range(3):
+            assert transport.send(f"u{i}@example.com", MESSAGE) == (True, "", False)
+
+        assert os.listdir(os.path.join(tmpdir_path, "tmp")) == []
+        assert sorted(m["Delivered-To"] for m in mailbox.Maildir(tmpdir_path)) == [
+            "u0@example.com",
+            "u1@example.com",
+            "u2@example.com",
+        ]
+
+    def test_write_failure_is_an_outage(self, tmpdir_path):
+        """Test an unwritable destination pauses sending instead of rejecting."""
+        transport = MboxTransport(os.path.join(tmpdir_path, "missing", "out.mbox"))
+
+        success, error, outage = transport.send("a@example.com", MESSAGE)
+
+        assert (success, outage) == (False, True)
+        assert "Could not write" in error
+
+
+class TestHttpTransport:
+    """Test cases for posting messages to an HTTP API."""
+
+    def test_posts_raw_message(self, api):
+        """Test the message is posted base64-encoded with the envelope."""
+        transport = HttpTransport(api.url, token="secret")
+        transport.envelope_from = "noreply@example.com"
+
+        assert transport.send("a@example.com", MESSAGE) == (True, "", False)
+        request = api.requests[0]
+        assert request["authorization"] == "Bearer secret"
+        assert request["payload"]["from"] == "noreply@example.com"
+        assert request["payload"]["to"] == ["a@example.com"]
+        assert base64.b64decode(request["payload"]["raw"]) == MESSAGE
+
+    @pytest.mark.parametrize("status,outage", [(503, True), (429, True), (400, False)])
+    def test_error_statuses(self, api, status, outage):
+        """Test overload and server errors are outages, other 4xx rejections."""
+        api.status = status
+        success, error, is_outage = HttpTransport(api.url).send("a@example.com", b"x")
+
+        assert success is False
+        assert is_outage is outage
+        assert str(status) in error
+
+
+class TestEmailSenderTransports:
+    """Test cases for EmailSender delivering through a transport."""
+
+    def test_coupon_email_goes_through_transport(self, make_sender):
+        """Test the full pipeline hands a built message to the transport."""
+        transport = RecordingTransport()
+        sender = make_sender(transport=transport, max_outage=1.0)
+        try:
+            with patch.object(sender, "create_coupon", return_value=(True, "")):
+                result = sender.process_recipient_sync(RECIPIENT)
+        finally:
+            sender.close()
+
+        assert result.status == EmailStatus.SENT
+        [(to_email, message)] = transport.messages
+        assert to_email == "student@example.com"
+        assert result.coupon_code.encode() in message
+        assert b"John Doe" in message
+        assert transport.envelope_from == "noreply@example.com"
+
+    def test_failure_is_reported(self, make_sender):
+        """Test a rejected message fails the recipient."""
+        transport = RecordingTransport()
+        transport.send = lambda to_email, message: (False, "bounced", False)
+        sender = make_sender(transport=transport, max_outage=1.0)
+        try:
+            with patch.object(sender, "create_coupon", return_value=(True, "")):
+                result = sender.process_recipient_sync(RECIPIENT)
+        finally:
+            sender.close()
+
+        assert result.status == EmailStatus.FAILED
+        assert "bounced" in result.error_message
+
+    def test_defaults_to_smtp_relays(self, make_sender):
+        """Test senders without a transport use the SMTP relay transport."""
+        sender = make_sender(transport=None, max_outage=1.0)
+        sender.close()
+
+        assert isinstance(sender.transport, SmtpTransport)
+        assert sender.smtp_breaker.name == "SMTP relay"
+
+    def test_dry_run_leaves_spool_pending(self, make_sender, tmpdir_path):
+        """Test spooled messages sent to a dry-run sink stay in new/."""
+        spool = Spool(os.path.join(tmpdir_path, "spool"))
+        entry = spool.add(RECIPIENT, "MLNCAB12C3", MESSAGE)
+        transport = NullTransport()
+        sender = make_sender(transport=transport, max_outage=1.0)
+        try:
+            result = sender.send_spooled_sync(entry, spool)
+        finally:
+            sender.close()
+
+        assert result.success is True
+        assert transport.sent == 1
+        assert transport.bytes_sent == len(MESSAGE)
+        assert [e.id for e in spool.pending()] == [entry.id]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""Tests for watch mode: file watching, keep-alives and the daemon loop."""
+
+import asyncio
+import logging
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+from unittest.mock import MagicMock
+
+import pytest
+from mail_coupons import watch as watch_module
+from mail_coupons.database import Database
+from mail_coupons.email_sender import EmailResult, EmailStatus
+from mail_coupons.relays import SmtpRelay
+from mail_coupons.transports import SmtpTransport
+from mail_coupons.watch import FileWatcher, file_stamp
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+HEADER = "roll_no,email,name,is_paid\n"
+
+
+@pytest.fixture
+def tmp_dir():
+    """Temporary directory."""
+    with tempfile.TemporaryDirectory() as path:
+        yield path
+
+
+@pytest.fixture
+def csv_path(tmp_dir):
+    """CSV file with a header and one row."""
+    path = os.path.join(tmp_dir, "registrations.csv")
+    with open(path, "w") as f:
+        f.write(HEADER + "R0,r0@example.com,Ann,true\n")
+    return path
+
+
+def append(path, text):
+    """Append ``text`` to a file."""
+    with open(path, "a") as f:
+        f.write(text)
+
+
+async def append_later(path, text, delay=0.05):
+    """Append ``text`` to a file after ``delay`` seconds."""
+    await asyncio.sleep(delay)
+    append(path, text)
+
+
+def make_watcher(path, use_inotify):
+    """FileWatcher in the requested mode, skipping if inotify is missing."""
+    watcher = FileWatcher(path, poll_interval=0.02, use_inotify=use_inotify)
+    if use_inotify and watcher.mode != "inotify":
+        watcher.close()
+        pytest.skip("inotify not available")
+    return watcher
+
+
+class TestFileWatcher:
+    """Test cases for FileWatcher in both modes."""
+
+    @pytest.mark.parametrize("use_inotify", [True, False])
+    def test_detects_append(self, csv_path, use_inotify):
+        """Test an append wakes the watcher and a quiet file times out."""
+        watcher = make_watcher(csv_path, use_inotify)
+
+        async def run():
+            writer = asyncio.ensure_future(append_later(csv_path, "R1,b@x.com,B,0\n"))
+            changed = await watcher.wait(5)
+            await writer
+            return changed, await watcher.wait(0.1)
+
+        try:
+            assert asyncio.run(run()) == (True, False)
+        finally:
+            watcher.close()
+
+    @pytest.mark.parametrize("use_inotify", [True, False])
+    def test_detects_replacement(self, csv_path, tmp_dir, use_inotify):
+        """Test a new file renamed over the watched one counts as a change."""
+        watcher = make_watcher(csv_path, use_inotify)
+        replacement = os.path.join(tmp_dir, "export.tmp")
+        with open(replacement, "w") as f:
+            f.write(HEADER)
+        os.replace(replacement, csv_path)
+
+        try:
+            assert asyncio.run(watcher.wait(5))
+        finally:
+            watcher.close()
+
+    def test_ignores_other_files(self, csv_path, tmp_dir):
+        """Test writes to other files in the directory don't wake inotify."""
+        watcher = make_watcher(csv_path, use_inotify=True)
+        append(os.path.join(tmp_dir, "other.csv"), "x\n")
+
+        try:
+            assert asyncio.run(watcher.wait(0.1)) is False
+        finally:
+            watcher.close()
+
+    def test_falls_back_to_polling(self, csv_path, monkeypatch):
+        """Test the watcher polls when inotify can't be set up."""
+
+        def unavailable():
+            raise OSError("no inotify")
+
+        monkeypatch.setattr(watch_module, "Inotify", unavailable)
+        watcher = FileWatcher(csv_path)
+
+        assert watcher.mode == "polling"
+
+    def test_file_stamp_missing(self, tmp_dir):
+        """Test a missing file has no stamp."""
+        assert file_stamp(os.path.join(tmp_dir, "missing.csv")) is None
+
+    def test_ctypes_loaded_only_by_watchers(self):
+        """Test importing the CLI doesn't load ctypes for inotify."""
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        code = "import sys, main; print('ctypes' in sys.modules)"
+        env = {**os.environ, "PYTHONPATH": os.path.join(root, "src")}
+        output = subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=root,
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+
+        assert output.strip() == "False"
+
+
+class FakeSmtp:
+    """SMTP session that counts NOOPs, or fails them."""
+
+    def __init__(self, alive=True):
+        self.alive = alive
+        self.noops = 0
+        self.closed = False
+
+    def noop(self):
+        if not self.alive:
+            raise OSError("connection reset")
+        self.noops += 1
+
+    def close(self):
+        self.closed = True
+
+
+class TestKeepAlive:
+    """Test cases for keeping idle connections and the token warm."""
+
+    def test_smtp_noops_and_drops_dead_sessions(self):
+        """Test live sessions get a NOOP and dead ones are discarded."""
+        transport = SmtpTransport([SmtpRelay("localhost", 25)])
+        live, dead = FakeSmtp(), FakeSmtp(alive=False)
+        transport._connections.extend([live, dead])
+
+        transport.keep_alive()
+
+        assert live.noops == 1
+        assert dead.closed
+        assert transport._connections == [live]
+
+    def test_sender_refreshes_token(self, make_sender):
+        """Test the sender checks its token while idle."""
+        token_provider = MagicMock()
+        sender = make_sender(token_provider=token_provider)
+        try:
+            sender.keep_alive()
+        finally:
+            sender.close()
+
+        token_provider.get_token.assert_called_once()
+
+
+class TestWatchCsv:
+    """Test cases for the watch daemon loop."""
+
+    def test_sends_appended_rows_until_stopped(self, make_sender, csv_path, tmp_dir):
+        """Test existing and appended rows are sent once and progress saved."""
+        import main as main_module
+
+        db = Database(os.path.join(tmp_dir, "test.db"))
+        sender = make_sender(rate_limit=100)
+        sent = []
+
+        def worker(recipient):
+            sent.append(recipient["roll_no"])
+            return EmailResult(
+                recipient=recipient,
+                coupon_code="MLNCAAA000",
+                status=EmailStatus.SENT,
+                success=True,
+            )
+
+        sender.process_recipient_sync = worker
+        watcher = FileWatcher(csv_path, poll_interval=0.02)
+
+        async def feed():
+            await asyncio.sleep(0.2)
+            append(csv_path, "R1,r1@example.com,Bob,false\n")
+            await asyncio.sleep(0.2)
+            append(csv_path, "R2,r2@example.com,Cy,false\nR3,r3@exam")
+            await asyncio.sleep(0.2)
+            os.kill(os.getpid(), signal.SIGTERM)
+
+        async def run():
+            feeder = asyncio.ensure_future(feed())
+            stats = await main_module.watch_csv(
+                logging.getLogger(__name__),
+                sender,
+                db,
+                watcher,
+                csv_path,
+                on_result=main_module.mark_sent_callback(db),
+                keepalive_interval=0.05,
+            )
+            await feeder
+            return stats
+
+        try:
+            stats = asyncio.run(run())
+        finally:
+            watcher.close()
+            sender.close()
+
+        # The half-written row waits for its newline
+        assert sent == ["R0", "R1", "R2"]
+        assert stats.success_count == 3
+        assert db.get_csv_checkpoint(os.path.abspath(csv_path))["row_count"] == 3
+        assert db.email_already_sent("R2")
+
+    def test_failed_rows_wait_for_retry_interval(self, make_sender, csv_path, tmp_dir):
+        """Test rows appended in the retry window don't resend failed ones."""
+        import main as main_module
+
+        db = Database(os.path.join(tmp_dir, "test.db"))
+        sender = make_sender(rate_limit=100)
+        sent = []
+
+        def worker(recipient):
+            sent.append(recipient["roll_no"])
+            # R0 has a bad address and keeps failing
+            success = recipient["roll_no"] != "R0"
+            return EmailResult(
+                recipient=recipient,
+                coupon_code="MLNCAAA000",
+                status=EmailStatus.SENT if success else EmailStatus.FAILED,
+                success=success,
+            )
+
+        sender.process_recipient_sync = worker
+        watcher = FileWatcher(csv_path, poll_interval=0.02)
+
+        async def feed():
+            await asyncio.sleep(0.15)
+            append(csv_path, "R1,r1@example.com,Bob,false\n")
+            await asyncio.sleep(0.15)
+            append(csv_path, "R2,r2@example.com,Cy,false\n")
+            await asyncio.sleep(0.6)
+            os.kill(os.getpid(), signal.SIGTERM)
+
+        async def run():
+            feeder = asyncio.ensure_future(feed())
+            stats = await main_module.watch_csv(
+                logging.getLogger(__name__),
+                sender,
+                db,
+                watcher,
+                csv_path,
+                on_result=main_module.mark_sent_callback(db),
+                keepalive_interval=0.05,
+                retry_interval=0.6,
+            )
+            await feeder
+            return stats
+
+        try:
+            stats = asyncio.run(run())
+        finally:
+            watcher.close()
+            sender.close()
+
+        # R0 is retried once, after the interval, not on each append
+        assert sent == ["R0", "R1", "R2", "R0"]
+        assert stats.fail_count == 2
+        assert db.get_csv_checkpoint(os.path.abspath(csv_path)) is None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])